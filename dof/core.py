@@ -23,13 +23,353 @@ Notes
 #               understand our code and the way of our thinking.
 
 
+from asyncio import get_running_loop
+from collections import OrderedDict, deque
+from functools import partial
 from json import loads as json_loads
 from pickle import dumps as pickle_dumps, loads as pickle_loads
+from sys import getsizeof
+from threading import Lock, RLock
+from weakref import WeakMethod
+try:
+    from os import register_at_fork
+except ImportError:
+    register_at_fork = None
 
 from .datamodel import ContentForm, JSONDescription, JSONRoot
 from .datamodel import create_json_dict, get_content
 from .error import DofError
-from .storage import DofObjectHandler, DofSerializable
+from .storage import AsyncDofObjectHandler, BinaryView, DofObjectHandler
+from .storage import DofSerializable
+
+
+class PayloadManager:
+    """
+    Process-wide memory budget of DofObject payloads
+    ================================================
+
+    Attributes
+    ----------
+    max_bytes : int | NoneType
+        Size limit of the tracked payloads in bytes, None if there is no limit.
+    stats : dict (read-only)
+        Get the occupancy and the eviction counters.
+
+    Notes
+    -----
+    I.
+        Only payloads that are stored at a location of a handler are tracked,
+        since only they can be loaded again. The owners are held by weak
+        references, so tracking keeps no DofObject alive.
+    II.
+        When the tracked payloads exceed max_bytes, the least recently used
+        payloads are evicted until the budget is kept. The payload that is
+        tracked or touched last is never evicted, even if it alone exceeds the
+        budget. An owner may refuse the eviction (eg. because its payload has
+        been changed since it was stored), then it is just not tracked anymore.
+        Sizes are approximate, see payload_size().
+    III.
+        If max_bytes is None, nothing is tracked and the calls return at once.
+    """
+
+    # Keys of the counters of the stats property, tracked, bytes and max_bytes
+    # are added to them as occupancy values.
+    STAT_KEYS = ['peak_bytes', 'evictions', 'evicted_bytes', 'reloads']
+
+
+    def __init__(self, max_bytes : int = None):
+        """
+        Initialize an instance of the object
+        ====================================
+
+        Parameters
+        ----------
+        max_bytes : int, optional (None if omitted)
+            Size limit of the tracked payloads in bytes. If None, payloads are
+            not tracked.
+
+        Raises
+        ------
+        DofError
+            When max_bytes is negative.
+        """
+
+        if max_bytes is not None and max_bytes < 0:
+            raise DofError('PayloadManager.init(): max_bytes must not be ' +
+                           'negative.')
+        self.__max_bytes = max_bytes
+        self.__entries = OrderedDict()
+        self.__size = 0
+        self.__dead = deque()
+        self.__stats = dict.fromkeys(PayloadManager.STAT_KEYS, 0)
+        self.__lock = RLock()
+
+
+    def after_fork(self):
+        """
+        Reinitialize the lock in a forked child process
+        ===============================================
+        """
+
+        self.__lock = RLock()
+
+
+    def forget(self, owner : any):
+        """
+        Stop tracking the payload of an owner
+        =====================================
+
+        Parameters
+        ----------
+        owner : any
+            Owner of the payload, eg. a DofObject.
+        """
+
+        if self.__max_bytes is None:
+            return
+        with self.__lock:
+            _entry = self.__entries.pop(id(owner), None)
+            if _entry is not None:
+                self.__size -= _entry[1]
+
+
+    @property
+    def max_bytes(self) -> int:
+        """
+        Get the size limit of the tracked payloads
+        ==========================================
+
+        Returns
+        -------
+        int | NoneType
+            Size limit in bytes, None if payloads are not tracked.
+        """
+
+        return self.__max_bytes
+
+
+    @max_bytes.setter
+    def max_bytes(self, new_value : int):
+        """
+        Set the size limit of the tracked payloads
+        ==========================================
+
+        Parameters
+        ----------
+        new_value : int | NoneType
+            New size limit in bytes, None to stop tracking.
+
+        Raises
+        ------
+        DofError
+            When the new value is negative.
+
+        Notes
+        -----
+            Payloads over the new limit are evicted at once. If the new value is
+            None, the tracked payloads are dropped from the manager, but kept
+            in the memory.
+        """
+
+        if new_value is not None and new_value < 0:
+            raise DofError('PayloadManager.max_bytes: size limit must not be ' +
+                           'negative.')
+        with self.__lock:
+            self.__max_bytes = new_value
+            if new_value is None:
+                self.__entries = OrderedDict()
+                self.__size = 0
+                self.__dead.clear()
+            else:
+                self.__evict_over_budget(None)
+
+
+    @staticmethod
+    def payload_size(data : any) -> int:
+        """
+        Get the approximate size of a payload
+        =====================================
+
+        Parameters
+        ----------
+        data : any
+            The payload.
+
+        Returns
+        -------
+        int
+            Size of the payload in bytes.
+
+        Notes
+        -----
+            Bytes-like objects and objects with an nbytes attribute (eg. numpy
+            arrays) count with the size of their buffer. Lists, tuples, sets
+            and dicts count with their own size and the size of their items,
+            but not deeper. Any other object counts with sys.getsizeof().
+        """
+
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            return memoryview(data).nbytes
+        _nbytes = getattr(data, 'nbytes', None)
+        if isinstance(_nbytes, int):
+            return _nbytes
+        result = getsizeof(data)
+        if isinstance(data, dict):
+            data = list(data.keys()) + list(data.values())
+        if isinstance(data, (list, tuple, set, frozenset)):
+            for item in data:
+                if isinstance(item, (bytes, bytearray, memoryview)):
+                    result += memoryview(item).nbytes
+                else:
+                    result += getattr(item, 'nbytes', None) or getsizeof(item)
+        return result
+
+
+    def reset_stats(self):
+        """
+        Reset the eviction counters
+        ===========================
+        """
+
+        with self.__lock:
+            self.__stats = dict.fromkeys(PayloadManager.STAT_KEYS, 0)
+            self.__stats['peak_bytes'] = self.__size
+
+
+    @property
+    def stats(self) -> dict:
+        """
+        Get the occupancy and the eviction counters
+        ===========================================
+
+        Returns
+        -------
+        dict
+            Copy of the counters, the keys are in STAT_KEYS, and the number of
+            tracked payloads (tracked), their size (bytes) and max_bytes.
+        """
+
+        with self.__lock:
+            self.__purge()
+            result = dict(self.__stats)
+            result['tracked'] = len(self.__entries)
+            result['bytes'] = self.__size
+            result['max_bytes'] = self.__max_bytes
+        return result
+
+
+    def touch(self, owner : any):
+        """
+        Mark the payload of an owner as the most recently used
+        ======================================================
+
+        Parameters
+        ----------
+        owner : any
+            Owner of the payload, eg. a DofObject.
+        """
+
+        if self.__max_bytes is None:
+            return
+        with self.__lock:
+            if id(owner) in self.__entries:
+                self.__entries.move_to_end(id(owner))
+
+
+    def track(self, owner : any, data : any, evict : any,
+              reloaded : bool = False):
+        """
+        Track the payload of an owner
+        =============================
+
+        Parameters
+        ----------
+        owner : any
+            Owner of the payload, eg. a DofObject.
+        data : any
+            The payload.
+        evict : bound method
+            Method of the owner to drop its payload from the memory. It returns
+            whether the payload has been dropped.
+        reloaded : bool, optional (False if omitted)
+            Whether the payload is loaded again after an eviction.
+
+        Notes
+        -----
+            The payload becomes the most recently used one, and the least
+            recently used payloads are evicted if the budget is exceeded. If
+            data is None, the owner is forgotten.
+        """
+
+        if self.__max_bytes is None:
+            return
+        if data is None:
+            self.forget(owner)
+            return
+        _key = id(owner)
+        _size = PayloadManager.payload_size(data)
+        _evict = WeakMethod(evict, lambda ref: self.__dead.append((_key, ref)))
+        with self.__lock:
+            self.__purge()
+            _entry = self.__entries.pop(_key, None)
+            if _entry is not None:
+                self.__size -= _entry[1]
+            self.__entries[_key] = (_evict, _size)
+            self.__size += _size
+            if reloaded:
+                self.__stats['reloads'] += 1
+            self.__stats['peak_bytes'] = max(self.__stats['peak_bytes'],
+                                             self.__size)
+            self.__evict_over_budget(_key)
+
+
+    def __evict_over_budget(self, keep : int):
+        """
+        Evict the least recently used payloads over the budget
+        ======================================================
+
+        Parameters
+        ----------
+        keep : int | NoneType
+            Key of the payload that must not be evicted, or None.
+
+        Notes
+        -----
+            The lock must be held by the caller.
+        """
+
+        while self.__size > self.__max_bytes and len(self.__entries) > 0:
+            _key, (_evict, _size) = self.__entries.popitem(last=False)
+            if _key == keep:
+                self.__entries[_key] = (_evict, _size)
+                if len(self.__entries) == 1:
+                    break
+                continue
+            self.__size -= _size
+            _method = _evict()
+            if _method is not None and _method():
+                self.__stats['evictions'] += 1
+                self.__stats['evicted_bytes'] += _size
+
+
+    def __purge(self):
+        """
+        Drop the entries of the owners that do not exist anymore
+        ========================================================
+
+        Notes
+        -----
+            The lock must be held by the caller. An entry is dropped only if it
+            still holds the dead reference, since the id of a dead owner can be
+            reused by a new one.
+        """
+
+        while len(self.__dead) > 0:
+            _key, _ref = self.__dead.popleft()
+            _entry = self.__entries.get(_key)
+            if _entry is not None and _entry[0] is _ref:
+                del self.__entries[_key]
+                self.__size -= _entry[1]
 
 
 class DofObject(DofSerializable):
@@ -40,16 +380,20 @@ class DofObject(DofSerializable):
     Attributes
     ----------
     data : any
-        Data from memory.
+        Data from memory, loaded on first access if lazy is True.
 
     is_binary : bool
         Whether the DofObject is a wrapper of a real binary data (eg. document)
+    is_dirty : bool
+        Whether data have been changed since it was last loaded or saved.
     is_in_memory : bool (read-only)
         Whether data is in the memory or not.
     is_relative_local : bool (read-only)
         Local path's relativity state.
     is_relative_online : bool (read-only)
         Online link's relativity state.
+    lazy : bool
+        Whether data is loaded on the first access.
     local_handler_id : int
         Id of local handler.
     local_path : str (read-only)
@@ -58,6 +402,20 @@ class DofObject(DofSerializable):
         Id of online handler.
     online_link : str (read-only)
         Online link of the data.
+
+    Notes
+    -----
+    I.
+        The handler registry is copy-on-write: add_handler(), delete_handler()
+        and set_default_handler() build a new registry under a lock and swap it
+        in, so get_handler() and the other readers never lock and always see a
+        consistent registry. In a forked child process after_fork() (called
+        automatically where os.register_at_fork() is available) reinitializes
+        the lock and the registered handlers.
+    II.
+        Payloads loaded from or saved to the own location of an instance are
+        tracked by a process-wide PayloadManager once set_memory_budget() is
+        called. Evicted payloads are loaded again on the next access of data.
     """
 
 
@@ -69,16 +427,28 @@ class DofObject(DofSerializable):
     #         The amount of attributes is needed because of the functionality.
 
 
+    # Instance attributes are kept in slots instead of a __dict__, since
+    # datasets may hold millions of instances. __weakref__ is needed by the
+    # memory budget.
+    __slots__ = ('__data', '__local_path', '__is_relative_local',
+                 '__local_handler_id', '__online_link', '__is_relative_online',
+                 '__online_handler_id', '__is_binary', '__lazy', '__evicted',
+                 '__is_dirty', '__weakref__')
+
+
     __local_handlers = {}
     __online_handlers = {}
     __local_default = -1
     __online_default = -1
+    __registry_lock = Lock()
+    __payload_manager = PayloadManager()
 
 
     def __init__(self, data : any = None, local_path : str = '',
                  is_relative_local : bool = True, local_handler_id : int = -1,
                  online_link : str = '', is_relative_online : bool = True,
-                 online_handler_id : int = -1, is_binary : bool = False):
+                 online_handler_id : int = -1, is_binary : bool = False,
+                 lazy : bool = False):
         """
         Initialize an instance of the object
         ====================================
@@ -101,12 +471,21 @@ class DofObject(DofSerializable):
             Id of online handler.
         is_binary : bool, optinal (False if omitted)
             Whether the DofObject is a wrapper of a real binary data.
+        lazy : bool, optional (False if omitted)
+            Whether to load data on the first access of the data property
+            instead of an explicit load() call.
 
         Notes
         -----
+        I.
             The is_binary flag is True when the DofObject contains real binary
             data, for example any document. In all other cases the state is
             False.
+        II.
+            A lazy DofObject loads data from the local path, or from the online
+            link if there is no local path, when data is not in the memory.
+            Together with unload() the memory can be reclaimed and refilled on
+            demand.
         """
 
         # pylint: disable=too-many-arguments
@@ -121,6 +500,9 @@ class DofObject(DofSerializable):
         self.__is_relative_online = is_relative_online
         self.__online_handler_id = online_handler_id
         self.__is_binary = is_binary
+        self.__lazy = lazy
+        self.__evicted = False
+        self.__is_dirty = data is not None
 
 
     @classmethod
@@ -148,18 +530,149 @@ class DofObject(DofSerializable):
             The id of the new handler.
         """
 
-        if handler.handler_type == DofObjectHandler.LOCAL:
-            next_id = len(cls.__local_handlers)
-            cls.__local_handlers[next_id] = handler
-            if as_default or next_id == 0:
-                cls.__local_default = next_id
-        elif handler.handler_type == DofObjectHandler.ONLINE:
-            next_id = len(cls.__online_handlers)
-            cls.__online_handlers[next_id] = handler
-            if as_default or next_id == 0:
-                cls.__online_default = next_id
+        with DofObject.__registry_lock:
+            if handler.handler_type == DofObjectHandler.LOCAL:
+                next_id = len(DofObject.__local_handlers)
+                _handlers = dict(DofObject.__local_handlers)
+                _handlers[next_id] = handler
+                DofObject.__local_handlers = _handlers
+                if as_default or next_id == 0:
+                    DofObject.__local_default = next_id
+            elif handler.handler_type == DofObjectHandler.ONLINE:
+                next_id = len(DofObject.__online_handlers)
+                _handlers = dict(DofObject.__online_handlers)
+                _handlers[next_id] = handler
+                DofObject.__online_handlers = _handlers
+                if as_default or next_id == 0:
+                    DofObject.__online_default = next_id
+            else:
+                raise DofError('DofObject.add_handler(): Unsupported handler ' +
+                               'type.')
+        return next_id
+
+
+    @classmethod
+    def after_fork(cls):
+        """
+        Reinitialize the handler registry in a forked child process
+        ===========================================================
+
+        Notes
+        -----
+            The lock of the registry is replaced, since another thread of the
+            parent may have held it at the time of the fork, and after_fork()
+            of every registered handler is called once. Where
+            os.register_at_fork() is available this function is called
+            automatically, otherwise call it first in the child process.
+        """
+
+        DofObject.__registry_lock = Lock()
+        DofObject.__payload_manager.after_fork()
+        _handlers = (list(DofObject.__local_handlers.values()) +
+                     list(DofObject.__online_handlers.values()))
+        _done = set()
+        for handler in _handlers:
+            if handler is not None and id(handler) not in _done:
+                _done.add(id(handler))
+                handler.after_fork()
+
+
+    async def aload(self, source_type : str = DofObjectHandler.LOCAL):
+        """
+        Load data from the source without blocking the event loop
+        =========================================================
+
+        Parameters
+        ----------
+        source_type : str, optional (DofObjectHandler.LOCAL if omitted)
+            Source of data.
+
+        Raises
+        ------
+        DofError
+            When the type of handler is not supported.
+
+        See Also
+        --------
+            Synchronous counterpart : DofObject.load()
+
+        Notes
+        -----
+            If the handler of the source is an AsyncDofObjectHandler, its
+            coroutines are awaited. Any other handler is called on the default
+            executor of the running event loop.
+        """
+
+        if source_type not in [DofObjectHandler.LOCAL, DofObjectHandler.ONLINE]:
+            raise DofError('DofObject.aload(): Unsupported handler type.')
+        _handler = self.__own_handler(source_type)
+        _location, _is_relative = self.__own_location(source_type)
+        if isinstance(_handler, AsyncDofObjectHandler):
+            if not self.__is_binary:
+                self.__data = await _handler.aload_as_instance(_location,
+                                                               _is_relative)
+            else:
+                self.__data = await _handler.aload_as_binary(_location,
+                                                             _is_relative)
+        else:
+            if not self.__is_binary:
+                _function = _handler.load_as_instance
+            else:
+                _function = _handler.load_as_binary
+            self.__data = await get_running_loop().run_in_executor(None,
+                                partial(_function, _location, _is_relative))
+        self.__mark_synced()
+
+
+    async def asave(self, destination_type : str = DofObjectHandler.LOCAL):
+        """
+        Save data to the destination without blocking the event loop
+        =============================================================
+
+        Parameters
+        ----------
+        destination_type : str, optional (DofObjectHandler.LOCAL if omitted)
+            Destinaton of data.
+
+        Raises
+        ------
+        DofError
+            When the type of handler is not supported.
+
+        See Also
+        --------
+            Synchronous counterpart : DofObject.save()
+
+        Notes
+        -----
+            If the handler of the destination is an AsyncDofObjectHandler, its
+            coroutines are awaited. Any other handler is called on the default
+            executor of the running event loop.
+        """
+
+        if destination_type not in [DofObjectHandler.LOCAL,
+                                    DofObjectHandler.ONLINE]:
+            raise DofError('DofObject.asave(): Unsupported handler type.')
+        if self.__evicted:
+            self.force_load_to_memory()
+        _handler = self.__own_handler(destination_type)
+        _location, _is_relative = self.__own_location(destination_type)
+        if isinstance(_handler, AsyncDofObjectHandler):
+            if not self.__is_binary:
+                await _handler.asave_as_instance(self.__data, _location,
+                                                 _is_relative)
+            else:
+                await _handler.asave_as_binary(self.__data, _location,
+                                               _is_relative)
         else:
-            raise DofError('DofObject.add_handler(): Unsupported handler type.')
+            if not self.__is_binary:
+                _function = _handler.save_as_instance
+            else:
+                _function = _handler.save_as_binary
+            await get_running_loop().run_in_executor(None,
+                        partial(_function, self.__data, _location,
+                                _is_relative))
+        self.__mark_synced()
 
 
     @classmethod
@@ -190,12 +703,14 @@ class DofObject(DofSerializable):
 
         result = []
         if handler_type == DofObjectHandler.LOCAL:
-            for key in sorted(cls.__local_handlers.keys()):
-                if cls.__local_handlers[key] is not None:
+            _handlers = cls.__local_handlers
+            for key in sorted(_handlers.keys()):
+                if _handlers[key] is not None:
                     result.append(key)
         elif handler_type == DofObjectHandler.ONLINE:
-            for key in sorted(cls.__online_handlers.keys()):
-                if cls.__online_handlers[key] is not None:
+            _handlers = cls.__online_handlers
+            for key in sorted(_handlers.keys()):
+                if _handlers[key] is not None:
                     result.append(key)
         else:
             raise DofError('DofObject.available_handlers(): Unsupported ' +
@@ -203,14 +718,82 @@ class DofObject(DofSerializable):
         return result
 
 
+    def binary_view(self, offset : int, length : int,
+                    source_type : str = DofObjectHandler.LOCAL) -> any:
+        """
+        Get a lazy view of a byte range of the data
+        ===========================================
+
+        Parameters
+        ----------
+        offset : int
+            Position of the first byte of the view.
+        length : int
+            Number of bytes of the view.
+        source_type : str, optional (DofObjectHandler.LOCAL if omitted)
+            Type of the handler to load the range with.
+
+        Returns
+        -------
+        memoryview | BinaryView
+            Memoryview slice if the binary data is in memory, a BinaryView
+            that loads only the range on demand otherwise.
+
+        Raises
+        ------
+        DofError
+            When offset or length is negative.
+        DofError
+            When the handler of the instance doesn't exist.
+
+        Notes
+        -----
+            This function doesn't load the whole data into the memory, so it is
+            useful to access the header or a chunk of a large blob.
+        """
+
+        DofObjectHandler.check_range(offset, length)
+        if isinstance(self.__data, (bytes, bytearray, memoryview)):
+            return memoryview(self.__data)[offset:offset + length]
+        _handler = self.__own_handler(source_type)
+        _location, _is_relative = self.__own_location(source_type)
+        return BinaryView(_handler, _location, _is_relative, offset, length)
+
+
     @property
     def data(self) -> any:
         """
         Get data from memory
         ====================
+
+        Returns
+        -------
+        any
+            Data from memory, or None if it is not loaded.
+
+        Raises
+        ------
+        DofError
+            When data is lazy loaded and its handler does not exist or have been
+            deleted already.
+
+        Notes
+        -----
+            If lazy is True or data have been evicted by the memory budget and
+            data is not in the memory, data is loaded first from the local
+            path, or from the online link if the local path is empty.
         """
 
-        return self.__data
+        _data = self.__data
+        if _data is None and (self.__lazy or self.__evicted):
+            if self.__local_path != '':
+                self.__load_local()
+            elif self.__online_link != '':
+                self.__load_online()
+            _data = self.__data
+        else:
+            DofObject.__payload_manager.touch(self)
+        return _data
 
 
     @data.setter
@@ -223,9 +806,17 @@ class DofObject(DofSerializable):
         ----------
         new_value : any
             New value to set as data.
+
+        Notes
+        -----
+            The new value is not tracked by the memory budget until it is saved
+            to the own location of the instance.
         """
 
+        DofObject.__payload_manager.forget(self)
         self.__data = new_value
+        self.__evicted = False
+        self.__is_dirty = True
 
 
     @classmethod
@@ -260,29 +851,28 @@ class DofObject(DofSerializable):
             Possible type of handlers : storage.DofObjectHandler
         """
 
-        if handler_type == DofObjectHandler.LOCAL:
-            if not handler_id in cls.__local_handlers.keys():
-                raise DofError('DofObject.delete_handler(): handler id {} '
-                               .format(handler_id) + 'doesn\'t exist in LOCAL' +
-                               ' handlers.')
-            if cls.__local_handlers[handler_id] is None:
-                raise DofError('DofObject.delete_handler(): handler id {} '
-                               .format(handler_id) + 'in LOCAL is already ' +
-                               'deleted.')
-            cls.__local_handlers[handler_id] = None
-        elif handler_type == DofObjectHandler.ONLINE:
-            if not handler_id in cls.__online_handlers.keys():
-                raise DofError('DofObject.delete_handler(): handler id {} '
-                               .format(handler_id) + 'doesn\'t exist in ' +
-                               'ONLINE handlers.')
-            if cls.__online_handlers[handler_id] is None:
-                raise DofError('DofObject.delete_handler(): handler id {} '
-                               .format(handler_id) + 'in ONLINE is already ' +
-                               'deleted.')
-            cls.__online_handlers[handler_id] = None
-        else:
+        if handler_type not in [DofObjectHandler.LOCAL,
+                                DofObjectHandler.ONLINE]:
             raise DofError('DofObject.delete_handler(): Unsupported handler ' +
                            'type.')
+        with DofObject.__registry_lock:
+            if handler_type == DofObjectHandler.LOCAL:
+                _handlers = dict(DofObject.__local_handlers)
+            else:
+                _handlers = dict(DofObject.__online_handlers)
+            if not handler_id in _handlers.keys():
+                raise DofError('DofObject.delete_handler(): handler id {} '
+                               .format(handler_id) + 'doesn\'t exist in {} '
+                               .format(handler_type.upper()) + 'handlers.')
+            if _handlers[handler_id] is None:
+                raise DofError('DofObject.delete_handler(): handler id {} '
+                               .format(handler_id) + 'in {} is already '
+                               .format(handler_type.upper()) + 'deleted.')
+            _handlers[handler_id] = None
+            if handler_type == DofObjectHandler.LOCAL:
+                DofObject.__local_handlers = _handlers
+            else:
+                DofObject.__online_handlers = _handlers
 
 
     def force_load_to_memory(self) -> bool:
@@ -362,6 +952,45 @@ class DofObject(DofSerializable):
         return _object
 
 
+    @classmethod
+    def from_loaded(cls, data : any, local_path : str,
+                    local_handler_id : int, lazy : bool = False) -> any:
+        """
+        Create an instance of data loaded from its local path
+        =====================================================
+
+        Parameters
+        ----------
+        data : any
+            The loaded data, or None if data is not loaded yet.
+        local_path : str
+            Relative local location the data has been loaded from.
+        local_handler_id : int
+            Id of the local handler the data has been loaded with.
+        lazy : bool, optional (False if omitted)
+            Whether to load data on the first access of the data property.
+
+        Returns
+        -------
+        DofObject
+            The new instance, its data is clean.
+
+        Notes
+        -----
+            Loaders that read many files at once (eg. Dataset.load_from()) wrap
+            the loaded data with this function, so the instances are tracked by
+            the memory budget and they can be unloaded and loaded again as if
+            they had been loaded with load().
+        """
+
+        result = cls(local_path=local_path, local_handler_id=local_handler_id,
+                     lazy=lazy)
+        if data is not None:
+            result.__data = data
+            result.__mark_synced()
+        return result
+
+
     @classmethod
     def get_handler(cls, handler_type : str,
                     handler_id : int) -> DofObjectHandler:
@@ -398,29 +1027,35 @@ class DofObject(DofSerializable):
         --------
             Possible type of handlers : storage.DofObjectHandler
         """
+        # The default is read before the handlers, since writers publish the
+        # handlers before the default that refers them.
         result = None
         if handler_type == DofObjectHandler.LOCAL:
+            _default = cls.__local_default
+            _handlers = cls.__local_handlers
             if handler_id == -1:
-                result = cls.__local_handlers[cls.__local_default]
-            elif handler_id not in cls.__local_handlers.keys():
+                result = _handlers[_default]
+            elif handler_id not in _handlers.keys():
                 raise DofError('DofObject.get_handler(): tried to get a LOCAL' +
                                ' handler that never existed.')
-            elif  cls.__local_handlers[handler_id] is None:
+            elif  _handlers[handler_id] is None:
                 raise DofError('DofObject.get_handler(): tried to get a LOCAL' +
                                ' handler that is already deleted.')
             else:
-                result = cls.__local_handlers[handler_id]
+                result = _handlers[handler_id]
         elif handler_type == DofObjectHandler.ONLINE:
+            _default = cls.__online_default
+            _handlers = cls.__online_handlers
             if handler_id == -1:
-                result = cls.__online_handlers[cls.__online_default]
-            elif handler_id not in cls.__online_handlers.keys():
+                result = _handlers[_default]
+            elif handler_id not in _handlers.keys():
                 raise DofError('DofObject.get_handler(): tried to get an ' +
                                'ONLINE handler that never existed.')
-            elif cls.__online_handlers[handler_id] is None:
+            elif _handlers[handler_id] is None:
                 raise DofError('DofObject.get_handler(): tried to get an ' +
                                'ONLINE handler that is already deleted.')
             else:
-                result = cls.__online_handlers[handler_id]
+                result = _handlers[handler_id]
         else:
             raise DofError('DofObject.get_handler(): Unsupported handler ' +
                            'type.')
@@ -457,19 +1092,21 @@ class DofObject(DofSerializable):
 
         result = False
         if handler_type == DofObjectHandler.LOCAL:
+            _handlers = cls.__local_handlers
             if handler_id == -1:
                 result = True
-            elif handler_id not in cls.__local_handlers.keys():
+            elif handler_id not in _handlers.keys():
                 result = False
             else:
-                result = cls.__local_handlers[handler_id] is not None
+                result = _handlers[handler_id] is not None
         elif handler_type == DofObjectHandler.ONLINE:
+            _handlers = cls.__online_handlers
             if handler_id == -1:
                 result = True
-            elif handler_id not in cls.__online_handlers.keys():
+            elif handler_id not in _handlers.keys():
                 result = False
             else:
-                result = cls.__online_handlers[handler_id] is not None
+                result = _handlers[handler_id] is not None
         else:
             raise DofError('DofObject.handler_exists(): Unsupported handler ' +
                            'type.')
@@ -514,6 +1151,50 @@ class DofObject(DofSerializable):
         self.__is_binary = new_value
 
 
+    @property
+    def is_dirty(self) -> bool:
+        """
+        Get whether data have been changed since it was last loaded or saved
+        ====================================================================
+
+        Returns
+        -------
+        bool
+            True if data have been changed, False if not.
+
+        Notes
+        -----
+            The flag is set by the data setter and set_path(), and it is
+            cleared by loads and saves. Changes made inside a mutable data
+            object are not detected, set the flag to True after them. Dirty
+            data is never evicted by the memory budget.
+        """
+
+        return self.__is_dirty
+
+
+    @is_dirty.setter
+    def is_dirty(self, new_value : bool):
+        """
+        Set whether data have been changed since it was last loaded or saved
+        ====================================================================
+
+        Parameters
+        ----------
+        new_value : bool
+            The new state of the flag.
+
+        Notes
+        -----
+            Dirty data is not tracked by the memory budget until it is saved to
+            the own location of the instance.
+        """
+
+        if new_value:
+            DofObject.__payload_manager.forget(self)
+        self.__is_dirty = new_value
+
+
     @property
     def is_in_memory(self) -> bool:
         """
@@ -559,6 +1240,36 @@ class DofObject(DofSerializable):
         return self.__is_relative_online
 
 
+    @property
+    def lazy(self) -> bool:
+        """
+        Get whether data is loaded on the first access
+        ==============================================
+
+        Returns
+        -------
+        bool
+            True if data is loaded on the first access, False if not.
+        """
+
+        return self.__lazy
+
+
+    @lazy.setter
+    def lazy(self, new_value : bool):
+        """
+        Set whether data is loaded on the first access
+        ==============================================
+
+        Parameters
+        ----------
+        new_value : bool
+            The new state of lazy loading.
+        """
+
+        self.__lazy = new_value
+
+
     def load(self, source_type : str = DofObjectHandler.LOCAL):
         """
         Load data from the source
@@ -614,12 +1325,16 @@ class DofObject(DofSerializable):
             When the local handler has been deleted.
         """
 
-        if not handler_id in self.__local_handlers:
+        _handlers = self.__local_handlers
+        if not handler_id in _handlers:
             raise DofError('DofObject.save_to(): local handler doesn\'t exist.')
-        if self.__local_handlers[handler_id] is None:
+        if _handlers[handler_id] is None:
             raise DofError('DofObject.save_to(): local handler is deleted.')
-        self.__data = self.__local_handlers[handler_id].load_as_instance(
-                                                        location, is_relative)
+        DofObject.__payload_manager.forget(self)
+        self.__data = _handlers[handler_id].load_as_instance(location,
+                                                             is_relative)
+        self.__evicted = False
+        self.__is_dirty = False
 
 
     @property
@@ -679,6 +1394,25 @@ class DofObject(DofSerializable):
         return self.__local_path
 
 
+    @classmethod
+    def memory_stats(cls) -> dict:
+        """
+        Get the occupancy and the eviction counters of the memory budget
+        ================================================================
+
+        Returns
+        -------
+        dict
+            The counters of the process-wide payload manager.
+
+        See Also
+        --------
+            Meaning of the counters : PayloadManager.stats
+        """
+
+        return DofObject.__payload_manager.stats
+
+
     @property
     def online_handler_id(self) -> int:
         """
@@ -768,6 +1502,46 @@ class DofObject(DofSerializable):
             raise DofError('DofObject.save(): Unsupported handler type.')
 
 
+    def save_from_stream(self, instream : any,
+                         destination_type : str = DofObjectHandler.LOCAL,
+                         chunk_size : int = DofObjectHandler.CHUNK_SIZE
+                         ) -> int:
+        """
+        Save the content of a binary stream to the destination
+        ======================================================
+
+        Parameters
+        ----------
+        instream : file object
+            Readable binary stream to copy from, eg. an open file.
+        destination_type : str, optional (DofObjectHandler.LOCAL if omitted)
+            Destinaton of data.
+        chunk_size : int, optional (DofObjectHandler.CHUNK_SIZE if omitted)
+            Size of the chunks to copy in bytes.
+
+        Returns
+        -------
+        int
+            Number of bytes copied.
+
+        Raises
+        ------
+        DofError
+            When the handler of the instance doesn't exist.
+
+        Notes
+        -----
+            The content is copied in chunks to the own location of the
+            instance and it is not kept in memory, so large files can be saved
+            with bounded memory usage. The data in memory is not changed.
+        """
+
+        _handler = self.__own_handler(destination_type)
+        _location, _is_relative = self.__own_location(destination_type)
+        return _handler.save_from_stream(instream, _location, _is_relative,
+                                         chunk_size)
+
+
     def save_to(self, handler_id : int, location : str, is_relative : bool):
         """
         Save internal data to local storage
@@ -791,13 +1565,14 @@ class DofObject(DofSerializable):
             When the local handler has been deleted.
         """
 
-        if not handler_id in self.__local_handlers:
+        _handlers = self.__local_handlers
+        if not handler_id in _handlers:
             raise DofError('DofObject.save_to(): local handler doesn\'t exist.')
-        if self.__local_handlers[handler_id] is None:
+        if _handlers[handler_id] is None:
             raise DofError('DofObject.save_to(): local handler is deleted.')
-        self.__local_handlers[handler_id].save_as_instance(self.__data,
-                                                           location,
-                                                           is_relative)
+        _handlers[handler_id].save_as_instance(self.__data, location,
+                                               is_relative)
+        self.__is_dirty = False
 
 
     @classmethod
@@ -824,29 +1599,55 @@ class DofObject(DofSerializable):
             If the handler is already deleted.
         """
 
-        if handler_type == DofObjectHandler.LOCAL:
-            if not handler_id in cls.__local_handlers.keys():
-                raise DofError('DofObject.set_default_handler(): handler id {} '
-                               .format(handler_id) + 'doesn\'t exist in LOCAL' +
-                               ' handlers.')
-            if cls.__local_handlers[handler_id] is None:
-                raise DofError('DofObject.set_default_handler(): handler id {}'
-                               .format(handler_id) + ' in LOCAL is already ' +
-                               'deleted.')
-            cls.__local_default = handler_id
-        elif handler_type == DofObjectHandler.ONLINE:
-            if not handler_id in cls.__online_handlers.keys():
-                raise DofError('DofObject.set_default_handler(): handler id {} '
-                               .format(handler_id) + 'doesn\'t exist in ' +
-                               'ONLINE handlers.')
-            if cls.__online_handlers[handler_id] is None:
-                raise DofError('DofObject.set_default_handler(): handler id {}'
-                               .format(handler_id) + ' in ONLINE is already ' +
-                               'deleted.')
-            cls.__online_default = handler_id
-        else:
+        if handler_type not in [DofObjectHandler.LOCAL,
+                                DofObjectHandler.ONLINE]:
             raise DofError('DofObject.set_default_handler(): Unsupported ' +
                            'handler type.')
+        with DofObject.__registry_lock:
+            if handler_type == DofObjectHandler.LOCAL:
+                _handlers = DofObject.__local_handlers
+            else:
+                _handlers = DofObject.__online_handlers
+            if not handler_id in _handlers.keys():
+                raise DofError('DofObject.set_default_handler(): handler id {} '
+                               .format(handler_id) + 'doesn\'t exist in {} '
+                               .format(handler_type.upper()) + 'handlers.')
+            if _handlers[handler_id] is None:
+                raise DofError('DofObject.set_default_handler(): handler id {}'
+                               .format(handler_id) + ' in {} is already '
+                               .format(handler_type.upper()) + 'deleted.')
+            if handler_type == DofObjectHandler.LOCAL:
+                DofObject.__local_default = handler_id
+            else:
+                DofObject.__online_default = handler_id
+
+
+    @classmethod
+    def set_memory_budget(cls, max_bytes : int = None):
+        """
+        Set the process-wide memory budget of payloads
+        ==============================================
+
+        Parameters
+        ----------
+        max_bytes : int, optional (None if omitted)
+            Size limit of the payloads in bytes. If None, payloads are not
+            tracked and not evicted.
+
+        Raises
+        ------
+        DofError
+            When max_bytes is negative.
+
+        Notes
+        -----
+            Only the payloads loaded from or saved to the own location of a
+            DofObject are tracked, the least recently used of them are evicted
+            when the budget is exceeded. Payloads loaded before this call are
+            tracked from their next load or save.
+        """
+
+        DofObject.__payload_manager.max_bytes = max_bytes
 
 
     def set_path(self, path_type : str, new_value : str, is_relative : bool):
@@ -874,17 +1675,24 @@ class DofObject(DofSerializable):
 
         Notes
         -----
-            Type of path can be local or online.
+            Type of path can be local or online. Evicted data is loaded before
+            the path changes, and data is not tracked by the memory budget
+            until it is saved to the new path. Data becomes dirty, since it is
+            not stored at the new path yet.
         """
 
+        if path_type not in [DofObjectHandler.LOCAL, DofObjectHandler.ONLINE]:
+            raise DofError('DofObject.set_path(): Unsupported path type.')
+        if self.__evicted:
+            self.force_load_to_memory()
+        DofObject.__payload_manager.forget(self)
+        self.__is_dirty = True
         if path_type == DofObjectHandler.LOCAL:
             self.__local_path = new_value
             self.__is_relative_local = is_relative
         elif path_type == DofObjectHandler.ONLINE:
             self.__online_link = new_value
             self.__is_relative_online = is_relative
-        else:
-            raise DofError('DofObject.set_path(): Unsupported path type.')
 
 
     def to_json_dict(self, describe_only : bool = True) -> dict:
@@ -936,6 +1744,56 @@ class DofObject(DofSerializable):
         return result
 
 
+    def unload(self):
+        """
+        Drop data from the memory
+        =========================
+
+        Raises
+        ------
+        DofError
+            When there is neither local path nor online link to load data from
+            again.
+        DofError
+            When data have been changed since it was last saved.
+
+        Notes
+        -----
+            Paths and handler ids are kept, so data can be loaded again with
+            load(), force_load_to_memory() or, if lazy is True, by accessing
+            the data property.
+        """
+
+        if self.__local_path == '' and self.__online_link == '':
+            raise DofError('DofObject.unload(): data has neither local path ' +
+                           'nor online link to load it again.')
+        if self.__is_dirty:
+            raise DofError('DofObject.unload(): data have been changed ' +
+                           'since it was last saved.')
+        DofObject.__payload_manager.forget(self)
+        self.__data = None
+        self.__evicted = False
+
+
+    def __evict(self) -> bool:
+        """
+        Drop data on the request of the memory budget
+        =============================================
+
+        Returns
+        -------
+        bool
+            True if data has been dropped, False if it is kept since it has
+            been changed since it was last loaded or saved.
+        """
+
+        if self.__is_dirty:
+            return False
+        self.__data = None
+        self.__evicted = True
+        return True
+
+
     def __load_local(self):
         """
         Load data from local source
@@ -949,22 +1807,14 @@ class DofObject(DofSerializable):
             When the local handler have been deleted already.
         """
 
-        if self.__local_handler_id > -1:
-            _handler = self.__local_handlers[self.__local_handler_id]
-        else:
-            if self.__local_handler_id not in self.__local_handlers.keys():
-                raise DofError('DofObject.load(): LOCAL handler of the ' +
-                               'instance doesn\'t exist.')
-            if self.__local_handlers[self.__local_handler_id] is None:
-                raise DofError('DofObject.load(): LOCAL handler of the ' +
-                               'instance is deleted.')
-            _handler = self.__local_handlers[self.__local_handler_id]
+        _handler = self.__own_handler(DofObjectHandler.LOCAL)
         if not self.__is_binary:
             self.__data = _handler.load_as_instance(self.__local_path,
                                                 self.__is_relative_local)
         else:
             self.__data = _handler.load_as_binary(self.__local_path,
                                                 self.__is_relative_local)
+        self.__mark_synced()
 
 
     def __load_online(self):
@@ -979,23 +1829,88 @@ class DofObject(DofSerializable):
         DofError
             When the online handler have been deleted already.
         """
-        if self.__online_handler_id > -1:
-            _handler = self.__online_handlers[self.__online_handler_id]
-        else:
-            if self.__online_handler_id not in \
-                                            self.__online_handlers.keys():
-                raise DofError('DofObject.load(): ONLINE handler of the ' +
-                               'instance doesn\'t exist.')
-            if self.__online_handlers[self.__online_handler_id] is None:
-                raise DofError('DofObject.load(): ONLINE handler of the ' +
-                               'instance is deleted.')
-            _handler = self.__online_handlers[self.__online_handler_id]
+
+        _handler = self.__own_handler(DofObjectHandler.ONLINE)
         if not self.__is_binary:
             self.__data = _handler.load_as_instance(self.__online_link,
                                                 self.__is_relative_online)
         else:
             self.__data = _handler.load_as_binary(self.__online_link,
                                                 self.__is_relative_online)
+        self.__mark_synced()
+
+
+    def __mark_synced(self):
+        """
+        Mark data as stored at the own location
+        =======================================
+
+        Notes
+        -----
+            Data becomes clean and it is tracked by the memory budget.
+        """
+
+        DofObject.__payload_manager.track(self, self.__data, self.__evict,
+                                          self.__evicted)
+        self.__evicted = False
+        self.__is_dirty = False
+
+
+    def __own_handler(self, handler_type : str) -> DofObjectHandler:
+        """
+        Get the handler of the instance
+        ===============================
+
+        Parameters
+        ----------
+        handler_type : str
+            Type of the handler to get.
+
+        Returns
+        -------
+        DofObjectHandler
+            The handler with the id of the instance, or the default handler if
+            the id of the instance is -1.
+
+        Raises
+        ------
+        DofError
+            When the handler does not exist.
+        DofError
+            When the handler have been deleted already.
+        """
+
+        if handler_type == DofObjectHandler.LOCAL:
+            _handler_id = self.__local_handler_id
+        else:
+            _handler_id = self.__online_handler_id
+        if not DofObject.handler_exists(handler_type, _handler_id) or \
+                len(DofObject.available_handlers(handler_type)) == 0:
+            raise DofError('DofObject.load(): {} handler of the instance '
+                           .format(handler_type.upper()) + 'doesn\'t exist ' +
+                           'or is deleted.')
+        return DofObject.get_handler(handler_type, _handler_id)
+
+
+    def __own_location(self, location_type : str) -> tuple:
+        """
+        Get the location of the instance
+        ================================
+
+        Parameters
+        ----------
+        location_type : str
+            Type of the location to get.
+
+        Returns
+        -------
+        tuple(str, bool)
+            The local path or online link and its relativity state.
+        """
+
+        if location_type == DofObjectHandler.LOCAL:
+            return (self.__local_path, self.__is_relative_local)
+        return (self.__online_link, self.__is_relative_online)
 
 
     def __save_local(self):
@@ -1003,16 +1918,17 @@ class DofObject(DofSerializable):
         Save data to local destination
         ==============================
         """
-        if self.__local_handler_id > -1:
-            _handler = self.__local_handlers[self.__local_handler_id]
-        else:
-            _handler = self.__local_handlers[self.__local_default]
+
+        if self.__evicted:
+            self.force_load_to_memory()
+        _handler = self.__own_handler(DofObjectHandler.LOCAL)
         if not self.__is_binary:
             _handler.save_as_instance(self.__data, self.__local_path,
                                       self.__is_relative_local)
         else:
             _handler.save_as_binary(self.__data, self.__local_path,
                                       self.__is_relative_local)
+        self.__mark_synced()
 
 
     def __save_online(self):
@@ -1020,16 +1936,83 @@ class DofObject(DofSerializable):
         Save data to online destination
         ===============================
         """
-        if self.__online_handler_id > -1:
-            _handler = self.__online_handlers[self.__online_handler_id]
-        else:
-            _handler = self.__online_handlers[self.__online_default]
+
+        if self.__evicted:
+            self.force_load_to_memory()
+        _handler = self.__own_handler(DofObjectHandler.ONLINE)
         if not self.__is_binary:
             _handler.save_as_instance(self.__data, self.__online_link,
                                       self.__is_relative_online)
         else:
             _handler.save_as_binary(self.__data, self.__online_link,
                                       self.__is_relative_online)
+        self.__mark_synced()
+
+
+    def __getstate__(self) -> dict:
+        """
+        Get the state of the instance to pickle
+        =======================================
+
+        Returns
+        -------
+        dict
+            The attributes with their name-mangled names.
+
+        Notes
+        -----
+            The state has the same form as the __dict__ of earlier versions, so
+            pickles stay compatible in both directions.
+        """
+
+        return {'_DofObject__data' : self.__data,
+                '_DofObject__local_path' : self.__local_path,
+                '_DofObject__is_relative_local' : self.__is_relative_local,
+                '_DofObject__local_handler_id' : self.__local_handler_id,
+                '_DofObject__online_link' : self.__online_link,
+                '_DofObject__is_relative_online' : self.__is_relative_online,
+                '_DofObject__online_handler_id' : self.__online_handler_id,
+                '_DofObject__is_binary' : self.__is_binary,
+                '_DofObject__lazy' : self.__lazy,
+                '_DofObject__evicted' : self.__evicted,
+                '_DofObject__is_dirty' : self.__is_dirty}
+
+
+    def __setstate__(self, state : dict):
+        """
+        Restore the state of the instance from a pickle
+        ===============================================
+
+        Parameters
+        ----------
+        state : dict
+            The attributes with their name-mangled names.
+
+        Notes
+        -----
+            Attributes missing from pickles of earlier versions get their
+            default values.
+        """
+
+        self.__data = state.get('_DofObject__data')
+        self.__local_path = state.get('_DofObject__local_path', '')
+        self.__is_relative_local = state.get('_DofObject__is_relative_local',
+                                             True)
+        self.__local_handler_id = state.get('_DofObject__local_handler_id',
+                                            -1)
+        self.__online_link = state.get('_DofObject__online_link', '')
+        self.__is_relative_online = state.get(
+                                        '_DofObject__is_relative_online', True)
+        self.__online_handler_id = state.get('_DofObject__online_handler_id',
+                                             -1)
+        self.__is_binary = state.get('_DofObject__is_binary', False)
+        self.__lazy = state.get('_DofObject__lazy', False)
+        self.__evicted = state.get('_DofObject__evicted', False)
+        self.__is_dirty = state.get('_DofObject__is_dirty', False)
+
+
+if register_at_fork is not None:
+    register_at_fork(after_in_child=DofObject.after_fork)
 
 
 if __name__ == '__main__':
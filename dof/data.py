@@ -14,14 +14,18 @@ Submodule: data
 #               understand our code and the way of our thinking.
 
 
+from asyncio import get_running_loop
+from functools import partial
 from json import dumps, loads
+from pickle import dumps as pickle_dumps, loads as pickle_loads
 
 from .core import DofObject
 from .datamodel import create_json_dict, get_content
 from .datamodel import ContentForm, JSONContent, JSONDescription, JSONRoot
 from .error import DofError
 from .information import DataElementInfo
-from .storage import DofObjectHandler, DofSerializable
+from .storage import AsyncDofObjectHandler, DofObjectHandler, DofSerializable
+from .storage import SegmentStore
 
 
 class DataElement(DofSerializable):
@@ -32,7 +36,8 @@ class DataElement(DofSerializable):
     Attributes
     ----------
     data : any (read-only)
-        Content of dataset element.
+        Content of dataset element, loaded on first access if the DofObject is
+        lazy.
     dof_object : DofObject
         Provide direct access to the DofObject.
     element_type : str (read-only)
@@ -41,6 +46,10 @@ class DataElement(DofSerializable):
         Whether the instance contains info or not.
     info : DataElementInfo | NoneType
         The info that is stored or None if there is no info.
+    is_dirty : bool
+        Whether the data or the info have been changed since the last save.
+    is_info_dirty : bool (read-only)
+        Whether the info have been changed since the last save.
     is_x : bool (read-only)
         Whether the instance is X or not.
     is_y : bool (read-only)
@@ -48,6 +57,11 @@ class DataElement(DofSerializable):
     """
 
 
+    # Instance attributes are kept in slots instead of a __dict__, since
+    # datasets may hold millions of elements.
+    __slots__ = ('__data', '__element_type', '__info', '__is_info_dirty')
+
+
     # These variables should be static class level constants but this out of the
     # capabilites of Python.
     X = 'x'
@@ -104,11 +118,12 @@ class DataElement(DofSerializable):
                            .format(element_type))
         if info is None:
             self.__info = info
-        if isinstance(info, DataElementInfo):
+        elif isinstance(info, DataElementInfo):
             self.__info = info
         else:
             raise DofError('DataElement.init(): type of info must be ' +
                            'DataElementInfo and not {}'.format(type(info)))
+        self.__is_info_dirty = False
 
 
     @property
@@ -121,6 +136,10 @@ class DataElement(DofSerializable):
         -------
         any
             The data that is stored.
+
+        See Also
+        --------
+            Lazy loading : DofObject.data
         """
 
         return self.__data.data
@@ -133,6 +152,7 @@ class DataElement(DofSerializable):
         """
 
         self.__info = None
+        self.__is_info_dirty = True
 
 
     @property
@@ -285,6 +305,57 @@ class DataElement(DofSerializable):
         """
 
         self.__info = new_info
+        self.__is_info_dirty = True
+
+
+    @property
+    def is_dirty(self) -> bool:
+        """
+        Return whether the element have been changed since the last save
+        ================================================================
+
+        Returns
+        -------
+        bool
+            True if the data or the info have been changed, False if not.
+
+        See Also
+        --------
+            Changes of the data : DofObject.is_dirty
+        """
+
+        return self.__is_info_dirty or self.__data.is_dirty
+
+
+    @is_dirty.setter
+    def is_dirty(self, new_value : bool):
+        """
+        Set whether the element have been changed since the last save
+        =============================================================
+
+        Parameters
+        ----------
+        new_value : bool
+            The new state of the flags of both the data and the info.
+        """
+
+        self.__is_info_dirty = new_value
+        self.__data.is_dirty = new_value
+
+
+    @property
+    def is_info_dirty(self) -> bool:
+        """
+        Return whether the info have been changed since the last save
+        =============================================================
+
+        Returns
+        -------
+        bool
+            True if the info have been changed, False if not.
+        """
+
+        return self.__is_info_dirty
 
 
     @property
@@ -394,11 +465,59 @@ class DataElement(DofSerializable):
         -------
         any
             The data that is stored.
+
+        See Also
+        --------
+            Lazy loading : DofObject.data
         """
 
         return self.__data.data
 
 
+    def __getstate__(self) -> dict:
+        """
+        Get the state of the instance to pickle
+        =======================================
+
+        Returns
+        -------
+        dict
+            The attributes with their name-mangled names.
+
+        Notes
+        -----
+            The state has the same form as the __dict__ of earlier versions, so
+            pickles stay compatible in both directions.
+        """
+
+        return {'_DataElement__data' : self.__data,
+                '_DataElement__element_type' : self.__element_type,
+                '_DataElement__info' : self.__info,
+                '_DataElement__is_info_dirty' : self.__is_info_dirty}
+
+
+    def __setstate__(self, state : dict):
+        """
+        Restore the state of the instance from a pickle
+        ===============================================
+
+        Parameters
+        ----------
+        state : dict
+            The attributes with their name-mangled names.
+
+        Notes
+        -----
+            Attributes missing from pickles of earlier versions get their
+            default values.
+        """
+
+        self.__data = state['_DataElement__data']
+        self.__element_type = state['_DataElement__element_type']
+        self.__info = state.get('_DataElement__info')
+        self.__is_info_dirty = state.get('_DataElement__is_info_dirty', False)
+
+
 class LinkEngine(DofSerializable):
     """
     Class to maintain connections between dataset elements
@@ -406,6 +525,8 @@ class LinkEngine(DofSerializable):
 
     Attributes
     ----------
+    is_dirty : bool
+        Whether the links have been changed since the last save.
     links : list (read-only)
         All links between any X and Y values.
 
@@ -422,6 +543,7 @@ class LinkEngine(DofSerializable):
 
         self.__links = []
         self.__at = 0
+        self.__is_dirty = False
 
 
     def count_all(self, id_to_count : int) -> int:
@@ -519,6 +641,7 @@ class LinkEngine(DofSerializable):
             if self.__links[i][0] == id_x:
                 if self.__links[i][1] == id_y:
                     del self.__links[i]
+                    self.__is_dirty = True
                     return
         raise DofError('LinkEngine.delink(): nothing to delete at given X, Y' +
                        ': "{}"->"{}".'.format(id_x, id_y))
@@ -550,6 +673,8 @@ class LinkEngine(DofSerializable):
         indexes.reverse()
         for i in indexes:
             del self.__links[i]
+        if len(indexes) > 0:
+            self.__is_dirty = True
         if len(indexes) == 0:
             raise DofError('LinkEngine.delink_all(): nothing to delete at ' +
                            'given id "{}".'.format(id_to_delink))
@@ -757,6 +882,36 @@ class LinkEngine(DofSerializable):
         return False
 
 
+    @property
+    def is_dirty(self) -> bool:
+        """
+        Return whether the links have been changed since the last save
+        ==============================================================
+
+        Returns
+        -------
+        bool
+            True if any link have been added or removed, False if not.
+        """
+
+        return self.__is_dirty
+
+
+    @is_dirty.setter
+    def is_dirty(self, new_value : bool):
+        """
+        Set whether the links have been changed since the last save
+        ===========================================================
+
+        Parameters
+        ----------
+        new_value : bool
+            The new state of the flag.
+        """
+
+        self.__is_dirty = new_value
+
+
     def link(self, id_x : int, id_y : int):
         """
         Connect X and Y together
@@ -782,6 +937,7 @@ class LinkEngine(DofSerializable):
                                    'X and Y already exists: "{}"->"{}"'
                                    .format(id_x, id_y))
         self.__links.append((id_x, id_y))
+        self.__is_dirty = True
 
 
     @property
@@ -835,10 +991,10 @@ class LinkEngine(DofSerializable):
         _description = []
         _description.append((JSONDescription.LINKS_COUNT, len(self.__links)))
         if describe_only:
-            result = create_json_dict('DataElement', 'dof.data', describe_only,
+            result = create_json_dict('LinkEngine', 'dof.data', describe_only,
                                       description=_description)
         else:
-            result = create_json_dict('DataElement', 'dof.data', describe_only,
+            result = create_json_dict('LinkEngine', 'dof.data', describe_only,
                                       content_form=ContentForm.TEXTUAL,
                                       description=_description)
             result[JSONRoot.CONTENT.value] = self.links
@@ -942,6 +1098,9 @@ class Dataset(DofSerializable):
     as_dataset : list (read-only)
         Get the whole dataset with connections between X and Y values as
         elements of list.
+    is_dirty : bool (read-only)
+        Whether the dataset have been changed since it was last loaded or
+        saved.
     is_dof : bool
         Whether the dataset is a pre-trained model output or not.
     linker : LinkEngine (read-only)
@@ -1012,6 +1171,9 @@ class Dataset(DofSerializable):
 
         self.__elements = {}
         self.__at = 0
+        self.__added = set()
+        self.__deleted = set()
+        self.__synced = None
         if linker_engine is not None:
             if not isinstance(linker_engine, LinkEngine):
                 raise DofError('Dataset.init(): linker_engine must be ' +
@@ -1064,6 +1226,7 @@ class Dataset(DofSerializable):
                            .format(type(element)))
         _id = len(self.__elements)
         self.__elements[_id] = element
+        self.__added.add(_id)
         if link is not None:
             self.__linker.link(_id, link)
         return _id
@@ -1116,6 +1279,70 @@ class Dataset(DofSerializable):
         return result
 
 
+    async def aload_from(self, handler_id : int, lazy : bool = False):
+        """
+        Load dataset from the working directory without blocking the event loop
+        =======================================================================
+
+        Parameters
+        ==========
+        handler_id : int
+            Id of a local handler to use.
+        lazy : bool, optional (False if omitted)
+            Whether to load the data of the elements on their first access
+            instead of loading every element now.
+
+        Raises
+        ------
+        DofError
+            If the dataset is not empty.
+        DofError
+            If the stored dataset is invalid.
+
+        See Also
+        --------
+            Synchronous counterpart and the list of errors : load_from()
+
+        Notes
+        -----
+            If the handler is an AsyncDofObjectHandler, the stored element
+            files are looked up with one afiles() call and all element loads
+            are awaited concurrently. Any other handler runs load_from() on the
+            default executor of the running event loop.
+        """
+
+        if len(self.__elements) > 0:
+            raise DofError('Dataset.aload_from(): only empty dataset can be ' +
+                           'filled with this method.')
+        _handler = DofObject.get_handler(DofObjectHandler.LOCAL, handler_id)
+        if not isinstance(_handler, AsyncDofObjectHandler):
+            await get_running_loop().run_in_executor(None, partial(
+                                        self.load_from, handler_id, lazy))
+            return
+        _dataset_base = await _handler.aload_as_instance('dataset.base')
+        _next_id = self.__restore_base(_dataset_base)
+        _element_info = await _handler.aload_as_instance('elements.info')
+        if _dataset_base.get(JSONDescription.PACKED.value, False):
+            _loaded = await get_running_loop().run_in_executor(None,
+                                                self.__load_packed, _handler)
+            _source_id = None
+        else:
+            _stored = set(await _handler.afiles(''))
+            _ids = [i for i in range(_next_id)
+                    if '{}.obj'.format(i) in _stored]
+            if lazy:
+                _loaded = dict.fromkeys(_ids)
+            else:
+                _loaded = dict(zip(_ids, await _handler.aload_many(
+                                        ['{}.obj'.format(i) for i in _ids])))
+            _source_id = handler_id
+        self.__restore_elements(_next_id, _element_info, _loaded, _source_id)
+        _linker_dict = await _handler.aload_as_instance('elements.links')
+        self.__linker = LinkEngine.from_json(dumps(_linker_dict))
+        self.__mark_synced(_handler, _dataset_base.get(
+                                        JSONDescription.PACKED.value, False))
+
+
     @property
     def as_dataset(self) -> list:
         """
@@ -1216,6 +1443,7 @@ class Dataset(DofSerializable):
         if id_to_delete in self.__elements.keys():
             if self.__elements[id_to_delete] is not None:
                 self.__elements[id_to_delete] = None
+                self.__deleted.add(id_to_delete)
                 self.__linker.delink_all(id_to_delete)
             else:
                 raise DofError('Dataset.delete(): tried to delete an ' +
@@ -1263,7 +1491,9 @@ class Dataset(DofSerializable):
             True if data get loaded into the memory, False if not.
         """
 
-        return all(e.dof_object.force_load_to_memory() for e in self.__elements)
+        return all([element.dof_object.force_load_to_memory()
+                    for element in self.__elements.values()
+                    if element is not None])
 
 
     @classmethod
@@ -1487,6 +1717,26 @@ class Dataset(DofSerializable):
         return result
 
 
+    @property
+    def is_dirty(self) -> bool:
+        """
+        Get whether the dataset have been changed since the last save
+        =============================================================
+
+        Returns
+        -------
+        bool
+            True if elements have been added, deleted or changed, or the links
+            have been changed, False if not.
+        """
+
+        if len(self.__added) > 0 or len(self.__deleted) > 0 or \
+                self.__linker.is_dirty:
+            return True
+        return any(element.is_dirty for element in self.__elements.values()
+                   if element is not None)
+
+
     @property
     def is_dof(self) -> bool:
         """
@@ -1535,7 +1785,7 @@ class Dataset(DofSerializable):
         return self.__linker
 
 
-    def load_from(self, handler_id : int):
+    def load_from(self, handler_id : int, lazy : bool = False):
         """
         Load dataset from the working directory of DofFile
         ==================================================
@@ -1544,6 +1794,9 @@ class Dataset(DofSerializable):
         ==========
         handler_id : int
             Id of a local handler to use.
+        lazy : bool, optional (False if omitted)
+            Whether to load the data of the elements on their first access
+            instead of loading every element now.
 
         Raises
         ------
@@ -1557,6 +1810,19 @@ class Dataset(DofSerializable):
             If the data in dataset.info file does not contain required fields.
         DofError
             If there is no element_type data field in the dataset.info file.
+
+        Notes
+        -----
+        I.
+            The stored element files are looked up with one files() call of the
+            handler instead of an existence check per id.
+        II.
+            In the default layout the DofObjects of the elements are lazy and
+            they refer to their "<id>.obj" files through the handler, see
+            DofObject.from_loaded(). So elements can be unloaded, they are
+            tracked by the memory budget and they are loaded again on their
+            next access. Elements of the packed layout are always loaded and
+            they stay in the memory, since they have no own files.
         """
 
         if len(self.__elements) > 0:
@@ -1564,37 +1830,26 @@ class Dataset(DofSerializable):
                            'filled with this method.')
         _handler = DofObject.get_handler(DofObjectHandler.LOCAL, handler_id)
         _dataset_base = _handler.load_as_instance('dataset.base')
-        _is_dof = _dataset_base.get(JSONDescription.IS_DOF.value)
-        if _is_dof is None:
-            raise DofError('Dataset.load_from(): dataset.base is invalid, ' +
-                           'it doesn\'t contain is_dof data.')
-        self.__is_dof = _is_dof
-        _next_id = _dataset_base.get(JSONDescription.NEXT_ID.value)
-        if _next_id is None:
-            raise DofError('Dataset.load_from(): dataset.base is invalid, ' +
-                           'it doesn\'t contain next_id data.')
+        _next_id = self.__restore_base(_dataset_base)
         _element_info = _handler.load_as_instance('elements.info')
-        for i in range(_next_id):
-            _filename = '{}.obj'.format(i)
-            if _handler.exist(_filename):
-                _data = _handler.load_as_instance(_filename)
-                _info_dict = _element_info.get(i)
-                if _info_dict is None:
-                    raise DofError('Dataset.load_from(): dataset element.info' +
-                                   ' contains bad data.')
-                _element_type = _info_dict.get(
-                                            JSONDescription.ELEMENT_TYPE.value)
-                if _element_type is None:
-                    raise DofError('Dataset.load_from(): dataset missing ' +
-                                   'element type data in element.info.')
-                _info = _info_dict.get(JSONDescription.ELEMENT_INFO.value)
-                if _info is not None:
-                    _info = DataElementInfo.from_json(dumps(_info))
-                self.__elements[i] = DataElement(_data, _element_type, _info)
+        if _dataset_base.get(JSONDescription.PACKED.value, False):
+            _loaded = self.__load_packed(_handler)
+            _source_id = None
+        else:
+            _stored = set(_handler.files(''))
+            _ids = [i for i in range(_next_id)
+                    if '{}.obj'.format(i) in _stored]
+            if lazy:
+                _loaded = dict.fromkeys(_ids)
             else:
-                self.__elements[i] = None
+                _loaded = dict(zip(_ids, _handler.load_many(
+                                        ['{}.obj'.format(i) for i in _ids])))
+            _source_id = handler_id
+        self.__restore_elements(_next_id, _element_info, _loaded, _source_id)
         _linker_dict = _handler.load_as_instance('elements.links')
         self.__linker = LinkEngine.from_json(dumps(_linker_dict))
+        self.__mark_synced(_handler, _dataset_base.get(
+                                        JSONDescription.PACKED.value, False))
 
 
     @property
@@ -1611,7 +1866,8 @@ class Dataset(DofSerializable):
         return len(self.__elements)
 
 
-    def save_to(self, handler_id : int):
+    def save_to(self, handler_id : int, packed : bool = False,
+                segment_size : int = 67108864, full : bool = False):
         """
         Save dataset to the working directory of DofFile
         ================================================
@@ -1620,20 +1876,92 @@ class Dataset(DofSerializable):
         ==========
         handler_id : int
             Id of a local handler to use.
+        packed : bool, optional (False if omitted)
+            Whether to pack the elements into segment files instead of saving
+            every element into its own file.
+        segment_size : int, optional (64 MiB if omitted)
+            Size limit of a segment in bytes if packed is True.
+        full : bool, optional (False if omitted)
+            Whether to rewrite every file even if the save could be
+            incremental.
+
+        See Also
+        --------
+            Packed layout : storage.SegmentStore
+
+        Notes
+        -----
+            In the default layout every element is saved into "<id>.obj" and
+            the elements are handed over to the handler in one batch, see
+            storage.DofObjectHandler.save_many(). In the packed layout the
+            pickled elements are appended to "elements.<n>.seg" segment files
+            and their positions are saved into "elements.index". The layout is
+            saved into dataset.base, load_from() reads both.
+            All files are written in one batch of the handler, see
+            storage.DofObjectHandler.transaction().
+            If the dataset was last loaded from or saved to the same handler
+            in the default layout, the save is incremental: only the added and
+            changed elements are written, the files of the deleted elements
+            are deleted, and elements.info and elements.links are written only
+            if they have been changed. Changes inside a mutable data object are
+            not detected, see DofObject.is_dirty. The data of unchanged lazy
+            elements is not loaded by an incremental save. A full save deletes
+            the files of every deleted element that the handler still has.
         """
 
-        _element_info = {}
-        for i, element in self.__elements.items():
-            element.dof_object.save_to(handler_id, '{}.obj'.format(i))
-            _element_info[i] = element.to_info()
         _handler = DofObject.get_handler(DofObjectHandler.LOCAL, handler_id)
-        _handler.save_as_instance(_element_info, 'elements.info')
-        _dataset_base = {}
-        _dataset_base[JSONDescription.IS_DOF.value] = self.is_dof
-        _dataset_base[JSONDescription.NEXT_ID.value] = self.next_available_id
-        _handler.save_as_instance(_dataset_base, 'dataset.base')
-        _linker = self.__linker.to_json_dict(describe_only=False)
-        _handler.save_as_instance(_linker, 'elements.links')
+        _incremental = not full and not packed and self.__synced is _handler
+        _elements = [(i, element) for i, element in self.__elements.items()
+                     if element is not None]
+        if _incremental:
+            _ids = [i for i, element in _elements
+                    if i in self.__added or element.is_dirty]
+            _info_changed = len(self.__added) > 0 or \
+                            len(self.__deleted) > 0 or \
+                            any(self.__elements[i].is_info_dirty for i in _ids)
+        else:
+            _ids = [i for i, _ in _elements]
+            _info_changed = True
+        if _incremental:
+            _stale = sorted(self.__deleted - self.__added)
+        else:
+            _stale = [i for i, element in sorted(self.__elements.items())
+                      if element is None and
+                      _handler.exist('{}.obj'.format(i))]
+        with _handler.transaction():
+            if packed:
+                _store = SegmentStore(_handler, segment_size=segment_size)
+                for i in _ids:
+                    _store.append(i, pickle_dumps(
+                                        self.__elements[i].dof_object.data))
+                _store.flush()
+            else:
+                _handler.save_many([(self.__elements[i].dof_object.data,
+                                     '{}.obj'.format(i)) for i in _ids])
+            for i in _stale:
+                _handler.delete('{}.obj'.format(i))
+            if _info_changed:
+                _element_info = {}
+                for i, element in _elements:
+                    _element_info[i] = element.to_info()
+                _handler.save_as_instance(_element_info, 'elements.info')
+            _dataset_base = {}
+            _dataset_base[JSONDescription.IS_DOF.value] = self.is_dof
+            _dataset_base[JSONDescription.NEXT_ID.value] = \
+                                                        self.next_available_id
+            _dataset_base[JSONDescription.PACKED.value] = packed
+            _handler.save_as_instance(_dataset_base, 'dataset.base')
+            if not _incremental or self.__linker.is_dirty:
+                _linker = self.__linker.to_json_dict(describe_only=False)
+                _handler.save_as_instance(_linker, 'elements.links')
+        if _incremental:
+            for i in _ids:
+                self.__elements[i].is_dirty = False
+            self.__linker.is_dirty = False
+            self.__added = set()
+            self.__deleted = set()
+        else:
+            self.__mark_synced(_handler, packed)
 
 
     def to_json_dict(self, describe_only : bool = True) -> dict:
@@ -1799,6 +2127,141 @@ class Dataset(DofSerializable):
         return (count, count_x, count_y)
 
 
+    @staticmethod
+    def __load_packed(handler : DofObjectHandler) -> dict:
+        """
+        Load the elements of the packed layout
+        ======================================
+
+        Parameters
+        ----------
+        handler : DofObjectHandler
+            Handler that stores the segment and index files.
+
+        Returns
+        -------
+        dict
+            The loaded data of the stored elements by their ids.
+        """
+
+        _store = SegmentStore.load_from(handler)
+        return {i : pickle_loads(_store.read(i)) for i in _store.keys}
+
+
+    def __mark_synced(self, handler : DofObjectHandler, packed : bool):
+        """
+        Mark the dataset as stored in a handler
+        =======================================
+
+        Parameters
+        ----------
+        handler : DofObjectHandler
+            The handler that stores the dataset.
+        packed : bool
+            Whether the dataset is stored in the packed layout.
+
+        Notes
+        -----
+            Every change is cleared. Further saves to the handler can be
+            incremental if the layout is not packed.
+        """
+
+        for element in self.__elements.values():
+            if element is not None:
+                element.is_dirty = False
+        self.__linker.is_dirty = False
+        self.__added = set()
+        self.__deleted = set()
+        self.__synced = None if packed else handler
+
+
+    def __restore_base(self, dataset_base : dict) -> int:
+        """
+        Restore the base data of the dataset
+        ====================================
+
+        Parameters
+        ----------
+        dataset_base : dict
+            The content of the dataset.base file.
+
+        Returns
+        -------
+        int
+            The next available id of the stored dataset.
+
+        Raises
+        ------
+        DofError
+            If there is no is_dof data field in the dataset.base file.
+        DofError
+            If there is no max_id data field in the dataset.base file.
+        """
+
+        _is_dof = dataset_base.get(JSONDescription.IS_DOF.value)
+        if _is_dof is None:
+            raise DofError('Dataset.load_from(): dataset.base is invalid, ' +
+                           'it doesn\'t contain is_dof data.')
+        self.__is_dof = _is_dof
+        _next_id = dataset_base.get(JSONDescription.NEXT_ID.value)
+        if _next_id is None:
+            raise DofError('Dataset.load_from(): dataset.base is invalid, ' +
+                           'it doesn\'t contain next_id data.')
+        return _next_id
+
+
+    def __restore_elements(self, next_id : int, element_info : dict,
+                           loaded : dict, handler_id : int):
+        """
+        Restore the elements of the dataset
+        ===================================
+
+        Parameters
+        ----------
+        next_id : int
+            The next available id of the stored dataset.
+        element_info : dict
+            The content of the elements.info file.
+        loaded : dict
+            The loaded data of the stored elements by their ids, None values
+            for elements to load lazily.
+        handler_id : int | NoneType
+            Id of the handler that stores the "<id>.obj" files of the elements,
+            or None if the elements have no own files.
+
+        Raises
+        ------
+        DofError
+            If the data in dataset.info file does not contain required fields.
+        DofError
+            If there is no element_type data field in the dataset.info file.
+        """
+
+        for i in range(next_id):
+            if i in loaded:
+                _info_dict = element_info.get(i)
+                if _info_dict is None:
+                    raise DofError('Dataset.load_from(): dataset element.info' +
+                                   ' contains bad data.')
+                _element_type = _info_dict.get(
+                                            JSONDescription.ELEMENT_TYPE.value)
+                if _element_type is None:
+                    raise DofError('Dataset.load_from(): dataset missing ' +
+                                   'element type data in element.info.')
+                _info = _info_dict.get(JSONDescription.ELEMENT_INFO.value)
+                if _info is not None:
+                    _info = DataElementInfo.from_json(dumps(_info))
+                if handler_id is None:
+                    _data = loaded[i]
+                else:
+                    _data = DofObject.from_loaded(loaded[i],
+                                                  '{}.obj'.format(i),
+                                                  handler_id, lazy=True)
+                self.__elements[i] = DataElement(_data, _element_type, _info)
+            else:
+                self.__elements[i] = None
+
+
     def __getitem__(self, id_to_get : int) -> any:
         """
         Get an item from the dataset
@@ -105,6 +105,8 @@ class JSONDescription(Enum):
                 core.DofObject.online_link
             ONLINE_LINK_RELATIVE :
                 core.DofObject.is_relative_online
+            PACKED :
+                data.Dataset.save_to(packed)
             REAL_BINARY :
                 core.DofObject.is_binary
             X_ELEMENTS_COUNT :
@@ -131,6 +133,7 @@ class JSONDescription(Enum):
     OBJECT_TYPE = 'object_type'
     ONLINE_LINK = 'online_link'
     ONLINE_LINK_RELATIVE = 'online_link_relative'
+    PACKED = 'packed'
     REAL_BINARY = 'real_binary'
     X_ELEMENTS_COUNT = 'x_elements_count'
     Y_ELEMENTS_COUNT = 'y_elements_count'
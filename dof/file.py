@@ -16,10 +16,13 @@ Notes
 """
 
 
+from io import BytesIO
 from json import dumps as json_dumps, loads as json_loads
 from os import mkdir
 from os.path import isdir, splitext
-from pickle import dump as pickle_dump, load as pickle_load
+from pickle import dump as pickle_dump, dumps as pickle_dumps
+from pickle import load as pickle_load
+from urllib.parse import urlsplit
 from zipfile import ZipFile
 
 from .core import DofObject
@@ -27,6 +30,7 @@ from .data import Dataset
 from .datamodel import ContentForm, JSONContent, JSONDescription, JSONRoot
 from .datamodel import create_json_dict, get_content
 from .error import DofError
+from .handlers import OnlineHandler, ZipHandler
 from .information import ContainerInfo, DocumentContainer, ModelInfo
 from .storage import DofObjectHandler, LocalHandler
 
@@ -58,7 +62,8 @@ class DofFile:
 
 
     def __init__(self, *args : any, dof_basepath : str = './dof_basepath',
-                 restore_mode : bool = False):
+                 restore_mode : bool = False,
+                 handler : DofObjectHandler = None):
         """
         Initialize an instance of the object
         ====================================
@@ -72,6 +77,10 @@ class DofFile:
         restore_mode : bool, optional (False if omitted)
             Mode selector flag between normal mode (False) and restore mode
             (True).
+        handler : DofObjectHandler, optional (None if omitted)
+            Local handler to store the content of the DofFile. If None, a
+            LocalHandler is created with dof_basepath as base path. The handler
+            is opened if it is not open yet.
 
         Raises
         ------
@@ -130,11 +139,14 @@ class DofFile:
                                '\n'.join(errormessage))
         else:
             self.__create_attributes()
-        if not isdir(dof_basepath):
-            mkdir(dof_basepath)
+        if handler is None:
+            if not isdir(dof_basepath):
+                mkdir(dof_basepath)
+            handler = LocalHandler(dof_basepath)
+        if not handler.is_open:
+            handler.open()
         self.__dof_basepath = dof_basepath
-        self.__handler_id = DofObject.add_handler(
-                            LocalHandler(self.__dof_basepath), as_default=False)
+        self.__handler_id = DofObject.add_handler(handler, as_default=False)
 
 
     def check(self) -> tuple:
@@ -222,13 +234,17 @@ class DofFile:
         if not isdir(new_path):
             mkdir(new_path)
         self.__dof_basepath = new_path
-        self.__handler_id = DofObject.add_handler(
-                            LocalHandler(self.__dof_basepath), as_default=True)
+        _handler = LocalHandler(self.__dof_basepath)
+        _handler.open()
+        self.__handler_id = DofObject.add_handler(_handler, as_default=True)
 
 
     @staticmethod
     def from_file(filename : str, file_type : str = '',
-                  dof_basepath : str = '!') -> any:
+                  dof_basepath : str = '!',
+                  handler : DofObjectHandler = None,
+                  extract : bool = True,
+                  online_handler : OnlineHandler = None) -> any:
         """
         Create DoF file from a file
         ===========================
@@ -241,6 +257,16 @@ class DofFile:
             Extension of file.
         dof_basepath : str, optional ('!' if omitted)
             Base directory of the content of the DofFile.
+        handler : DofObjectHandler, optional (None if omitted)
+            Local handler to restore the content of a DOF_FILE into. If None,
+            the content is extracted into dof_basepath.
+        extract : bool, optional (True if omitted)
+            Whether to extract a DOF_FILE. If False, the content is read
+            directly from the archive.
+        online_handler : OnlineHandler, optional (None if omitted)
+            Handler to download filename with if it is an http or https URL.
+            If None, a temporary handler with ranged downloads and hedging is
+            used.
 
         Returns
         -------
@@ -255,6 +281,8 @@ class DofFile:
             In autodetect mode the extension of file cannot be detected.
         DofError
             The content of source file is invalid.
+        DofError
+            When a handler is given and extract is False.
 
         See Also
         --------
@@ -262,9 +290,28 @@ class DofFile:
 
         Notes
         -----
+        I.
             When the file_type is an empty string, the function works in
             autodetect mode.
-        """
+        II.
+            If a handler is given, the members of a DOF_FILE are copied into
+            the handler instead of the filesystem. With a MemoryHandler the
+            whole restore runs in the memory.
+        III.
+            If extract is False, the content of a DOF_FILE is loaded through a
+            ZipHandler, so nothing is written to the disk. The handler of the
+            returned DofFile is read-only, set dof_basepath to get a writable
+            one before saving it as a DOF_FILE.
+        IV.
+            If filename is an http or https URL, the file is downloaded into
+            the memory with parallel byte-range requests (see OnlineHandler)
+            and it is loaded from there.
+        """
+
+        # pylint: disable=too-many-arguments
+        #         We consider a better practice having long list of named
+        #         arguments then having **kwargs only.
+
         if file_type not in [DofFile.DOF_AUTODETECT, DofFile.DOF_FILE,
                              DofFile.DOF_JSON, DofFile.DOF_PYTHON]:
             raise DofError('DofFile.from_file(): unsupported file type.')
@@ -276,32 +323,56 @@ class DofFile:
                                'type.')
         else:
             _file_type = file_type
+        if not extract and handler is not None:
+            raise DofError('DofFile.from_file(): a handler cannot be used ' +
+                           'without extraction.')
+        if (isinstance(filename, str) and
+            urlsplit(filename).scheme in ['http', 'https']):
+            _source = BytesIO(DofFile.__download(filename, online_handler))
+        else:
+            _source = filename
         if _file_type == DofFile.DOF_FILE:
-            _handler_id = DofObject.add_handler(LocalHandler(dof_basepath))
-            _handler = DofObject.get_handler(DofObjectHandler.LOCAL,
-                                             _handler_id)
-            with ZipFile(filename, 'r') as instream:
-                _dof_basepath = instream.read('dof.basepath')
-                if dof_basepath != '!':
-                    _dof_basepath = dof_basepath
-                instream.extractall(_dof_basepath)
-            _handler_id = DofObject.add_handler(LocalHandler(_dof_basepath))
-            _handler = DofObject.get_handler(DofObjectHandler.LOCAL,
-                                                                _handler_id)
+            if not extract:
+                handler = ZipHandler(_source)
+                handler.open()
+                _dof_basepath = dof_basepath
+            else:
+                with ZipFile(_source, 'r') as instream:
+                    if handler is None:
+                        _dof_basepath = instream.read('dof.basepath')
+                        if dof_basepath != '!':
+                            _dof_basepath = dof_basepath
+                        instream.extractall(_dof_basepath)
+                        handler = LocalHandler(_dof_basepath)
+                        handler.open()
+                    else:
+                        _dof_basepath = dof_basepath
+                        if not handler.is_open:
+                            handler.open()
+                        for _name in instream.namelist():
+                            handler.save_as_binary(instream.read(_name),
+                                                   _name)
+            _handler_id = DofObject.add_handler(handler)
             _dataset = Dataset()
             _dataset.load_from(_handler_id)
-            _docments = _handler.load_as_instance('dof.documents')
-            _info = _handler.load_as_instance('dof.info')
-            _model_info = _handler.load_as_instance('dof.modelinfo')
+            _docments = handler.load_as_instance('dof.documents')
+            _info = handler.load_as_instance('dof.info')
+            _model_info = handler.load_as_instance('dof.modelinfo')
             result = DofFile(_dataset, _docments, _info, _model_info,
-                             dof_basepath=_dof_basepath)
+                             dof_basepath=_dof_basepath, handler=handler)
         elif _file_type == DofFile.DOF_JSON:
-            with open(filename, 'r') as instream:
-                json_string = instream.read()
+            if isinstance(_source, BytesIO):
+                json_string = _source.getvalue().decode('utf8')
+            else:
+                with open(_source, 'r') as instream:
+                    json_string = instream.read()
             result = DofFile.from_json(json_string)
         elif _file_type == DofFile.DOF_PYTHON:
-            with open(filename, 'rb') as instream:
-                result = pickle_load(instream)
+            if isinstance(_source, BytesIO):
+                result = pickle_load(_source)
+            else:
+                with open(_source, 'rb') as instream:
+                    result = pickle_load(instream)
         if not isinstance(result, DofFile):
             raise DofError('DofFile.from_file(): got invalid instance.')
         return result
@@ -603,20 +674,33 @@ class DofFile:
         DofError
             When some object could not be loaded into memory and
             halt_if_not_in_memory flag is True.
+
+        Notes
+        -----
+            The dataset is saved incrementally into the working directory if it
+            was loaded from or saved to the handler of the DofFile before, so
+            only the changed elements are written, see Dataset.save_to().
+            Instances that are stored with out-of-band buffers (see
+            LocalHandler.out_of_band) are pickled in-band into the archive, so
+            it doesn't depend on the sidecars of the working directory.
         """
 
-        self.__dataset.save_to(self.__handler_id)
         _handler = DofObject.get_handler(DofObjectHandler.LOCAL,
                                          self.__handler_id)
-        _handler.save_as_instance(self.__documents, 'dof.documents')
-        _handler.save_as_instance(self.__dof_basepath, 'dof.basepath')
-        _handler.save_as_instance(self.__info, 'dof.info')
-        _handler.save_as_instance(self.__model_info, 'dof.modelinfo')
+        with _handler.transaction():
+            self.__dataset.save_to(self.__handler_id)
+            _handler.save_as_instance(self.__documents, 'dof.documents')
+            _handler.save_as_instance(self.__dof_basepath, 'dof.basepath')
+            _handler.save_as_instance(self.__info, 'dof.info')
+            _handler.save_as_instance(self.__model_info, 'dof.modelinfo')
         _files = _handler.files('')
         with ZipFile(filename, 'w', allowZip64=True) as outstream:
             for _filename in _files:
-                outstream.writestr(_filename,
-                                   _handler.load_as_binary(_filename))
+                if _handler.exist(_filename + LocalHandler.SIDECAR_EXTENSION):
+                    _data = pickle_dumps(_handler.load_as_instance(_filename))
+                else:
+                    _data = _handler.load_as_binary(_filename)
+                outstream.writestr(_filename, _data)
 
 
     def to_json(self, describe_only : bool = True, **kwargs) -> str:
@@ -743,6 +827,40 @@ class DofFile:
             self.__model_info = ModelInfo()
 
 
+    @staticmethod
+    def __download(url : str, online_handler : OnlineHandler) -> any:
+        """
+        Download a file into the memory
+        ===============================
+
+        Parameters
+        ----------
+        url : str
+            The http or https URL of the file.
+        online_handler : OnlineHandler | NoneType
+            Handler to download with. If None, a temporary handler with ranged
+            downloads and hedging is used.
+
+        Returns
+        -------
+        bytes | bytearray
+            Content of the file.
+        """
+
+        if online_handler is not None:
+            if not online_handler.is_open:
+                online_handler.open()
+            return online_handler.load_as_binary(url, False)
+        _handler = OnlineHandler(url, range_size=OnlineHandler.RANGE_SIZE,
+                                 hedge_percentile=95)
+        _handler.open()
+        try:
+            result = _handler.load_as_binary(url, False)
+        finally:
+            _handler.close()
+        return result
+
+
     def __getitem__(self, id_to_get : int) -> any:
         """
         Get an item from the dataset
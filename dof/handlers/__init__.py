@@ -0,0 +1,21 @@
+"""
+DoF - Deep Model Core Output Framework
+======================================
+
+Submodule: handlers
+
+Notes
+-----
+    Storage handlers beyond the LocalHandler of the storage module. Every
+    handler implements storage.DofObjectHandler, so any of them can be added
+    to the registry of DofObject.
+"""
+
+
+from .archive import ZipHandler
+from .dedup import DedupHandler
+from .memory import MemoryHandler
+from .online import OnlineHandler
+from .prefetch import PrefetchHandler
+from .sqlite import SqliteHandler
+from .tiered import TieredHandler
@@ -0,0 +1,693 @@
+"""
+DoF - Deep Model Core Output Framework
+======================================
+
+Submodule: handlers.archive
+"""
+
+
+from contextlib import contextmanager
+from functools import partial
+from io import BufferedReader
+import json
+import os
+from os.path import normpath
+import pickle
+from zipfile import ZipFile
+
+from ..error import DofError
+from ..storage import CompressionPolicy, CompressionReader, DofObjectHandler
+from ..storage import LocalHandler
+
+
+class ZipHandler(DofObjectHandler):
+    """
+    Read-only storage handler of zip archives
+    =========================================
+
+    Attributes
+    ----------
+    archive : str | file object (read-only)
+        Get the path or the file object of the archive.
+    encoding : str
+        Encoding type for files with textual content (text, JSON).
+    handler_type : str (inherited) (read-only)
+        Get the type of the handler.
+    is_closed : bool (read-only)
+        Get whether the handler is closed or not.
+    is_open : bool (read-only)
+        Get whether the handler is open or not.
+
+    Notes
+    -----
+    I.
+        The handler serves the members of an archive, like a .dof file, without
+        extracting it. Instances are unpickled straight from the member stream,
+        so no copy of the member is needed on the disk or in the memory.
+    II.
+        Locations are member names, there is no base path. The is_relative
+        parameters are accepted for the compatibility with the interface and
+        they are ignored. Every save function raises DofError.
+    III.
+        Files saved by LocalHandler with out_of_band=True cannot be archived:
+        their pickles refer to the buffers of a sidecar file that this handler
+        doesn't read, so load_as_instance() raises DofError for them.
+    """
+
+
+    def __init__(self, archive : any, encoding : str = 'utf8'):
+        """
+        Initialize an instance of the object
+        ====================================
+
+        Parameters
+        ----------
+        archive : str | file object
+            Path or file object of the archive.
+        encoding : str, optional (utf8 if omitted)
+            Encoding type of textual files like text and JSON files.
+        """
+
+        super().__init__(DofObjectHandler.LOCAL)
+        self.__archive = archive
+        self.__encoding = encoding
+        self.__zipfile = None
+        self.__members = set()
+
+
+    def after_fork(self) -> bool:
+        """
+        Reinitialize the state of the handler in a forked child process
+        ===============================================================
+
+        Returns
+        -------
+        bool
+            True if the state has been reinitialized, False if it has already
+            been reinitialized in the actual process.
+
+        Notes
+        -----
+            An archive file shares its position with the parent process, so it
+            is opened again in the child. Archives in file objects are left as
+            they are.
+        """
+
+        if not super().after_fork():
+            return False
+        if self.__zipfile is not None and isinstance(self.__archive, str):
+            self.__zipfile.close()
+            self.__zipfile = ZipFile(self.__archive, 'r')
+        return True
+
+
+    @property
+    def archive(self) -> any:
+        """
+        Get the archive
+        ===============
+
+        Returns
+        -------
+        str | file object
+            Path or file object of the archive.
+        """
+
+        return self.__archive
+
+
+    def close(self):
+        """
+        Close the connection with the storage
+        =====================================
+        """
+
+        if self.__zipfile is not None:
+            self.__zipfile.close()
+            self.__zipfile = None
+            self.__members = set()
+
+
+    def delete(self, location : str, is_relative : bool = True):
+        """
+        Delete a file
+        =============
+
+        Parameters
+        ----------
+        location : str
+            Location of the file to delete.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Raises
+        ------
+        DofError
+            Always, the handler is read-only.
+        """
+
+        raise DofError('ZipHandler.delete(): handler is read-only.')
+
+
+    @property
+    def encoding(self) -> str:
+        """
+        Get the value of encoding
+        =========================
+
+        Returns
+        -------
+        str
+            Encoding type of textual files.
+        """
+
+        return self.__encoding
+
+
+    @encoding.setter
+    def encoding(self, newvalue : str):
+        """
+        Set the value of encoding
+        =========================
+
+        Parameters
+        ----------
+        newvalue : str
+            Encoding type of textual files.
+        """
+
+        self.__encoding = newvalue
+
+
+    def exist(self, location : str, is_relative : bool = True) -> bool:
+        """
+        Get whether a file exists or not
+        ================================
+
+        Parameters
+        ----------
+        location : str
+            Location to check.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Returns
+        -------
+        bool
+            True if the file exists, False if not.
+        """
+
+        return self.__member(location) in self.__members
+
+
+    def files(self, location : str, is_relative : bool = True) -> list:
+        """
+        Get list of files in a directory
+        ================================
+
+        Parameters
+        ----------
+        location : str
+            Location to check.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Returns
+        -------
+        list
+            List of files, empty list if no files.
+        """
+
+        _location = self.__member(location)
+        if _location == '.':
+            _location = ''
+        return sorted(member.rpartition('/')[2] for member in self.__members
+                      if member.rpartition('/')[0] == _location)
+
+
+    @property
+    def is_closed(self) -> bool:
+        """
+        Get whether the handler is closed or not
+        ========================================
+
+        Returns
+        -------
+        bool
+            True if the handler is closed, False if not.
+        """
+
+        return self.__zipfile is None
+
+
+    @property
+    def is_open(self) -> bool:
+        """
+        Get whether the handler is open or not
+        ======================================
+
+        Returns
+        -------
+        bool
+            True if the handler is open, False if not.
+        """
+
+        return self.__zipfile is not None
+
+
+    def load_as_binary(self, location : str,
+                       is_relative : bool = True) -> bytes:
+        """
+        Load data as binary data
+        ========================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Returns
+        -------
+        bytes
+            Load data as bytes.
+
+        Raises
+        ------
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If the target file doesn't exist.
+        """
+
+        _member = self.__check_member(location, 'load_as_binary')
+        return CompressionPolicy.decompress(self.__zipfile.read(_member))
+
+
+    def load_as_instance(self, location : str,
+                         is_relative : bool = True) -> any:
+        """
+        Load data as instance
+        =====================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Returns
+        -------
+        any
+            Load data as any instances.
+
+        Raises
+        ------
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If the target file doesn't exist.
+        DofError
+            When the member refers to out-of-band buffers of a sidecar file.
+        """
+
+        _member = self.__check_member(location, 'load_as_instance')
+        with self.__zipfile.open(_member) as instream:
+            _header = instream.read(len(CompressionPolicy.MAGIC) + 1)
+            try:
+                if CompressionPolicy.is_compressed(_header):
+                    result = pickle.loads(CompressionPolicy.decompress(
+                                          _header + instream.read()))
+                else:
+                    instream.seek(0)
+                    result = pickle.load(instream)
+            except pickle.UnpicklingError:
+                if not self.exist(location + LocalHandler.SIDECAR_EXTENSION):
+                    raise
+                raise DofError('ZipHandler.load_as_instance(): "{}" refers '
+                               .format(location) + 'to out-of-band buffers, ' +
+                               'which are not supported.') from None
+            self.count_payload(bytes_in=instream.tell())
+        return result
+
+
+    def load_as_json(self, location : str, is_relative : bool = True) -> any:
+        """
+        Load data as JSON data
+        ======================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Returns
+        -------
+        any
+            Load data as JSON.
+
+        Raises
+        ------
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If the target file doesn't exist.
+        """
+
+        _member = self.__check_member(location, 'load_as_json')
+        return json.loads(self.__zipfile.read(_member)
+                          .decode(self.__encoding))
+
+
+    def load_as_text(self, location : str, is_relative : bool = True) -> list:
+        """
+        Load data as text
+        =================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Returns
+        -------
+        list[str]
+            Load data as a list of lines.
+
+        Raises
+        ------
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If the target file doesn't exist.
+        """
+
+        _member = self.__check_member(location, 'load_as_text')
+        return (self.__zipfile.read(_member).decode(self.__encoding)
+                .splitlines(True))
+
+
+    def load_range(self, location : str, offset : int, length : int,
+                   is_relative : bool = True) -> bytes:
+        """
+        Load a byte range of binary data
+        ================================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        offset : int
+            Position of the first byte to load.
+        length : int
+            Number of bytes to load.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Returns
+        -------
+        bytes
+            The bytes of the range. It is shorter than length if the range
+            reaches over the end of the data.
+
+        Raises
+        ------
+        DofError
+            When offset or length is negative.
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If the target file doesn't exist.
+
+        Notes
+        -----
+            The member is opened and seeked to the offset. Stored members are
+            read only in the given range, deflated members are decompressed up
+            to the end of the range.
+        """
+
+        DofObjectHandler.check_range(offset, length)
+        _member = self.__check_member(location, 'load_range')
+        return CompressionPolicy.read_range(partial(self.__read_at, _member),
+                                            offset, length)
+
+
+    def open(self):
+        """
+        Open the connection with the storage
+        ====================================
+
+        Notes
+        -----
+            The archive is opened for reading and its member names are indexed.
+        """
+
+        if self.__zipfile is None:
+            self.__zipfile = ZipFile(self.__archive, 'r')
+            self.__members = set(self.__zipfile.namelist())
+
+
+    @contextmanager
+    def open_read(self, location : str, is_relative : bool = True) -> any:
+        """
+        Open a file to read as a binary stream
+        ======================================
+
+        Parameters
+        ----------
+        location : str
+            Location to read from.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Returns
+        -------
+        Iterator[file object]
+            Context manager that yields a readable binary stream of the
+            decompressed content.
+
+        Raises
+        ------
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If the target file doesn't exist.
+
+        Notes
+        -----
+            The member is read and decompressed chunk by chunk.
+        """
+
+        _member = self.__check_member(location, 'open_read')
+        with self.__zipfile.open(_member) as instream:
+            with BufferedReader(CompressionReader(instream)) as result:
+                yield result
+
+
+    def open_write(self, location : str, is_relative : bool = True):
+        """
+        Refuse to open a file to write
+        ==============================
+
+        Parameters
+        ----------
+        location : str
+            Location to write to.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Raises
+        ------
+        DofError
+            Always, since the handler is read-only.
+        """
+
+        raise DofError('ZipHandler.open_write(): handler is read-only.')
+
+
+    def save_as_binary(self, data : any, location : str,
+                       is_relative : bool = True):
+        """
+        Save data as binary
+        ===================
+
+        Parameters
+        ----------
+        data : any
+            Data to save in the form true binary data.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Raises
+        ------
+        DofError
+            Always, the handler is read-only.
+        """
+
+        raise DofError('ZipHandler.save_as_binary(): handler is read-only.')
+
+
+    def save_as_instance(self, data : any, location : str,
+                         is_relative : bool = True):
+        """
+        Save data as instance
+        =====================
+
+        Parameters
+        ----------
+        data : any
+            Data to save in the form a python instance.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Raises
+        ------
+        DofError
+            Always, the handler is read-only.
+        """
+
+        raise DofError('ZipHandler.save_as_instance(): handler is read-only.')
+
+
+    def save_as_json(self, data : any, location : str,
+                     is_relative : bool = True):
+        """
+        Save data as JSON data
+        ======================
+
+        Parameters
+        ----------
+        data : any
+            Data to save in the form JSON.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Raises
+        ------
+        DofError
+            Always, the handler is read-only.
+        """
+
+        raise DofError('ZipHandler.save_as_json(): handler is read-only.')
+
+
+    def save_as_text(self, data : any, location : str,
+                     is_relative : bool = True):
+        """
+        Save data as text
+        =================
+
+        Parameters
+        ----------
+        data : str | list
+            Data to save as text.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Raises
+        ------
+        DofError
+            Always, the handler is read-only.
+        """
+
+        raise DofError('ZipHandler.save_as_text(): handler is read-only.')
+
+
+    def __check_member(self, location : str, caller : str) -> str:
+        """
+        Check whether a member can be loaded
+        ====================================
+
+        Parameters
+        ----------
+        location : str
+            Location of the member.
+        caller : str
+            Name of the calling function for error messages.
+
+        Returns
+        -------
+        str
+            Name of the member.
+
+        Raises
+        ------
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If the target file doesn't exist.
+        """
+
+        if self.__zipfile is None:
+            raise DofError('ZipHandler.{}(): handler is not open.'
+                           .format(caller))
+        _member = self.__member(location)
+        if _member not in self.__members:
+            raise DofError('ZipHandler.{}(): tried to load from '
+                           .format(caller) + 'non-existing member "{}".'
+                           .format(_member))
+        return _member
+
+
+    def __read_at(self, member : str, offset : int, length : int) -> bytes:
+        """
+        Read bytes of a member from a position
+        ======================================
+
+        Parameters
+        ----------
+        member : str
+            Name of the member.
+        offset : int
+            Position of the first byte to read.
+        length : int | NoneType
+            Number of bytes to read, None means up to the end of the member.
+
+        Returns
+        -------
+        bytes
+            The bytes read, shorter than length at the end of the member.
+        """
+
+        with self.__zipfile.open(member) as instream:
+            instream.seek(offset)
+            result = instream.read(-1 if length is None else length)
+        return result
+
+
+    @staticmethod
+    def __member(location : str) -> str:
+        """
+        Get the member name of a location
+        =================================
+
+        Parameters
+        ----------
+        location : str
+            Location of a file.
+
+        Returns
+        -------
+        str
+            Member name with forward slashes.
+        """
+
+        return normpath(location).replace(os.sep, '/')
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,884 @@
+"""
+DoF - Deep Model Core Output Framework
+======================================
+
+Submodule: handlers.dedup
+"""
+
+
+from hashlib import blake2b
+import json
+from os.path import normpath, split
+import pickle
+from threading import RLock
+
+from ..error import DofError
+from ..storage import DofObjectHandler
+
+
+class DedupHandler(DofObjectHandler):
+    """
+    Content-addressed handler that stores each unique payload once
+    ==============================================================
+
+    Attributes
+    ----------
+    blob_count : int (read-only)
+        Get the number of stored unique payloads.
+    digest_size : int (read-only)
+        Get the size of the digests in bytes.
+    encoding : str
+        Encoding type for files with textual content (text, JSON).
+    handler_type : str (inherited) (read-only)
+        Get the type of the handler.
+    index_location : str (read-only)
+        Get the location of the index in the upstream handler.
+    is_closed : bool (read-only)
+        Get whether the handler is closed or not.
+    is_open : bool (read-only)
+        Get whether the handler is open or not.
+    upstream : DofObjectHandler (read-only)
+        Get the handler that stores the blobs and the index.
+
+    Notes
+    -----
+    I.
+        Every saved file is serialized and hashed with blake2b. The payload is
+        stored as a blob named by its digest ("<digest>.blob") in the upstream
+        handler, only if there is no such blob yet. The location of the file
+        only refers to the digest, so identical elements (eg. repeated labels)
+        cost one blob and their writes cost no I/O at all.
+    II.
+        The references (location -> digest) are kept in the memory and the
+        number of references of each digest is counted. A blob is released
+        when its last reference is deleted or overwritten.
+    III.
+        The references are saved to index_location of the upstream handler by
+        close(), commit_batch() and save_index(). Blobs are always written
+        before the index that refers them and released blobs are deleted only
+        after an index without their references is saved, so a crash may leave
+        unreferenced blobs but never references without blobs.
+    IV.
+        Locations are normalized, the is_relative parameters are forwarded to
+        the upstream handler for the index only. Blobs are stored at relative
+        locations of the upstream handler.
+    V.
+        The references are guarded by a lock, the upstream handler is called
+        outside of it. Writes of new blobs, saves of the index and deletes of
+        blobs are serialized by a second lock, so a blob is never deleted
+        while it is referred again.
+    """
+
+    # Extension of blobs in the upstream handler.
+    BLOB_EXTENSION = '.blob'
+
+
+    def __init__(self, upstream : DofObjectHandler, digest_size : int = 32,
+                 index_location : str = 'dedup.index',
+                 encoding : str = 'utf8'):
+        """
+        Initialize an instance of the object
+        ====================================
+
+        Parameters
+        ----------
+        upstream : DofObjectHandler
+            Handler to store the blobs and the index.
+        digest_size : int, optional (32 if omitted)
+            Size of the blake2b digests in bytes, between 1 and 64.
+        index_location : str, optional ('dedup.index' if omitted)
+            Location of the index in the upstream handler.
+        encoding : str, optional (utf8 if omitted)
+            Encoding type of textual files like text and JSON files.
+
+        Raises
+        ------
+        DofError
+            When digest_size is out of range.
+        """
+
+        if not 1 <= digest_size <= 64:
+            raise DofError('DedupHandler.init(): digest_size must be ' +
+                           'between 1 and 64.')
+        super().__init__(upstream.handler_type)
+        self.__upstream = upstream
+        self.__digest_size = digest_size
+        self.__index_location = index_location
+        self.__encoding = encoding
+        self.__references = {}
+        self.__counts = {}
+        self.__index_dirty = False
+        self.__snapshot = None
+        self.__released = []
+        self.__batch_depth = 0
+        self.__lock = RLock()
+        self.__io_lock = RLock()
+
+
+    def abort_batch(self):
+        """
+        Drop the writes of the actual batch
+        ===================================
+
+        Notes
+        -----
+            The references are restored to their state at the beginning of the
+            outermost batch and the blobs released by the batch are kept. Blobs
+            written by the batch are left for the upstream handler to drop.
+        """
+
+        self.__upstream.abort_batch()
+        with self.__lock:
+            if self.__batch_depth == 0:
+                return
+            self.__batch_depth = 0
+            self.__references, self.__counts, self.__released = self.__snapshot
+            self.__snapshot = None
+            self.__index_dirty = True
+
+
+    def after_fork(self) -> bool:
+        """
+        Reinitialize the state of the handler in a forked child process
+        ===============================================================
+
+        Returns
+        -------
+        bool
+            True if the state has been reinitialized, False if it has already
+            been reinitialized in the actual process.
+
+        Notes
+        -----
+            The upstream handler is reinitialized as well.
+        """
+
+        if not super().after_fork():
+            return False
+        self.__lock = RLock()
+        self.__io_lock = RLock()
+        self.__upstream.after_fork()
+        return True
+
+
+    def begin_batch(self):
+        """
+        Begin a batch of writes
+        =======================
+        """
+
+        self.__upstream.begin_batch()
+        with self.__lock:
+            if self.__batch_depth == 0:
+                self.__snapshot = (dict(self.__references),
+                                   dict(self.__counts), list(self.__released))
+            self.__batch_depth += 1
+
+
+    @property
+    def blob_count(self) -> int:
+        """
+        Get the number of stored unique payloads
+        ========================================
+
+        Returns
+        -------
+        int
+            Number of blobs.
+        """
+
+        return len(self.__counts)
+
+
+    def close(self):
+        """
+        Close the connection with the storage
+        =====================================
+
+        Notes
+        -----
+            The index is saved if it has changed, then the upstream handler is
+            closed.
+        """
+
+        if self.__upstream.is_open:
+            self.save_index()
+        self.__upstream.close()
+
+
+    def commit_batch(self):
+        """
+        Commit the actual batch
+        =======================
+
+        Notes
+        -----
+            The index is written into the outermost batch before it is
+            committed, so the blobs and the references land together. Released
+            blobs are deleted after the commit.
+        """
+
+        with self.__lock:
+            _outermost = self.__batch_depth == 1
+        if _outermost:
+            self.save_index()
+        with self.__lock:
+            if self.__batch_depth > 0:
+                self.__batch_depth -= 1
+            _released = []
+            if self.__batch_depth == 0:
+                self.__snapshot = None
+                _released = self.__released
+                self.__released = []
+        self.__upstream.commit_batch()
+        self.__delete_blobs(_released)
+
+
+    def delete(self, location : str, is_relative : bool = True):
+        """
+        Delete a file
+        =============
+
+        Parameters
+        ----------
+        location : str
+            Location of the file to delete.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Raises
+        ------
+        DofError
+            If the target file doesn't exist.
+
+        Notes
+        -----
+            If the file was the last reference of its blob, the blob is deleted
+            by the next save of the index.
+        """
+
+        _location = normpath(location)
+        with self.__lock:
+            if _location not in self.__references:
+                raise DofError('DedupHandler.delete(): tried to delete ' +
+                               'non-existing file "{}".'.format(_location))
+            self.__release(self.__references.pop(_location))
+            self.__index_dirty = True
+
+
+    @property
+    def digest_size(self) -> int:
+        """
+        Get the size of the digests
+        ===========================
+
+        Returns
+        -------
+        int
+            Size of the digests in bytes.
+        """
+
+        return self.__digest_size
+
+
+    @property
+    def encoding(self) -> str:
+        """
+        Get the value of encoding
+        =========================
+
+        Returns
+        -------
+        str
+            Encoding type of textual files.
+        """
+
+        return self.__encoding
+
+
+    @encoding.setter
+    def encoding(self, newvalue : str):
+        """
+        Set the value of encoding
+        =========================
+
+        Parameters
+        ----------
+        newvalue : str
+            Encoding type of textual files.
+        """
+
+        self.__encoding = newvalue
+
+
+    def exist(self, location : str, is_relative : bool = True) -> bool:
+        """
+        Get whether a file exists or not
+        ================================
+
+        Parameters
+        ----------
+        location : str
+            Location to check.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Returns
+        -------
+        bool
+            True if the file exists, False if not.
+        """
+
+        return normpath(location) in self.__references
+
+
+    def files(self, location : str, is_relative : bool = True) -> list:
+        """
+        Get list of files in a directory
+        ================================
+
+        Parameters
+        ----------
+        location : str
+            Location to check.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Returns
+        -------
+        list
+            List of files, empty list if no files.
+        """
+
+        _directory = normpath(location)
+        if _directory == '.':
+            _directory = ''
+        with self.__lock:
+            _keys = list(self.__references.keys())
+        return sorted(split(key)[1] for key in _keys
+                      if split(key)[0] == _directory)
+
+
+    @property
+    def index_location(self) -> str:
+        """
+        Get the location of the index
+        =============================
+
+        Returns
+        -------
+        str
+            Location of the index in the upstream handler.
+        """
+
+        return self.__index_location
+
+
+    @property
+    def is_closed(self) -> bool:
+        """
+        Get whether the handler is closed or not
+        ========================================
+
+        Returns
+        -------
+        bool
+            True if the handler is closed, False if not.
+        """
+
+        return self.__upstream.is_closed
+
+
+    @property
+    def is_open(self) -> bool:
+        """
+        Get whether the handler is open or not
+        ======================================
+
+        Returns
+        -------
+        bool
+            True if the handler is open, False if not.
+        """
+
+        return self.__upstream.is_open
+
+
+    def load_as_binary(self, location : str,
+                       is_relative : bool = True) -> any:
+        """
+        Load data as binary data
+        ========================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Returns
+        -------
+        bytes | bytearray | memoryview
+            Load data as binary, like the upstream handler does.
+
+        Raises
+        ------
+        DofError
+            If the target file doesn't exist.
+        """
+
+        return self.__fetch(location, 'load_as_binary')
+
+
+    def load_as_instance(self, location : str,
+                         is_relative : bool = True) -> any:
+        """
+        Load data as instance
+        =====================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Returns
+        -------
+        any
+            Load data as any instances.
+
+        Raises
+        ------
+        DofError
+            If the target file doesn't exist.
+        """
+
+        _payload = self.__fetch(location, 'load_as_instance')
+        self.count_payload(bytes_in=len(_payload))
+        return pickle.loads(_payload)
+
+
+    def load_as_json(self, location : str, is_relative : bool = True) -> any:
+        """
+        Load data as JSON data
+        ======================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Returns
+        -------
+        any
+            Load data as JSON.
+
+        Raises
+        ------
+        DofError
+            If the target file doesn't exist.
+        """
+
+        return json.loads(bytes(self.__fetch(location, 'load_as_json'))
+                          .decode(self.__encoding))
+
+
+    def load_as_text(self, location : str, is_relative : bool = True) -> list:
+        """
+        Load data as text
+        =================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Returns
+        -------
+        list[str]
+            Load data as a list of lines.
+
+        Raises
+        ------
+        DofError
+            If the target file doesn't exist.
+        """
+
+        return (bytes(self.__fetch(location, 'load_as_text'))
+                .decode(self.__encoding).splitlines(True))
+
+
+    def load_range(self, location : str, offset : int, length : int,
+                   is_relative : bool = True) -> bytes:
+        """
+        Load a byte range of binary data
+        ================================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        offset : int
+            Position of the first byte to load.
+        length : int
+            Number of bytes to load.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Returns
+        -------
+        bytes
+            The bytes of the range. It is shorter than length if the range
+            reaches over the end of the data.
+
+        Raises
+        ------
+        DofError
+            When offset or length is negative.
+        DofError
+            If the target file doesn't exist.
+        """
+
+        _location = normpath(location)
+        with self.__lock:
+            _digest = self.__references.get(_location)
+        if _digest is None:
+            raise DofError('DedupHandler.load_range(): tried to load from ' +
+                           'non-existing file "{}".'.format(_location))
+        return self.__upstream.load_range(self.__blob_location(_digest),
+                                          offset, length)
+
+
+    def open(self):
+        """
+        Open the connection with the storage
+        ====================================
+
+        Notes
+        -----
+            The upstream handler is opened if it is not open yet and the index
+            is read from it. The reference counts are rebuilt from the index.
+        """
+
+        if not self.__upstream.is_open:
+            self.__upstream.open()
+        with self.__lock:
+            if self.__upstream.exist(self.__index_location):
+                self.__references = self.__upstream.load_as_json(
+                                                        self.__index_location)
+            else:
+                self.__references = {}
+            self.__counts = {}
+            for digest in self.__references.values():
+                self.__counts[digest] = self.__counts.get(digest, 0) + 1
+            self.__index_dirty = False
+
+
+    def save_as_binary(self, data : any, location : str,
+                       is_relative : bool = True):
+        """
+        Save data as binary
+        ===================
+
+        Parameters
+        ----------
+        data : any
+            Data to save in the form true binary data.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+        """
+
+        if hasattr(data, 'to_binary'):
+            _payload = bytes(data.to_binary())
+        elif isinstance(data, (bytes, bytearray, memoryview)):
+            _payload = bytes(data)
+        else:
+            _payload = pickle.dumps(data)
+        self.__store(_payload, location)
+
+
+    def save_as_instance(self, data : any, location : str,
+                         is_relative : bool = True):
+        """
+        Save data as instance
+        =====================
+
+        Parameters
+        ----------
+        data : any
+            Data to save in the form a python instance.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+        """
+
+        _payload = pickle.dumps(data)
+        self.count_payload(bytes_out=len(_payload))
+        self.__store(_payload, location)
+
+
+    def save_as_json(self, data : any, location : str,
+                     is_relative : bool = True):
+        """
+        Save data as JSON data
+        ======================
+
+        Parameters
+        ----------
+        data : any
+            Data to save in the form JSON.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+        """
+
+        self.__store(json.dumps(data).encode(self.__encoding), location)
+
+
+    def save_as_text(self, data : any, location : str,
+                     is_relative : bool = True):
+        """
+        Save data as text
+        =================
+
+        Parameters
+        ----------
+        data : str | list
+            Data to save as text. If list is given, elements of list is
+            considered is lines of text.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+        """
+
+        if isinstance(data, list):
+            _output = '\n'.join([str(row) for row in data])
+        else:
+            _output = data
+        self.__store(_output.encode(self.__encoding), location)
+
+
+    def save_index(self):
+        """
+        Save the references into the upstream handler
+        =============================================
+
+        Notes
+        -----
+            The index is written only if it has changed since it was read or
+            saved. Only the copy of the references is taken under the lock, the
+            upstream handler writes it outside of it. Outside of a batch the
+            released blobs are deleted after the index is written.
+        """
+
+        with self.__io_lock:
+            with self.__lock:
+                if not self.__index_dirty:
+                    return
+                _references = dict(self.__references)
+                self.__index_dirty = False
+                _released = []
+                if self.__batch_depth == 0:
+                    _released = self.__released
+                    self.__released = []
+            try:
+                self.__upstream.save_as_json(_references,
+                                             self.__index_location)
+            except BaseException:
+                with self.__lock:
+                    self.__index_dirty = True
+                    self.__released = _released + self.__released
+                raise
+            self.__delete_blobs(_released)
+
+
+    @property
+    def upstream(self) -> DofObjectHandler:
+        """
+        Get the handler that stores the blobs and the index
+        ===================================================
+
+        Returns
+        -------
+        DofObjectHandler
+            The upstream handler.
+        """
+
+        return self.__upstream
+
+
+    @staticmethod
+    def __blob_location(digest : str) -> str:
+        """
+        Get the location of a blob
+        ==========================
+
+        Parameters
+        ----------
+        digest : str
+            Hexadecimal digest of the payload.
+
+        Returns
+        -------
+        str
+            Location of the blob in the upstream handler.
+        """
+
+        return '{}{}'.format(digest, DedupHandler.BLOB_EXTENSION)
+
+
+    def __delete_blobs(self, digests : list):
+        """
+        Delete released blobs
+        =====================
+
+        Parameters
+        ----------
+        digests : list[str]
+            Hexadecimal digests of the released payloads.
+
+        Notes
+        -----
+            Blobs that are referred again since their release are kept.
+        """
+
+        with self.__io_lock:
+            for digest in set(digests):
+                with self.__lock:
+                    _unused = digest not in self.__counts
+                _location = self.__blob_location(digest)
+                if _unused and self.__upstream.exist(_location):
+                    self.__upstream.delete(_location)
+
+
+    def __fetch(self, location : str, caller : str) -> any:
+        """
+        Load the payload of a file
+        ==========================
+
+        Parameters
+        ----------
+        location : str
+            Location of the file.
+        caller : str
+            Name of the calling function for error messages.
+
+        Returns
+        -------
+        bytes | bytearray | memoryview
+            The stored payload.
+
+        Raises
+        ------
+        DofError
+            If the target file doesn't exist.
+        """
+
+        _location = normpath(location)
+        with self.__lock:
+            _digest = self.__references.get(_location)
+        if _digest is None:
+            raise DofError('DedupHandler.{}(): tried to load from '
+                           .format(caller) + 'non-existing file "{}".'
+                           .format(_location))
+        return self.__upstream.load_as_binary(self.__blob_location(_digest))
+
+
+    def __refer(self, digest : str, location : str):
+        """
+        Refer a digest from a location
+        ==============================
+
+        Parameters
+        ----------
+        digest : str
+            Hexadecimal digest of the payload.
+        location : str
+            Normalized location of the file.
+
+        Notes
+        -----
+            The caller must hold the lock of the instance. The digest that the
+            location referred before is released.
+        """
+
+        self.__counts[digest] = self.__counts.get(digest, 0) + 1
+        _previous = self.__references.get(location)
+        self.__references[location] = digest
+        if _previous is not None:
+            self.__release(_previous)
+        self.__index_dirty = True
+
+
+    def __release(self, digest : str):
+        """
+        Release a reference of a digest
+        ===============================
+
+        Parameters
+        ----------
+        digest : str
+            Hexadecimal digest of the payload.
+
+        Notes
+        -----
+            The caller must hold the lock of the instance. When the last
+            reference is released, the blob is queued to be deleted after the
+            next save of the index, see the notes of the class.
+        """
+
+        self.__counts[digest] -= 1
+        if self.__counts[digest] == 0:
+            del self.__counts[digest]
+            self.__released.append(digest)
+
+
+    def __store(self, payload : bytes, location : str):
+        """
+        Store a payload and refer it from a location
+        ============================================
+
+        Parameters
+        ----------
+        payload : bytes
+            Serialized content of the file.
+        location : str
+            Location of the file.
+
+        Notes
+        -----
+            The payload is written to the upstream handler only if no blob
+            with the same digest exists. The blob is written outside of the
+            lock of the instance, but under the lock of the upstream I/O, so it
+            cannot be deleted before it is referred.
+        """
+
+        _digest = blake2b(payload, digest_size=self.__digest_size).hexdigest()
+        _location = normpath(location)
+        with self.__lock:
+            if _digest in self.__counts:
+                self.__refer(_digest, _location)
+                return
+        with self.__io_lock:
+            with self.__lock:
+                _known = _digest in self.__counts
+            if not _known:
+                self.__upstream.save_as_binary(payload,
+                                               self.__blob_location(_digest))
+            with self.__lock:
+                self.__refer(_digest, _location)
+
+
+if __name__ == '__main__':
+    pass
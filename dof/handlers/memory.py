@@ -0,0 +1,670 @@
+"""
+DoF - Deep Model Core Output Framework
+======================================
+
+Submodule: handlers.memory
+"""
+
+
+import json
+from os.path import normpath, split
+import pickle
+from threading import Lock
+
+from ..error import DofError
+from ..storage import CompressionPolicy, DofObjectHandler
+
+
+class MemoryHandler(DofObjectHandler):
+    """
+    In-memory storage handler
+    =========================
+
+    Attributes
+    ----------
+    encoding : str
+        Encoding type for files with textual content (text, JSON).
+    handler_type : str (inherited) (read-only)
+        Get the type of the handler.
+    is_closed : bool (read-only)
+        Get whether the handler is closed or not.
+    is_open : bool (read-only)
+        Get whether the handler is open or not.
+    max_bytes : int | NoneType (read-only)
+        Get the maximal size of the stored payloads in bytes.
+    max_files : int | NoneType (read-only)
+        Get the maximal number of stored files.
+    pickle_instances : bool (read-only)
+        Get whether instances are stored pickled or as references.
+    total_bytes : int (read-only)
+        Get the size of the stored payloads in bytes.
+
+    Notes
+    -----
+    I.
+        The handler keeps every file in a dictionary, nothing touches the
+        filesystem. It is a LOCAL handler, so it can be added to DofObject and
+        used by Dataset and DofFile like a LocalHandler.
+    II.
+        Locations are normalized paths, there is no base path. The is_relative
+        parameters are accepted for the compatibility with the interface and
+        they are ignored.
+    III.
+        By default instances are pickled on save and unpickled on load, like in
+        the case of any other handler, so the serialization cost can be
+        measured without the cost of the disk. With pickle_instances=False the
+        instances are stored as references, which makes the handler a fast
+        scratch space, but the stored objects are shared with the caller and
+        they don't count into total_bytes.
+    """
+
+
+    def __init__(self, encoding : str = 'utf8', max_bytes : int = None,
+                 max_files : int = None, pickle_instances : bool = True):
+        """
+        Initialize an instance of the object
+        ====================================
+
+        Parameters
+        ----------
+        encoding : str, optional (utf8 if omitted)
+            Encoding type of textual files like text and JSON files.
+        max_bytes : int, optional (None if omitted)
+            Maximal size of the stored payloads in bytes. If None, the size is
+            not limited.
+        max_files : int, optional (None if omitted)
+            Maximal number of stored files. If None, the number of files is not
+            limited.
+        pickle_instances : bool, optional (True if omitted)
+            Whether to store instances pickled or as references.
+        """
+
+        super().__init__(DofObjectHandler.LOCAL)
+        self.__is_open = False
+        self.__encoding = encoding
+        self.__max_bytes = max_bytes
+        self.__max_files = max_files
+        self.__pickle_instances = pickle_instances
+        self.__files = {}
+        self.__total_bytes = 0
+        self.__lock = Lock()
+
+
+    def after_fork(self) -> bool:
+        """
+        Reinitialize the state of the handler in a forked child process
+        ===============================================================
+
+        Returns
+        -------
+        bool
+            True if the state has been reinitialized, False if it has already
+            been reinitialized in the actual process.
+        """
+
+        if not super().after_fork():
+            return False
+        self.__lock = Lock()
+        return True
+
+
+    def close(self):
+        """
+        Close the connection with the storage
+        =====================================
+
+        Notes
+        -----
+            The stored files are kept, they are available after the next
+            open().
+        """
+
+        self.__is_open = False
+
+
+    def delete(self, location : str, is_relative : bool = True):
+        """
+        Delete a file
+        =============
+
+        Parameters
+        ----------
+        location : str
+            Location of the file to delete.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+        DofError
+            If the target file doesn't exist.
+        """
+
+        if not self.__is_open:
+            raise DofError('MemoryHandler.delete(): handler is not open.')
+        _location = normpath(location)
+        with self.__lock:
+            _removed = self.__files.pop(_location, None)
+            if _removed is None:
+                raise DofError('MemoryHandler.delete(): tried to delete ' +
+                               'non-existing file "{}".'.format(_location))
+            if not _removed[1]:
+                self.__total_bytes -= len(_removed[0])
+
+
+    @property
+    def encoding(self) -> str:
+        """
+        Get the value of encoding
+        =========================
+
+        Returns
+        -------
+        str
+            Encoding type of textual files.
+        """
+
+        return self.__encoding
+
+
+    @encoding.setter
+    def encoding(self, newvalue : str):
+        """
+        Set the value of encoding
+        =========================
+
+        Parameters
+        ----------
+        newvalue : str
+            Encoding type of textual files.
+        """
+
+        self.__encoding = newvalue
+
+
+    def exist(self, location : str, is_relative : bool = True) -> bool:
+        """
+        Get whether a file exists or not
+        ================================
+
+        Parameters
+        ----------
+        location : str
+            Location to check.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Returns
+        -------
+        bool
+            True if the file exists, False if not.
+        """
+
+        return normpath(location) in self.__files
+
+
+    def files(self, location : str, is_relative : bool = True) -> list:
+        """
+        Get list of files in a directory
+        ================================
+
+        Parameters
+        ----------
+        location : str
+            Location to check.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Returns
+        -------
+        list
+            List of files, empty list if no files.
+        """
+
+        _location = normpath(location)
+        if _location == '.':
+            _location = ''
+        with self.__lock:
+            _keys = list(self.__files.keys())
+        return sorted(split(key)[1] for key in _keys
+                      if split(key)[0] == _location)
+
+
+    @property
+    def is_closed(self) -> bool:
+        """
+        Get whether the handler is closed or not
+        ========================================
+
+        Returns
+        -------
+        bool
+            True if the handler is closed, False if not.
+        """
+
+        return not self.__is_open
+
+
+    @property
+    def is_open(self) -> bool:
+        """
+        Get whether the handler is open or not
+        ======================================
+
+        Returns
+        -------
+        bool
+            True if the handler is open, False if not.
+        """
+
+        return self.__is_open
+
+
+    def load_as_binary(self, location : str,
+                       is_relative : bool = True) -> bytes:
+        """
+        Load data as binary data
+        ========================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Returns
+        -------
+        bytes
+            Load data as bytes. Instances stored as references are pickled.
+
+        Raises
+        ------
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If the target file doesn't exist.
+        """
+
+        payload, is_object = self.__fetch(location, 'load_as_binary')
+        if is_object:
+            return pickle.dumps(payload)
+        return CompressionPolicy.decompress(payload)
+
+
+    def load_as_instance(self, location : str,
+                         is_relative : bool = True) -> any:
+        """
+        Load data as instance
+        =====================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Returns
+        -------
+        any
+            Load data as any instances.
+
+        Raises
+        ------
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If the target file doesn't exist.
+        """
+
+        payload, is_object = self.__fetch(location, 'load_as_instance')
+        if is_object:
+            return payload
+        self.count_payload(bytes_in=len(payload))
+        return pickle.loads(CompressionPolicy.decompress(payload))
+
+
+    def load_as_json(self, location : str, is_relative : bool = True) -> any:
+        """
+        Load data as JSON data
+        ======================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Returns
+        -------
+        any
+            Load data as JSON.
+
+        Raises
+        ------
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If the target file doesn't exist.
+        """
+
+        payload, _ = self.__fetch(location, 'load_as_json')
+        return json.loads(bytes(payload).decode(self.__encoding))
+
+
+    def load_as_text(self, location : str, is_relative : bool = True) -> list:
+        """
+        Load data as text
+        =================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Returns
+        -------
+        list[str]
+            Load data as a list of lines.
+
+        Raises
+        ------
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If the target file doesn't exist.
+        """
+
+        payload, _ = self.__fetch(location, 'load_as_text')
+        return bytes(payload).decode(self.__encoding).splitlines(True)
+
+
+    @property
+    def max_bytes(self) -> int:
+        """
+        Get the maximal size of the stored payloads
+        ===========================================
+
+        Returns
+        -------
+        int | NoneType
+            Maximal size in bytes, None if the size is not limited.
+        """
+
+        return self.__max_bytes
+
+
+    @property
+    def max_files(self) -> int:
+        """
+        Get the maximal number of stored files
+        ======================================
+
+        Returns
+        -------
+        int | NoneType
+            Maximal number of files, None if it is not limited.
+        """
+
+        return self.__max_files
+
+
+    def open(self):
+        """
+        Open the connection with the storage
+        ====================================
+        """
+
+        self.__is_open = True
+
+
+    @property
+    def pickle_instances(self) -> bool:
+        """
+        Get whether instances are stored pickled
+        ========================================
+
+        Returns
+        -------
+        bool
+            True if instances are stored pickled, False if they are stored as
+            references.
+        """
+
+        return self.__pickle_instances
+
+
+    def save_as_binary(self, data : any, location : str,
+                       is_relative : bool = True):
+        """
+        Save data as binary
+        ===================
+
+        Parameters
+        ----------
+        data : any
+            Data to save in the form true binary data.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+        DofError
+            When a size limit of the handler would be exceeded.
+        """
+
+        if hasattr(data, 'to_binary'):
+            _payload = bytes(data.to_binary())
+        elif isinstance(data, (bytes, bytearray, memoryview)):
+            _payload = bytes(data)
+        else:
+            _payload = pickle.dumps(data)
+        self.__store(CompressionPolicy.protect(_payload), False, location,
+                     'save_as_binary')
+
+
+    def save_as_instance(self, data : any, location : str,
+                         is_relative : bool = True):
+        """
+        Save data as instance
+        =====================
+
+        Parameters
+        ----------
+        data : any
+            Data to save in the form a python instance.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+        DofError
+            When a size limit of the handler would be exceeded.
+        """
+
+        if self.__pickle_instances:
+            _payload = pickle.dumps(data)
+            self.count_payload(bytes_out=len(_payload))
+            self.__store(_payload, False, location, 'save_as_instance')
+        else:
+            self.__store(data, True, location, 'save_as_instance')
+
+
+    def save_as_json(self, data : any, location : str,
+                     is_relative : bool = True):
+        """
+        Save data as JSON data
+        ======================
+
+        Parameters
+        ----------
+        data : any
+            Data to save in the form JSON.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+        DofError
+            When a size limit of the handler would be exceeded.
+        """
+
+        self.__store(json.dumps(data).encode(self.__encoding), False,
+                     location, 'save_as_json')
+
+
+    def save_as_text(self, data : any, location : str,
+                     is_relative : bool = True):
+        """
+        Save data as text
+        =================
+
+        Parameters
+        ----------
+        data : str | list
+            Data to save as text. If list is given, elements of list is
+            considered is lines of text.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+        DofError
+            When a size limit of the handler would be exceeded.
+        """
+
+        if isinstance(data, list):
+            _output = '\n'.join([str(row) for row in data])
+        else:
+            _output = data
+        self.__store(_output.encode(self.__encoding), False, location,
+                     'save_as_text')
+
+
+    @property
+    def total_bytes(self) -> int:
+        """
+        Get the size of the stored payloads
+        ===================================
+
+        Returns
+        -------
+        int
+            Size of the stored payloads in bytes. Instances stored as
+            references are not counted.
+        """
+
+        return self.__total_bytes
+
+
+    def __fetch(self, location : str, caller : str) -> tuple:
+        """
+        Get a stored file
+        =================
+
+        Parameters
+        ----------
+        location : str
+            Location of the file.
+        caller : str
+            Name of the calling function for error messages.
+
+        Returns
+        -------
+        tuple(any, bool)
+            The payload and whether it is an instance stored as reference.
+
+        Raises
+        ------
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If the target file doesn't exist.
+        """
+
+        if not self.__is_open:
+            raise DofError('MemoryHandler.{}(): handler is not open.'
+                           .format(caller))
+        _location = normpath(location)
+        with self.__lock:
+            result = self.__files.get(_location)
+        if result is None:
+            raise DofError('MemoryHandler.{}(): tried to load from '
+                           .format(caller) + 'non-existing file "{}".'
+                           .format(_location))
+        return result
+
+
+    def __store(self, payload : any, is_object : bool, location : str,
+                caller : str):
+        """
+        Store a file
+        ============
+
+        Parameters
+        ----------
+        payload : any
+            Payload to store, bytes or an instance stored as reference.
+        is_object : bool
+            Whether the payload is an instance stored as reference.
+        location : str
+            Location of the file.
+        caller : str
+            Name of the calling function for error messages.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+        DofError
+            When a size limit of the handler would be exceeded.
+        """
+
+        if not self.__is_open:
+            raise DofError('MemoryHandler.{}(): handler is not open.'
+                           .format(caller))
+        _location = normpath(location)
+        _size = 0 if is_object else len(payload)
+        with self.__lock:
+            _previous = self.__files.get(_location)
+            _previous_size = 0
+            if _previous is not None and not _previous[1]:
+                _previous_size = len(_previous[0])
+            _total = self.__total_bytes - _previous_size + _size
+            if self.__max_bytes is not None and _total > self.__max_bytes:
+                raise DofError('MemoryHandler.{}(): storing "{}" would '
+                               .format(caller, _location) + 'exceed the ' +
+                               'limit of {} bytes.'.format(self.__max_bytes))
+            if (self.__max_files is not None and _previous is None and
+                len(self.__files) >= self.__max_files):
+                raise DofError('MemoryHandler.{}(): storing "{}" would '
+                               .format(caller, _location) + 'exceed the ' +
+                               'limit of {} files.'.format(self.__max_files))
+            self.__files[_location] = (payload, is_object)
+            self.__total_bytes = _total
+
+
+if __name__ == '__main__':
+    pass
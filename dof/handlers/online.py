@@ -0,0 +1,1541 @@
+"""
+DoF - Deep Model Core Output Framework
+======================================
+
+Submodule: handlers.online
+"""
+
+
+# pylint: disable=too-many-lines
+#           I.  Docstring and code together consumes a lot of lines of code.
+#          II.  We try to keep similar or related classes in the same file.
+#         III.  The working code may be under the 1000 lines limit, but we
+#               think, docstring with notations is useful to anybody to
+#               understand our code and the way of our thinking.
+
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+from itertools import repeat
+import gzip
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+import json
+import os
+from os.path import normpath, split
+import pickle
+from threading import Lock
+from time import perf_counter
+from urllib.parse import quote, urlsplit
+
+from ..error import DofError
+from ..storage import CompressionPolicy, DofObjectHandler, LocalHandler
+
+
+class OnlineHandler(DofObjectHandler):
+    """
+    HTTP storage handler with persistent connections
+    ================================================
+
+    Attributes
+    ----------
+    base_url : str (read-only)
+        Get the URL that relative locations are added to.
+    encoding : str
+        Encoding type for files with textual content (text, JSON).
+    executor : ThreadPoolExecutor (read-only)
+        Get the worker pool of batched operations.
+    handler_type : str (inherited) (read-only)
+        Get the type of the handler.
+    is_closed : bool (read-only)
+        Get whether the handler is closed or not.
+    is_open : bool (read-only)
+        Get whether the handler is open or not.
+    hedge_percentile : float | NoneType (read-only)
+        Get the latency percentile after which requests are re-issued.
+    max_connections : int (read-only)
+        Get the maximal number of kept connections and parallel requests.
+    range_size : int | NoneType (read-only)
+        Get the size of the parts of ranged downloads in bytes.
+    stats : dict (read-only)
+        Get the counters of ranged downloads and hedged requests.
+    timeout : float (read-only)
+        Get the timeout of connecting and reading in seconds.
+    use_gzip : bool (read-only)
+        Get whether gzip transfer encoding is requested from the server.
+
+    Notes
+    -----
+    I.
+        Files are loaded with GET, checked with HEAD, saved with PUT and
+        deleted with DELETE requests. Any HTTP/1.1 server can serve the loads,
+        eg. a directory of LocalHandler published by http.server. Saves and
+        deletions need a server that supports PUT and DELETE.
+    II.
+        Connections are kept alive and reused from a pool per host, so a
+        series of requests costs one TCP (and TLS) handshake instead of one per
+        request. A request on a reused connection that has been closed by the
+        server meanwhile is repeated once on a new connection.
+    III.
+        load_many() runs at most max_connections requests in parallel.
+        files() reads the manifest of LocalHandler (MANIFEST_FILE) from the
+        base URL, since HTTP has no directory listing. Save the manifest of
+        the published directory with LocalHandler.save_manifest().
+    IV.
+        With handler_type=DofObjectHandler.LOCAL the handler can be used
+        where local handlers are expected, eg. Dataset.load_from() can load a
+        published dataset.
+    V.
+        With range_size, files are downloaded in parts of byte-range requests.
+        The first part tells the size of the file, the other parts are
+        requested in parallel and reassembled in order. Servers without range
+        support answer the first request with the whole file. The other parts
+        are requested with an If-Range header of the ETag (or Last-Modified)
+        of the first part, so if the file changes meanwhile, the server
+        answers with the whole new file and that is used instead.
+    VI.
+        With hedge_percentile, the latencies of the last LATENCY_WINDOW GET
+        requests are kept. A GET request (or a part of a ranged download) that
+        is still running after the given percentile of these latencies is
+        issued once more, and the response that arrives first is used. The
+        slower request is not cancelled, its connection is kept after it
+        completes. Hedging starts after HEDGE_MIN_SAMPLES requests.
+    VII.
+        Files saved by LocalHandler with out_of_band=True cannot be published:
+        their pickles refer to the buffers of a sidecar file that this handler
+        doesn't read, so load_as_instance() raises DofError for them.
+    """
+
+    # Suggested size of the parts of ranged downloads in bytes.
+    RANGE_SIZE = 8388608
+    # Number of the latest GET latencies that hedging is based on.
+    LATENCY_WINDOW = 256
+    # Number of latencies needed before requests are hedged.
+    HEDGE_MIN_SAMPLES = 20
+    # Keys of the counters of the stats property.
+    STAT_KEYS = ['ranged_loads', 'range_requests', 'range_restarts',
+                 'hedged_requests', 'hedge_wins']
+
+
+    def __init__(self, base_url : str, encoding : str = 'utf8',
+                 max_connections : int = 8, timeout : float = 30.0,
+                 use_gzip : bool = True, headers : dict = None,
+                 range_size : int = None, hedge_percentile : float = None,
+                 handler_type : str = DofObjectHandler.ONLINE):
+        """
+        Initialize an instance of the object
+        ====================================
+
+        Parameters
+        ----------
+        base_url : str
+            URL to add relative locations to, eg. "http://host:8000/data/".
+        encoding : str, optional (utf8 if omitted)
+            Encoding type of textual files like text and JSON files.
+        max_connections : int, optional (8 if omitted)
+            Maximal number of kept connections per host and parallel requests
+            of load_many().
+        timeout : float, optional (30.0 if omitted)
+            Timeout of connecting and of each read in seconds.
+        use_gzip : bool, optional (True if omitted)
+            Whether to request gzip transfer encoding from the server.
+        headers : dict(str : str), optional (None if omitted)
+            Additional headers of every request, eg. authorization.
+        range_size : int, optional (None if omitted)
+            Size of the parts of ranged downloads in bytes, eg. RANGE_SIZE.
+            If None, files are downloaded with one request.
+        hedge_percentile : float, optional (None if omitted)
+            Latency percentile (between 0 and 100, eg. 95) after which a GET
+            request is issued once more. If None, requests are not hedged.
+        handler_type : str, optional (DofObjectHandler.ONLINE if omitted)
+            Type of the handler.
+
+        Raises
+        ------
+        DofError
+            When the scheme of base_url is not http or https.
+        DofError
+            When max_connections is less than 1.
+        DofError
+            When range_size is less than 1.
+        DofError
+            When hedge_percentile is not between 0 and 100.
+        """
+
+        # pylint: disable=too-many-arguments
+        #         We consider a better practice having long list of named
+        #         arguments then having **kwargs only.
+
+        if urlsplit(base_url).scheme not in ['http', 'https']:
+            raise DofError('OnlineHandler.init(): base_url must be an http ' +
+                           'or https URL.')
+        if max_connections < 1:
+            raise DofError('OnlineHandler.init(): max_connections must be ' +
+                           'at least 1.')
+        if range_size is not None and range_size < 1:
+            raise DofError('OnlineHandler.init(): range_size must be at ' +
+                           'least 1.')
+        if hedge_percentile is not None and not 0 < hedge_percentile < 100:
+            raise DofError('OnlineHandler.init(): hedge_percentile must be ' +
+                           'between 0 and 100.')
+        super().__init__(handler_type)
+        self.__base_url = base_url
+        self.__encoding = encoding
+        self.__max_connections = max_connections
+        self.__timeout = timeout
+        self.__use_gzip = use_gzip
+        self.__headers = dict(headers) if headers is not None else {}
+        self.__range_size = range_size
+        self.__hedge_percentile = hedge_percentile
+        self.__is_open = False
+        self.__executor = None
+        self.__request_executor = None
+        self.__idle = {}
+        self.__latencies = deque(maxlen=OnlineHandler.LATENCY_WINDOW)
+        self.__stats = dict.fromkeys(OnlineHandler.STAT_KEYS, 0)
+        self.__lock = Lock()
+
+
+    def after_fork(self) -> bool:
+        """
+        Reinitialize the state of the handler in a forked child process
+        ===============================================================
+
+        Returns
+        -------
+        bool
+            True if the state has been reinitialized, False if it has already
+            been reinitialized in the actual process.
+
+        Notes
+        -----
+            The kept connections are shared with the parent process, they are
+            closed in the child (the parent keeps using its own descriptors)
+            and new ones are opened on demand. The worker pools are dropped.
+        """
+
+        if not super().after_fork():
+            return False
+        _idle, self.__idle = self.__idle, {}
+        for connections in _idle.values():
+            for connection in connections:
+                connection.close()
+        self.__executor = None
+        self.__request_executor = None
+        self.__lock = Lock()
+        return True
+
+
+    @property
+    def base_url(self) -> str:
+        """
+        Get the base URL
+        ================
+
+        Returns
+        -------
+        str
+            The URL that relative locations are added to.
+        """
+
+        return self.__base_url
+
+
+    def close(self):
+        """
+        Close the connection with the storage
+        =====================================
+
+        Notes
+        -----
+            The kept connections are closed and the worker pools of batched
+            operations and of parallel requests are shut down.
+        """
+
+        self.__is_open = False
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=True)
+            self.__executor = None
+        if self.__request_executor is not None:
+            self.__request_executor.shutdown(wait=True)
+            self.__request_executor = None
+        with self.__lock:
+            _idle, self.__idle = self.__idle, {}
+        for connections in _idle.values():
+            for connection in connections:
+                connection.close()
+
+
+    def delete(self, location : str, is_relative : bool = True):
+        """
+        Delete a file
+        =============
+
+        Parameters
+        ----------
+        location : str
+            Location of the file to delete.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+        DofError
+            If the target file doesn't exist.
+        DofError
+            When the request fails.
+        """
+
+        _status, _, _ = self.__request('DELETE', location, is_relative,
+                                       'delete')
+        if _status == 404:
+            raise DofError('OnlineHandler.delete(): tried to delete ' +
+                           'non-existing file "{}".'.format(location))
+        if not 200 <= _status < 300:
+            raise DofError('OnlineHandler.delete(): server responded with ' +
+                           'status {}.'.format(_status))
+
+
+    @property
+    def encoding(self) -> str:
+        """
+        Get the encoding of textual files
+        =================================
+
+        Returns
+        -------
+        str
+            The identifier of the actual encoding method.
+        """
+
+        return self.__encoding
+
+
+    @encoding.setter
+    def encoding(self, newvalue : str):
+        """
+        Set encoding for textual files
+        ==============================
+
+        Parameters
+        ----------
+        newvalue : str
+            The identifier of the new encoding method.
+        """
+
+        self.__encoding = newvalue
+
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """
+        Get the worker pool of batched operations
+        =========================================
+
+        Returns
+        -------
+        ThreadPoolExecutor
+            The worker pool of max_connections workers. It is created on the
+            first access.
+        """
+
+        with self.__lock:
+            if self.__executor is None:
+                self.__executor = ThreadPoolExecutor(
+                                        max_workers=self.__max_connections,
+                                        thread_name_prefix='OnlineHandler')
+        return self.__executor
+
+
+    def exist(self, location : str, is_relative : bool = True) -> bool:
+        """
+        Get whether a location exists or not
+        ====================================
+
+        Parameters
+        ----------
+        location : str
+            Location to check.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Returns
+        -------
+        bool
+            True if the server responds to HEAD with success, False if not.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+        DofError
+            When the request fails.
+        """
+
+        _status, _, _ = self.__request('HEAD', location, is_relative,
+                                       'exist')
+        return 200 <= _status < 300
+
+
+    def files(self, location : str, is_relative : bool = True) -> list:
+        """
+        Get list of files in a directory
+        ================================
+
+        Parameters
+        ----------
+        location : str
+            Location to check.
+        is_relative : bool, optional (True if omitted)
+            Ignored, the manifest of the base URL is used.
+
+        Returns
+        -------
+        list
+            List of files, empty list if no files.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+        DofError
+            When the server has no manifest file.
+        DofError
+            When the request fails.
+        """
+
+        _status, _data, _ = self.__request('GET', LocalHandler.MANIFEST_FILE,
+                                           True, 'files')
+        if _status != 200:
+            raise DofError('OnlineHandler.files(): listing needs the ' +
+                           'manifest file, server responded with status {}.'
+                           .format(_status))
+        _manifest = json.loads(_data.decode('utf8'))
+        _directory = normpath(location)
+        if _directory == '.':
+            _directory = ''
+        return sorted(split(normpath(key))[1] for key in _manifest
+                      if split(normpath(key))[0] == _directory)
+
+
+    @property
+    def hedge_percentile(self) -> float:
+        """
+        Get the latency percentile of hedging
+        =====================================
+
+        Returns
+        -------
+        float | NoneType
+            Latency percentile after which GET requests are issued once more,
+            None if requests are not hedged.
+        """
+
+        return self.__hedge_percentile
+
+
+    @property
+    def is_closed(self) -> bool:
+        """
+        Get whether the handler is closed or not
+        ========================================
+
+        Returns
+        -------
+        bool
+            True if handler is closed, False if not.
+        """
+
+        return not self.__is_open
+
+
+    @property
+    def is_open(self) -> bool:
+        """
+        Get whether the handler is open or not
+        ======================================
+
+        Returns
+        -------
+        bool
+            True if handler is open, False if not.
+        """
+
+        return self.__is_open
+
+
+    def load_as_binary(self, location : str,
+                       is_relative : bool = True) -> any:
+        """
+        Load binary data
+        ================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Returns
+        -------
+        bytes
+            The binary content of the file.
+
+        Raises
+        ------
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If the target file doesn't exist.
+        DofError
+            When the request fails.
+        """
+
+        return CompressionPolicy.decompress(self.__fetch(location,
+                                                         is_relative,
+                                                         'load_as_binary'))
+
+
+    def load_as_instance(self, location : str,
+                         is_relative : bool = True) -> any:
+        """
+        Load data as instance
+        =====================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Returns
+        -------
+        any
+            Load data as any instances.
+
+        Raises
+        ------
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If the target file doesn't exist.
+        DofError
+            When the request fails.
+        DofError
+            When the file refers to out-of-band buffers of a sidecar file.
+        """
+
+        _payload = self.__fetch(location, is_relative, 'load_as_instance')
+        self.count_payload(bytes_in=len(_payload))
+        try:
+            return pickle.loads(CompressionPolicy.decompress(_payload))
+        except pickle.UnpicklingError:
+            if not self.exist(location + LocalHandler.SIDECAR_EXTENSION,
+                              is_relative):
+                raise
+        raise DofError('OnlineHandler.load_as_instance(): "{}" refers to '
+                       .format(location) + 'out-of-band buffers, which are ' +
+                       'not supported.')
+
+
+    def load_as_json(self, location : str, is_relative : bool = True) -> any:
+        """
+        Load data as JSON data
+        ======================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Returns
+        -------
+        any
+            Load data as JSON data.
+
+        Raises
+        ------
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If the target file doesn't exist.
+        DofError
+            When the request fails.
+        """
+
+        return json.loads(self.__fetch(location, is_relative, 'load_as_json')
+                          .decode(self.__encoding))
+
+
+    def load_as_text(self, location : str, is_relative : bool = True) -> list:
+        """
+        Load data as text
+        =================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Returns
+        -------
+        list[str]
+            Lines of the text.
+
+        Raises
+        ------
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If the target file doesn't exist.
+        DofError
+            When the request fails.
+        """
+
+        return self.__fetch(location, is_relative, 'load_as_text').decode(
+                                        self.__encoding).splitlines(True)
+
+
+    def load_many(self, locations : list, is_relative : bool = True) -> list:
+        """
+        Load multiple data as instances in parallel
+        ===========================================
+
+        Parameters
+        ----------
+        locations : list[str]
+            Locations to load from.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location strings as relative or absolute locations.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Returns
+        -------
+        list[any]
+            Loaded instances in the order of the given locations.
+
+        Raises
+        ------
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If any of the target files doesn't exist.
+        DofError
+            When any of the requests fails.
+
+        Notes
+        -----
+            At most max_connections requests are in flight at the same time,
+            each on its own kept connection.
+        """
+
+        self.__check_open('load_many')
+        return list(self.executor.map(self.load_as_instance, locations,
+                                      repeat(is_relative)))
+
+
+    def load_range(self, location : str, offset : int, length : int,
+                   is_relative : bool = True) -> bytes:
+        """
+        Load a byte range of binary data
+        ================================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        offset : int
+            Position of the first byte to load.
+        length : int
+            Number of bytes to load.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Returns
+        -------
+        bytes
+            The bytes of the range. It is shorter than length if the range
+            reaches over the end of the data.
+
+        Raises
+        ------
+        DofError
+            When offset or length is negative.
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If the target file doesn't exist.
+        DofError
+            When the request fails.
+
+        Notes
+        -----
+            The range is requested with a Range header, so only the range is
+            transferred if the server supports ranges. Compressed payloads have
+            to be transferred as a whole. The header of the payload and the
+            range are requested separately. The second request has an If-Range
+            header, so if the file changes in between, the range is read again
+            from the whole new file. A server without range support answers
+            the first request with the whole file, the range is read from it.
+        """
+
+        DofObjectHandler.check_range(offset, length)
+        _state = {}
+        result = CompressionPolicy.read_range(partial(self.__read_at, location,
+                                                      is_relative, _state),
+                                              offset, length)
+        if _state.get('changed', False):
+            with self.__lock:
+                self.__stats['range_restarts'] += 1
+            _state = {'data' : _state['data']}
+            result = CompressionPolicy.read_range(partial(self.__read_at,
+                                                          location,
+                                                          is_relative, _state),
+                                                  offset, length)
+        return result
+
+
+    @property
+    def max_connections(self) -> int:
+        """
+        Get the maximal number of connections
+        =====================================
+
+        Returns
+        -------
+        int
+            Maximal number of kept connections per host and parallel requests
+            of load_many().
+        """
+
+        return self.__max_connections
+
+
+    def open(self):
+        """
+        Open the connection with the storage
+        ====================================
+
+        Notes
+        -----
+            Connections are opened on demand by the requests.
+        """
+
+        self.__is_open = True
+
+
+    @property
+    def range_size(self) -> int:
+        """
+        Get the size of the parts of ranged downloads
+        =============================================
+
+        Returns
+        -------
+        int | NoneType
+            Size of the parts in bytes, None if files are downloaded with one
+            request.
+        """
+
+        return self.__range_size
+
+
+    def reset_stats(self):
+        """
+        Reset the counters of ranged downloads and hedged requests
+        ==========================================================
+        """
+
+        with self.__lock:
+            self.__stats = dict.fromkeys(OnlineHandler.STAT_KEYS, 0)
+
+
+    def save_as_binary(self, data : any, location : str,
+                       is_relative : bool = True):
+        """
+        Save data as binary
+        ===================
+
+        Parameters
+        ----------
+        data : any
+            Data to save in the form true binary data.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+        DofError
+            When the request fails.
+        """
+
+        if hasattr(data, 'to_binary'):
+            _payload = data.to_binary()
+        elif isinstance(data, (bytes, bytearray, memoryview)):
+            _payload = data
+        else:
+            _payload = pickle.dumps(data)
+        self.__store(CompressionPolicy.protect(_payload), location,
+                     is_relative, 'save_as_binary')
+
+
+    def save_as_instance(self, data : any, location : str,
+                         is_relative : bool = True):
+        """
+        Save data as instance
+        =====================
+
+        Parameters
+        ----------
+        data : any
+            Data to save in the form a python instance.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+        DofError
+            When the request fails.
+        """
+
+        _payload = pickle.dumps(data)
+        self.count_payload(bytes_out=len(_payload))
+        self.__store(_payload, location, is_relative, 'save_as_instance')
+
+
+    def save_as_json(self, data : any, location : str,
+                     is_relative : bool = True):
+        """
+        Save data as JSON data
+        ======================
+
+        Parameters
+        ----------
+        data : any
+            Data to save in the form a JSON data.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+        DofError
+            When the request fails.
+        """
+
+        self.__store(json.dumps(data).encode(self.__encoding), location,
+                     is_relative, 'save_as_json')
+
+
+    def save_as_text(self, data : any, location : str,
+                     is_relative : bool = True):
+        """
+        Save data as text
+        =================
+
+        Parameters
+        ----------
+        data : any
+            Data to save in the form a text.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+        DofError
+            When the request fails.
+        """
+
+        if isinstance(data, list):
+            _output = '\n'.join([str(row) for row in data])
+        else:
+            _output = data
+        self.__store(_output.encode(self.__encoding), location, is_relative,
+                     'save_as_text')
+
+
+    @property
+    def stats(self) -> dict:
+        """
+        Get the counters of ranged downloads and hedged requests
+        ========================================================
+
+        Returns
+        -------
+        dict
+            Copy of the counters, the keys are in STAT_KEYS.
+        """
+
+        with self.__lock:
+            return dict(self.__stats)
+
+
+    @property
+    def timeout(self) -> float:
+        """
+        Get the timeout of the requests
+        ===============================
+
+        Returns
+        -------
+        float
+            Timeout of connecting and of each read in seconds.
+        """
+
+        return self.__timeout
+
+
+    @property
+    def use_gzip(self) -> bool:
+        """
+        Get whether gzip transfer encoding is requested
+        ===============================================
+
+        Returns
+        -------
+        bool
+            True if gzip transfer encoding is requested, False if not.
+        """
+
+        return self.__use_gzip
+
+
+    def __acquire(self, origin : tuple) -> tuple:
+        """
+        Get a connection to a host
+        ==========================
+
+        Parameters
+        ----------
+        origin : tuple(str, str)
+            Scheme and network location of the host.
+
+        Returns
+        -------
+        tuple(HTTPConnection, bool)
+            A kept connection or a new one, and whether it is reused.
+        """
+
+        with self.__lock:
+            _idle = self.__idle.get(origin)
+            if _idle:
+                return (_idle.pop(), True)
+        if origin[0] == 'https':
+            result = HTTPSConnection(origin[1], timeout=self.__timeout)
+        else:
+            result = HTTPConnection(origin[1], timeout=self.__timeout)
+        return (result, False)
+
+
+    @staticmethod
+    def __check_status(status : int, expected : tuple, location : str,
+                       caller : str):
+        """
+        Check the status of a response
+        ==============================
+
+        Parameters
+        ----------
+        status : int
+            Status of the response.
+        expected : tuple(int)
+            Successful statuses.
+        location : str
+            Location of the file.
+        caller : str
+            Name of the calling function for the error messages.
+
+        Raises
+        ------
+        DofError
+            If the target file doesn't exist.
+        DofError
+            When the status is not an expected one.
+        """
+
+        if status == 404:
+            raise DofError('OnlineHandler.{}(): tried to load from '
+                           .format(caller) + 'non-existing file "{}".'
+                           .format(location))
+        if status not in expected:
+            raise DofError('OnlineHandler.{}(): server responded with status '
+                           .format(caller) + '{}.'.format(status))
+
+
+    def __check_open(self, caller : str):
+        """
+        Check whether the handler is open
+        =================================
+
+        Parameters
+        ----------
+        caller : str
+            Name of the calling function for the error message.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+        """
+
+        if not self.__is_open:
+            raise DofError('OnlineHandler.{}(): handler is not open.'
+                           .format(caller))
+
+
+    def __fetch(self, location : str, is_relative : bool,
+                caller : str) -> any:
+        """
+        Get the content of a file
+        =========================
+
+        Parameters
+        ----------
+        location : str
+            Location of the file.
+        is_relative : bool
+            Whether to treat location string as relative or absolute location.
+        caller : str
+            Name of the calling function for the error messages.
+
+        Returns
+        -------
+        bytes | bytearray
+            Content of the file.
+
+        Raises
+        ------
+        DofError
+            If the target file doesn't exist.
+        DofError
+            When the server responds with an error.
+        DofError
+            When a part of a ranged download is not the requested range.
+        """
+
+        if self.__range_size is None:
+            _status, result, _ = self.__gather([partial(self.__request, 'GET',
+                                                location, is_relative,
+                                                caller)])[0]
+            self.__check_status(_status, (200,), location, caller)
+            return result
+        _status, result, _headers = self.__gather([self.__range_call(
+                                                    location, is_relative,
+                                                    caller, 0)])[0]
+        if _status == 416:
+            return b''
+        self.__check_status(_status, (200, 206), location, caller)
+        _total = self.__total_size(_headers)
+        if _status == 200 or _total is None or _total <= len(result):
+            return result
+        _validator = self.__validator(_headers)
+        _first = result
+        result = bytearray(_total)
+        result[:len(_first)] = _first
+        _offsets = list(range(len(_first), _total, self.__range_size))
+        _parts = self.__gather([self.__range_call(location, is_relative,
+                                                  caller, offset, _validator)
+                                for offset in _offsets])
+        for offset, (status, data, _) in zip(_offsets, _parts):
+            if status == 200 and _validator is not None:
+                with self.__lock:
+                    self.__stats['range_restarts'] += 1
+                return data
+            _length = min(self.__range_size, _total - offset)
+            if status != 206 or len(data) != _length:
+                raise DofError('OnlineHandler.{}(): file "{}" changed '
+                               .format(caller, location) + 'during the ' +
+                               'ranged download.')
+            result[offset:offset + _length] = data
+        with self.__lock:
+            self.__stats['ranged_loads'] += 1
+            self.__stats['range_requests'] += len(_offsets) + 1
+        return result
+
+
+    def __gather(self, calls : list) -> list:
+        """
+        Run requests in parallel with hedging
+        =====================================
+
+        Parameters
+        ----------
+        calls : list[callable]
+            Functions without parameters that send a GET request and return
+            its result.
+
+        Returns
+        -------
+        list
+            The results of the calls in the order of the calls.
+
+        Raises
+        ------
+        DofError
+            When any of the requests fails (and its hedged pair fails too).
+
+        Notes
+        -----
+            A single call without hedging is run in the calling thread. The
+            requests run on a worker pool of their own, so loads on the worker
+            pool of load_many() can wait for them without a deadlock.
+        """
+
+        _delay = self.__hedge_delay()
+        if len(calls) == 1 and _delay is None:
+            return [calls[0]()]
+        with self.__lock:
+            if self.__request_executor is None:
+                self.__request_executor = ThreadPoolExecutor(
+                                    max_workers=2 * self.__max_connections,
+                                    thread_name_prefix='OnlineHandler')
+            _executor = self.__request_executor
+        _begun = {}
+
+        def begin(index):
+            _begun[index] = perf_counter()
+            return calls[index]()
+
+        _pending = {_executor.submit(begin, index) : index
+                    for index in range(len(calls))}
+        _hedges = set()
+        _hedge_futures = set()
+        result = [None] * len(calls)
+        _done = set()
+        while len(_done) < len(calls):
+            _timeout = None
+            if _delay is not None:
+                _now = perf_counter()
+                for index in range(len(calls)):
+                    if index in _done or index in _hedges:
+                        continue
+                    if index not in _begun:
+                        _timeout = _delay if _timeout is None else min(
+                                                            _timeout, _delay)
+                    elif _now - _begun[index] >= _delay:
+                        _future = _executor.submit(calls[index])
+                        _pending[_future] = index
+                        _hedge_futures.add(_future)
+                        _hedges.add(index)
+                        with self.__lock:
+                            self.__stats['hedged_requests'] += 1
+                    else:
+                        _left = _begun[index] + _delay - _now
+                        _timeout = _left if _timeout is None else min(
+                                                            _timeout, _left)
+            _finished, _ = wait(list(_pending), timeout=_timeout,
+                                return_when=FIRST_COMPLETED)
+            for future in _finished:
+                _index = _pending.pop(future)
+                if _index in _done:
+                    continue
+                if future.exception() is not None:
+                    if _index in _pending.values():
+                        continue
+                    raise future.exception()
+                result[_index] = future.result()
+                _done.add(_index)
+                if future in _hedge_futures:
+                    with self.__lock:
+                        self.__stats['hedge_wins'] += 1
+        return result
+
+
+    def __hedge_delay(self) -> float:
+        """
+        Get the delay after which requests are hedged
+        =============================================
+
+        Returns
+        -------
+        float | NoneType
+            The hedge_percentile of the latest latencies in seconds, None if
+            requests are not hedged (yet).
+        """
+
+        if self.__hedge_percentile is None:
+            return None
+        with self.__lock:
+            _latencies = sorted(self.__latencies)
+        if len(_latencies) < OnlineHandler.HEDGE_MIN_SAMPLES:
+            return None
+        return _latencies[min(int(len(_latencies) * self.__hedge_percentile /
+                                  100), len(_latencies) - 1)]
+
+
+    def __range_call(self, location : str, is_relative : bool, caller : str,
+                     offset : int, validator : str = None) -> any:
+        """
+        Get a call of a part of a ranged download
+        =========================================
+
+        Parameters
+        ----------
+        location : str
+            Location of the file.
+        is_relative : bool
+            Whether to treat location string as relative or absolute location.
+        caller : str
+            Name of the calling function for the error messages.
+        offset : int
+            Position of the first byte of the part.
+        validator : str | NoneType, optional (None if omitted)
+            ETag or Last-Modified value of the first part to send as If-Range.
+
+        Returns
+        -------
+        callable
+            Function without parameters that requests the part.
+        """
+
+        # pylint: disable=too-many-arguments
+        #         We consider a better practice having long list of named
+        #         arguments then having **kwargs only.
+
+        _headers = {'Range' : 'bytes={}-{}'.format(offset,
+                                                   offset + self.__range_size -
+                                                   1),
+                    'Accept-Encoding' : 'identity'}
+        if validator is not None:
+            _headers['If-Range'] = validator
+        return partial(self.__request, 'GET', location, is_relative, caller,
+                       headers=_headers)
+
+
+    def __read_at(self, location : str, is_relative : bool, state : dict,
+                  offset : int, length : int) -> bytes:
+        """
+        Read bytes of a file from a position
+        ====================================
+
+        Parameters
+        ----------
+        location : str
+            Location of the file.
+        is_relative : bool
+            Whether to treat location string as relative or absolute location.
+        state : dict
+            State of the reads of one load_range() call, see the notes.
+        offset : int
+            Position of the first byte to read.
+        length : int | NoneType
+            Number of bytes to read, None means up to the end of the file.
+
+        Returns
+        -------
+        bytes
+            The bytes read, shorter than length at the end of the file.
+
+        Raises
+        ------
+        DofError
+            If the target file doesn't exist.
+        DofError
+            When the server responds with an error.
+
+        Notes
+        -----
+            The first partial response stores its ETag (or Last-Modified) as
+            'validator' in state and the later reads send it as If-Range. A
+            whole file (a server without range support or a changed file) is
+            stored as 'data' and the later reads are served from it. A whole
+            file after a partial response sets 'changed'.
+        """
+
+        # pylint: disable=too-many-arguments
+        #         We consider a better practice having long list of named
+        #         arguments then having **kwargs only.
+
+        if length == 0:
+            return b''
+        _data = state.get('data')
+        if _data is None:
+            if length is None:
+                _range = 'bytes={}-'.format(offset)
+            else:
+                _range = 'bytes={}-{}'.format(offset, offset + length - 1)
+            _headers = {'Range' : _range, 'Accept-Encoding' : 'identity'}
+            if state.get('validator') is not None:
+                _headers['If-Range'] = state['validator']
+            _status, _data, _response = self.__gather([partial(self.__request,
+                                                       'GET', location,
+                                                       is_relative,
+                                                       'load_range',
+                                                       headers=_headers)])[0]
+            if _status == 416:
+                return b''
+            self.__check_status(_status, (200, 206), location, 'load_range')
+            if _status == 206:
+                if 'validator' not in state:
+                    state['validator'] = self.__validator(_response)
+                return _data
+            state['changed'] = 'validator' in state
+            state['data'] = _data
+        return _data[offset:None if length is None else offset + length]
+
+
+    def __release(self, origin : tuple, connection : HTTPConnection):
+        """
+        Keep a connection for later requests
+        ====================================
+
+        Parameters
+        ----------
+        origin : tuple(str, str)
+            Scheme and network location of the host.
+        connection : HTTPConnection
+            The connection to keep. It is closed if max_connections
+            connections are kept already or the handler is closed.
+        """
+
+        with self.__lock:
+            _idle = self.__idle.setdefault(origin, [])
+            if self.__is_open and len(_idle) < self.__max_connections:
+                _idle.append(connection)
+                return
+        connection.close()
+
+
+    def __request(self, method : str, location : str, is_relative : bool,
+                  caller : str, body : any = None,
+                  headers : dict = None) -> tuple:
+        """
+        Send a request and read the response
+        ====================================
+
+        Parameters
+        ----------
+        method : str
+            HTTP method of the request.
+        location : str
+            Location of the file.
+        is_relative : bool
+            Whether to treat location string as relative or absolute location.
+        caller : str
+            Name of the calling function for the error messages.
+        body : bytes | NoneType, optional (None if omitted)
+            Body of the request.
+        headers : dict(str : str) | NoneType, optional (None if omitted)
+            Headers of the request on top of the default ones.
+
+        Returns
+        -------
+        tuple(int, bytes, http.client.HTTPMessage)
+            Status, body and headers of the response, the gzip transfer
+            encoding of the body is decoded.
+
+        Notes
+        -----
+            The latencies of successful GET requests are recorded for hedging.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+        DofError
+            When the request fails.
+        """
+
+        # pylint: disable=too-many-arguments
+        #         We consider a better practice having long list of named
+        #         arguments then having **kwargs only.
+
+        self.__check_open(caller)
+        _origin, _path = self.__url(location, is_relative)
+        _headers = dict(self.__headers)
+        if self.__use_gzip:
+            _headers['Accept-Encoding'] = 'gzip'
+        if headers is not None:
+            _headers.update(headers)
+        _started = perf_counter()
+        while True:
+            _connection, _reused = self.__acquire(_origin)
+            try:
+                _connection.request(method, _path, body=body,
+                                    headers=_headers)
+                _response = _connection.getresponse()
+                _data = _response.read()
+            except (HTTPException, OSError) as exception:
+                _connection.close()
+                if _reused and isinstance(exception, (ConnectionError,
+                                                      HTTPException)):
+                    continue
+                raise DofError('OnlineHandler.{}(): request to "{}" failed: '
+                               .format(caller, _path) + '{}.'
+                               .format(exception)) from exception
+            break
+        if _response.will_close:
+            _connection.close()
+        else:
+            self.__release(_origin, _connection)
+        if method == 'GET' and _response.status < 300:
+            with self.__lock:
+                self.__latencies.append(perf_counter() - _started)
+        if (_response.getheader('Content-Encoding', '').lower() == 'gzip' and
+            len(_data) > 0):
+            _data = gzip.decompress(_data)
+        return (_response.status, _data, _response.headers)
+
+
+    def __store(self, payload : any, location : str, is_relative : bool,
+                caller : str):
+        """
+        Upload a file
+        =============
+
+        Parameters
+        ----------
+        payload : bytes | bytearray | memoryview
+            Content of the file.
+        location : str
+            Location of the file.
+        is_relative : bool
+            Whether to treat location string as relative or absolute location.
+        caller : str
+            Name of the calling function for the error messages.
+
+        Raises
+        ------
+        DofError
+            When the server responds with an error.
+        """
+
+        _status, _, _ = self.__request('PUT', location, is_relative, caller,
+                                       body=bytes(payload), headers={
+                                       'Content-Type' :
+                                       'application/octet-stream'})
+        if not 200 <= _status < 300:
+            raise DofError('OnlineHandler.{}(): server responded with status '
+                           .format(caller) + '{}.'.format(_status))
+
+
+    @staticmethod
+    def __total_size(headers : any) -> int:
+        """
+        Get the size of a file from a partial response
+        ==============================================
+
+        Parameters
+        ----------
+        headers : http.client.HTTPMessage
+            Headers of the response.
+
+        Returns
+        -------
+        int | NoneType
+            The whole size from the Content-Range header, None if it is
+            unknown.
+        """
+
+        _range = headers.get('Content-Range', '')
+        _, _, _total = _range.rpartition('/')
+        if not _total.isdigit():
+            return None
+        return int(_total)
+
+
+    @staticmethod
+    def __validator(headers : any) -> str:
+        """
+        Get the validator of a response for If-Range
+        ============================================
+
+        Parameters
+        ----------
+        headers : http.client.HTTPMessage
+            Headers of the response.
+
+        Returns
+        -------
+        str | NoneType
+            The strong ETag, or the Last-Modified date if there is no strong
+            ETag, None if there is neither. Weak ETags cannot be used with
+            If-Range.
+        """
+
+        _etag = headers.get('ETag')
+        if _etag is not None and not _etag.startswith('W/'):
+            return _etag
+        return headers.get('Last-Modified')
+
+
+    def __url(self, location : str, is_relative : bool) -> tuple:
+        """
+        Split the URL of a location
+        ===========================
+
+        Parameters
+        ----------
+        location : str
+            Location of the file.
+        is_relative : bool
+            Whether the location is relative to the base URL or it is a whole
+            URL.
+
+        Returns
+        -------
+        tuple(tuple(str, str), str)
+            Scheme and network location of the host, and the path (with query)
+            of the request.
+        """
+
+        if is_relative:
+            _parts = urlsplit(self.__base_url)
+            _path = (_parts.path.rstrip('/') + '/' +
+                     quote(location.replace(os.sep, '/').lstrip('/')))
+        else:
+            _parts = urlsplit(location)
+            _path = _parts.path or '/'
+        if _parts.query:
+            _path += '?' + _parts.query
+        return ((_parts.scheme, _parts.netloc), _path)
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,765 @@
+"""
+DoF - Deep Model Core Output Framework
+======================================
+
+Submodule: handlers.prefetch
+"""
+
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import re
+from threading import Lock
+
+from ..error import DofError
+from ..storage import DofObjectHandler
+
+
+class PrefetchHandler(DofObjectHandler):
+    """
+    Read-ahead handler that prefetches upcoming files in the background
+    ===================================================================
+
+    Attributes
+    ----------
+    handler_type : str (inherited) (read-only)
+        Get the type of the handler.
+    is_closed : bool (read-only)
+        Get whether the handler is closed or not.
+    is_open : bool (read-only)
+        Get whether the handler is open or not.
+    stats : dict (read-only)
+        Get the counters of the prefetcher.
+    upstream : DofObjectHandler (read-only)
+        Get the wrapped handler.
+    window : int (read-only)
+        Get the number of files to load ahead.
+
+    Notes
+    -----
+    I.
+        Loads of numbered locations (like "0.obj", "1.obj", ...) are watched.
+        When a location directly follows the previously loaded one, the next
+        window locations of the sequence are loaded on worker threads with the
+        same load function. A later load of such a location gets the result of
+        the background load, so the I/O of upcoming files overlaps with the
+        work of the caller. Non-sequential loads are served by the upstream
+        handler directly.
+    II.
+        If the order of loads is known in advance, it can be given with
+        prefetch(), which starts loading the given locations immediately.
+    III.
+        load_many() takes the prefetched results of its locations and loads
+        the rest with one load_many() call of the wrapped handler. When its
+        locations form a sequence, the window after the last one is loaded
+        ahead. A dataset loaded with Dataset.load_from(lazy=True) loads its
+        elements one by one on their first access, so iterating it through
+        this handler reads the upcoming element files ahead.
+    IV.
+        At most 2 * window results are held. The oldest results are dropped
+        when the limit is reached and any save to a location drops its
+        prefetched result. A failed background load is retried in the
+        foreground, so errors are raised by the load that asks for the file.
+    """
+
+    # Pattern of numbered locations: prefix, number and suffix.
+    NUMBERED = re.compile(r'^(.*?)(\d+)(\.[^./\\]*)?$')
+    # Keys of the counters of the stats property.
+    STAT_KEYS = ['hits', 'misses', 'issued', 'dropped']
+
+
+    def __init__(self, upstream : DofObjectHandler, window : int = 8,
+                 max_workers : int = None):
+        """
+        Initialize an instance of the object
+        ====================================
+
+        Parameters
+        ----------
+        upstream : DofObjectHandler
+            Handler to wrap.
+        window : int, optional (8 if omitted)
+            Number of files to load ahead.
+        max_workers : int, optional (None if omitted)
+            Maximal number of worker threads. If None, window is used.
+
+        Raises
+        ------
+        DofError
+            When window is not positive.
+        """
+
+        if window <= 0:
+            raise DofError('PrefetchHandler.init(): window must be positive.')
+        super().__init__(upstream.handler_type)
+        self.__upstream = upstream
+        self.__window = window
+        self.__max_workers = max_workers if max_workers is not None else window
+        self.__executor = None
+        self.__prefetched = OrderedDict()
+        self.__last = None
+        self.__stats = dict.fromkeys(PrefetchHandler.STAT_KEYS, 0)
+        self.__lock = Lock()
+
+
+    def abort_batch(self):
+        """
+        Drop the writes of the actual batch
+        ===================================
+        """
+
+        self.__upstream.abort_batch()
+
+
+    def after_fork(self) -> bool:
+        """
+        Reinitialize the state of the handler in a forked child process
+        ===============================================================
+
+        Returns
+        -------
+        bool
+            True if the state has been reinitialized, False if it has already
+            been reinitialized in the actual process.
+
+        Notes
+        -----
+            Prefetches of the parent never complete in the child, so they are
+            dropped with the worker pool. The upstream handler is reinitialized
+            as well.
+        """
+
+        if not super().after_fork():
+            return False
+        self.__executor = None
+        self.__prefetched = OrderedDict()
+        self.__lock = Lock()
+        self.__upstream.after_fork()
+        return True
+
+
+    def begin_batch(self):
+        """
+        Begin a batch of writes
+        =======================
+        """
+
+        self.__upstream.begin_batch()
+
+
+    def close(self):
+        """
+        Close the connection with the storage
+        =====================================
+
+        Notes
+        -----
+            Background loads are waited for and their results are dropped. The
+            wrapped handler is closed as well.
+        """
+
+        with self.__lock:
+            _executor = self.__executor
+            self.__executor = None
+            self.__prefetched = OrderedDict()
+            self.__last = None
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+        self.__upstream.close()
+
+
+    def commit_batch(self):
+        """
+        Commit the actual batch
+        =======================
+        """
+
+        self.__upstream.commit_batch()
+
+
+    def delete(self, location : str, is_relative : bool = True):
+        """
+        Delete a file
+        =============
+
+        Parameters
+        ----------
+        location : str
+            Location of the file to delete.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+        """
+
+        self.__forget(location, is_relative)
+        self.__upstream.delete(location, is_relative)
+
+
+    def exist(self, location : str, is_relative : bool = True) -> bool:
+        """
+        Get whether a file exists or not
+        ================================
+
+        Parameters
+        ----------
+        location : str
+            Location to check.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+
+        Returns
+        -------
+        bool
+            True if the file exists, False if not.
+        """
+
+        return self.__upstream.exist(location, is_relative)
+
+
+    def files(self, location : str, is_relative : bool = True) -> list:
+        """
+        Get list of files in a directory
+        ================================
+
+        Parameters
+        ----------
+        location : str
+            Location to check.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+
+        Returns
+        -------
+        list
+            List of files, empty list if no files.
+        """
+
+        return self.__upstream.files(location, is_relative)
+
+
+    @property
+    def is_closed(self) -> bool:
+        """
+        Get whether the handler is closed or not
+        ========================================
+
+        Returns
+        -------
+        bool
+            True if the handler is closed, False if not.
+        """
+
+        return self.__upstream.is_closed
+
+
+    @property
+    def is_open(self) -> bool:
+        """
+        Get whether the handler is open or not
+        ======================================
+
+        Returns
+        -------
+        bool
+            True if the handler is open, False if not.
+        """
+
+        return self.__upstream.is_open
+
+
+    def load_as_binary(self, location : str,
+                       is_relative : bool = True) -> any:
+        """
+        Load data as binary data
+        ========================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+
+        Returns
+        -------
+        bytes | bytearray | memoryview
+            Load data as binary, like the wrapped handler does.
+        """
+
+        return self.__load(self.__upstream.load_as_binary, location,
+                           is_relative)
+
+
+    def load_as_instance(self, location : str,
+                         is_relative : bool = True) -> any:
+        """
+        Load data as instance
+        =====================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+
+        Returns
+        -------
+        any
+            Load data as any instances.
+        """
+
+        return self.__load(self.__upstream.load_as_instance, location,
+                           is_relative)
+
+
+    def load_as_json(self, location : str, is_relative : bool = True) -> any:
+        """
+        Load data as JSON data
+        ======================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+
+        Returns
+        -------
+        any
+            Load data as JSON.
+        """
+
+        return self.__upstream.load_as_json(location, is_relative)
+
+
+    def load_as_text(self, location : str, is_relative : bool = True) -> list:
+        """
+        Load data as text
+        =================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+
+        Returns
+        -------
+        list[str]
+            Load data as a list of lines.
+        """
+
+        return self.__upstream.load_as_text(location, is_relative)
+
+
+    def load_many(self, locations : list, is_relative : bool = True) -> list:
+        """
+        Load multiple data as instances
+        ===============================
+
+        Parameters
+        ----------
+        locations : list[str]
+            Locations to load from.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location strings as relative or absolute locations.
+
+        Returns
+        -------
+        list
+            Loaded instances in the order of locations.
+
+        Notes
+        -----
+            Failed background loads are retried with the rest of the
+            locations.
+        """
+
+        _function = self.__upstream.load_as_instance
+        with self.__lock:
+            _futures = [self.__prefetched.pop((_function, location,
+                                               is_relative), None)
+                        for location in locations]
+            _hits = len([future for future in _futures if future is not None])
+            self.__stats['hits'] += _hits
+            self.__stats['misses'] += len(locations) - _hits
+            for location in locations[:-1]:
+                self.__track(_function, location, is_relative, False, False)
+            if len(locations) > 0:
+                self.__track(_function, locations[-1], is_relative, _hits > 0,
+                             True)
+        result = [None] * len(locations)
+        _missing = []
+        for i, future in enumerate(_futures):
+            if future is None:
+                _missing.append(i)
+                continue
+            try:
+                result[i] = future.result()
+            except Exception:
+                _missing.append(i)
+        if len(_missing) > 0:
+            _loaded = self.__upstream.load_many([locations[i]
+                                                 for i in _missing],
+                                                is_relative)
+            for i, data in zip(_missing, _loaded):
+                result[i] = data
+        return result
+
+
+    def load_range(self, location : str, offset : int, length : int,
+                   is_relative : bool = True) -> bytes:
+        """
+        Load a byte range of binary data
+        ================================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        offset : int
+            Position of the first byte to load.
+        length : int
+            Number of bytes to load.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+
+        Returns
+        -------
+        bytes
+            The bytes of the range. It is shorter than length if the range
+            reaches over the end of the data.
+        """
+
+        return self.__upstream.load_range(location, offset, length,
+                                          is_relative)
+
+
+    def open(self):
+        """
+        Open the connection with the storage
+        ====================================
+        """
+
+        if not self.__upstream.is_open:
+            self.__upstream.open()
+
+
+    def prefetch(self, locations : list, is_relative : bool = True,
+                 as_binary : bool = False):
+        """
+        Start loading locations in the background
+        =========================================
+
+        Parameters
+        ----------
+        locations : list[str]
+            Locations in the order they are going to be loaded.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location strings as relative or absolute locations.
+        as_binary : bool, optional (False if omitted)
+            Whether the locations are going to be loaded as binary data or as
+            instances.
+
+        Notes
+        -----
+            Only the first 2 * window locations are loaded, the rest is
+            dropped. Call it again later with the remaining locations.
+        """
+
+        if as_binary:
+            _function = self.__upstream.load_as_binary
+        else:
+            _function = self.__upstream.load_as_instance
+        with self.__lock:
+            for location in locations[:2 * self.__window]:
+                self.__submit(_function, location, is_relative)
+
+
+    def reset_stats(self):
+        """
+        Reset the counters of the prefetcher
+        ====================================
+        """
+
+        with self.__lock:
+            self.__stats = dict.fromkeys(PrefetchHandler.STAT_KEYS, 0)
+
+
+    def save_as_binary(self, data : any, location : str,
+                       is_relative : bool = True):
+        """
+        Save data as binary
+        ===================
+
+        Parameters
+        ----------
+        data : any
+            Data to save in the form true binary data.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+        """
+
+        self.__forget(location, is_relative)
+        self.__upstream.save_as_binary(data, location, is_relative)
+
+
+    def save_as_instance(self, data : any, location : str,
+                         is_relative : bool = True):
+        """
+        Save data as instance
+        =====================
+
+        Parameters
+        ----------
+        data : any
+            Data to save in the form a python instance.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+        """
+
+        self.__forget(location, is_relative)
+        self.__upstream.save_as_instance(data, location, is_relative)
+
+
+    def save_as_json(self, data : any, location : str,
+                     is_relative : bool = True):
+        """
+        Save data as JSON data
+        ======================
+
+        Parameters
+        ----------
+        data : any
+            Data to save in the form JSON.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+        """
+
+        self.__forget(location, is_relative)
+        self.__upstream.save_as_json(data, location, is_relative)
+
+
+    def save_as_text(self, data : any, location : str,
+                     is_relative : bool = True):
+        """
+        Save data as text
+        =================
+
+        Parameters
+        ----------
+        data : str | list
+            Data to save as text.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+        """
+
+        self.__forget(location, is_relative)
+        self.__upstream.save_as_text(data, location, is_relative)
+
+
+    def save_many(self, items : list, is_relative : bool = True):
+        """
+        Save multiple data as instances
+        ===============================
+
+        Parameters
+        ----------
+        items : list[tuple(any, str)]
+            Pairs of data to save and location to save to.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location strings as relative or absolute locations.
+        """
+
+        for _, location in items:
+            self.__forget(location, is_relative)
+        self.__upstream.save_many(items, is_relative)
+
+
+    @property
+    def stats(self) -> dict:
+        """
+        Get the counters of the prefetcher
+        ==================================
+
+        Returns
+        -------
+        dict
+            Copy of the counters, the keys are in STAT_KEYS.
+        """
+
+        with self.__lock:
+            return dict(self.__stats)
+
+
+    @property
+    def upstream(self) -> DofObjectHandler:
+        """
+        Get the wrapped handler
+        =======================
+
+        Returns
+        -------
+        DofObjectHandler
+            The wrapped handler.
+        """
+
+        return self.__upstream
+
+
+    @property
+    def window(self) -> int:
+        """
+        Get the number of files to load ahead
+        =====================================
+
+        Returns
+        -------
+        int
+            Number of files to load ahead.
+        """
+
+        return self.__window
+
+
+    def __forget(self, location : str, is_relative : bool):
+        """
+        Drop the prefetched results of a location
+        =========================================
+
+        Parameters
+        ----------
+        location : str
+            Location of the file.
+        is_relative : bool
+            Whether to treat location string as relative or absolute location.
+        """
+
+        with self.__lock:
+            for function in [self.__upstream.load_as_binary,
+                             self.__upstream.load_as_instance]:
+                self.__prefetched.pop((function, location, is_relative), None)
+
+
+    def __load(self, function : any, location : str,
+               is_relative : bool) -> any:
+        """
+        Load a file through the prefetcher
+        ==================================
+
+        Parameters
+        ----------
+        function : callable
+            Load function of the wrapped handler.
+        location : str
+            Location to load from.
+        is_relative : bool
+            Whether to treat location string as relative or absolute location.
+
+        Returns
+        -------
+        any
+            The loaded data.
+        """
+
+        _key = (function, location, is_relative)
+        with self.__lock:
+            _future = self.__prefetched.pop(_key, None)
+            self.__stats['hits' if _future is not None else 'misses'] += 1
+            self.__track(function, location, is_relative, _future is not None,
+                         True)
+        if _future is not None:
+            try:
+                return _future.result()
+            except Exception:
+                pass
+        return function(location, is_relative)
+
+
+    def __submit(self, function : any, location : str, is_relative : bool):
+        """
+        Start a background load unless it is already started
+        =====================================================
+
+        Parameters
+        ----------
+        function : callable
+            Load function of the wrapped handler.
+        location : str
+            Location to load from.
+        is_relative : bool
+            Whether to treat location string as relative or absolute location.
+
+        Notes
+        -----
+            The caller must hold the lock of the instance.
+        """
+
+        _key = (function, location, is_relative)
+        if _key in self.__prefetched:
+            return
+        if self.__executor is None:
+            self.__executor = ThreadPoolExecutor(
+                                        max_workers=self.__max_workers,
+                                        thread_name_prefix='PrefetchHandler')
+        self.__prefetched[_key] = self.__executor.submit(function, location,
+                                                         is_relative)
+        self.__stats['issued'] += 1
+        while len(self.__prefetched) > 2 * self.__window:
+            _, _dropped = self.__prefetched.popitem(last=False)
+            _dropped.cancel()
+            self.__stats['dropped'] += 1
+
+
+    def __track(self, function : any, location : str, is_relative : bool,
+                hit : bool, read_ahead : bool):
+        """
+        Record a load and read ahead if the access is sequential
+        ========================================================
+
+        Parameters
+        ----------
+        function : callable
+            Load function of the wrapped handler.
+        location : str
+            The loaded location.
+        is_relative : bool
+            Whether to treat location string as relative or absolute location.
+        hit : bool
+            Whether the load got a prefetched result.
+        read_ahead : bool
+            Whether to start loading the next window locations if the access
+            is sequential.
+
+        Notes
+        -----
+            The access is sequential if the location directly follows the
+            previously loaded one or if it has been prefetched. The caller must
+            hold the lock of the instance.
+        """
+
+        _match = PrefetchHandler.NUMBERED.match(location)
+        if _match is None:
+            return
+        _prefix, _number, _suffix = _match.groups('')
+        _sequence = (function, _prefix, _suffix, is_relative)
+        _number = int(_number)
+        if read_ahead and (hit or self.__last == (_sequence, _number - 1)):
+            for i in range(_number + 1, _number + self.__window + 1):
+                self.__submit(function, '{}{}{}'.format(_prefix, i, _suffix),
+                              is_relative)
+        self.__last = (_sequence, _number)
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,963 @@
+"""
+DoF - Deep Model Core Output Framework
+======================================
+
+Submodule: handlers.sqlite
+"""
+
+
+from functools import partial
+import json
+from os.path import normpath, split
+import pickle
+import sqlite3
+from threading import RLock
+
+from ..error import DofError
+from ..storage import CompressionPolicy, DofObjectHandler
+
+
+class SqliteHandler(DofObjectHandler):
+    """
+    SQLite single-file storage handler
+    ==================================
+
+    Attributes
+    ----------
+    database : str (read-only)
+        Get the path of the database file.
+    encoding : str
+        Encoding type for files with textual content (text, JSON).
+    handler_type : str (inherited) (read-only)
+        Get the type of the handler.
+    is_closed : bool (read-only)
+        Get whether the handler is closed or not.
+    is_open : bool (read-only)
+        Get whether the handler is open or not.
+    timeout : float (read-only)
+        Get the timeout of database locks in seconds.
+
+    Notes
+    -----
+    I.
+        Every file is a row of a single table with a unique index on its
+        directory and name, so exist() is an index lookup and files() is an
+        index range scan instead of a directory scan. The table keeps its rowid,
+        since the rows of a WITHOUT ROWID table are stored in the index itself,
+        which performs poorly with large payloads.
+    II.
+        Locations are normalized paths inside the database, there is no base
+        path. The is_relative parameters are accepted for the compatibility
+        with the interface and they are ignored.
+    III.
+        The database runs in WAL mode. A single save is committed on its own,
+        save_many() writes all of its items in one transaction and a batch (see
+        DofObjectHandler.transaction()) is one transaction as well. Nested
+        batches are savepoints of that transaction. The connection is shared
+        between threads and it is guarded by a lock.
+    IV.
+        In a forked child process the handler stays open, but its connection
+        is opened again only by the first operation of the child.
+    """
+
+    # Connections inherited through fork(), they are kept to prevent the
+    # garbage collector from closing them in the child process.
+    __inherited = []
+
+
+    def __init__(self, database : str = 'dof.sqlite', encoding : str = 'utf8',
+                 timeout : float = 5.0):
+        """
+        Initialize an instance of the object
+        ====================================
+
+        Parameters
+        ----------
+        database : str, optional ('dof.sqlite' if omitted)
+            Path of the database file. It is created on open() if it doesn't
+            exist.
+        encoding : str, optional (utf8 if omitted)
+            Encoding type of textual files like text and JSON files.
+        timeout : float, optional (5.0 if omitted)
+            Seconds to wait for a lock of the database held by another
+            connection.
+        """
+
+        super().__init__(DofObjectHandler.LOCAL)
+        self.__database = database
+        self.__encoding = encoding
+        self.__timeout = timeout
+        self.__connection = None
+        self.__reconnect = False
+        self.__batch_depth = 0
+        self.__lock = RLock()
+
+
+    def abort_batch(self):
+        """
+        Roll back the transaction of the actual batch
+        =============================================
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+
+        Notes
+        -----
+            A nested batch is rolled back to its savepoint, so the writes of
+            the outer batches are kept. The outermost batch rolls back the
+            whole transaction.
+        """
+
+        with self.__lock:
+            self.__check_open('abort_batch')
+            if self.__batch_depth > 1:
+                _savepoint = self.__savepoint()
+                self.__connection.execute('ROLLBACK TO ' + _savepoint)
+                self.__connection.execute('RELEASE ' + _savepoint)
+                self.__batch_depth -= 1
+            elif self.__batch_depth == 1:
+                self.__connection.execute('ROLLBACK')
+                self.__batch_depth = 0
+
+
+    def after_fork(self) -> bool:
+        """
+        Reinitialize the state of the handler in a forked child process
+        ===============================================================
+
+        Returns
+        -------
+        bool
+            True if the state has been reinitialized, False if it has already
+            been reinitialized in the actual process.
+
+        Notes
+        -----
+            An SQLite connection must not be used in the child process, not
+            even to close it, since closing can checkpoint or remove the
+            journal of the parent. The inherited connection is kept unused and
+            a new one is opened by the next operation, see the notes of the
+            class.
+        """
+
+        if not super().after_fork():
+            return False
+        self.__lock = RLock()
+        self.__batch_depth = 0
+        if self.__connection is not None:
+            SqliteHandler.__inherited.append(self.__connection)
+            self.__connection = None
+            self.__reconnect = True
+        return True
+
+
+    def begin_batch(self):
+        """
+        Begin a transaction
+        ===================
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+
+        Notes
+        -----
+            A nested batch opens a savepoint in the actual transaction.
+        """
+
+        with self.__lock:
+            self.__check_open('begin_batch')
+            self.__batch_depth += 1
+            if self.__batch_depth == 1:
+                self.__connection.execute('BEGIN')
+            else:
+                self.__connection.execute('SAVEPOINT ' + self.__savepoint())
+
+
+    def close(self):
+        """
+        Close the connection with the storage
+        =====================================
+
+        Notes
+        -----
+            An unfinished batch is rolled back.
+        """
+
+        with self.__lock:
+            self.__reconnect = False
+            if self.__connection is not None:
+                if self.__batch_depth > 0:
+                    self.__connection.execute('ROLLBACK')
+                    self.__batch_depth = 0
+                self.__connection.close()
+                self.__connection = None
+
+
+    def commit_batch(self):
+        """
+        Commit the transaction of the actual batch
+        ==========================================
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+        DofError
+            When there is no batch to commit.
+        """
+
+        with self.__lock:
+            self.__check_open('commit_batch')
+            if self.__batch_depth == 0:
+                raise DofError('SqliteHandler.commit_batch(): there is no ' +
+                               'batch to commit.')
+            if self.__batch_depth > 1:
+                self.__connection.execute('RELEASE ' + self.__savepoint())
+            else:
+                self.__connection.execute('COMMIT')
+            self.__batch_depth -= 1
+
+
+    @property
+    def database(self) -> str:
+        """
+        Get the path of the database file
+        =================================
+
+        Returns
+        -------
+        str
+            Path of the database file.
+        """
+
+        return self.__database
+
+
+    def delete(self, location : str, is_relative : bool = True):
+        """
+        Delete a file
+        =============
+
+        Parameters
+        ----------
+        location : str
+            Location of the file to delete.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+        DofError
+            If the target file doesn't exist.
+        """
+
+        with self.__lock:
+            self.__check_open('delete')
+            _cursor = self.__connection.execute(
+                        'DELETE FROM files WHERE directory = ? AND name = ?',
+                        self.__key(location))
+        if _cursor.rowcount == 0:
+            raise DofError('SqliteHandler.delete(): tried to delete ' +
+                           'non-existing file "{}".'.format(location))
+
+
+    @property
+    def encoding(self) -> str:
+        """
+        Get the value of encoding
+        =========================
+
+        Returns
+        -------
+        str
+            Encoding type of textual files.
+        """
+
+        return self.__encoding
+
+
+    @encoding.setter
+    def encoding(self, newvalue : str):
+        """
+        Set the value of encoding
+        =========================
+
+        Parameters
+        ----------
+        newvalue : str
+            Encoding type of textual files.
+        """
+
+        self.__encoding = newvalue
+
+
+    def exist(self, location : str, is_relative : bool = True) -> bool:
+        """
+        Get whether a file exists or not
+        ================================
+
+        Parameters
+        ----------
+        location : str
+            Location to check.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Returns
+        -------
+        bool
+            True if the file exists, False if not.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+        """
+
+        with self.__lock:
+            self.__check_open('exist')
+            _row = self.__connection.execute(
+                        'SELECT 1 FROM files WHERE directory = ? AND name = ?',
+                        self.__key(location)).fetchone()
+        return _row is not None
+
+
+    def files(self, location : str, is_relative : bool = True) -> list:
+        """
+        Get list of files in a directory
+        ================================
+
+        Parameters
+        ----------
+        location : str
+            Location to check.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Returns
+        -------
+        list
+            List of files, empty list if no files.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+        """
+
+        _directory = normpath(location)
+        if _directory == '.':
+            _directory = ''
+        with self.__lock:
+            self.__check_open('files')
+            _rows = self.__connection.execute(
+                        'SELECT name FROM files WHERE directory = ? ' +
+                        'ORDER BY name', (_directory,)).fetchall()
+        return [row[0] for row in _rows]
+
+
+    @property
+    def is_closed(self) -> bool:
+        """
+        Get whether the handler is closed or not
+        ========================================
+
+        Returns
+        -------
+        bool
+            True if the handler is closed, False if not.
+        """
+
+        return self.__connection is None and not self.__reconnect
+
+
+    @property
+    def is_open(self) -> bool:
+        """
+        Get whether the handler is open or not
+        ======================================
+
+        Returns
+        -------
+        bool
+            True if the handler is open, False if not.
+        """
+
+        return self.__connection is not None or self.__reconnect
+
+
+    def load_as_binary(self, location : str,
+                       is_relative : bool = True) -> bytes:
+        """
+        Load data as binary data
+        ========================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Returns
+        -------
+        bytes
+            Load data as bytes.
+
+        Raises
+        ------
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If the target file doesn't exist.
+        """
+
+        return CompressionPolicy.decompress(self.__fetch(location,
+                                                         'load_as_binary'))
+
+
+    def load_as_instance(self, location : str,
+                         is_relative : bool = True) -> any:
+        """
+        Load data as instance
+        =====================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Returns
+        -------
+        any
+            Load data as any instances.
+
+        Raises
+        ------
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If the target file doesn't exist.
+        """
+
+        _payload = self.__fetch(location, 'load_as_instance')
+        self.count_payload(bytes_in=len(_payload))
+        return pickle.loads(CompressionPolicy.decompress(_payload))
+
+
+    def load_as_json(self, location : str, is_relative : bool = True) -> any:
+        """
+        Load data as JSON data
+        ======================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Returns
+        -------
+        any
+            Load data as JSON.
+
+        Raises
+        ------
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If the target file doesn't exist.
+        """
+
+        return json.loads(self.__fetch(location, 'load_as_json')
+                          .decode(self.__encoding))
+
+
+    def load_as_text(self, location : str, is_relative : bool = True) -> list:
+        """
+        Load data as text
+        =================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Returns
+        -------
+        list[str]
+            Load data as a list of lines.
+
+        Raises
+        ------
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If the target file doesn't exist.
+        """
+
+        return (self.__fetch(location, 'load_as_text')
+                .decode(self.__encoding).splitlines(True))
+
+
+    def load_many(self, locations : list, is_relative : bool = True) -> list:
+        """
+        Load multiple data as instances
+        ===============================
+
+        Parameters
+        ----------
+        locations : list[str]
+            Locations to load from.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Returns
+        -------
+        list
+            Loaded instances in the order of locations.
+
+        Raises
+        ------
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If any of the target files doesn't exist.
+
+        Notes
+        -----
+            The rows are read under one lock of the connection.
+        """
+
+        with self.__lock:
+            self.__check_open('load_many')
+            _payloads = [self.__fetch(location, 'load_many')
+                         for location in locations]
+        self.count_payload(bytes_in=sum(len(payload)
+                                        for payload in _payloads))
+        return [pickle.loads(CompressionPolicy.decompress(payload))
+                for payload in _payloads]
+
+
+    def load_range(self, location : str, offset : int, length : int,
+                   is_relative : bool = True) -> bytes:
+        """
+        Load a byte range of binary data
+        ================================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        offset : int
+            Position of the first byte to load.
+        length : int
+            Number of bytes to load.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Returns
+        -------
+        bytes
+            The bytes of the range. It is shorter than length if the range
+            reaches over the end of the data.
+
+        Raises
+        ------
+        DofError
+            When offset or length is negative.
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If the target file doesn't exist.
+
+        Notes
+        -----
+            Only the given range is transferred from the database, unless the
+            file is compressed.
+        """
+
+        DofObjectHandler.check_range(offset, length)
+        with self.__lock:
+            self.__check_open('load_range')
+            if not self.exist(location):
+                raise DofError('SqliteHandler.load_range(): tried to load ' +
+                               'from non-existing file "{}".'.format(location))
+            result = CompressionPolicy.read_range(partial(self.__read_at,
+                                                  self.__key(location)),
+                                                  offset, length)
+        return result
+
+
+    def open(self):
+        """
+        Open the connection with the storage
+        ====================================
+
+        Notes
+        -----
+            The database file and its table are created if they don't exist.
+        """
+
+        with self.__lock:
+            if self.__connection is not None:
+                return
+            _connection = sqlite3.connect(self.__database,
+                                          timeout=self.__timeout,
+                                          isolation_level=None,
+                                          check_same_thread=False)
+            _connection.execute('PRAGMA journal_mode=WAL')
+            _connection.execute('PRAGMA synchronous=NORMAL')
+            _connection.execute('CREATE TABLE IF NOT EXISTS files (' +
+                                'id INTEGER PRIMARY KEY, ' +
+                                'directory TEXT NOT NULL, ' +
+                                'name TEXT NOT NULL, data BLOB NOT NULL)')
+            _connection.execute('CREATE UNIQUE INDEX IF NOT EXISTS ' +
+                                'files_location ON files (directory, name)')
+            self.__connection = _connection
+            self.__reconnect = False
+
+
+    def save_as_binary(self, data : any, location : str,
+                       is_relative : bool = True):
+        """
+        Save data as binary
+        ===================
+
+        Parameters
+        ----------
+        data : any
+            Data to save in the form true binary data.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+        """
+
+        if hasattr(data, 'to_binary'):
+            _payload = data.to_binary()
+        elif isinstance(data, (bytes, bytearray, memoryview)):
+            _payload = data
+        else:
+            _payload = pickle.dumps(data)
+        self.__store([(location, CompressionPolicy.protect(_payload))],
+                     'save_as_binary')
+
+
+    def save_as_instance(self, data : any, location : str,
+                         is_relative : bool = True):
+        """
+        Save data as instance
+        =====================
+
+        Parameters
+        ----------
+        data : any
+            Data to save in the form a python instance.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+        """
+
+        _payload = pickle.dumps(data)
+        self.count_payload(bytes_out=len(_payload))
+        self.__store([(location, _payload)], 'save_as_instance')
+
+
+    def save_as_json(self, data : any, location : str,
+                     is_relative : bool = True):
+        """
+        Save data as JSON data
+        ======================
+
+        Parameters
+        ----------
+        data : any
+            Data to save in the form JSON.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+        """
+
+        self.__store([(location, json.dumps(data).encode(self.__encoding))],
+                     'save_as_json')
+
+
+    def save_as_text(self, data : any, location : str,
+                     is_relative : bool = True):
+        """
+        Save data as text
+        =================
+
+        Parameters
+        ----------
+        data : str | list
+            Data to save as text. If list is given, elements of list is
+            considered is lines of text.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+        """
+
+        if isinstance(data, list):
+            _output = '\n'.join([str(row) for row in data])
+        else:
+            _output = data
+        self.__store([(location, _output.encode(self.__encoding))],
+                     'save_as_text')
+
+
+    def save_many(self, items : list, is_relative : bool = True):
+        """
+        Save multiple data as instances in one transaction
+        ==================================================
+
+        Parameters
+        ----------
+        items : list[tuple(any, str)]
+            Pairs of data to save and location to save to.
+        is_relative : bool, optional (True if omitted)
+            Ignored, for the compatibility with the interface.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+
+        Notes
+        -----
+            The items are pickled before the database gets locked and they are
+            inserted with one executemany() call.
+        """
+
+        _items = [(location, pickle.dumps(data)) for data, location in items]
+        self.count_payload(bytes_out=sum(len(payload)
+                                         for _, payload in _items))
+        self.__store(_items, 'save_many')
+
+
+    @property
+    def timeout(self) -> float:
+        """
+        Get the timeout of database locks
+        =================================
+
+        Returns
+        -------
+        float
+            Seconds to wait for a lock of the database.
+        """
+
+        return self.__timeout
+
+
+    def __check_open(self, caller : str):
+        """
+        Check whether the handler is open
+        =================================
+
+        Parameters
+        ----------
+        caller : str
+            Name of the calling function for error messages.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+
+        Notes
+        -----
+            The caller must hold the lock of the instance. The connection is
+            opened here if it was dropped by after_fork().
+        """
+
+        if self.__connection is None and self.__reconnect:
+            self.open()
+        if self.__connection is None:
+            raise DofError('SqliteHandler.{}(): handler is not open.'
+                           .format(caller))
+
+
+    def __fetch(self, location : str, caller : str) -> bytes:
+        """
+        Get the payload of a file
+        =========================
+
+        Parameters
+        ----------
+        location : str
+            Location of the file.
+        caller : str
+            Name of the calling function for error messages.
+
+        Returns
+        -------
+        bytes
+            The stored payload.
+
+        Raises
+        ------
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If the target file doesn't exist.
+        """
+
+        with self.__lock:
+            self.__check_open(caller)
+            _row = self.__connection.execute(
+                        'SELECT data FROM files WHERE directory = ? AND ' +
+                        'name = ?', self.__key(location)).fetchone()
+        if _row is None:
+            raise DofError('SqliteHandler.{}(): tried to load from '
+                           .format(caller) + 'non-existing file "{}".'
+                           .format(location))
+        return _row[0]
+
+
+    @staticmethod
+    def __key(location : str) -> tuple:
+        """
+        Get the key of a location
+        =========================
+
+        Parameters
+        ----------
+        location : str
+            Location of a file.
+
+        Returns
+        -------
+        tuple(str, str)
+            Directory and name of the file.
+        """
+
+        _directory, _name = split(normpath(location))
+        return _directory, _name
+
+
+    def __read_at(self, key : tuple, offset : int, length : int) -> bytes:
+        """
+        Read bytes of a stored file from a position
+        ===========================================
+
+        Parameters
+        ----------
+        key : tuple(str, str)
+            Directory and name of the file.
+        offset : int
+            Position of the first byte to read.
+        length : int | NoneType
+            Number of bytes to read, None means up to the end of the file.
+
+        Returns
+        -------
+        bytes
+            The bytes read, shorter than length at the end of the file.
+        """
+
+        if length is None:
+            _row = self.__connection.execute(
+                        'SELECT substr(data, ?) FROM files WHERE ' +
+                        'directory = ? AND name = ?', (offset + 1,) + key
+                        ).fetchone()
+        else:
+            _row = self.__connection.execute(
+                        'SELECT substr(data, ?, ?) FROM files WHERE ' +
+                        'directory = ? AND name = ?',
+                        (offset + 1, length) + key).fetchone()
+        return bytes(_row[0]) if _row[0] is not None else b''
+
+
+    def __savepoint(self) -> str:
+        """
+        Get the name of the savepoint of the actual nested batch
+        ========================================================
+
+        Returns
+        -------
+        str
+            Name of the savepoint, it comes from the depth of the batch.
+        """
+
+        return 'batch_{}'.format(self.__batch_depth)
+
+
+    def __store(self, items : list, caller : str):
+        """
+        Store files
+        ===========
+
+        Parameters
+        ----------
+        items : list[tuple(str, bytes)]
+            Pairs of location and payload to store.
+        caller : str
+            Name of the calling function for error messages.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+
+        Notes
+        -----
+            Outside of a batch the items are written in their own transaction.
+        """
+
+        _rows = [self.__key(location) + (payload,)
+                 for location, payload in items]
+        with self.__lock:
+            self.__check_open(caller)
+            _own_transaction = self.__batch_depth == 0
+            if _own_transaction:
+                self.__connection.execute('BEGIN')
+            try:
+                self.__connection.executemany(
+                            'INSERT OR REPLACE INTO files ' +
+                            '(directory, name, data) VALUES (?, ?, ?)', _rows)
+            except BaseException:
+                if _own_transaction:
+                    self.__connection.execute('ROLLBACK')
+                raise
+            if _own_transaction:
+                self.__connection.execute('COMMIT')
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,1035 @@
+"""
+DoF - Deep Model Core Output Framework
+======================================
+
+Submodule: handlers.tiered
+"""
+
+
+from collections import OrderedDict
+import json
+import os
+from os import makedirs, remove
+from os.path import dirname, getmtime, getsize, isabs, isfile, join, normpath
+from os.path import relpath
+import pickle
+from threading import RLock
+from uuid import uuid4
+
+from ..error import DofError
+from ..storage import DofObjectHandler, LocalHandler
+
+
+class TieredHandler(DofObjectHandler):
+    """
+    Caching handler with memory, disk and upstream tiers
+    ====================================================
+
+    Attributes
+    ----------
+    cache_path : str | NoneType (read-only)
+        Get the directory of the disk tier.
+    disk_budget : int | NoneType (read-only)
+        Get the size limit of the disk tier in bytes.
+    encoding : str
+        Encoding type for files with textual content (text, JSON).
+    handler_type : str (inherited) (read-only)
+        Get the type of the handler.
+    is_closed : bool (read-only)
+        Get whether the handler is closed or not.
+    is_open : bool (read-only)
+        Get whether the handler is open or not.
+    memory_budget : int (read-only)
+        Get the size limit of the memory tier in bytes.
+    stats : dict (read-only)
+        Get the hit, miss and eviction counters of the tiers.
+    upstream : DofObjectHandler (read-only)
+        Get the handler of the upstream tier.
+
+    Notes
+    -----
+    I.
+        Loads are read-through: a file is looked up in the memory tier, then in
+        the disk tier and finally it is loaded from the upstream handler. A file
+        found in a lower tier is copied into the tiers above it, so a remote
+        file is fetched only once. Saves are write-through: the file is saved
+        to the upstream handler and to every tier.
+    II.
+        Both tiers hold the raw content of the files (what load_as_binary()
+        returns) and they evict the least recently used files when their budget
+        is exceeded. Files larger than the budget of a tier are not stored in
+        that tier. The raw content of a file saved by LocalHandler with
+        out_of_band=True refers to the buffers of a sidecar file, so it cannot
+        be unpickled on its own. Instances of such files (and of any cached
+        content that fails to unpickle) are loaded by the upstream handler.
+    III.
+        Only relative locations are cached, absolute locations are passed to
+        the upstream handler directly. Relative locations that point outside
+        of the base path (eg. "../a.obj") are rejected. Batches are forwarded
+        to the upstream handler, the files written by an aborted batch are
+        dropped from the tiers.
+    IV.
+        The disk tier is a cache, so its files are not synced. A file is
+        written under a temporary name and renamed into place, which keeps
+        torn files out of the tier without the cost of a sync. File I/O of the
+        tiers runs outside of the lock of the handler, the lock guards the LRU
+        bookkeeping only.
+    """
+
+    # Keys of the counters of the stats property.
+    STAT_KEYS = ['memory_hits', 'memory_misses', 'memory_evictions',
+                 'disk_hits', 'disk_misses', 'disk_evictions',
+                 'upstream_loads']
+
+
+    def __init__(self, upstream : DofObjectHandler, cache_path : str = None,
+                 memory_budget : int = 67108864, disk_budget : int = None,
+                 encoding : str = 'utf8', handler_type : str = None):
+        """
+        Initialize an instance of the object
+        ====================================
+
+        Parameters
+        ----------
+        upstream : DofObjectHandler
+            Handler of the upstream tier, eg. an online handler.
+        cache_path : str, optional (None if omitted)
+            Directory of the disk tier. If None, there is no disk tier.
+        memory_budget : int, optional (64 MiB if omitted)
+            Size limit of the memory tier in bytes. 0 means no memory tier.
+        disk_budget : int, optional (None if omitted)
+            Size limit of the disk tier in bytes. If None, the size of the
+            disk tier is not limited.
+        encoding : str, optional (utf8 if omitted)
+            Encoding type of textual files like text and JSON files.
+        handler_type : str, optional (None if omitted)
+            Type of the handler. If None, the type of the upstream handler is
+            used.
+
+        Raises
+        ------
+        DofError
+            When memory_budget is negative.
+        """
+
+        if memory_budget < 0:
+            raise DofError('TieredHandler.init(): memory_budget must not be ' +
+                           'negative.')
+        if handler_type is None:
+            handler_type = upstream.handler_type
+        super().__init__(handler_type)
+        self.__upstream = upstream
+        self.__cache_path = cache_path
+        self.__memory_budget = memory_budget
+        self.__disk_budget = disk_budget
+        self.__encoding = encoding
+        self.__disk = None
+        self.__memory = OrderedDict()
+        self.__memory_size = 0
+        self.__disk_index = OrderedDict()
+        self.__disk_size = 0
+        self.__batch_written = set()
+        self.__stats = dict.fromkeys(TieredHandler.STAT_KEYS, 0)
+        self.__lock = RLock()
+
+
+    def abort_batch(self):
+        """
+        Drop the writes of the actual batch
+        ===================================
+
+        Notes
+        -----
+            The files written in the batch are dropped from the tiers, since
+            the upstream handler may roll them back.
+        """
+
+        self.__upstream.abort_batch()
+        _paths = []
+        with self.__lock:
+            for location in self.__batch_written:
+                _paths.extend(self.__forget(location))
+            self.__batch_written = set()
+        TieredHandler.__remove_files(_paths)
+
+
+    def after_fork(self) -> bool:
+        """
+        Reinitialize the state of the handler in a forked child process
+        ===============================================================
+
+        Returns
+        -------
+        bool
+            True if the state has been reinitialized, False if it has already
+            been reinitialized in the actual process.
+
+        Notes
+        -----
+            The upstream handler and the disk tier are reinitialized as well.
+        """
+
+        if not super().after_fork():
+            return False
+        self.__lock = RLock()
+        self.__upstream.after_fork()
+        if self.__disk is not None:
+            self.__disk.after_fork()
+        return True
+
+
+    def begin_batch(self):
+        """
+        Begin a batch of writes
+        =======================
+        """
+
+        self.__upstream.begin_batch()
+
+
+    @property
+    def cache_path(self) -> str:
+        """
+        Get the directory of the disk tier
+        ==================================
+
+        Returns
+        -------
+        str | NoneType
+            Directory of the disk tier, None if there is no disk tier.
+        """
+
+        return self.__cache_path
+
+
+    def close(self):
+        """
+        Close the connection with the storage
+        =====================================
+
+        Notes
+        -----
+            The upstream handler is closed as well. The memory tier is
+            emptied, the disk tier is kept for the next open().
+        """
+
+        with self.__lock:
+            self.__upstream.close()
+            if self.__disk is not None:
+                self.__disk.close()
+                self.__disk = None
+            self.__memory = OrderedDict()
+            self.__memory_size = 0
+
+
+    def commit_batch(self):
+        """
+        Commit the actual batch
+        =======================
+        """
+
+        self.__upstream.commit_batch()
+        with self.__lock:
+            self.__batch_written = set()
+
+
+    def delete(self, location : str, is_relative : bool = True):
+        """
+        Delete a file
+        =============
+
+        Parameters
+        ----------
+        location : str
+            Location of the file to delete.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+
+        Raises
+        ------
+        DofError
+            When a relative location points outside of the base path.
+
+        Notes
+        -----
+            The file is deleted from the upstream handler and from the tiers.
+        """
+
+        if not is_relative:
+            self.__upstream.delete(location, is_relative)
+            return
+        _location = self.__key(location, 'delete')
+        self.__upstream.delete(location, is_relative)
+        with self.__lock:
+            _paths = self.__forget(_location)
+        TieredHandler.__remove_files(_paths)
+
+
+    @property
+    def disk_budget(self) -> int:
+        """
+        Get the size limit of the disk tier
+        ===================================
+
+        Returns
+        -------
+        int | NoneType
+            Size limit in bytes, None if the size is not limited.
+        """
+
+        return self.__disk_budget
+
+
+    @property
+    def encoding(self) -> str:
+        """
+        Get the value of encoding
+        =========================
+
+        Returns
+        -------
+        str
+            Encoding type of textual files.
+        """
+
+        return self.__encoding
+
+
+    @encoding.setter
+    def encoding(self, newvalue : str):
+        """
+        Set the value of encoding
+        =========================
+
+        Parameters
+        ----------
+        newvalue : str
+            Encoding type of textual files.
+        """
+
+        self.__encoding = newvalue
+
+
+    def exist(self, location : str, is_relative : bool = True) -> bool:
+        """
+        Get whether a file exists or not
+        ================================
+
+        Parameters
+        ----------
+        location : str
+            Location to check.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+
+        Returns
+        -------
+        bool
+            True if the file exists, False if not.
+        """
+
+        if is_relative:
+            _location = self.__key(location, 'exist')
+            with self.__lock:
+                if (_location in self.__memory or
+                    _location in self.__disk_index):
+                    return True
+        return self.__upstream.exist(location, is_relative)
+
+
+    def files(self, location : str, is_relative : bool = True) -> list:
+        """
+        Get list of files in a directory
+        ================================
+
+        Parameters
+        ----------
+        location : str
+            Location to check.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+
+        Returns
+        -------
+        list
+            List of files of the upstream handler, empty list if no files.
+        """
+
+        return self.__upstream.files(location, is_relative)
+
+
+    @property
+    def is_closed(self) -> bool:
+        """
+        Get whether the handler is closed or not
+        ========================================
+
+        Returns
+        -------
+        bool
+            True if the handler is closed, False if not.
+        """
+
+        return self.__upstream.is_closed
+
+
+    @property
+    def is_open(self) -> bool:
+        """
+        Get whether the handler is open or not
+        ======================================
+
+        Returns
+        -------
+        bool
+            True if the handler is open, False if not.
+        """
+
+        return self.__upstream.is_open
+
+
+    def load_as_binary(self, location : str,
+                       is_relative : bool = True) -> bytes:
+        """
+        Load data as binary data
+        ========================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+
+        Returns
+        -------
+        bytes
+            Load data as bytes.
+
+        Raises
+        ------
+        DofError
+            If the target file doesn't exist in any tier.
+        DofError
+            When a relative location points outside of the base path.
+        """
+
+        return self.__fetch(location, is_relative, 'load_as_binary')
+
+
+    def load_as_instance(self, location : str,
+                         is_relative : bool = True) -> any:
+        """
+        Load data as instance
+        =====================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+
+        Returns
+        -------
+        any
+            Load data as any instances.
+
+        Raises
+        ------
+        DofError
+            If the target file doesn't exist in any tier.
+        DofError
+            When a relative location points outside of the base path.
+        """
+
+        if not is_relative:
+            return self.__upstream.load_as_instance(location, False)
+        _payload = self.__fetch(location, is_relative, 'load_as_instance')
+        self.count_payload(bytes_in=len(_payload))
+        try:
+            return pickle.loads(_payload)
+        except pickle.UnpicklingError:
+            pass
+        with self.__lock:
+            self.__stats['upstream_loads'] += 1
+        return self.__upstream.load_as_instance(location, is_relative)
+
+
+    def load_as_json(self, location : str, is_relative : bool = True) -> any:
+        """
+        Load data as JSON data
+        ======================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+
+        Returns
+        -------
+        any
+            Load data as JSON.
+
+        Raises
+        ------
+        DofError
+            If the target file doesn't exist in any tier.
+        DofError
+            When a relative location points outside of the base path.
+        """
+
+        return json.loads(self.__fetch(location, is_relative, 'load_as_json')
+                          .decode(self.__encoding))
+
+
+    def load_as_text(self, location : str, is_relative : bool = True) -> list:
+        """
+        Load data as text
+        =================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+
+        Returns
+        -------
+        list[str]
+            Load data as a list of lines.
+
+        Raises
+        ------
+        DofError
+            If the target file doesn't exist in any tier.
+        DofError
+            When a relative location points outside of the base path.
+        """
+
+        return (self.__fetch(location, is_relative, 'load_as_text')
+                .decode(self.__encoding).splitlines(True))
+
+
+    def load_range(self, location : str, offset : int, length : int,
+                   is_relative : bool = True) -> bytes:
+        """
+        Load a byte range of binary data
+        ================================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        offset : int
+            Position of the first byte to load.
+        length : int
+            Number of bytes to load.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+
+        Returns
+        -------
+        bytes
+            The bytes of the range. It is shorter than length if the range
+            reaches over the end of the data.
+
+        Notes
+        -----
+            A file of the memory tier is sliced, any other range is loaded from
+            the upstream handler without caching.
+        """
+
+        DofObjectHandler.check_range(offset, length)
+        if is_relative:
+            _location = self.__key(location, 'load_range')
+            with self.__lock:
+                _payload = self.__memory.get(_location)
+                if _payload is not None:
+                    self.__memory.move_to_end(_location)
+                    self.__stats['memory_hits'] += 1
+                    return _payload[offset:offset + length]
+        return self.__upstream.load_range(location, offset, length,
+                                          is_relative)
+
+
+    @property
+    def memory_budget(self) -> int:
+        """
+        Get the size limit of the memory tier
+        =====================================
+
+        Returns
+        -------
+        int
+            Size limit in bytes.
+        """
+
+        return self.__memory_budget
+
+
+    def open(self):
+        """
+        Open the connection with the storage
+        ====================================
+
+        Notes
+        -----
+            The upstream handler is opened if it is not open yet. The files of
+            the disk tier that are left from earlier runs are indexed in the
+            order of their modification time, unfinished temporary files are
+            removed.
+        """
+
+        if not self.__upstream.is_open:
+            self.__upstream.open()
+        if self.__cache_path is None or self.__disk is not None:
+            return
+        makedirs(self.__cache_path, exist_ok=True)
+        _found = []
+        for root, _, filenames in os.walk(self.__cache_path):
+            for filename in filenames:
+                _path = join(root, filename)
+                if filename.endswith(LocalHandler.TEMP_EXTENSION):
+                    remove(_path)
+                    continue
+                _found.append((getmtime(_path),
+                               relpath(_path, self.__cache_path),
+                               getsize(_path)))
+        with self.__lock:
+            self.__disk_index = OrderedDict((location, size) for _, location,
+                                            size in sorted(_found))
+            self.__disk_size = sum(self.__disk_index.values())
+            self.__disk = LocalHandler(self.__cache_path)
+            self.__disk.open()
+            _paths = self.__evict_disk()
+        TieredHandler.__remove_files(_paths)
+
+
+    def reset_stats(self):
+        """
+        Reset the counters of the tiers
+        ===============================
+        """
+
+        with self.__lock:
+            self.__stats = dict.fromkeys(TieredHandler.STAT_KEYS, 0)
+
+
+    def save_as_binary(self, data : any, location : str,
+                       is_relative : bool = True):
+        """
+        Save data as binary
+        ===================
+
+        Parameters
+        ----------
+        data : any
+            Data to save in the form true binary data.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+        """
+
+        if hasattr(data, 'to_binary'):
+            _payload = bytes(data.to_binary())
+        elif isinstance(data, (bytes, bytearray, memoryview)):
+            _payload = bytes(data)
+        else:
+            _payload = pickle.dumps(data)
+        self.__store(_payload, location, is_relative, 'save_as_binary')
+
+
+    def save_as_instance(self, data : any, location : str,
+                         is_relative : bool = True):
+        """
+        Save data as instance
+        =====================
+
+        Parameters
+        ----------
+        data : any
+            Data to save in the form a python instance.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+        """
+
+        _payload = pickle.dumps(data)
+        self.count_payload(bytes_out=len(_payload))
+        self.__store(_payload, location, is_relative, 'save_as_instance')
+
+
+    def save_as_json(self, data : any, location : str,
+                     is_relative : bool = True):
+        """
+        Save data as JSON data
+        ======================
+
+        Parameters
+        ----------
+        data : any
+            Data to save in the form JSON.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+        """
+
+        self.__store(json.dumps(data).encode(self.__encoding), location,
+                     is_relative, 'save_as_json')
+
+
+    def save_as_text(self, data : any, location : str,
+                     is_relative : bool = True):
+        """
+        Save data as text
+        =================
+
+        Parameters
+        ----------
+        data : str | list
+            Data to save as text. If list is given, elements of list is
+            considered is lines of text.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+        """
+
+        if isinstance(data, list):
+            _output = '\n'.join([str(row) for row in data])
+        else:
+            _output = data
+        self.__store(_output.encode(self.__encoding), location, is_relative,
+                     'save_as_text')
+
+
+    @property
+    def stats(self) -> dict:
+        """
+        Get the counters of the tiers
+        =============================
+
+        Returns
+        -------
+        dict
+            Copy of the counters, the keys are in STAT_KEYS.
+        """
+
+        with self.__lock:
+            return dict(self.__stats)
+
+
+    @property
+    def upstream(self) -> DofObjectHandler:
+        """
+        Get the handler of the upstream tier
+        ====================================
+
+        Returns
+        -------
+        DofObjectHandler
+            The upstream handler.
+        """
+
+        return self.__upstream
+
+
+    def __cache(self, location : str, payload : bytes, to_disk : bool):
+        """
+        Put a file into the tiers
+        =========================
+
+        Parameters
+        ----------
+        location : str
+            Normalized location of the file.
+        payload : bytes
+            Content of the file.
+        to_disk : bool
+            Whether to put the file into the disk tier as well.
+
+        Notes
+        -----
+            The tiers are updated under the lock, the file of the disk tier is
+            written and evicted files are removed outside of it.
+        """
+
+        _paths = []
+        with self.__lock:
+            if len(payload) <= self.__memory_budget:
+                self.__memory_size -= len(self.__memory.pop(location, b''))
+                self.__memory[location] = payload
+                self.__memory_size += len(payload)
+                while self.__memory_size > self.__memory_budget:
+                    _, _evicted = self.__memory.popitem(last=False)
+                    self.__memory_size -= len(_evicted)
+                    self.__stats['memory_evictions'] += 1
+            else:
+                self.__memory_size -= len(self.__memory.pop(location, b''))
+            _disk = self.__disk if to_disk else None
+            if (_disk is not None and self.__disk_budget is not None and
+                len(payload) > self.__disk_budget):
+                _paths = self.__forget_disk(location)
+                _disk = None
+        if _disk is None:
+            TieredHandler.__remove_files(_paths)
+            return
+        self.__write_disk(_disk, location, payload)
+        with self.__lock:
+            self.__disk_size -= self.__disk_index.pop(location, 0)
+            self.__disk_index[location] = len(payload)
+            self.__disk_size += len(payload)
+            _paths = self.__evict_disk()
+        TieredHandler.__remove_files(_paths)
+
+
+    def __evict_disk(self) -> list:
+        """
+        Evict files from the disk tier until it fits into its budget
+        ============================================================
+
+        Returns
+        -------
+        list[str]
+            Paths of the evicted files, the caller removes them outside of the
+            lock.
+        """
+
+        result = []
+        if self.__disk_budget is None:
+            return result
+        while self.__disk_size > self.__disk_budget:
+            _location, _size = self.__disk_index.popitem(last=False)
+            self.__disk_size -= _size
+            result.append(join(self.__cache_path, _location))
+            self.__stats['disk_evictions'] += 1
+        return result
+
+
+    def __fetch(self, location : str, is_relative : bool,
+                caller : str) -> bytes:
+        """
+        Get the content of a file through the tiers
+        ===========================================
+
+        Parameters
+        ----------
+        location : str
+            Location of the file.
+        is_relative : bool
+            Whether to treat location string as relative or absolute location.
+        caller : str
+            Name of the calling function for error messages.
+
+        Returns
+        -------
+        bytes
+            Content of the file.
+
+        Notes
+        -----
+            A file of the disk tier that disappears while it is read (eg. it
+            is evicted by another thread) is counted as a miss of the disk tier
+            and it is loaded from the upstream handler.
+        """
+
+        if not is_relative:
+            return bytes(self.__upstream.load_as_binary(location, False))
+        _location = self.__key(location, caller)
+        with self.__lock:
+            result = self.__memory.get(_location)
+            if result is not None:
+                self.__memory.move_to_end(_location)
+                self.__stats['memory_hits'] += 1
+                return result
+            self.__stats['memory_misses'] += 1
+            _disk = self.__disk
+            if _disk is not None and _location not in self.__disk_index:
+                self.__stats['disk_misses'] += 1
+                _disk = None
+        if _disk is not None:
+            try:
+                result = bytes(_disk.load_as_binary(_location))
+            except (DofError, OSError):
+                result = None
+            with self.__lock:
+                if result is None:
+                    self.__stats['disk_misses'] += 1
+                    _paths = self.__forget_disk(_location)
+                else:
+                    if _location in self.__disk_index:
+                        self.__disk_index.move_to_end(_location)
+                    self.__stats['disk_hits'] += 1
+            if result is not None:
+                self.__cache(_location, result, False)
+                return result
+            TieredHandler.__remove_files(_paths)
+        result = bytes(self.__upstream.load_as_binary(location, is_relative))
+        with self.__lock:
+            self.__stats['upstream_loads'] += 1
+        self.__cache(_location, result, True)
+        return result
+
+
+    def __forget(self, location : str) -> list:
+        """
+        Drop a file from the tiers
+        ==========================
+
+        Parameters
+        ----------
+        location : str
+            Normalized location of the file.
+
+        Returns
+        -------
+        list[str]
+            Paths of the files to remove from the disk tier.
+        """
+
+        self.__memory_size -= len(self.__memory.pop(location, b''))
+        return self.__forget_disk(location)
+
+
+    def __forget_disk(self, location : str) -> list:
+        """
+        Drop a file from the disk tier
+        ==============================
+
+        Parameters
+        ----------
+        location : str
+            Normalized location of the file.
+
+        Returns
+        -------
+        list[str]
+            Paths of the files to remove from the disk tier.
+        """
+
+        if location not in self.__disk_index:
+            return []
+        self.__disk_size -= self.__disk_index.pop(location)
+        return [join(self.__cache_path, location)]
+
+
+    @staticmethod
+    def __key(location : str, caller : str) -> str:
+        """
+        Get the key of a relative location in the tiers
+        ===============================================
+
+        Parameters
+        ----------
+        location : str
+            Relative location of a file.
+        caller : str
+            Name of the calling function for error messages.
+
+        Returns
+        -------
+        str
+            Normalized location of the file.
+
+        Raises
+        ------
+        DofError
+            When the location points outside of the base path.
+        """
+
+        result = normpath(location)
+        if isabs(result) or result.split(os.sep)[0] == '..':
+            raise DofError('TieredHandler.{}(): location "{}" points '
+                           .format(caller, location) + 'outside of the base ' +
+                           'path.')
+        return result
+
+
+    @staticmethod
+    def __remove_files(paths : list):
+        """
+        Remove files of the disk tier
+        =============================
+
+        Parameters
+        ----------
+        paths : list[str]
+            Paths of the files to remove. Missing files are skipped.
+        """
+
+        for path in paths:
+            if isfile(path):
+                remove(path)
+
+
+    def __store(self, payload : bytes, location : str, is_relative : bool,
+                caller : str):
+        """
+        Save a file to the upstream handler and to the tiers
+        ====================================================
+
+        Parameters
+        ----------
+        payload : bytes
+            Content of the file.
+        location : str
+            Location of the file.
+        is_relative : bool
+            Whether to treat location string as relative or absolute location.
+        caller : str
+            Name of the calling function for error messages.
+
+        Notes
+        -----
+            The content is serialized only once, it is saved to the upstream
+            handler as binary data.
+        """
+
+        if not is_relative:
+            self.__upstream.save_as_binary(payload, location, is_relative)
+            return
+        _location = self.__key(location, caller)
+        self.__upstream.save_as_binary(payload, location, is_relative)
+        self.__cache(_location, payload, True)
+        with self.__lock:
+            self.__batch_written.add(_location)
+
+
+    def __write_disk(self, disk : LocalHandler, location : str,
+                     payload : bytes):
+        """
+        Write a file of the disk tier
+        =============================
+
+        Parameters
+        ----------
+        disk : LocalHandler
+            Handler of the disk tier.
+        location : str
+            Normalized location of the file.
+        payload : bytes
+            Content of the file.
+
+        Notes
+        -----
+            The file is written under a temporary name and renamed into place
+            without a sync, see the notes of the class.
+        """
+
+        _temp = '{}.{}{}'.format(location, uuid4().hex,
+                                 LocalHandler.TEMP_EXTENSION)
+        makedirs(dirname(join(self.__cache_path, location)), exist_ok=True)
+        disk.save_as_binary(payload, _temp)
+        os.replace(join(self.__cache_path, _temp),
+                   join(self.__cache_path, location))
+
+
+if __name__ == '__main__':
+    pass
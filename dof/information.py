@@ -20,7 +20,7 @@ from .core import DofObject
 from .datamodel import ContentForm, JSONContent, JSONDescription, JSONRoot
 from .datamodel import create_json_dict, get_content
 from .error import DofError
-from .storage import DofSerializable
+from .storage import DofObjectHandler, DofSerializable
 
 
 class Information(dict, DofSerializable):
@@ -771,6 +771,37 @@ class Document(InformationStrict):
         return Document(list(data.items()), _document)
 
 
+    def save_from_stream(self, instream : any,
+                         destination_type : str = DofObjectHandler.LOCAL,
+                         chunk_size : int = DofObjectHandler.CHUNK_SIZE
+                         ) -> int:
+        """
+        Save the document from a binary stream
+        ======================================
+
+        Parameters
+        ----------
+        instream : file object
+            Readable binary stream of the document, eg. an open file.
+        destination_type : str, optional (DofObjectHandler.LOCAL if omitted)
+            Destinaton of the document.
+        chunk_size : int, optional (DofObjectHandler.CHUNK_SIZE if omitted)
+            Size of the chunks to copy in bytes.
+
+        Returns
+        -------
+        int
+            Number of bytes copied.
+
+        See Also
+        --------
+            Streamed save of binary data : core.DofObject.save_from_stream()
+        """
+
+        return self.__document.save_from_stream(instream, destination_type,
+                                                chunk_size)
+
+
     def to_json_dict(self, describe_only : bool = True) -> dict:
         """
         Create a dictionary that is compatible to make JSON from an instance
@@ -7,10 +7,27 @@ Submodule: storage
 
 
 from abc import ABC, abstractmethod
+from array import array
+from asyncio import gather, get_running_loop
+import bz2
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from functools import partial, wraps
+from io import BufferedReader, BytesIO, RawIOBase
+from itertools import repeat
 import json
-from os import listdir
-from os.path import isfile, join
+from hashlib import blake2b
+import lzma
+from mmap import mmap, ACCESS_READ
+import os
+from os import listdir, makedirs, remove
+from os.path import dirname, getsize, isdir, isfile, join, normpath
+from os.path import relpath, split, splitext
 import pickle
+from threading import Lock, current_thread, local
+from time import perf_counter
+from uuid import uuid4
+import zlib
 
 from .error import DofError
 
@@ -28,12 +45,25 @@ class DofObjectHandler(ABC):
         Get whether the handler is closed or not.
     is_open : bool (abstract) (read-only)
         Get whether the handler is open or not.
+
+    Notes
+    -----
+        The operations of MEASURED_OPERATIONS are measured automatically in
+        every subclass, see io_stats().
     """
 
     # These variables should be static class level constants but this out of the
     # capabilites of Python.
     LOCAL = 'local'
     ONLINE = 'online'
+    # Size of the chunks of streamed copies in bytes.
+    CHUNK_SIZE = 1048576
+    # Operations that are measured by the I/O statistics of the handlers.
+    MEASURED_OPERATIONS = ['delete', 'exist', 'files', 'load_as_binary',
+                           'load_as_instance', 'load_as_json', 'load_as_text',
+                           'load_many', 'load_range', 'save_as_binary',
+                           'save_as_instance', 'save_as_json', 'save_as_text',
+                           'save_many']
 
 
     @abstractmethod
@@ -58,6 +88,115 @@ class DofObjectHandler(ABC):
             self.__handler_type = handler_type
         else:
             raise DofError('DofObjectHandler.init(): unsupported handler type.')
+        self.__io_stats = HandlerStats()
+        self.__pid = os.getpid()
+
+
+    def __init_subclass__(cls, **kwargs):
+        """
+        Instrument the measured operations of a subclass
+        ================================================
+
+        Parameters
+        ----------
+        keyword arguments
+            Arguments to forward to the __init_subclass__() of the parent.
+
+        Notes
+        -----
+            Every operation of MEASURED_OPERATIONS that is not yet measured is
+            wrapped, including the inherited default implementations. Abstract
+            methods are left as they are.
+        """
+
+        super().__init_subclass__(**kwargs)
+        for name in DofObjectHandler.MEASURED_OPERATIONS:
+            _method = getattr(cls, name, None)
+            if _method is None or getattr(_method, '__isabstractmethod__',
+                                          False):
+                continue
+            if getattr(_method, '_dof_measured', False):
+                continue
+            setattr(cls, name, DofObjectHandler.__measured(name, _method))
+
+
+    def abort_batch(self):
+        """
+        Drop the writes of the actual batch
+        ===================================
+
+        Notes
+        -----
+            This default implementation does nothing, handlers without batch
+            support write immediately.
+        """
+
+
+    def after_fork(self) -> bool:
+        """
+        Reinitialize the state of the handler in a forked child process
+        ===============================================================
+
+        Returns
+        -------
+        bool
+            True if the state has been reinitialized, False if it has already
+            been reinitialized in the actual process.
+
+        Notes
+        -----
+            This function is called by DofObject.after_fork() in the child
+            process for the registered handlers, and by wrapper handlers (eg.
+            PrefetchHandler) for their upstream handlers. Locks, worker pools,
+            open connections and file descriptors of the parent must not be
+            used by the child. This default implementation starts new I/O
+            statistics and it remembers the process, so only the first call in
+            a process does anything. Handlers with such state should override
+            it, call it first and return False if it returns False.
+        """
+
+        _pid = os.getpid()
+        if self.__pid == _pid:
+            return False
+        self.__pid = _pid
+        self.__io_stats = HandlerStats()
+        return True
+
+
+    def begin_batch(self):
+        """
+        Start a batch of writes
+        =======================
+
+        Notes
+        -----
+            This default implementation does nothing, handlers without batch
+            support write immediately.
+        """
+
+
+    @staticmethod
+    def check_range(offset : int, length : int):
+        """
+        Check the parameters of a byte range
+        ====================================
+
+        Parameters
+        ----------
+        offset : int
+            Position of the first byte.
+        length : int
+            Number of bytes.
+
+        Raises
+        ------
+        DofError
+            When offset or length is negative.
+        """
+
+        if offset < 0 or length < 0:
+            raise DofError('DofObjectHandler.load_range(): offset and ' +
+                           'length must not be negative.')
 
 
     @abstractmethod
@@ -68,6 +207,67 @@ class DofObjectHandler(ABC):
         """
 
 
+    def commit_batch(self):
+        """
+        Make the writes of the actual batch permanent
+        =============================================
+
+        Notes
+        -----
+            This default implementation does nothing, handlers without batch
+            support write immediately.
+        """
+
+
+    def count_payload(self, bytes_in : int = 0, bytes_out : int = 0):
+        """
+        Count the serialized size of a payload into the I/O statistics
+        ==============================================================
+
+        Parameters
+        ----------
+        bytes_in : int, optional (0 if omitted)
+            Number of bytes loaded.
+        bytes_out : int, optional (0 if omitted)
+            Number of bytes saved.
+
+        Notes
+        -----
+            Handlers call this function from their measured operations when
+            the payload is not bytes-like (eg. save_as_instance()), so the
+            size of the pickled, compressed or transferred form is counted.
+            The bytes are added to the operations in progress of the actual
+            thread.
+        """
+
+        self.__io_stats.count_payload(bytes_in, bytes_out)
+
+
+    def delete(self, location : str, is_relative : bool = True):
+        """
+        Delete a file
+        =============
+
+        Parameters
+        ----------
+        location : str
+            Location of the file to delete.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Raises
+        ------
+        DofError
+            In this default implementation always, since the handler doesn't
+            support deletion.
+        """
+
+        raise DofError('DofObjectHandler.delete(): {} doesn\'t support '
+                       .format(type(self).__name__) + 'deletion.')
+
+
     @abstractmethod
     def exist(self, location : str, is_relative : bool = True) -> bool:
         """
@@ -130,6 +330,33 @@ class DofObjectHandler(ABC):
         return self.__handler_type
 
 
+    def io_stats(self) -> dict:
+        """
+        Get a snapshot of the I/O statistics
+        ====================================
+
+        Returns
+        -------
+        dict(str : dict)
+            Statistics of the operations that have been called since the
+            creation of the handler or the last reset_io_stats(), by operation
+            name. See HandlerStats.snapshot() for the fields.
+
+        Notes
+        -----
+            Only the outermost call of an operation is measured, calls of the
+            same operation through super() are not counted again. Operations
+            of upstream handlers are measured by the upstream handlers. Bytes
+            of payloads that are not bytes-like are counted by the handlers,
+            see count_payload().
+            The function is not called stats(), since several handlers (eg.
+            PrefetchHandler, TieredHandler) already have a stats property of
+            their own cache counters.
+        """
+
+        return self.__io_stats.snapshot()
+
+
     @property
     @abstractmethod
     def is_closed(self) -> bool:
@@ -248,6 +475,78 @@ class DofObjectHandler(ABC):
         """
 
 
+    def load_many(self, locations : list, is_relative : bool = True) -> list:
+        """
+        Load multiple data as instances
+        ===============================
+
+        Parameters
+        ----------
+        locations : list[str]
+            Locations to load from.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location strings as relative or absolute locations.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Returns
+        -------
+        list[any]
+            Loaded instances in the order of the given locations.
+
+        Notes
+        -----
+            This default implementation loads the locations one after another
+            with load_as_instance(). Handlers that can overlap the latency of
+            their storage should override it.
+        """
+
+        return [self.load_as_instance(location, is_relative)
+                for location in locations]
+
+
+    def load_range(self, location : str, offset : int, length : int,
+                   is_relative : bool = True) -> bytes:
+        """
+        Load a byte range of binary data
+        ================================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        offset : int
+            Position of the first byte to load.
+        length : int
+            Number of bytes to load.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Returns
+        -------
+        bytes
+            The bytes of the range. It is shorter than length if the range
+            reaches over the end of the data.
+
+        Raises
+        ------
+        DofError
+            When offset or length is negative.
+
+        Notes
+        -----
+            This default implementation loads the whole data with
+            load_as_binary() and slices it. Handlers that can read a part of a
+            file should override it.
+        """
+
+        DofObjectHandler.check_range(offset, length)
+        _data = memoryview(self.load_as_binary(location, is_relative))
+        return bytes(_data[offset:offset + length])
+
+
     @abstractmethod
     def open(self):
         """
@@ -256,6 +555,76 @@ class DofObjectHandler(ABC):
         """
 
 
+    @contextmanager
+    def open_read(self, location : str, is_relative : bool = True) -> any:
+        """
+        Open a file to read as a binary stream
+        ======================================
+
+        Parameters
+        ----------
+        location : str
+            Location to read from.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+
+        Returns
+        -------
+        Iterator[file object]
+            Context manager that yields a readable binary stream of the
+            decompressed content.
+
+        Notes
+        -----
+            This default implementation loads the whole file with
+            load_as_binary(). Handlers that can read their storage in chunks
+            should override it.
+        """
+
+        with BytesIO(self.load_as_binary(location, is_relative)) as instream:
+            yield instream
+
+
+    @contextmanager
+    def open_write(self, location : str, is_relative : bool = True) -> any:
+        """
+        Open a file to write as a binary stream
+        =======================================
+
+        Parameters
+        ----------
+        location : str
+            Location to write to.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+
+        Returns
+        -------
+        Iterator[file object]
+            Context manager that yields a writable binary stream.
+
+        Notes
+        -----
+            The file is saved when the context exits normally, nothing is saved
+            when an exception leaves the context. This default implementation
+            collects the content in memory and saves it with save_as_binary().
+            Handlers that can write their storage in chunks should override it.
+        """
+
+        with BytesIO() as outstream:
+            yield outstream
+            self.save_as_binary(outstream.getvalue(), location, is_relative)
+
+
+    def reset_io_stats(self):
+        """
+        Reset the I/O statistics
+        ========================
+        """
+
+        self.__io_stats.reset()
+
+
     @abstractmethod
     def save_as_binary(self, data : any, location : str,
                        is_relative : bool = True):
@@ -360,588 +729,3791 @@ class DofObjectHandler(ABC):
         """
 
 
-class DofSerializable:
-    """
-    Provide serializability functions
-    =================================
-    """
-
-
-    @abstractmethod
-    def from_json(self, json_string : str, **kwargs) -> any:
+    def save_from_stream(self, instream : any, location : str,
+                         is_relative : bool = True,
+                         chunk_size : int = CHUNK_SIZE) -> int:
         """
-        Abstract methot to build object from JSON string
-        ================================================
+        Save the content of a binary stream
+        ===================================
 
         Parameters
         ----------
-        json_string : str
-            The JSON formatted string that contains all the needed data.
-        keyword arguments
-            Arguments to forward to json.loads() funtion.
+        instream : file object
+            Readable binary stream to copy from.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+        chunk_size : int, optional (DofObjectHandler.CHUNK_SIZE if omitted)
+            Size of the chunks to copy in bytes.
 
         Returns
         -------
-        any
-            The object that is created.
+        int
+            Number of bytes copied.
 
         Notes
         -----
-            This function requires a JSON string that is created with the
-            .to_json(describe_only=False) function.
+            The stream is copied chunk by chunk into open_write(), so the
+            memory usage is bounded by the chunk size if the handler writes its
+            storage in chunks.
         """
 
+        result = 0
+        with self.open_write(location, is_relative) as outstream:
+            _chunk = instream.read(chunk_size)
+            while len(_chunk) > 0:
+                outstream.write(_chunk)
+                result += len(_chunk)
+                _chunk = instream.read(chunk_size)
+        return result
 
-    def to_json(self, describe_only : bool = True, **kwargs) -> str:
+
+    def save_many(self, items : list, is_relative : bool = True):
         """
-        Create JSON from an instance
-        ============================
+        Save multiple data as instances
+        ===============================
 
         Parameters
         ----------
-        describe_only : bool, optional (True if omitted)
-            Whether the JSON output should be a whole instance or not. If the
-            value is False, the function returns all data of the instance that
-            is needed to restore exactly the same instance. If the value is
-            True, only those data should be included which are essential to
-            describe the data.
-        keyword arguments
-            Arguments to forward to json.dunps() funtion.
+        items : list[tuple(any, str)]
+            Pairs of data to save and location to save to.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location strings as relative or absolute locations.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Notes
+        -----
+            This default implementation saves the items one after another with
+            save_as_instance(). Handlers that can overlap the latency of their
+            storage should override it.
+        """
+
+        for data, location in items:
+            self.save_as_instance(data, location, is_relative)
+
+
+    @contextmanager
+    def transaction(self) -> any:
+        """
+        Group the writes inside the context into one batch
+        ==================================================
 
         Returns
         -------
-        str
-            JSON formatted string.
+        Iterator[DofObjectHandler]
+            Context manager that yields the handler itself.
 
         Notes
         -----
-            If the value of describe_only parameter is True, only description
-            data returns. This means the dataset won't be included. It does not
-            matter that the dataelements are images or strings. The goal of
-            describe_only is not to store the data but to describe it.
+            The batch is committed when the context exits normally and aborted
+            when an exception leaves the context. Example:
+
+            with handler.transaction():
+                handler.save_as_instance(data, 'a.obj')
+                handler.save_as_instance(other_data, 'b.obj')
         """
 
-        data = self.to_json_dict(describe_only=describe_only)
-        return json.dumps(data, **kwargs)
+        self.begin_batch()
+        try:
+            yield self
+        except BaseException:
+            self.abort_batch()
+            raise
+        self.commit_batch()
 
 
-    @abstractmethod
-    def to_json_dict(self, describe_only : bool = True) -> dict:
+    @staticmethod
+    def __measured(operation : str, method : any) -> any:
         """
-        Abstract method to create a dict that is compatible to JSON from
-        ================================================================
+        Wrap a method to measure it
+        ===========================
 
         Parameters
         ----------
-        describe_only : bool, optional (True if omitted)
-            Whether the JSON output should be a whole instance or not. If the
-            value is False, the function returns all data of the instance that
-            is needed to restore exactly the same instance. If the value is
-            True, only those data should be included which are essential to
-            describe the data.
+        operation : str
+            Name of the operation.
+        method : callable
+            The method to wrap.
 
         Returns
         -------
-        dict
-            Dict that is complatible to create a JSON formatted string.
+        callable
+            The wrapper method that records the calls into the statistics of
+            the handler.
+        """
 
-        Notes
-        -----
-            If the value of describe_only parameter is True, only description
-            data returns. This means the dataset won't be included. It does not
-            matter that the dataelements are images or strings. The goal of
-            describe_only is not to store the data but to describe it.
-        """
+        def measured(self, *args, **kwargs):
+            _stats = self.__io_stats
+            _active = _stats.active_operations()
+            if operation in _active:
+                return method(self, *args, **kwargs)
+            _active.add(operation)
+            _payload = [0, 0]
+            _outer = _stats.swap_payload(_payload)
+            _start = perf_counter()
+            try:
+                result = method(self, *args, **kwargs)
+            except BaseException:
+                _stats.record(operation, perf_counter() - _start, failed=True)
+                raise
+            finally:
+                _active.discard(operation)
+                _stats.swap_payload(_outer)
+                if _outer is not None:
+                    _outer[0] += _payload[0]
+                    _outer[1] += _payload[1]
+            _elapsed = perf_counter() - _start
+            if operation.startswith('load'):
+                _stats.record(operation, _elapsed, bytes_in=_payload[0] or
+                              HandlerStats.payload_size(result))
+            elif operation.startswith('save'):
+                _data = args[0] if len(args) > 0 else kwargs.get(
+                                'items' if operation == 'save_many' else 'data')
+                _stats.record(operation, _elapsed, bytes_out=_payload[1] or
+                              HandlerStats.payload_size(_data))
+            else:
+                _stats.record(operation, _elapsed)
+            return result
 
+        result = wraps(method)(measured)
+        result._dof_measured = True
+        return result
 
-class LocalHandler(DofObjectHandler):
-    """
-    Local storage handler
-    =====================
 
-    Attributes
-    ----------
-    encoding : str
-        Encoding type for files with textual content (text, JSON).
-    handler_type : str (inherited) (read-only)
-        Get the type of the handler.
-    is_closed : bool (read-only)
-        Get whether the handler is closed or not.
-    is_open : bool (read-only)
-        Get whether the handler is open or not.
+class HandlerStats:
     """
+    Collect I/O statistics of a handler
+    ===================================
+
+    Notes
+    -----
+    I.
+        Every thread counts into its own counters, so recording needs no lock
+        and no contention among the threads. The lock is taken only when a
+        thread records for the first time (or the first time after a reset)
+        and when a snapshot is taken. The counters of finished threads are
+        folded into common counters at these points, so short-lived threads
+        (eg. of worker pools) don't pile up.
+    II.
+        Latencies are counted in a histogram of exponential buckets, the upper
+        bound of bucket i is 2**i microseconds, the last bucket is unbounded.
+    III.
+        Payloads that are not bytes-like (eg. instances) have no size of their
+        own. Handlers count the size of their serialized form with
+        count_payload() while the operation runs.
+    """
+
+    # Number of the latency histogram buckets.
+    BUCKET_COUNT = 25
 
 
-    def __init__(self, base_path : str = './', encoding : str = 'uf8'):
+    def __init__(self):
         """
         Initialize an instance of the object
         ====================================
+        """
 
-        Parameters
-        ----------
-        base_path : str, optional (./ if ommited)
-            Base path to be used on loading or saving files.
-        encoding : str, optional (utf8 if omitted)
-            Encoding type of textual files like text and JSON files.
+        self.__local = local()
+        self.__generation = 0
+        self.__counters = []
+        self.__finished = {}
+        self.__lock = Lock()
+
+
+    def active_operations(self) -> set:
+        """
+        Get the operations in progress in the actual thread
+        ===================================================
+
+        Returns
+        -------
+        set[str]
+            Names of the operations in progress, the set can be modified.
         """
 
-        super().__init__(DofObjectHandler.LOCAL)
-        self.__base_path = base_path
-        self.__is_open = False
-        self.__encoding = encoding
+        result = getattr(self.__local, 'active', None)
+        if result is None:
+            result = set()
+            self.__local.active = result
+        return result
 
 
-    def close(self):
+    def count_payload(self, bytes_in : int = 0, bytes_out : int = 0):
         """
-        Close the connection with the storage
-        =====================================
+        Count serialized bytes into the operation of the actual thread
+        ==============================================================
+
+        Parameters
+        ----------
+        bytes_in : int, optional (0 if omitted)
+            Number of bytes loaded.
+        bytes_out : int, optional (0 if omitted)
+            Number of bytes saved.
+
+        Notes
+        -----
+            Outside of a measured operation the bytes are dropped.
         """
 
-        self.__is_open = False
+        _payload = getattr(self.__local, 'payload', None)
+        if _payload is not None:
+            _payload[0] += bytes_in
+            _payload[1] += bytes_out
 
 
-    @property
-    def encoding(self) -> str:
+    @staticmethod
+    def payload_size(data : any) -> int:
         """
-        Get encoding for textual files
-        ==============================
+        Get the size of a payload
+        =========================
+
+        Parameters
+        ----------
+        data : any
+            Payload, list of payloads or list of (payload, location) pairs.
 
         Returns
         -------
-        str
-            The identifier of the actual encoding method.
+        int
+            Size of the bytes-like payloads in bytes, other payloads count as
+            0.
         """
 
-        return self.__encoding
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            return memoryview(data).nbytes
+        if isinstance(data, list):
+            return sum(HandlerStats.payload_size(item[0]
+                                                 if isinstance(item, tuple)
+                                                 else item)
+                       for item in data)
+        return 0
 
 
-    @encoding.setter
-    def encoding(self, newvalue : str):
+    def record(self, operation : str, seconds : float, bytes_in : int = 0,
+               bytes_out : int = 0, failed : bool = False):
         """
-        Set encoding for textual files
-        ==============================
+        Record a call of an operation
+        =============================
 
         Parameters
         ----------
-        newvalue : str
-            The identifier of the new encoding method.
+        operation : str
+            Name of the operation.
+        seconds : float
+            Duration of the call.
+        bytes_in : int, optional (0 if omitted)
+            Number of bytes loaded.
+        bytes_out : int, optional (0 if omitted)
+            Number of bytes saved.
+        failed : bool, optional (False if omitted)
+            Whether the call raised an error.
         """
 
-        self.__encoding = newvalue
+        # pylint: disable=too-many-arguments
+        #         We consider a better practice having long list of named
+        #         arguments then having **kwargs only.
+
+        _counters = self.__thread_counters()
+        _entry = _counters.get(operation)
+        if _entry is None:
+            _entry = [0, 0, 0, 0, 0.0, [0] * HandlerStats.BUCKET_COUNT]
+            _counters[operation] = _entry
+        _entry[0] += 1
+        if failed:
+            _entry[1] += 1
+        _entry[2] += bytes_in
+        _entry[3] += bytes_out
+        _entry[4] += seconds
+        _bucket = min(int(seconds * 1000000).bit_length(),
+                      HandlerStats.BUCKET_COUNT - 1)
+        _entry[5][_bucket] += 1
+
+
+    def reset(self):
+        """
+        Drop the counters of every thread
+        =================================
+        """
 
+        with self.__lock:
+            self.__generation += 1
+            self.__counters = []
+            self.__finished = {}
 
-    @property
-    def is_closed(self) -> bool:
+
+    def snapshot(self) -> dict:
         """
-        Get whether the handler is closed or not
-        ========================================
+        Get the statistics summed over the threads
+        ==========================================
 
         Returns
         -------
-        bool
-            True if handler is closed, False if not.
+        dict(str : dict)
+            Statistics by operation name. The statistics of an operation
+            contain 'count', 'errors', 'bytes_in', 'bytes_out', 'seconds' (the
+            total duration) and 'histogram' (list of call counts by latency
+            bucket).
         """
 
-        return not self.__is_open
+        with self.__lock:
+            self.__fold_finished()
+            _counters = [counters.copy() for _, counters in self.__counters]
+            _counters.append({operation : list(entry) for operation, entry
+                              in self.__finished.items()})
+        result = {}
+        for counters in _counters:
+            for operation, entry in counters.items():
+                _sum = result.get(operation)
+                if _sum is None:
+                    _sum = {'count' : 0, 'errors' : 0, 'bytes_in' : 0,
+                            'bytes_out' : 0, 'seconds' : 0.0,
+                            'histogram' : [0] * HandlerStats.BUCKET_COUNT}
+                    result[operation] = _sum
+                _sum['count'] += entry[0]
+                _sum['errors'] += entry[1]
+                _sum['bytes_in'] += entry[2]
+                _sum['bytes_out'] += entry[3]
+                _sum['seconds'] += entry[4]
+                _sum['histogram'] = [a + b for a, b in zip(_sum['histogram'],
+                                                           entry[5])]
+        return result
 
 
-    @property
-    def is_open(self) -> bool:
+    def swap_payload(self, payload : list) -> list:
         """
-        Get whether the handler is open or not
-        ======================================
+        Swap the serialized byte counters of the actual thread
+        ======================================================
+
+        Parameters
+        ----------
+        payload : list[int] | NoneType
+            New [bytes_in, bytes_out] counters, None to stop counting.
 
         Returns
         -------
-        bool
-            True if handler is open, False if not.
+        list[int] | NoneType
+            The previous counters.
+
+        Notes
+        -----
+            Measured operations start their own counters and restore the
+            counters of the enclosing operation when they return.
         """
 
-        return self.__is_open
+        result = getattr(self.__local, 'payload', None)
+        self.__local.payload = payload
+        return result
 
 
-    def exist(self, location : str, is_relative : bool = True) -> bool:
+    def __fold_finished(self):
         """
-        Abstract method to check the existence file
-        ===========================================
+        Fold the counters of finished threads into the common counters
+        ===============================================================
 
-        Parameters
-        ----------
-        location : str
-            Location to check.
-        is_relative : bool, optional (True if omitted)
-            Whether to treat location string as relative or absolute location.
-            Relative location means that the value will be added to a base path
-            or base url or something like those.
+        Notes
+        -----
+            The caller must hold the lock of the instance.
+        """
+
+        _alive = []
+        for thread, counters in self.__counters:
+            if thread.is_alive():
+                _alive.append((thread, counters))
+                continue
+            for operation, entry in counters.items():
+                _sum = self.__finished.get(operation)
+                if _sum is None:
+                    self.__finished[operation] = [entry[0], entry[1], entry[2],
+                                                  entry[3], entry[4],
+                                                  list(entry[5])]
+                    continue
+                for i in range(5):
+                    _sum[i] += entry[i]
+                _sum[5] = [a + b for a, b in zip(_sum[5], entry[5])]
+        self.__counters = _alive
+
+
+    def __thread_counters(self) -> dict:
+        """
+        Get the counters of the actual thread
+        =====================================
 
         Returns
         -------
-        bool
-            True if file exists, False if not.
+        dict(str : list)
+            Counters of the thread by operation name.
         """
-        if is_relative:
-            _location = join(self.__base_path, location)
-        else:
-            _location = location
-        return isfile(_location)
 
+        _state = getattr(self.__local, 'state', None)
+        if _state is None or _state[0] != self.__generation:
+            with self.__lock:
+                self.__fold_finished()
+                _state = (self.__generation, {})
+                self.__counters.append((current_thread(), _state[1]))
+            self.__local.state = _state
+        return _state[1]
 
-    def files(self, location : str, is_relative : bool = True) -> list:
+
+class AsyncDofObjectHandler(DofObjectHandler):
+    """
+    Abstract class (de facto interface) to provide asynchronous storage
+    ===================================================================
+
+    Attributes
+    ----------
+    handler_type : str (inherited) (read-only)
+        Get the type of the handler.
+    is_closed : bool (inherited) (abstract) (read-only)
+        Get whether the handler is closed or not.
+    is_open : bool (inherited) (abstract) (read-only)
+        Get whether the handler is open or not.
+
+    Notes
+    -----
+        An asynchronous handler is a complete DofObjectHandler as well, so it
+        can be added to DofObject with DofObject.add_handler() and it can serve
+        synchronous calls too. The coroutines have the same parameters and
+        return values as their synchronous counterparts.
+    """
+
+
+    @abstractmethod
+    async def aexist(self, location : str, is_relative : bool = True) -> bool:
         """
-        Abstract method to get list of files in a directory
+        Abstract coroutine to check the existence of a file
         ===================================================
 
-        Parameters
-        ----------
-        location : str
-            Location to check.
-        is_relative : bool, optional (True if omitted)
-            Whether to treat location string as relative or absolute location.
-            Relative location means that the value will be added to a base path
-            or base url or something like those.
+        See Also
+        --------
+            Parameters and return value : DofObjectHandler.exist()
+        """
 
-        Returns
-        -------
-        list
-            List of files, empty list if no files.
+
+    async def afiles(self, location : str, is_relative : bool = True) -> list:
         """
+        Get the list of files in a directory without blocking the event loop
+        ====================================================================
 
-        if is_relative:
-            _location = join(self.__base_path, location)
-        else:
-            _location = location
-        return [f for f in listdir(_location) if isfile(f)]
+        See Also
+        --------
+            Parameters and return value : DofObjectHandler.files()
+
+        Notes
+        -----
+            By default files() runs on the default executor of the running
+            event loop.
+        """
 
+        return await get_running_loop().run_in_executor(None,
+                                    partial(self.files, location, is_relative))
 
-    def load_as_binary(self, location : str,
-                       is_relative : bool = True) -> bytearray:
+
+    @abstractmethod
+    async def aload_as_binary(self, location : str,
+                              is_relative : bool = True) -> bytearray:
         """
-        Load data as binary data
-        ========================
+        Abstract coroutine to load data as binary data
+        ==============================================
 
-        Parameters
-        ----------
-        location : str
-            Location to save to.
-        is_relative : bool, optional (True if omitted)
-            Whether to treat location string as relative or absolute location.
-            Relative location means that the value will be added to a base path
-            or base url or something like those.
+        See Also
+        --------
+            Parameters and return value : DofObjectHandler.load_as_binary()
+        """
 
-        Returns
-        -------
-        bytearray
-            Load data as bytearray.
 
-        Raises
-        ------
-        DofError
-            If the hanlder is not yet or no mor open.
-        DofError
-            If the target file doesn't exist.
+    @abstractmethod
+    async def aload_as_instance(self, location : str,
+                                is_relative : bool = True) -> any:
         """
+        Abstract coroutine to load data as instance
+        ===========================================
 
-        if not self.__is_open:
-            raise DofError('LocalHandler.load_as_binary(): handler is not ' +
-                           'open.')
-        if is_relative:
-            _location = join(self.__base_path, location)
-        else:
-            _location = location
-        if not isfile(_location):
-            raise DofError('LocalHandler.load_as_binary(): tried to ' +
-                           'load binary from non-existing file "{}".'
-                           .format(_location))
-        with open(_location, 'rb') as instream:
-            result = instream.read()
-        return result
+        See Also
+        --------
+            Parameters and return value : DofObjectHandler.load_as_instance()
+        """
 
 
-    def load_as_instance(self, location : str,
-                         is_relative : bool = True) -> any:
+    @abstractmethod
+    async def aload_as_json(self, location : str,
+                            is_relative : bool = True) -> any:
         """
-        Load data as instance
-        =====================
+        Abstract coroutine to load data as JSON data
+        ============================================
 
-        Parameters
-        ----------
-        location : str
-            Location to save to.
-        is_relative : bool, optional (True if omitted)
-            Whether to treat location string as relative or absolute location.
-            Relative location means that the value will be added to a base path
-            or base url or something like those.
+        See Also
+        --------
+            Parameters and return value : DofObjectHandler.load_as_json()
+        """
 
-        Returns
-        -------
-        any
-            Load data as any instances.
 
-        Raises
-        ------
-        DofError
-            If the hanlder is not yet or no mor open.
-        DofError
-            If the target file doesn't exist.
+    @abstractmethod
+    async def aload_as_text(self, location : str,
+                            is_relative : bool = True) -> str:
         """
+        Abstract coroutine to load data as text
+        =======================================
 
-        if not self.__is_open:
-            raise DofError('LocalHandler.load_as_instance(): handler is not ' +
-                           'open.')
-        if is_relative:
-            _location = join(self.__base_path, location)
-        else:
-            _location = location
-        if not isfile(_location):
-            raise DofError('LocalHandler.load_as_instance(): tried to ' +
-                           'load instance from non-existing file "{}".'
-                           .format(_location))
-        with open(_location, 'rb') as instream:
-            result = pickle.load(instream)
-        return result
+        See Also
+        --------
+            Parameters and return value : DofObjectHandler.load_as_text()
+        """
 
 
-    def load_as_json(self, location : str, is_relative : bool = True) -> any:
+    async def aload_many(self, locations : list,
+                         is_relative : bool = True) -> list:
         """
-        Abstract method to load data as JSON data
-        =========================================
+        Load multiple data as instances concurrently
+        ============================================
 
         Parameters
         ----------
-        location : str
-            Location to save to.
+        locations : list[str]
+            Locations to load from.
         is_relative : bool, optional (True if omitted)
-            Whether to treat location string as relative or absolute location.
-            Relative location means that the value will be added to a base path
-            or base url or something like those.
+            Whether to treat location strings as relative or absolute locations.
 
         Returns
         -------
-        any
-            Load data as JSON.
+        list[any]
+            Loaded instances in the order of the given locations.
+        """
 
-        Raises
-        ------
-        DofError
-            If the hanlder is not yet or no mor open.
-        DofError
-            If the target file doesn't exist.
+        return list(await gather(*[self.aload_as_instance(location,
+                                                          is_relative)
+                                   for location in locations]))
+
+
+    @abstractmethod
+    async def asave_as_binary(self, data : any, location : str,
+                              is_relative : bool = True):
+        """
+        Abstract coroutine to save data as binary
+        =========================================
+
+        See Also
+        --------
+            Parameters : DofObjectHandler.save_as_binary()
+        """
+
+
+    @abstractmethod
+    async def asave_as_instance(self, data : any, location : str,
+                                is_relative : bool = True):
+        """
+        Abstract coroutine to save data as instance
+        ===========================================
+
+        See Also
+        --------
+            Parameters : DofObjectHandler.save_as_instance()
+        """
+
+
+    @abstractmethod
+    async def asave_as_json(self, data : any, location : str,
+                            is_relative : bool = True):
+        """
+        Abstract coroutine to save data as JSON data
+        ============================================
+
+        See Also
+        --------
+            Parameters : DofObjectHandler.save_as_json()
+        """
+
+
+    @abstractmethod
+    async def asave_as_text(self, data : any, location : str,
+                            is_relative : bool = True):
+        """
+        Abstract coroutine to save data as text
+        =======================================
+
+        See Also
+        --------
+            Parameters : DofObjectHandler.save_as_text()
+        """
+
+
+    async def asave_many(self, items : list, is_relative : bool = True):
+        """
+        Save multiple data as instances concurrently
+        ============================================
+
+        Parameters
+        ----------
+        items : list[tuple(any, str)]
+            Pairs of data to save and location to save to.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location strings as relative or absolute locations.
+        """
+
+        await gather(*[self.asave_as_instance(data, location, is_relative)
+                       for data, location in items])
+
+
+class BinaryView:
+    """
+    Provide lazy access to a byte range of a stored file
+    ====================================================
+
+    Notes
+    -----
+        The view doesn't load anything until its bytes are requested. Slicing a
+        view creates a narrower view without loading, so only the finally
+        requested range gets transferred by the handler.
+    """
+
+
+    def __init__(self, handler : DofObjectHandler, location : str,
+                 is_relative : bool = True, offset : int = 0,
+                 length : int = 0):
+        """
+        Initialize an instance of the object
+        ====================================
+
+        Parameters
+        ----------
+        handler : DofObjectHandler
+            Handler to load the range with.
+        location : str
+            Location of the file.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+        offset : int, optional (0 if omitted)
+            Position of the first byte of the view.
+        length : int, optional (0 if omitted)
+            Number of bytes of the view.
+
+        Raises
+        ------
+        DofError
+            When offset or length is negative.
+        """
+
+        # pylint: disable=too-many-arguments
+        #         We consider a better practice having long list of named
+        #         arguments then having **kwargs only.
+
+        DofObjectHandler.check_range(offset, length)
+        self.__handler = handler
+        self.__location = location
+        self.__is_relative = is_relative
+        self.__offset = offset
+        self.__length = length
+
+
+    def __bytes__(self) -> bytes:
+        """
+        Load the bytes of the view
+        ==========================
+
+        Returns
+        -------
+        bytes
+            The bytes of the range.
+        """
+
+        return self.tobytes()
+
+
+    def __getitem__(self, key : any) -> any:
+        """
+        Get a byte or a narrower view
+        =============================
+
+        Parameters
+        ----------
+        key : int | slice
+            Index of a byte or slice of the view. Slices with step are not
+            supported.
+
+        Returns
+        -------
+        int | BinaryView
+            The value of the byte at index or a new view of the slice.
+
+        Raises
+        ------
+        DofError
+            When the slice has step other than 1.
+        IndexError
+            When the index is out of the view.
+        """
+
+        if isinstance(key, slice):
+            if key.step not in (None, 1):
+                raise DofError('BinaryView[]: slices with step are not ' +
+                               'supported.')
+            _start, _stop, _ = key.indices(self.__length)
+            return BinaryView(self.__handler, self.__location,
+                              self.__is_relative, self.__offset + _start,
+                              max(_stop - _start, 0))
+        if key < 0:
+            key += self.__length
+        if not 0 <= key < self.__length:
+            raise IndexError('BinaryView index out of range')
+        _data = self.__handler.load_range(self.__location, self.__offset + key,
+                                          1, self.__is_relative)
+        if len(_data) == 0:
+            raise IndexError('BinaryView index out of range')
+        return _data[0]
+
+
+    def __len__(self) -> int:
+        """
+        Get the length of the view
+        ==========================
+
+        Returns
+        -------
+        int
+            Number of bytes of the view.
+
+        Notes
+        -----
+            The length is the requested one, the file may end before.
+        """
+
+        return self.__length
+
+
+    @property
+    def location(self) -> str:
+        """
+        Get the location of the file
+        ============================
+
+        Returns
+        -------
+        str
+            Location of the file.
+        """
+
+        return self.__location
+
+
+    @property
+    def offset(self) -> int:
+        """
+        Get the offset of the view
+        ==========================
+
+        Returns
+        -------
+        int
+            Position of the first byte of the view.
+        """
+
+        return self.__offset
+
+
+    def tobytes(self) -> bytes:
+        """
+        Load the bytes of the view
+        ==========================
+
+        Returns
+        -------
+        bytes
+            The bytes of the range.
+        """
+
+        return self.__handler.load_range(self.__location, self.__offset,
+                                         self.__length, self.__is_relative)
+
+
+class DofSerializable:
+    """
+    Provide serializability functions
+    =================================
+
+    Notes
+    -----
+        The class has empty __slots__, so subclasses that define __slots__ get
+        no instance __dict__.
+    """
+
+
+    __slots__ = ()
+
+
+    @abstractmethod
+    def from_json(self, json_string : str, **kwargs) -> any:
+        """
+        Abstract methot to build object from JSON string
+        ================================================
+
+        Parameters
+        ----------
+        json_string : str
+            The JSON formatted string that contains all the needed data.
+        keyword arguments
+            Arguments to forward to json.loads() funtion.
+
+        Returns
+        -------
+        any
+            The object that is created.
+
+        Notes
+        -----
+            This function requires a JSON string that is created with the
+            .to_json(describe_only=False) function.
+        """
+
+
+    def to_json(self, describe_only : bool = True, **kwargs) -> str:
+        """
+        Create JSON from an instance
+        ============================
+
+        Parameters
+        ----------
+        describe_only : bool, optional (True if omitted)
+            Whether the JSON output should be a whole instance or not. If the
+            value is False, the function returns all data of the instance that
+            is needed to restore exactly the same instance. If the value is
+            True, only those data should be included which are essential to
+            describe the data.
+        keyword arguments
+            Arguments to forward to json.dunps() funtion.
+
+        Returns
+        -------
+        str
+            JSON formatted string.
+
+        Notes
+        -----
+            If the value of describe_only parameter is True, only description
+            data returns. This means the dataset won't be included. It does not
+            matter that the dataelements are images or strings. The goal of
+            describe_only is not to store the data but to describe it.
+        """
+
+        data = self.to_json_dict(describe_only=describe_only)
+        return json.dumps(data, **kwargs)
+
+
+    @abstractmethod
+    def to_json_dict(self, describe_only : bool = True) -> dict:
+        """
+        Abstract method to create a dict that is compatible to JSON from
+        ================================================================
+
+        Parameters
+        ----------
+        describe_only : bool, optional (True if omitted)
+            Whether the JSON output should be a whole instance or not. If the
+            value is False, the function returns all data of the instance that
+            is needed to restore exactly the same instance. If the value is
+            True, only those data should be included which are essential to
+            describe the data.
+
+        Returns
+        -------
+        dict
+            Dict that is complatible to create a JSON formatted string.
+
+        Notes
+        -----
+            If the value of describe_only parameter is True, only description
+            data returns. This means the dataset won't be included. It does not
+            matter that the dataelements are images or strings. The goal of
+            describe_only is not to store the data but to describe it.
+        """
+
+
+class CompressionPolicy:
+    """
+    Compression policy of stored payloads
+    =====================================
+
+    Attributes
+    ----------
+    codec : str (read-only)
+        Get the name of the codec.
+    level : int | NoneType (read-only)
+        Get the compression level, None means the default of the codec.
+    threshold : int (read-only)
+        Get the size in bytes below which payloads are stored uncompressed.
+
+    Notes
+    -----
+    I.
+        Only codecs of the standard library are supported: zlib, bz2 and lzma.
+        Compressed payloads start with a short header: the MAGIC bytes and one
+        byte that identifies the codec. Decompression relies only on this
+        header, so payloads written with any policy, or without compression,
+        can be loaded by any handler.
+    II.
+        Payloads smaller than the threshold and payloads that don't get smaller
+        by compression are stored as they are. A payload that happens to start
+        with the MAGIC bytes is stored with the header of the "stored" codec to
+        keep it from being mistaken for a compressed one.
+    III.
+        The codecs release the GIL while they work, so payloads compressed by
+        the worker threads of a batched save (eg. LocalHandler.save_many())
+        are compressed in parallel.
+    """
+
+    MAGIC = b'\x93DOFC'
+    BZ2 = 'bz2'
+    LZMA = 'lzma'
+    STORED = 'stored'
+    ZLIB = 'zlib'
+    # Codec identifiers of the header, the position is the identifier byte.
+    CODECS = [STORED, ZLIB, BZ2, LZMA]
+
+
+    def __init__(self, codec : str = 'zlib', level : int = None,
+                 threshold : int = 1024):
+        """
+        Initialize an instance of the object
+        ====================================
+
+        Parameters
+        ----------
+        codec : str, optional ('zlib' if omitted)
+            Name of the codec, 'zlib', 'bz2' or 'lzma'.
+        level : int, optional (None if omitted)
+            Compression level (preset in case of lzma). If None, the default
+            level of the codec is used.
+        threshold : int, optional (1024 if omitted)
+            Size in bytes below which payloads are stored uncompressed.
+
+        Raises
+        ------
+        DofError
+            When the codec is not supported.
+        DofError
+            When threshold is negative.
+        """
+
+        if codec not in [CompressionPolicy.ZLIB, CompressionPolicy.BZ2,
+                         CompressionPolicy.LZMA]:
+            raise DofError('CompressionPolicy.init(): unsupported codec ' +
+                           '"{}".'.format(codec))
+        if threshold < 0:
+            raise DofError('CompressionPolicy.init(): threshold must not be ' +
+                           'negative.')
+        self.__codec = codec
+        self.__level = level
+        self.__threshold = threshold
+
+
+    @property
+    def codec(self) -> str:
+        """
+        Get the name of the codec
+        =========================
+
+        Returns
+        -------
+        str
+            Name of the codec.
+        """
+
+        return self.__codec
+
+
+    def compress(self, data : any) -> bytes:
+        """
+        Compress a payload according to the policy
+        ==========================================
+
+        Parameters
+        ----------
+        data : bytes | bytearray | memoryview
+            Payload to compress.
+
+        Returns
+        -------
+        bytes | bytearray | memoryview
+            The compressed payload with header, or the payload itself if it
+            is not worth to compress it.
+        """
+
+        _length = memoryview(data).nbytes
+        if _length >= self.__threshold:
+            if self.__codec == CompressionPolicy.ZLIB:
+                _level = -1 if self.__level is None else self.__level
+                _compressed = zlib.compress(data, _level)
+            elif self.__codec == CompressionPolicy.BZ2:
+                _level = 9 if self.__level is None else self.__level
+                _compressed = bz2.compress(data, _level)
+            else:
+                _compressed = lzma.compress(data, preset=self.__level)
+            if len(_compressed) + len(CompressionPolicy.MAGIC) + 1 < _length:
+                return self.header(self.__codec) + _compressed
+        return CompressionPolicy.protect(data)
+
+
+    def compressor(self) -> any:
+        """
+        Get an incremental compressor of the codec
+        ==========================================
+
+        Returns
+        -------
+        zlib.Compress | bz2.BZ2Compressor | lzma.LZMACompressor
+            New compressor object with compress() and flush() functions. Its
+            output has to be preceded by the header of the codec.
+        """
+
+        if self.__codec == CompressionPolicy.ZLIB:
+            result = zlib.compressobj(-1 if self.__level is None
+                                      else self.__level)
+        elif self.__codec == CompressionPolicy.BZ2:
+            result = bz2.BZ2Compressor(9 if self.__level is None
+                                       else self.__level)
+        else:
+            result = lzma.LZMACompressor(preset=self.__level)
+        return result
+
+
+    @staticmethod
+    def decompress(data : any) -> any:
+        """
+        Decompress a payload based on its header
+        ========================================
+
+        Parameters
+        ----------
+        data : bytes | bytearray | memoryview
+            Payload to decompress.
+
+        Returns
+        -------
+        bytes | bytearray | memoryview
+            The decompressed payload, or the payload itself if it has no
+            compression header.
+
+        Raises
+        ------
+        DofError
+            When the header contains an unknown codec identifier.
+        """
+
+        if not CompressionPolicy.is_compressed(data):
+            return data
+        _start = len(CompressionPolicy.MAGIC)
+        _codec_id = data[_start]
+        if _codec_id >= len(CompressionPolicy.CODECS):
+            raise DofError('CompressionPolicy.decompress(): unknown codec ' +
+                           'identifier {}.'.format(_codec_id))
+        _codec = CompressionPolicy.CODECS[_codec_id]
+        _payload = memoryview(data)[_start + 1:]
+        if _codec == CompressionPolicy.ZLIB:
+            result = zlib.decompress(_payload)
+        elif _codec == CompressionPolicy.BZ2:
+            result = bz2.decompress(_payload)
+        elif _codec == CompressionPolicy.LZMA:
+            result = lzma.decompress(_payload)
+        else:
+            result = _payload
+        return result
+
+
+    @staticmethod
+    def decompressor(codec_id : int) -> any:
+        """
+        Get an incremental decompressor of a codec
+        ==========================================
+
+        Parameters
+        ----------
+        codec_id : int
+            Identifier byte of the codec from the header.
+
+        Returns
+        -------
+        zlib.Decompress | bz2.BZ2Decompressor | lzma.LZMADecompressor | None
+            New decompressor object with decompress() function, or None if the
+            payload is stored as it is.
+
+        Raises
+        ------
+        DofError
+            When the identifier is unknown.
+        """
+
+        if codec_id >= len(CompressionPolicy.CODECS):
+            raise DofError('CompressionPolicy.decompressor(): unknown codec ' +
+                           'identifier {}.'.format(codec_id))
+        _codec = CompressionPolicy.CODECS[codec_id]
+        if _codec == CompressionPolicy.ZLIB:
+            result = zlib.decompressobj()
+        elif _codec == CompressionPolicy.BZ2:
+            result = bz2.BZ2Decompressor()
+        elif _codec == CompressionPolicy.LZMA:
+            result = lzma.LZMADecompressor()
+        else:
+            result = None
+        return result
+
+
+    @staticmethod
+    def header(codec : str) -> bytes:
+        """
+        Get the header of a codec
+        =========================
+
+        Parameters
+        ----------
+        codec : str
+            Name of the codec.
+
+        Returns
+        -------
+        bytes
+            The MAGIC bytes followed by the identifier of the codec.
+        """
+
+        return (CompressionPolicy.MAGIC +
+                bytes([CompressionPolicy.CODECS.index(codec)]))
+
+
+    @staticmethod
+    def is_compressed(data : any) -> bool:
+        """
+        Get whether a payload starts with a compression header
+        ======================================================
+
+        Parameters
+        ----------
+        data : bytes | bytearray | memoryview
+            Payload to check.
+
+        Returns
+        -------
+        bool
+            True if the payload has a compression header, False if not.
+        """
+
+        _length = len(CompressionPolicy.MAGIC)
+        return (len(data) > _length and
+                bytes(data[:_length]) == CompressionPolicy.MAGIC)
+
+
+    @property
+    def level(self) -> int:
+        """
+        Get the compression level
+        =========================
+
+        Returns
+        -------
+        int | NoneType
+            Compression level, None means the default of the codec.
+        """
+
+        return self.__level
+
+
+    @staticmethod
+    def protect(data : any) -> any:
+        """
+        Protect an uncompressed payload from being taken as compressed
+        ==============================================================
+
+        Parameters
+        ----------
+        data : bytes | bytearray | memoryview
+            Uncompressed payload.
+
+        Returns
+        -------
+        bytes | bytearray | memoryview
+            The payload with the header of the "stored" codec if it starts
+            with the MAGIC bytes, the payload itself otherwise.
+        """
+
+        if CompressionPolicy.is_compressed(data):
+            return CompressionPolicy.header(CompressionPolicy.STORED) + data
+        return data
+
+
+    @staticmethod
+    def read_range(read_at : any, offset : int, length : int) -> bytes:
+        """
+        Read a byte range of a stored payload
+        =====================================
+
+        Parameters
+        ----------
+        read_at : callable
+            Function that reads length bytes of the stored payload from an
+            offset, read_at(offset, length), where length None means up to the
+            end.
+        offset : int
+            Position of the first byte in the uncompressed payload.
+        length : int
+            Number of bytes to read.
+
+        Returns
+        -------
+        bytes
+            The bytes of the range.
+
+        Notes
+        -----
+            Uncompressed payloads (including the ones with the header of the
+            "stored" codec) are read only in the given range. Compressed
+            payloads have to be read and decompressed as a whole.
+        """
+
+        _header_length = len(CompressionPolicy.MAGIC) + 1
+        _header = read_at(0, _header_length)
+        if not CompressionPolicy.is_compressed(_header):
+            return read_at(offset, length)
+        if _header[-1] == CompressionPolicy.CODECS.index(
+                                                    CompressionPolicy.STORED):
+            return read_at(offset + _header_length, length)
+        _data = memoryview(CompressionPolicy.decompress(read_at(0, None)))
+        return bytes(_data[offset:offset + length])
+
+
+    @property
+    def threshold(self) -> int:
+        """
+        Get the size threshold of compression
+        =====================================
+
+        Returns
+        -------
+        int
+            Size in bytes below which payloads are stored uncompressed.
+        """
+
+        return self.__threshold
+
+
+class CompressionReader(RawIOBase):
+    """
+    Readable stream that decompresses a stored payload
+    ==================================================
+
+    Notes
+    -----
+        The header of the payload is read at the first read. Payloads without
+        compression header are passed through. The compressed ones are
+        decompressed chunk by chunk, so the whole payload is never held in
+        memory. Wrap the stream into io.BufferedReader for efficient small
+        reads.
+    """
+
+
+    def __init__(self, instream : any):
+        """
+        Initialize an instance of the object
+        ====================================
+
+        Parameters
+        ----------
+        instream : file object
+            Readable binary stream of the stored payload. It is not closed by
+            the instance.
+        """
+
+        super().__init__()
+        self.__instream = instream
+        self.__decompressor = None
+        self.__pending = None
+        self.__eof = False
+
+
+    def readable(self) -> bool:
+        """
+        Get whether the stream is readable
+        ==================================
+
+        Returns
+        -------
+        bool
+            Always True.
+        """
+
+        return True
+
+
+    def readinto(self, buffer : any) -> int:
+        """
+        Read decompressed bytes into a buffer
+        =====================================
+
+        Parameters
+        ----------
+        buffer : bytearray | memoryview
+            Writable buffer to fill.
+
+        Returns
+        -------
+        int
+            Number of bytes read, 0 at the end of the stream.
+
+        Raises
+        ------
+        DofError
+            When the header contains an unknown codec identifier.
+        """
+
+        if self.__pending is None:
+            self.__read_header()
+        while len(self.__pending) == 0 and not self.__eof:
+            if self.__decompressor is None:
+                return self.__instream.readinto(buffer)
+            _chunk = self.__instream.read(DofObjectHandler.CHUNK_SIZE)
+            if len(_chunk) > 0:
+                self.__pending = memoryview(
+                                    self.__decompressor.decompress(_chunk))
+            else:
+                self.__eof = True
+                if hasattr(self.__decompressor, 'flush'):
+                    self.__pending = memoryview(self.__decompressor.flush())
+        _length = min(len(buffer), len(self.__pending))
+        buffer[:_length] = self.__pending[:_length]
+        self.__pending = self.__pending[_length:]
+        return _length
+
+
+    def __read_header(self):
+        """
+        Read the header of the payload
+        ==============================
+
+        Raises
+        ------
+        DofError
+            When the header contains an unknown codec identifier.
+        """
+
+        _header = self.__instream.read(len(CompressionPolicy.MAGIC) + 1)
+        if CompressionPolicy.is_compressed(_header):
+            self.__decompressor = CompressionPolicy.decompressor(_header[-1])
+            self.__pending = memoryview(b'')
+        else:
+            self.__pending = memoryview(_header)
+
+
+class CompressionWriter(RawIOBase):
+    """
+    Writable stream that compresses a payload to store
+    ==================================================
+
+    Notes
+    -----
+    I.
+        The first bytes of the payload are buffered until the threshold of the
+        compression policy is reached. Payloads that stay below it are stored
+        as they are. Longer payloads are compressed chunk by chunk. Unlike
+        CompressionPolicy.compress(), a streamed payload is stored compressed
+        even if it doesn't get smaller.
+    II.
+        Without compression policy only the first bytes are buffered to
+        protect a payload that starts with the MAGIC bytes.
+    III.
+        The payload is completed when the stream is closed.
+    """
+
+
+    def __init__(self, outstream : any, compression : CompressionPolicy = None):
+        """
+        Initialize an instance of the object
+        ====================================
+
+        Parameters
+        ----------
+        outstream : file object
+            Writable binary stream to write the stored payload to. It is not
+            closed by the instance.
+        compression : CompressionPolicy, optional (None if omitted)
+            Compression policy to apply, None means no compression.
+        """
+
+        super().__init__()
+        self.__outstream = outstream
+        self.__compression = compression
+        self.__compressor = None
+        self.__buffer = bytearray()
+        self.__is_direct = False
+
+
+    def close(self):
+        """
+        Complete the payload and close the stream
+        =========================================
+        """
+
+        if not self.closed:
+            if self.__compressor is not None:
+                self.__outstream.write(self.__compressor.flush())
+            elif not self.__is_direct:
+                if self.__compression is None:
+                    _payload = CompressionPolicy.protect(bytes(self.__buffer))
+                else:
+                    _payload = self.__compression.compress(self.__buffer)
+                self.__outstream.write(_payload)
+            self.__buffer = bytearray()
+        super().close()
+
+
+    def writable(self) -> bool:
+        """
+        Get whether the stream is writable
+        ==================================
+
+        Returns
+        -------
+        bool
+            Always True.
+        """
+
+        return True
+
+
+    def write(self, data : any) -> int:
+        """
+        Write bytes to the stream
+        =========================
+
+        Parameters
+        ----------
+        data : bytes | bytearray | memoryview
+            Bytes to write.
+
+        Returns
+        -------
+        int
+            Number of bytes written.
+
+        Raises
+        ------
+        ValueError
+            When the stream is closed.
+        """
+
+        if self.closed:
+            raise ValueError('write to closed file')
+        _length = memoryview(data).nbytes
+        if self.__compressor is not None:
+            self.__outstream.write(self.__compressor.compress(data))
+        elif self.__is_direct:
+            self.__outstream.write(data)
+        else:
+            self.__buffer += data
+            if self.__compression is None:
+                if len(self.__buffer) > len(CompressionPolicy.MAGIC):
+                    self.__outstream.write(CompressionPolicy.protect(
+                                                        bytes(self.__buffer)))
+                    self.__buffer = bytearray()
+                    self.__is_direct = True
+            elif len(self.__buffer) >= self.__compression.threshold:
+                self.__compressor = self.__compression.compressor()
+                self.__outstream.write(CompressionPolicy.header(
+                                                self.__compression.codec))
+                self.__outstream.write(self.__compressor.compress(
+                                                            self.__buffer))
+                self.__buffer = bytearray()
+        return _length
+
+
+class LocalHandler(DofObjectHandler):
+    """
+    Local storage handler
+    =====================
+
+    Attributes
+    ----------
+    atomic_writes : bool (read-only)
+        Get whether files are written atomically through temporary files.
+    compression : CompressionPolicy | NoneType (read-only)
+        Get the compression policy of binary data and instances.
+    encoding : str
+        Encoding type for files with textual content (text, JSON).
+    executor : ThreadPoolExecutor (read-only)
+        Get the worker pool of batched operations.
+    handler_type : str (inherited) (read-only)
+        Get the type of the handler.
+    is_closed : bool (read-only)
+        Get whether the handler is closed or not.
+    is_open : bool (read-only)
+        Get whether the handler is open or not.
+    manifest : dict | NoneType (read-only)
+        Get the stored locations and their sizes if the manifest is used.
+    max_workers : int | NoneType (read-only)
+        Get the maximal number of worker threads of batched operations.
+    out_of_band : bool (read-only)
+        Get whether instances are pickled with out-of-band buffers.
+    shard_depth : int (read-only)
+        Get the number of shard directory levels of element files.
+    use_manifest : bool (read-only)
+        Get whether existence checks and listings use the manifest.
+    use_mmap : bool
+        Whether binary data and instances are loaded through memory mapping.
+    """
+
+    # Files with these extensions are placed into shard directories if sharding
+    # is enabled. Any other files (metadata) stay at their given location.
+    SHARDED_EXTENSIONS = ['.obj', '.blob']
+    # Name of the manifest file in the base path.
+    MANIFEST_FILE = 'dof.manifest'
+    # Extension of temporary files of atomic writes.
+    TEMP_EXTENSION = '.dof-tmp'
+    # Extension of the sidecar files of out-of-band pickle buffers.
+    SIDECAR_EXTENSION = '.dof-buffers'
+    # Alignment of the buffers in the sidecar files in bytes.
+    BUFFER_ALIGNMENT = 64
+    # Maximal number of shard directory levels, each level takes one byte of
+    # the blake2b digest of the file name, which is at most 64 bytes long.
+    MAX_SHARD_DEPTH = 64
+
+
+    def __init__(self, base_path : str = './', encoding : str = 'utf8',
+                 use_mmap : bool = False, max_workers : int = None,
+                 shard_depth : int = 0, atomic_writes : bool = False,
+                 compression : CompressionPolicy = None,
+                 use_manifest : bool = False, out_of_band : bool = False):
+        """
+        Initialize an instance of the object
+        ====================================
+
+        Parameters
+        ----------
+        base_path : str, optional (./ if ommited)
+            Base path to be used on loading or saving files.
+        encoding : str, optional (utf8 if omitted)
+            Encoding type of textual files like text and JSON files.
+        use_mmap : bool, optional (False if omitted)
+            Whether to load binary data and instances through a read-only
+            memory map of the file instead of reading it into a new bytes
+            object.
+        max_workers : int, optional (None if omitted)
+            Maximal number of worker threads of load_many() and save_many().
+            If None, the default of ThreadPoolExecutor is used.
+        shard_depth : int, optional (0 if omitted)
+            Number of shard directory levels for element files. 0 means flat
+            layout, every file is stored directly at its location. At most
+            MAX_SHARD_DEPTH.
+        atomic_writes : bool, optional (False if omitted)
+            Whether to write files into temporary files that are synced and
+            renamed into place, so a crash never leaves torn files.
+        compression : CompressionPolicy, optional (None if omitted)
+            Compression policy of binary data and instances. If None, data is
+            saved uncompressed. Compressed data is loaded transparently
+            regardless of this setting.
+        use_manifest : bool, optional (False if omitted)
+            Whether to keep a manifest of the stored files, so exist() and
+            files() are lookups in the memory instead of filesystem calls.
+        out_of_band : bool, optional (False if omitted)
+            Whether to pickle instances with protocol 5 and to write their
+            large buffers into a sidecar file instead of the pickle stream.
+
+        Raises
+        ------
+        DofError
+            When shard_depth is negative or greater than MAX_SHARD_DEPTH.
+        DofError
+            When out_of_band is True but pickle protocol 5 is not available.
+
+        See Also
+        --------
+            Zero-copy binary loads : LocalHandler.load_as_binary()
+
+        Notes
+        -----
+        I.
+            With sharding, a file like "12.obj" is stored as "3f/a0/12.obj"
+            (shard_depth=2) where the directory names come from the hash of the
+            file name. Each level has at most 256 directories, which keeps
+            directories small even with millions of elements. The sharding is
+            transparent: the file is referred as "12.obj" in every function. On
+            reading, files of the flat layout are found as well, so data saved
+            without sharding remains readable.
+        II.
+            With atomic writes, a single save syncs its temporary file before
+            it is closed and renames it on its own. Inside a batch (see
+            DofObjectHandler.transaction()) the files are only written and
+            kept as temporary files until commit_batch(), which syncs them
+            together on the worker pool, renames every file into place and
+            syncs each touched directory once. Loads inside a batch see the
+            files written by the batch.
+        III.
+            The manifest maps the relative locations of the stored files to
+            their sizes. It is read from MANIFEST_FILE of the base path, or it
+            is built by scanning the base path if that file is missing. The
+            file is removed at the first write and it is written again (like a
+            built manifest) by close() or save_manifest(), so a crash never
+            leaves a stale manifest behind. While the manifest is used, the
+            base path should only be modified through the handler. Absolute
+            locations are not covered by the manifest.
+        IV.
+            With out-of-band pickling, buffers that support it (eg. the data of
+            numpy arrays) are written into "<file>.dof-buffers" next to the
+            file, each aligned to BUFFER_ALIGNMENT bytes. On load the sidecar is
+            memory mapped and the buffers are passed to the unpickler, so the
+            arrays are rebuilt on the map without copying. These arrays are
+            read-only. Sidecars are used on loading regardless of this setting,
+            they are written with the native byte order of the machine. The
+            raw content of such a file (what load_as_binary() returns) refers
+            to the buffers of its sidecar, so only load_as_instance() of this
+            class can unpickle it. These files cannot be published (see
+            OnlineHandler) or archived, TieredHandler loads their instances
+            from the upstream handler.
+        """
+
+        if shard_depth < 0:
+            raise DofError('LocalHandler.init(): shard_depth must not be ' +
+                           'negative.')
+        if shard_depth > LocalHandler.MAX_SHARD_DEPTH:
+            raise DofError('LocalHandler.init(): shard_depth must not be ' +
+                           'greater than {}.'
+                           .format(LocalHandler.MAX_SHARD_DEPTH))
+        if out_of_band and not hasattr(pickle, 'PickleBuffer'):
+            raise DofError('LocalHandler.init(): out-of-band pickling ' +
+                           'requires pickle protocol 5 (Python 3.8+).')
+
+        super().__init__(DofObjectHandler.LOCAL)
+        self.__base_path = base_path
+        self.__is_open = False
+        self.__encoding = encoding
+        self.__use_mmap = use_mmap
+        self.__max_workers = max_workers
+        self.__executor = None
+        self.__shard_depth = shard_depth
+        self.__atomic_writes = atomic_writes
+        self.__compression = compression
+        self.__use_manifest = use_manifest
+        self.__out_of_band = out_of_band
+        self.__manifest = None
+        self.__manifest_dirty = False
+        self.__manifest_lock = Lock()
+        self.__batch_depth = 0
+        self.__pending = {}
+        self.__unsynced = set()
+        self.__pending_lock = Lock()
+
+
+    def abort_batch(self):
+        """
+        Drop the writes of the actual batch
+        ===================================
+
+        Notes
+        -----
+            The temporary files of the batch are removed, the files at the
+            target locations stay untouched.
+        """
+
+        with self.__pending_lock:
+            if self.__batch_depth == 0:
+                return
+            self.__batch_depth = 0
+            _pending = self.__pending
+            self.__pending = {}
+            self.__unsynced.difference_update(_pending.values())
+        for _temp in _pending.values():
+            if isfile(_temp):
+                remove(_temp)
+        if len(_pending) > 0:
+            with self.__manifest_lock:
+                self.__manifest = None
+
+
+    def after_fork(self) -> bool:
+        """
+        Reinitialize the state of the handler in a forked child process
+        ===============================================================
+
+        Returns
+        -------
+        bool
+            True if the state has been reinitialized, False if it has already
+            been reinitialized in the actual process.
+
+        Notes
+        -----
+            The worker pool of the parent is dropped, a new one is created on
+            the next batched call. The actual batch (and its temporary files)
+            stays with the parent, the child starts without batch.
+        """
+
+        if not super().after_fork():
+            return False
+        self.__executor = None
+        self.__manifest_lock = Lock()
+        self.__pending_lock = Lock()
+        self.__batch_depth = 0
+        self.__pending = {}
+        self.__unsynced = set()
+        return True
+
+
+    @property
+    def atomic_writes(self) -> bool:
+        """
+        Get whether files are written atomically
+        ========================================
+
+        Returns
+        -------
+        bool
+            True if files are written through temporary files, False if files
+            are written in place.
+        """
+
+        return self.__atomic_writes
+
+
+    def begin_batch(self):
+        """
+        Start a batch of writes
+        =======================
+
+        Notes
+        -----
+            Batches can be nested, only the outermost commit_batch() makes the
+            writes permanent. Without atomic_writes there is nothing to batch,
+            files are written in place immediately.
+        """
+
+        with self.__pending_lock:
+            self.__batch_depth += 1
+
+
+    def close(self):
+        """
+        Close the connection with the storage
+        =====================================
+
+        Notes
+        -----
+            The worker pool of batched operations is shut down as well, it is
+            recreated on the next batched call. The manifest is saved if it has
+            changed.
+        """
+
+        if self.__use_manifest and self.__is_open:
+            self.save_manifest()
+        self.__is_open = False
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=True)
+            self.__executor = None
+
+
+    def commit_batch(self):
+        """
+        Make the writes of the actual batch permanent
+        =============================================
+
+        Raises
+        ------
+        DofError
+            When there is no open batch.
+        """
+
+        with self.__pending_lock:
+            if self.__batch_depth == 0:
+                raise DofError('LocalHandler.commit_batch(): there is no ' +
+                               'open batch.')
+            self.__batch_depth -= 1
+            if self.__batch_depth > 0:
+                return
+            _pending = self.__pending
+            self.__pending = {}
+        self.__commit(_pending, True)
+
+
+    def delete(self, location : str, is_relative : bool = True):
+        """
+        Delete a file
+        =============
+
+        Parameters
+        ----------
+        location : str
+            Location of the file to delete.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+        DofError
+            If the target file doesn't exist.
+
+        Notes
+        -----
+            Deletion is not part of batches, it takes effect immediately. A
+            pending write of the file in the actual batch is dropped as well.
+            The sidecar of out-of-band buffers is deleted with the file.
+        """
+
+        if not self.__is_open:
+            raise DofError('LocalHandler.delete(): handler is not open.')
+        _deleted = False
+        if self.__batch_depth > 0:
+            _target = self.__path_to_write(location, is_relative)
+            with self.__pending_lock:
+                _temp = self.__pending.pop(_target, None)
+                _sidecar = self.__pending.pop(_target +
+                                        LocalHandler.SIDECAR_EXTENSION, None)
+            if _sidecar is not None and isfile(_sidecar):
+                remove(_sidecar)
+            if _temp is not None and isfile(_temp):
+                remove(_temp)
+                _deleted = True
+        _location = self.__path_to_read(location, is_relative)
+        if isfile(_location + LocalHandler.SIDECAR_EXTENSION):
+            remove(_location + LocalHandler.SIDECAR_EXTENSION)
+        if isfile(_location):
+            remove(_location)
+            _deleted = True
+        if not _deleted:
+            raise DofError('LocalHandler.delete(): tried to delete ' +
+                           'non-existing file "{}".'.format(_location))
+        self.__record(location, is_relative, deleted=True)
+
+
+    @property
+    def compression(self) -> CompressionPolicy:
+        """
+        Get the compression policy of binary data and instances
+        =======================================================
+
+        Returns
+        -------
+        CompressionPolicy | NoneType
+            Compression policy, None if data is saved uncompressed.
+        """
+
+        return self.__compression
+
+
+    @property
+    def encoding(self) -> str:
+        """
+        Get encoding for textual files
+        ==============================
+
+        Returns
+        -------
+        str
+            The identifier of the actual encoding method.
+        """
+
+        return self.__encoding
+
+
+    @encoding.setter
+    def encoding(self, newvalue : str):
+        """
+        Set encoding for textual files
+        ==============================
+
+        Parameters
+        ----------
+        newvalue : str
+            The identifier of the new encoding method.
+        """
+
+        self.__encoding = newvalue
+
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """
+        Get the worker pool of batched operations
+        =========================================
+
+        Returns
+        -------
+        ThreadPoolExecutor
+            The worker pool. It is created on the first access.
+        """
+
+        if self.__executor is None:
+            self.__executor = ThreadPoolExecutor(
+                                    max_workers=self.__max_workers,
+                                    thread_name_prefix='LocalHandler')
+        return self.__executor
+
+
+    @property
+    def is_closed(self) -> bool:
+        """
+        Get whether the handler is closed or not
+        ========================================
+
+        Returns
+        -------
+        bool
+            True if handler is closed, False if not.
+        """
+
+        return not self.__is_open
+
+
+    @property
+    def is_open(self) -> bool:
+        """
+        Get whether the handler is open or not
+        ======================================
+
+        Returns
+        -------
+        bool
+            True if handler is open, False if not.
+        """
+
+        return self.__is_open
+
+
+    @property
+    def manifest(self) -> dict:
+        """
+        Get the manifest
+        ================
+
+        Returns
+        -------
+        dict | NoneType
+            Copy of the manifest, relative locations and their sizes in bytes,
+            None if the manifest is not used.
+        """
+
+        if not self.__use_manifest:
+            return None
+        return dict(self.__get_manifest())
+
+
+    @property
+    def max_workers(self) -> int:
+        """
+        Get the maximal number of worker threads of batched operations
+        ==============================================================
+
+        Returns
+        -------
+        int | NoneType
+            The maximal number of worker threads, None means the default of
+            ThreadPoolExecutor.
+        """
+
+        return self.__max_workers
+
+
+    @property
+    def out_of_band(self) -> bool:
+        """
+        Get whether instances are pickled with out-of-band buffers
+        ==========================================================
+
+        Returns
+        -------
+        bool
+            True if buffers of instances are written into sidecar files, False
+            if they are part of the pickle stream.
+        """
+
+        return self.__out_of_band
+
+
+    @property
+    def shard_depth(self) -> int:
+        """
+        Get the number of shard directory levels of element files
+        =========================================================
+
+        Returns
+        -------
+        int
+            Number of shard directory levels, 0 means flat layout.
+        """
+
+        return self.__shard_depth
+
+
+    @property
+    def use_manifest(self) -> bool:
+        """
+        Get whether the manifest is used
+        ================================
+
+        Returns
+        -------
+        bool
+            True if existence checks and listings use the manifest, False if
+            they use the filesystem.
+        """
+
+        return self.__use_manifest
+
+
+    @property
+    def use_mmap(self) -> bool:
+        """
+        Get whether files are loaded through memory mapping
+        ===================================================
+
+        Returns
+        -------
+        bool
+            True if binary data and instances are loaded through a read-only
+            memory map, False if files are read into the memory.
+        """
+
+        return self.__use_mmap
+
+
+    @use_mmap.setter
+    def use_mmap(self, newvalue : bool):
+        """
+        Set whether files are loaded through memory mapping
+        ===================================================
+
+        Parameters
+        ----------
+        newvalue : bool
+            The new state of memory mapped loading.
+        """
+
+        self.__use_mmap = newvalue
+
+
+    def exist(self, location : str, is_relative : bool = True) -> bool:
+        """
+        Abstract method to check the existence file
+        ===========================================
+
+        Parameters
+        ----------
+        location : str
+            Location to check.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Returns
+        -------
+        bool
+            True if file exists, False if not.
+
+        Notes
+        -----
+            The manifest doesn't record sidecars of out-of-band buffers, their
+            existence is always checked in the file system.
+        """
+
+        if (self.__use_manifest and is_relative and
+            not location.endswith(LocalHandler.SIDECAR_EXTENSION)):
+            return normpath(location) in self.__get_manifest()
+        return isfile(self.__path_to_read(location, is_relative))
+
+
+    def files(self, location : str, is_relative : bool = True) -> list:
+        """
+        Abstract method to get list of files in a directory
+        ===================================================
+
+        Parameters
+        ----------
+        location : str
+            Location to check.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Returns
+        -------
+        list
+            List of files, empty list if no files.
+
+        Notes
+        -----
+            If sharding is enabled, the files of the shard directories are
+            listed by their own name as if they were in the given directory.
+            Temporary files of atomic writes, sidecars of out-of-band buffers
+            and the manifest file are not listed.
+        """
+
+        if self.__use_manifest and is_relative:
+            _directory = normpath(location)
+            if _directory == '.':
+                _directory = ''
+            return sorted(split(key)[1] for key in self.__get_manifest()
+                          if split(key)[0] == _directory)
+        if is_relative:
+            _location = join(self.__base_path, location)
+        else:
+            _location = location
+        result = [f for f in listdir(_location) if isfile(join(_location, f))]
+        if self.__shard_depth > 0:
+            result.extend(self.__sharded_files(_location,
+                                               self.__shard_depth))
+        return sorted(set(f for f in result
+                          if not f.endswith(LocalHandler.TEMP_EXTENSION) and
+                          not f.endswith(LocalHandler.SIDECAR_EXTENSION) and
+                          f != LocalHandler.MANIFEST_FILE))
+
+
+    def load_as_binary(self, location : str,
+                       is_relative : bool = True) -> bytearray:
+        """
+        Load data as binary data
+        ========================
+
+        Parameters
+        ----------
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Returns
+        -------
+        bytearray | memoryview
+            Load data as bytearray, or as a read-only memoryview over the
+            mapped file if use_mmap is True.
+
+        Raises
+        ------
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If the target file doesn't exist.
+
+        Notes
+        -----
+            In mmap mode the file is not copied into the memory. The pages are
+            loaded by the operating system on access and they are shared with
+            any other process that maps the same file. The memory map stays
+            alive as long as the returned memoryview or any slice of it is
+            referenced. On some platforms (eg. Windows) a mapped file cannot be
+            overwritten or deleted while the map is alive. The sidecar of
+            out-of-band buffers is not part of the returned content.
+        """
+
+        if not self.__is_open:
+            raise DofError('LocalHandler.load_as_binary(): handler is not ' +
+                           'open.')
+        _location = self.__path_to_read(location, is_relative)
+        if not isfile(_location):
+            raise DofError('LocalHandler.load_as_binary(): tried to ' +
+                           'load binary from non-existing file "{}".'
+                           .format(_location))
+        if self.__use_mmap:
+            result = self.__map_file(_location)
+        else:
+            with open(_location, 'rb') as instream:
+                result = instream.read()
+        return CompressionPolicy.decompress(result)
+
+
+    def load_as_instance(self, location : str,
+                         is_relative : bool = True) -> any:
+        """
+        Load data as instance
+        =====================
+
+        Parameters
+        ----------
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Returns
+        -------
+        any
+            Load data as any instances.
+
+        Raises
+        ------
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If the target file doesn't exist.
+        """
+
+        if not self.__is_open:
+            raise DofError('LocalHandler.load_as_instance(): handler is not ' +
+                           'open.')
+        _location = self.__path_to_read(location, is_relative)
+        if not isfile(_location):
+            raise DofError('LocalHandler.load_as_instance(): tried to ' +
+                           'load instance from non-existing file "{}".'
+                           .format(_location))
+        _sidecar = self.__path_to_read(location +
+                                       LocalHandler.SIDECAR_EXTENSION,
+                                       is_relative)
+        if isfile(_sidecar):
+            if self.__use_mmap:
+                _pickled = self.__map_file(_location)
+            else:
+                with open(_location, 'rb') as instream:
+                    _pickled = instream.read()
+            result = pickle.loads(CompressionPolicy.decompress(_pickled),
+                                  buffers=self.__map_buffers(_sidecar))
+            self.count_payload(bytes_in=len(_pickled) + getsize(_sidecar))
+        elif self.__use_mmap:
+            _pickled = self.__map_file(_location)
+            result = pickle.loads(CompressionPolicy.decompress(_pickled))
+            self.count_payload(bytes_in=len(_pickled))
+        else:
+            with open(_location, 'rb') as instream:
+                _header = instream.read(len(CompressionPolicy.MAGIC) + 1)
+                if CompressionPolicy.is_compressed(_header):
+                    result = pickle.loads(CompressionPolicy.decompress(
+                                          _header + instream.read()))
+                else:
+                    instream.seek(0)
+                    result = pickle.load(instream)
+                self.count_payload(bytes_in=instream.tell())
+        return result
+
+
+    def load_as_json(self, location : str, is_relative : bool = True) -> any:
+        """
+        Abstract method to load data as JSON data
+        =========================================
+
+        Parameters
+        ----------
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Returns
+        -------
+        any
+            Load data as JSON.
+
+        Raises
+        ------
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If the target file doesn't exist.
+        """
+
+        if not self.__is_open:
+            raise DofError('LocalHandler.load_as_json(): handler is not open.')
+        _location = self.__path_to_read(location, is_relative)
+        if not isfile(_location):
+            raise DofError('LocalHandler.load_as_json(): tried to load JSON ' +
+                           'from non-existing file "{}".'.format(_location))
+        with open(_location, 'r', encoding=self.__encoding) as instream:
+            result = json.load(instream)
+        return result
+
+
+    def load_as_text(self, location : str, is_relative : bool = True) -> list:
+        """
+        Load data as text
+        =================
+
+        Parameters
+        ----------
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Returns
+        -------
+        list[str]
+            Load data as a list of lines.
+
+        Raises
+        ------
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If the target file doesn't exist.
+        """
+
+        if not self.__is_open:
+            raise DofError('LocalHandler.load_as_text(): handler is not open.')
+        _location = self.__path_to_read(location, is_relative)
+        if not isfile(_location):
+            raise DofError('LocalHandler.load_as_text(): tried to load text ' +
+                           'from non-existing file "{}".'.format(_location))
+        with open(_location, 'r', encoding=self.__encoding) as instream:
+            result = instream.readlines()
+        return result
+
+
+    def load_many(self, locations : list, is_relative : bool = True) -> list:
+        """
+        Load multiple data as instances in parallel
+        ===========================================
+
+        Parameters
+        ----------
+        locations : list[str]
+            Locations to load from.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location strings as relative or absolute locations.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Returns
+        -------
+        list[any]
+            Loaded instances in the order of the given locations.
+
+        Raises
+        ------
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If any of the target files doesn't exist.
+
+        Notes
+        -----
+            Opening, reading and unpickling of the files are overlapped on the
+            bounded worker pool of the handler. The first error stops the
+            collection of the results and gets raised.
+        """
+
+        if not self.__is_open:
+            raise DofError('LocalHandler.load_many(): handler is not open.')
+        return list(self.executor.map(self.load_as_instance, locations,
+                                      repeat(is_relative)))
+
+
+    def load_range(self, location : str, offset : int, length : int,
+                   is_relative : bool = True) -> bytes:
+        """
+        Load a byte range of binary data
+        ================================
+
+        Parameters
+        ----------
+        location : str
+            Location to load from.
+        offset : int
+            Position of the first byte to load.
+        length : int
+            Number of bytes to load.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Returns
+        -------
+        bytes
+            The bytes of the range. It is shorter than length if the range
+            reaches over the end of the data.
+
+        Raises
+        ------
+        DofError
+            When offset or length is negative.
+        DofError
+            If the hanlder is not yet or no mor open.
+        DofError
+            If the target file doesn't exist.
+
+        Notes
+        -----
+            Only the given range is read from the file with positional reads,
+            unless the file is compressed.
+        """
+
+        DofObjectHandler.check_range(offset, length)
+        if not self.__is_open:
+            raise DofError('LocalHandler.load_range(): handler is not open.')
+        _location = self.__path_to_read(location, is_relative)
+        if not isfile(_location):
+            raise DofError('LocalHandler.load_range(): tried to load range ' +
+                           'from non-existing file "{}".'.format(_location))
+        with open(_location, 'rb') as instream:
+            result = CompressionPolicy.read_range(partial(self.__read_at,
+                                                  instream.fileno()),
+                                                  offset, length)
+        return result
+
+
+    def open(self):
+        """
+        Abstract method to open the connection with the storage
+        =======================================================
+        """
+
+        self.__is_open = True
+
+
+    @contextmanager
+    def open_read(self, location : str, is_relative : bool = True) -> any:
+        """
+        Open a file to read as a binary stream
+        ======================================
+
+        Parameters
+        ----------
+        location : str
+            Location to read from.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Returns
+        -------
+        Iterator[file object]
+            Context manager that yields a readable binary stream of the
+            decompressed content.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+        DofError
+            If the target file doesn't exist.
+
+        Notes
+        -----
+            The file is read and decompressed chunk by chunk.
+        """
+
+        if not self.__is_open:
+            raise DofError('LocalHandler.open_read(): handler is not open.')
+        _location = self.__path_to_read(location, is_relative)
+        if not isfile(_location):
+            raise DofError('LocalHandler.open_read(): tried to read ' +
+                           'non-existing file "{}".'.format(_location))
+        with open(_location, 'rb') as instream:
+            with BufferedReader(CompressionReader(instream)) as result:
+                yield result
+
+
+    @contextmanager
+    def open_write(self, location : str, is_relative : bool = True) -> any:
+        """
+        Open a file to write as a binary stream
+        =======================================
+
+        Parameters
+        ----------
+        location : str
+            Location to write to.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Returns
+        -------
+        Iterator[CompressionWriter]
+            Context manager that yields a writable binary stream.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+
+        Notes
+        -----
+            The content is compressed and written chunk by chunk. With atomic
+            writes the file appears only when the context exits normally (or
+            when the actual batch gets committed), otherwise the file is
+            written in place.
+        """
+
+        if not self.__is_open:
+            raise DofError('LocalHandler.open_write(): handler is not open.')
+        _location = self.__path_to_write(location, is_relative)
+        with self.__open_to_write(_location, 'wb') as outstream:
+            _writer = CompressionWriter(outstream, self.__compression)
+            try:
+                yield _writer
+            finally:
+                _writer.close()
+        self.__record(location, is_relative)
+
+
+    def save_as_binary(self, data : any, location : str,
+                       is_relative : bool = True):
+        """
+        Save data as binary
+        ===================
+
+        Parameters
+        ----------
+        data : any
+            Data to save in the form true binary data.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+        """
+
+        if self.__is_open:
+            _location = self.__path_to_write(location, is_relative)
+            if hasattr(data, 'to_binary') or isinstance(data, (bytes,
+                                                    bytearray, memoryview)):
+                if hasattr(data, 'to_binary'):
+                    to_write = data.to_binary()
+                else:
+                    to_write = data
+                with self.__open_to_write(_location, 'wb') as outstream:
+                    outstream.write(self.__compress(to_write))
+            else:
+                self.__save_pickled(data, _location)
+            self.__record(location, is_relative)
+        else:
+            raise DofError('LocalHandler.save_as_binary(): handler is not ' +
+                           'open.')
+
+
+    def save_as_instance(self, data : any, location : str,
+                         is_relative : bool = True):
+        """
+        Save data as instance
+        =====================
+
+        Parameters
+        ----------
+        data : any
+            Data to save in the form a python instance.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+        """
+
+        if self.__is_open:
+            _location = self.__path_to_write(location, is_relative)
+            self.__save_pickled(data, _location)
+            self.__record(location, is_relative)
+        else:
+            raise DofError('LocalHandler.save_as_instance(): handler is not ' +
+                           'open.')
+
+
+    def save_as_json(self, data : any, location : str,
+                     is_relative : bool = True):
+        """
+        Abstract method to save data as JSON data
+        =========================================
+
+        Parameters
+        ----------
+        data : any
+            Data to save in the form JSON.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+        """
+
+        if self.__is_open:
+            _location = self.__path_to_write(location, is_relative)
+            with self.__open_to_write(_location, 'w') as outstream:
+                json.dump(data, outstream)
+            self.__record(location, is_relative)
+        else:
+            raise DofError('LocalHandler.save_as_instance(): handler is not ' +
+                           'open.')
+
+
+    def save_as_text(self, data : any, location : str,
+                     is_relative : bool = True):
+        """
+        Save data as text
+        =================
+
+        Parameters
+        ----------
+        data : str | list
+            Data to save as text. If list is given, elements of list is
+            considered is lines of text.
+        location : str
+            Location to save to.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location string as relative or absolute location.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+        """
+
+        if self.__is_open:
+            if isinstance(data, list):
+                _output = '\n'.join([str(row) for row in list])
+            else:
+                _output = data
+            _location = self.__path_to_write(location, is_relative)
+            with self.__open_to_write(_location, 'w') as outstream:
+                outstream.write(_output)
+            self.__record(location, is_relative)
+        else:
+            raise DofError('LocalHandler.save_as_text(): handler is not open.')
+
+
+    def save_manifest(self):
+        """
+        Save the manifest into the base path
+        ====================================
+
+        Notes
+        -----
+            The manifest is written only if it has changed since it was read or
+            saved. The file is written atomically through a temporary file.
+        """
+
+        if not self.__use_manifest:
+            return
+        with self.__manifest_lock:
+            if not self.__manifest_dirty or self.__manifest is None:
+                return
+            _manifest = dict(self.__manifest)
+            self.__manifest_dirty = False
+        _location = join(self.__base_path, LocalHandler.MANIFEST_FILE)
+        _temp = '{}.{}{}'.format(_location, uuid4().hex,
+                                 LocalHandler.TEMP_EXTENSION)
+        with open(_temp, 'w', encoding='utf8') as outstream:
+            json.dump(_manifest, outstream)
+        os.replace(_temp, _location)
+
+
+    def save_many(self, items : list, is_relative : bool = True):
+        """
+        Save multiple data as instances in parallel
+        ===========================================
+
+        Parameters
+        ----------
+        items : list[tuple(any, str)]
+            Pairs of data to save and location to save to.
+        is_relative : bool, optional (True if omitted)
+            Whether to treat location strings as relative or absolute locations.
+            Relative location means that the value will be added to a base path
+            or base url or something like those.
+
+        Raises
+        ------
+        DofError
+            When the handler is not open.
+
+        Notes
+        -----
+            Pickling, compression (see compression) and writing of the items
+            are overlapped on the bounded worker pool of the handler. All items
+            are waited for before the first error gets raised.
         """
 
         if not self.__is_open:
-            raise DofError('LocalHandler.load_as_json(): handler is not open.')
-        if is_relative:
-            _location = join(self.__base_path, location)
+            raise DofError('LocalHandler.save_many(): handler is not open.')
+        futures = [self.executor.submit(self.save_as_instance, data, location,
+                                        is_relative)
+                   for data, location in items]
+        wait(futures)
+        for future in futures:
+            future.result()
+
+
+    def __commit(self, pending : dict, in_parallel : bool = False):
+        """
+        Sync and rename temporary files into place
+        ==========================================
+
+        Parameters
+        ----------
+        pending : dict
+            Temporary file paths by target file paths.
+        in_parallel : bool, optional (False if omitted)
+            Whether the temporary files are synced on the worker pool.
+
+        Notes
+        -----
+            Temporary files written outside a batch are already synced by
+            __open_to_write(), the files written inside a batch are synced here
+            before any rename. After the renames every touched directory is
+            synced once, so the new directory entries are durable too. Files
+            are renamed in the order of pending, a sidecar of out-of-band
+            buffers follows its file. Only commit_batch() syncs in parallel,
+            a commit of a single save may run on the worker pool itself.
+        """
+
+        if len(pending) == 0:
+            return
+        with self.__pending_lock:
+            _unsynced = [_temp for _temp in pending.values()
+                         if _temp in self.__unsynced]
+            self.__unsynced.difference_update(_unsynced)
+        if in_parallel and len(_unsynced) > 1:
+            list(self.executor.map(LocalHandler.__sync_file, _unsynced))
         else:
-            _location = location
-        if not isfile(_location):
-            raise DofError('LocalHandler.load_as_json(): tried to load JSON ' +
-                           'from non-existing file "{}".'.format(_location))
-        with open(_location, 'r', encoding=self.__encoding) as instream:
-            result = json.load(instream)
+            for _temp in _unsynced:
+                LocalHandler.__sync_file(_temp)
+        _directories = set()
+        for _target, _temp in pending.items():
+            os.replace(_temp, _target)
+            _directories.add(dirname(_target) or '.')
+        if hasattr(os, 'O_DIRECTORY'):
+            for _directory in _directories:
+                _descriptor = os.open(_directory, os.O_RDONLY | os.O_DIRECTORY)
+                try:
+                    os.fsync(_descriptor)
+                finally:
+                    os.close(_descriptor)
+
+
+    def __compress(self, data : any) -> any:
+        """
+        Compress a payload according to the compression policy
+        =======================================================
+
+        Parameters
+        ----------
+        data : bytes | bytearray | memoryview
+            Payload to compress.
+
+        Returns
+        -------
+        bytes | bytearray | memoryview
+            Payload to write.
+        """
+
+        if self.__compression is None:
+            return CompressionPolicy.protect(data)
+        return self.__compression.compress(data)
+
+
+    def __enlist(self, pending : dict):
+        """
+        Commit temporary files or register them in the actual batch
+        ===========================================================
+
+        Parameters
+        ----------
+        pending : dict
+            Temporary file paths by target file paths.
+
+        Notes
+        -----
+            The files are committed or registered together, so a file and its
+            sidecar never land separately. Temporary files of earlier writes of
+            the same targets in the batch are removed.
+        """
+
+        _previous = []
+        with self.__pending_lock:
+            if self.__batch_depth > 0:
+                for _target, _temp in pending.items():
+                    _previous.append(self.__pending.get(_target))
+                    self.__pending[_target] = _temp
+                pending = {}
+            self.__unsynced.difference_update(_previous)
+        self.__commit(pending)
+        for _temp in _previous:
+            if _temp is not None and isfile(_temp):
+                remove(_temp)
+
+
+    def __get_manifest(self) -> dict:
+        """
+        Get the manifest, read or build it if needed
+        ============================================
+
+        Returns
+        -------
+        dict
+            The manifest itself, relative locations and their sizes in bytes.
+        """
+
+        with self.__manifest_lock:
+            if self.__manifest is not None:
+                return self.__manifest
+            _location = join(self.__base_path, LocalHandler.MANIFEST_FILE)
+            if isfile(_location) and not self.__manifest_dirty:
+                with open(_location, 'r', encoding='utf8') as instream:
+                    self.__manifest = json.load(instream)
+            else:
+                self.__manifest = self.__scan_manifest()
+                self.__manifest_dirty = True
+            return self.__manifest
+
+
+    @staticmethod
+    def __map_file(location : str) -> memoryview:
+        """
+        Map a file into the memory in read-only mode
+        ============================================
+
+        Parameters
+        ----------
+        location : str
+            Absolute or already joined location of the file to map.
+
+        Returns
+        -------
+        memoryview
+            Read-only view over the whole content of the file.
+
+        Notes
+        -----
+            Empty files cannot be mapped, an empty view is returned instead.
+            The file descriptor is closed immediately, the map itself keeps the
+            content available.
+        """
+
+        if getsize(location) == 0:
+            return memoryview(b'')
+        with open(location, 'rb') as instream:
+            mapped = mmap(instream.fileno(), 0, access=ACCESS_READ)
+        return memoryview(mapped)
+
+
+    def __map_buffers(self, location : str) -> list:
+        """
+        Map the buffers of a sidecar file
+        =================================
+
+        Parameters
+        ----------
+        location : str
+            Path of the sidecar file.
+
+        Returns
+        -------
+        list[memoryview]
+            Read-only views of the buffers on the memory map of the file.
+
+        Notes
+        -----
+            The sidecar starts with the number of the buffers and the offset
+            and length pairs of the buffers as 64 bit integers.
+        """
+
+        _mapped = self.__map_file(location)
+        _header = array('q')
+        _header.frombytes(_mapped[:_header.itemsize])
+        _count = _header[0]
+        _header.frombytes(_mapped[_header.itemsize:
+                                  _header.itemsize * (2 * _count + 1)])
+        return [_mapped[_header[i]:_header[i] + _header[i + 1]]
+                for i in range(1, 2 * _count + 1, 2)]
+
+
+    @contextmanager
+    def __open_to_write(self, location : str, mode : str,
+                        pending : dict = None) -> any:
+        """
+        Open a file to write
+        ====================
+
+        Parameters
+        ----------
+        location : str
+            Path of the file to write.
+        mode : str
+            Mode of opening, 'wb' or 'w'.
+        pending : dict | NoneType, optional (None if omitted)
+            If given, the temporary file is only collected into it by its
+            target path and the caller passes it to __enlist().
+
+        Returns
+        -------
+        Iterator[file object]
+            Context manager that yields the stream to write.
+
+        Notes
+        -----
+            Without atomic writes the file is opened in place. With atomic
+            writes a temporary file is opened next to it. When the context
+            exits normally outside a batch the temporary file is synced and
+            committed immediately. Inside a batch it is only flushed and
+            registered in the batch (see __enlist()), it gets synced together
+            with the other files of the batch by __commit(). When an exception
+            leaves the context the temporary file is removed.
+        """
+
+        _encoding = self.__encoding if 'b' not in mode else None
+        if not self.__atomic_writes:
+            with open(location, mode, encoding=_encoding) as outstream:
+                yield outstream
+            return
+        _temp = '{}.{}{}'.format(location, uuid4().hex,
+                                 LocalHandler.TEMP_EXTENSION)
+        try:
+            with open(_temp, mode, encoding=_encoding) as outstream:
+                yield outstream
+                outstream.flush()
+                with self.__pending_lock:
+                    _deferred = self.__batch_depth > 0
+                    if _deferred:
+                        self.__unsynced.add(_temp)
+                if not _deferred:
+                    os.fsync(outstream.fileno())
+        except BaseException:
+            with self.__pending_lock:
+                self.__unsynced.discard(_temp)
+            if isfile(_temp):
+                remove(_temp)
+            raise
+        if pending is not None:
+            pending[location] = _temp
+        else:
+            self.__enlist({location : _temp})
+
+
+    def __path_to_read(self, location : str, is_relative : bool) -> str:
+        """
+        Get the path of a file to read
+        ==============================
+
+        Parameters
+        ----------
+        location : str
+            Location of the file.
+        is_relative : bool
+            Whether the location is relative to the base path or not.
+
+        Returns
+        -------
+        str
+            The sharded path if the file exists there, the flat path otherwise.
+            Inside a batch, the temporary file of a pending write.
+        """
+
+        if self.__batch_depth > 0:
+            _target = self.__path_to_write(location, is_relative)
+            with self.__pending_lock:
+                _temp = self.__pending.get(_target)
+            if _temp is not None:
+                return _temp
+        if not is_relative:
+            return location
+        _flat = join(self.__base_path, location)
+        _sharded = self.__sharded_path(location)
+        if _sharded is not None:
+            if isfile(_sharded) or not isfile(_flat):
+                return _sharded
+        return _flat
+
+
+    def __path_to_write(self, location : str, is_relative : bool) -> str:
+        """
+        Get the path of a file to write
+        ===============================
+
+        Parameters
+        ----------
+        location : str
+            Location of the file.
+        is_relative : bool
+            Whether the location is relative to the base path or not.
+
+        Returns
+        -------
+        str
+            The sharded path if the file is sharded, the flat path otherwise.
+
+        Notes
+        -----
+            Missing shard directories are created.
+        """
+
+        if not is_relative:
+            return location
+        _sharded = self.__sharded_path(location)
+        if _sharded is None:
+            return join(self.__base_path, location)
+        makedirs(dirname(_sharded), exist_ok=True)
+        return _sharded
+
+
+    @staticmethod
+    def __read_at(descriptor : int, offset : int, length : int) -> bytes:
+        """
+        Read bytes of an open file from a position
+        ==========================================
+
+        Parameters
+        ----------
+        descriptor : int
+            File descriptor of the open file.
+        offset : int
+            Position of the first byte to read.
+        length : int | NoneType
+            Number of bytes to read, None means up to the end of the file.
+
+        Returns
+        -------
+        bytes
+            The bytes read, shorter than length at the end of the file.
+
+        Notes
+        -----
+            os.pread() doesn't move the position of the file, so it is safe to
+            use from more threads. Where it is not available (eg. Windows), the
+            position is moved with os.lseek().
+        """
+
+        if length is None:
+            length = max(os.fstat(descriptor).st_size - offset, 0)
+        _chunks = []
+        while length > 0:
+            if hasattr(os, 'pread'):
+                _chunk = os.pread(descriptor, length, offset)
+            else:
+                os.lseek(descriptor, offset, os.SEEK_SET)
+                _chunk = os.read(descriptor, length)
+            if len(_chunk) == 0:
+                break
+            _chunks.append(_chunk)
+            offset += len(_chunk)
+            length -= len(_chunk)
+        return b''.join(_chunks)
+
+
+    def __record(self, location : str, is_relative : bool,
+                 deleted : bool = False):
+        """
+        Record a written or deleted file in the manifest
+        ================================================
+
+        Parameters
+        ----------
+        location : str
+            Location of the file.
+        is_relative : bool
+            Whether the location is relative to the base path or not.
+        deleted : bool, optional (False if omitted)
+            Whether the file is deleted or written.
+
+        Notes
+        -----
+            The manifest file is removed at the first change, since it doesn't
+            match the content of the base path until it is saved again.
+        """
+
+        if not self.__use_manifest or not is_relative:
+            return
+        if not deleted:
+            _size = getsize(self.__path_to_read(location, True))
+        _manifest = self.__get_manifest()
+        with self.__manifest_lock:
+            if deleted:
+                _manifest.pop(normpath(location), None)
+            else:
+                _manifest[normpath(location)] = _size
+            if self.__manifest_dirty:
+                return
+            self.__manifest_dirty = True
+        _location = join(self.__base_path, LocalHandler.MANIFEST_FILE)
+        if isfile(_location):
+            remove(_location)
+
+
+    def __save_pickled(self, data : any, location : str):
+        """
+        Save data pickled into a file
+        =============================
+
+        Parameters
+        ----------
+        data : any
+            Data to save.
+        location : str
+            Path of the file to write.
+
+        Notes
+        -----
+            Without compression the data is pickled directly into the file. A
+            pickle never starts with the MAGIC bytes of CompressionPolicy, so
+            it needs no protection. With out-of-band pickling the sidecar is
+            always written, even without buffers, so a stale sidecar of an
+            earlier save never remains next to the file. The file and its
+            sidecar are committed or registered in the batch as one pair.
+        """
+
+        if self.__out_of_band:
+            _buffers = []
+            _pickled = pickle.dumps(data, protocol=5,
+                                    buffer_callback=_buffers.append)
+            if self.__compression is not None:
+                _pickled = self.__compression.compress(_pickled)
+            _pending = {}
+            try:
+                with self.__open_to_write(location, 'wb',
+                                          _pending) as outstream:
+                    outstream.write(_pickled)
+                    self.count_payload(bytes_out=outstream.tell())
+                with self.__open_to_write(location +
+                                          LocalHandler.SIDECAR_EXTENSION,
+                                          'wb', _pending) as outstream:
+                    self.__write_buffers(outstream, [buffer.raw()
+                                                     for buffer in _buffers])
+                    self.count_payload(bytes_out=outstream.tell())
+            except BaseException:
+                with self.__pending_lock:
+                    self.__unsynced.difference_update(_pending.values())
+                for _temp in _pending.values():
+                    if isfile(_temp):
+                        remove(_temp)
+                raise
+            self.__enlist(_pending)
+        elif self.__compression is None:
+            with self.__open_to_write(location, 'wb') as outstream:
+                pickle.dump(data, outstream)
+                self.count_payload(bytes_out=outstream.tell())
+        else:
+            to_write = self.__compression.compress(pickle.dumps(data))
+            with self.__open_to_write(location, 'wb') as outstream:
+                outstream.write(to_write)
+            self.count_payload(bytes_out=len(to_write))
+
+
+    def __scan_manifest(self) -> dict:
+        """
+        Build the manifest by scanning the base path
+        ============================================
+
+        Returns
+        -------
+        dict
+            Relative locations of the stored files and their sizes in bytes.
+
+        Notes
+        -----
+            Files in shard directories are recorded by their unsharded
+            location.
+        """
+
+        result = {}
+        if not isdir(self.__base_path):
+            return result
+        for root, _, filenames in os.walk(self.__base_path):
+            for filename in filenames:
+                if (filename.endswith(LocalHandler.TEMP_EXTENSION) or
+                    filename.endswith(LocalHandler.SIDECAR_EXTENSION) or
+                    filename == LocalHandler.MANIFEST_FILE):
+                    continue
+                _path = join(root, filename)
+                _location = relpath(_path, self.__base_path)
+                _parts = _location.split(os.sep)
+                if len(_parts) > self.__shard_depth > 0:
+                    _unsharded = join(*_parts[:-self.__shard_depth - 1],
+                                      filename)
+                    _sharded = self.__sharded_path(_unsharded)
+                    if (_sharded is not None and
+                        normpath(_sharded) == normpath(_path)):
+                        _location = _unsharded
+                result[normpath(_location)] = getsize(_path)
+        return result
+
+
+    def __sharded_path(self, location : str) -> str:
+        """
+        Get the sharded path of a relative location
+        ===========================================
+
+        Parameters
+        ----------
+        location : str
+            Relative location of the file.
+
+        Returns
+        -------
+        str | NoneType
+            The path of the file in its shard directory, or None if the file is
+            not sharded.
+
+        Notes
+        -----
+            The sidecar of out-of-band buffers is placed next to its file.
+        """
+
+        if self.__shard_depth == 0:
+            return None
+        _directory, _name = split(location)
+        _file = _name
+        if _file.endswith(LocalHandler.SIDECAR_EXTENSION):
+            _file = _file[:-len(LocalHandler.SIDECAR_EXTENSION)]
+        if splitext(_file)[1] not in LocalHandler.SHARDED_EXTENSIONS:
+            return None
+        _digest = blake2b(_file.encode('utf8'),
+                          digest_size=self.__shard_depth).hexdigest()
+        _shards = [_digest[i:i + 2] for i in range(0, len(_digest), 2)]
+        return join(self.__base_path, _directory, *_shards, _name)
+
+
+    @staticmethod
+    def __sharded_files(location : str, depth : int) -> list:
+        """
+        Collect files from shard directories
+        ====================================
+
+        Parameters
+        ----------
+        location : str
+            Directory that contains shard directories.
+        depth : int
+            Number of shard directory levels below location.
+
+        Returns
+        -------
+        list[str]
+            Names of the files in the shard directories.
+        """
+
+        result = []
+        for name in listdir(location):
+            _path = join(location, name)
+            if len(name) != 2 or not isdir(_path):
+                continue
+            if any(c not in '0123456789abcdef' for c in name):
+                continue
+            if depth > 1:
+                result.extend(LocalHandler.__sharded_files(_path, depth - 1))
+            else:
+                result.extend([f for f in listdir(_path)
+                               if isfile(join(_path, f))])
         return result
 
 
-    def load_as_text(self, location : str, is_relative : bool = True) -> list:
+    @staticmethod
+    def __sync_file(location : str):
+        """
+        Sync a written file to the disk
+        ===============================
+
+        Parameters
+        ----------
+        location : str
+            Path of the file to sync.
+
+        Notes
+        -----
+            The file is opened for writing, since os.fsync() needs write access
+            on Windows.
+        """
+
+        _descriptor = os.open(location, os.O_RDWR)
+        try:
+            os.fsync(_descriptor)
+        finally:
+            os.close(_descriptor)
+
+
+    @staticmethod
+    def __write_buffers(outstream : any, buffers : list):
+        """
+        Write buffers into a sidecar file
+        =================================
+
+        Parameters
+        ----------
+        outstream : file object
+            Binary stream of the sidecar file.
+        buffers : list[memoryview]
+            Contiguous buffers to write.
+
+        Notes
+        -----
+            The header (see __map_buffers()) is followed by the buffers, each
+            padded to start at a multiple of BUFFER_ALIGNMENT.
+        """
+
+        _header = array('q', [len(buffers)])
+        _offset = _header.itemsize * (2 * len(buffers) + 1)
+        for buffer in buffers:
+            _offset += -_offset % LocalHandler.BUFFER_ALIGNMENT
+            _header.extend([_offset, buffer.nbytes])
+            _offset += buffer.nbytes
+        outstream.write(_header.tobytes())
+        _offset = len(_header) * _header.itemsize
+        for buffer in buffers:
+            _padding = -_offset % LocalHandler.BUFFER_ALIGNMENT
+            outstream.write(bytes(_padding))
+            outstream.write(buffer)
+            _offset += _padding + buffer.nbytes
+
+
+class AsyncLocalHandler(LocalHandler, AsyncDofObjectHandler):
+    """
+    Local storage handler with asynchronous interface
+    =================================================
+
+    Attributes
+    ----------
+    encoding : str (inherited)
+        Encoding type for files with textual content (text, JSON).
+    executor : ThreadPoolExecutor (inherited) (read-only)
+        Get the worker pool that runs the file operations.
+    handler_type : str (inherited) (read-only)
+        Get the type of the handler.
+    is_closed : bool (inherited) (read-only)
+        Get whether the handler is closed or not.
+    is_open : bool (inherited) (read-only)
+        Get whether the handler is open or not.
+    max_workers : int | NoneType (inherited) (read-only)
+        Get the maximal number of worker threads.
+    use_mmap : bool (inherited)
+        Whether binary data and instances are loaded through memory mapping.
+
+    Notes
+    -----
+        Every coroutine runs the matching synchronous operation of LocalHandler
+        on the worker pool of the handler, so file I/O never blocks the event
+        loop. The number of coroutines waiting at the same time is not limited,
+        the number of files touched at the same time is limited by max_workers.
+    """
+
+
+    async def aexist(self, location : str, is_relative : bool = True) -> bool:
         """
-        Load data as text
-        =================
+        Check the existence of a file off the event loop
+        ================================================
+
+        See Also
+        --------
+            Parameters and return value : LocalHandler.exist()
+        """
+
+        return await self.__run(self.exist, location, is_relative)
+
+
+    async def afiles(self, location : str, is_relative : bool = True) -> list:
+        """
+        Get the list of files in a directory off the event loop
+        =======================================================
+
+        See Also
+        --------
+            Parameters and return value : LocalHandler.files()
+        """
+
+        return await self.__run(self.files, location, is_relative)
+
+
+    async def aload_as_binary(self, location : str,
+                              is_relative : bool = True) -> bytearray:
+        """
+        Load data as binary data off the event loop
+        ===========================================
+
+        See Also
+        --------
+            Parameters, return value and errors : LocalHandler.load_as_binary()
+        """
+
+        return await self.__run(self.load_as_binary, location, is_relative)
+
+
+    async def aload_as_instance(self, location : str,
+                                is_relative : bool = True) -> any:
+        """
+        Load data as instance off the event loop
+        ========================================
+
+        See Also
+        --------
+            Parameters, return value and errors :
+                LocalHandler.load_as_instance()
+        """
+
+        return await self.__run(self.load_as_instance, location, is_relative)
+
+
+    async def aload_as_json(self, location : str,
+                            is_relative : bool = True) -> any:
+        """
+        Load data as JSON data off the event loop
+        =========================================
+
+        See Also
+        --------
+            Parameters, return value and errors : LocalHandler.load_as_json()
+        """
+
+        return await self.__run(self.load_as_json, location, is_relative)
+
+
+    async def aload_as_text(self, location : str,
+                            is_relative : bool = True) -> list:
+        """
+        Load data as text off the event loop
+        ====================================
+
+        See Also
+        --------
+            Parameters, return value and errors : LocalHandler.load_as_text()
+        """
+
+        return await self.__run(self.load_as_text, location, is_relative)
+
+
+    async def asave_as_binary(self, data : any, location : str,
+                              is_relative : bool = True):
+        """
+        Save data as binary off the event loop
+        ======================================
+
+        See Also
+        --------
+            Parameters and errors : LocalHandler.save_as_binary()
+        """
+
+        await self.__run(self.save_as_binary, data, location, is_relative)
+
+
+    async def asave_as_instance(self, data : any, location : str,
+                                is_relative : bool = True):
+        """
+        Save data as instance off the event loop
+        ========================================
+
+        See Also
+        --------
+            Parameters and errors : LocalHandler.save_as_instance()
+        """
+
+        await self.__run(self.save_as_instance, data, location, is_relative)
+
+
+    async def asave_as_json(self, data : any, location : str,
+                            is_relative : bool = True):
+        """
+        Save data as JSON data off the event loop
+        =========================================
+
+        See Also
+        --------
+            Parameters and errors : LocalHandler.save_as_json()
+        """
+
+        await self.__run(self.save_as_json, data, location, is_relative)
+
+
+    async def asave_as_text(self, data : any, location : str,
+                            is_relative : bool = True):
+        """
+        Save data as text off the event loop
+        ====================================
+
+        See Also
+        --------
+            Parameters and errors : LocalHandler.save_as_text()
+        """
+
+        await self.__run(self.save_as_text, data, location, is_relative)
+
+
+    async def __run(self, function : any, *args : any) -> any:
+        """
+        Run a synchronous operation on the worker pool
+        ==============================================
 
         Parameters
         ----------
-        location : str
-            Location to save to.
-        is_relative : bool, optional (True if omitted)
-            Whether to treat location string as relative or absolute location.
-            Relative location means that the value will be added to a base path
-            or base url or something like those.
+        function : callable
+            The operation to run.
+        args : any
+            Positional arguments of the operation.
 
         Returns
         -------
-        list[str]
-            Load data as a list of lines.
-
-        Raises
-        ------
-        DofError
-            If the hanlder is not yet or no mor open.
-        DofError
-            If the target file doesn't exist.
+        any
+            The return value of the operation.
         """
 
-        if not self.__is_open:
-            raise DofError('LocalHandler.load_as_text(): handler is not open.')
-        if is_relative:
-            _location = join(self.__base_path, location)
-        else:
-            _location = location
-        if not isfile(_location):
-            raise DofError('LocalHandler.load_as_text(): tried to load text ' +
-                           'from non-existing file "{}".'.format(_location))
-        with open(_location, 'r', encoding=self.__encoding) as instream:
-            result = instream.readlines()
-        return result
+        loop = get_running_loop()
+        return await loop.run_in_executor(self.executor,
+                                          partial(function, *args))
 
 
-    def open(self):
-        """
-        Abstract method to open the connection with the storage
-        =======================================================
-        """
+class SegmentStore:
+    """
+    Packed append-only storage of payloads in segment files
+    =======================================================
 
-        self.__is_open = True
+    Attributes
+    ----------
+    keys : list (read-only)
+        Get the sorted list of stored keys.
+    prefix : str (read-only)
+        Get the prefix of the file names of the store.
+    segment_size : int (read-only)
+        Get the size limit of a segment in bytes.
+
+    Notes
+    -----
+    I.
+        A store consists of numbered segment files ("<prefix>.<n>.seg") that
+        hold the payloads one after another and an index file
+        ("<prefix>.index") that holds the segment, offset and length of every
+        key. Keys are non-negative integers, like the ids of a Dataset. The
+        index is a flat array of signed 64 bit integers with one
+        (segment, offset, length) triplet per key, where segment -1 means the
+        key is not stored.
+    II.
+        Payloads are appended to the open segment in the memory. When it
+        reaches segment_size, it is written with one save_as_binary() call, so
+        writing needs at most one segment worth of memory. Reading loads each
+        needed segment with one load_as_binary() call (memory mapped with
+        LocalHandler(use_mmap=True)) and serves payloads as slices of it.
+    """
 
 
-    def save_as_binary(self, data : any, location : str,
-                       is_relative : bool = True):
+    def __init__(self, handler : DofObjectHandler, prefix : str = 'elements',
+                 segment_size : int = 67108864):
         """
-        Save data as binary
-        ===================
+        Initialize an instance of the object
+        ====================================
 
         Parameters
         ----------
-        data : any
-            Data to save in the form true binary data.
-        location : str
-            Location to save to.
-        is_relative : bool, optional (True if omitted)
-            Whether to treat location string as relative or absolute location.
-            Relative location means that the value will be added to a base path
-            or base url or something like those.
+        handler : DofObjectHandler
+            Handler to store the segment and index files.
+        prefix : str, optional ('elements' if omitted)
+            Prefix of the file names of the store.
+        segment_size : int, optional (64 MiB if omitted)
+            Size limit of a segment in bytes. A single payload that is larger
+            than the limit gets its own segment.
 
         Raises
         ------
         DofError
-            When the handler is not open.
+            When segment_size is not positive.
         """
 
-        if self.__is_open:
-            if is_relative:
-                _location = join(self.__base_path, location)
-            else:
-                _location = location
-            if hasattr(data, 'to_binary') or isinstance(data, bytearray):
-                if hasattr(data, 'to_binary'):
-                    to_write = data.to_binary()
-                else:
-                    to_write = data
-                with open(_location, 'wb') as outstream:
-                    outstream.write(to_write)
-            else:
-                with open(_location, 'wb') as outstream:
-                    pickle.dump(data, outstream)
-        else:
-            raise DofError('LocalHandler.save_as_binary(): handler is not ' +
-                           'open.')
+        if segment_size <= 0:
+            raise DofError('SegmentStore.init(): segment_size must be ' +
+                           'positive.')
+        self.__handler = handler
+        self.__prefix = prefix
+        self.__segment_size = segment_size
+        self.__index = array('q')
+        self.__segment_count = 0
+        self.__open_segment = bytearray()
+        self.__loaded_segments = {}
 
 
-    def save_as_instance(self, data : any, location : str,
-                         is_relative : bool = True):
+    def append(self, key : int, payload : any):
         """
-        Save data as instance
-        =====================
+        Append a payload to the store
+        =============================
 
         Parameters
         ----------
-        data : any
-            Data to save in the form a python instance.
-        location : str
-            Location to save to.
-        is_relative : bool, optional (True if omitted)
-            Whether to treat location string as relative or absolute location.
-            Relative location means that the value will be added to a base path
-            or base url or something like those.
+        key : int
+            The key of the payload.
+        payload : bytes | bytearray | memoryview
+            The payload to store.
 
         Raises
         ------
         DofError
-            When the handler is not open.
+            When the key is negative.
+        DofError
+            When the key is already stored.
         """
 
-        if self.__is_open:
-            if is_relative:
-                _location = join(self.__base_path, location)
-            else:
-                _location = location
-            with open(_location, 'wb') as outstream:
-                pickle.dump(data, outstream)
-        else:
-            raise DofError('LocalHandler.save_as_instance(): handler is not ' +
-                           'open.')
+        if key < 0:
+            raise DofError('SegmentStore.append(): key must not be negative.')
+        if key < len(self.__index) // 3 and self.__index[key * 3] != -1:
+            raise DofError('SegmentStore.append(): key {} is already stored.'
+                           .format(key))
+        if len(self.__open_segment) > 0 and len(self.__open_segment) + \
+                                        len(payload) > self.__segment_size:
+            self.__seal()
+        while len(self.__index) // 3 <= key:
+            self.__index.extend((-1, 0, 0))
+        self.__index[key * 3] = self.__segment_count
+        self.__index[key * 3 + 1] = len(self.__open_segment)
+        self.__index[key * 3 + 2] = len(payload)
+        self.__open_segment.extend(payload)
+
+
+    def flush(self):
+        """
+        Write the open segment and the index
+        ====================================
+
+        Notes
+        -----
+            After flush() further payloads go to a new segment.
+        """
 
+        if len(self.__open_segment) > 0:
+            self.__seal()
+        self.__handler.save_as_binary(self.__index.tobytes(),
+                                      '{}.index'.format(self.__prefix))
 
-    def save_as_json(self, data : any, location : str,
-                     is_relative : bool = True):
+
+    @property
+    def keys(self) -> list:
         """
-        Abstract method to save data as JSON data
-        =========================================
+        Get the sorted list of stored keys
+        ==================================
+
+        Returns
+        -------
+        list[int]
+            The stored keys.
+        """
+
+        return [i for i in range(len(self.__index) // 3)
+                if self.__index[i * 3] != -1]
+
+
+    @classmethod
+    def load_from(cls, handler : DofObjectHandler,
+                  prefix : str = 'elements') -> any:
+        """
+        Open an existing store
+        ======================
 
         Parameters
         ----------
-        data : any
-            Data to save in the form JSON.
-        location : str
-            Location to save to.
-        is_relative : bool, optional (True if omitted)
-            Whether to treat location string as relative or absolute location.
-            Relative location means that the value will be added to a base path
-            or base url or something like those.
+        handler : DofObjectHandler
+            Handler that stores the segment and index files.
+        prefix : str, optional ('elements' if omitted)
+            Prefix of the file names of the store.
 
-        Raises
-        ------
-        DofError
-            When the handler is not open.
+        Returns
+        -------
+        SegmentStore
+            The store with its index loaded.
         """
 
-        if self.__is_open:
-            if is_relative:
-                _location = join(self.__base_path, location)
-            else:
-                _location = location
-            with open(_location, 'w', encoding=self.__encoding) as outstream:
-                json.dump(data, outstream)
-        else:
-            raise DofError('LocalHandler.save_as_instance(): handler is not ' +
-                           'open.')
+        result = cls(handler, prefix)
+        _index = handler.load_as_binary('{}.index'.format(prefix))
+        result.__index.frombytes(_index)
+        if len(result.__index) > 0:
+            result.__segment_count = max(result.__index[0::3]) + 1
+        return result
 
 
-    def save_as_text(self, data : any, location : str,
-                     is_relative : bool = True):
+    @property
+    def prefix(self) -> str:
         """
-        Save data as text
-        =================
+        Get the prefix of the file names of the store
+        =============================================
+
+        Returns
+        -------
+        str
+            The prefix of the file names.
+        """
+
+        return self.__prefix
+
+
+    def read(self, key : int) -> memoryview:
+        """
+        Read a payload from the store
+        =============================
 
         Parameters
         ----------
-        data : str | list
-            Data to save as text. If list is given, elements of list is
-            considered is lines of text.
-        location : str
-            Location to save to.
-        is_relative : bool, optional (True if omitted)
-            Whether to treat location string as relative or absolute location.
-            Relative location means that the value will be added to a base path
-            or base url or something like those.
+        key : int
+            The key of the payload.
+
+        Returns
+        -------
+        memoryview
+            The payload as a view over its segment.
 
         Raises
         ------
         DofError
-            When the handler is not open.
+            When the key is not stored.
         """
 
-        if self.__is_open:
-            if isinstance(data, list):
-                _output = '\n'.join([str(row) for row in list])
-            else:
-                _output = data
-            if is_relative:
-                _location = join(self.__base_path, location)
-            else:
-                _location = location
-            with open(_location, 'w', encoding=self.__encoding) as outstream:
-                outstream.write(_output)
-        else:
-            raise DofError('LocalHandler.save_as_text(): handler is not open.')
+        if key < 0 or key >= len(self.__index) // 3 or \
+                                                    self.__index[key * 3] == -1:
+            raise DofError('SegmentStore.read(): key {} is not stored.'
+                           .format(key))
+        _segment, _offset, _length = self.__index[key * 3:key * 3 + 3]
+        if _segment == self.__segment_count:
+            return memoryview(bytes(self.__open_segment[_offset:
+                                                        _offset + _length]))
+        _data = self.__loaded_segments.get(_segment)
+        if _data is None:
+            _data = memoryview(self.__handler.load_as_binary(
+                                '{}.{}.seg'.format(self.__prefix, _segment)))
+            self.__loaded_segments[_segment] = _data
+        return _data[_offset:_offset + _length]
+
+
+    @property
+    def segment_size(self) -> int:
+        """
+        Get the size limit of a segment in bytes
+        ========================================
+
+        Returns
+        -------
+        int
+            The size limit of a segment.
+        """
+
+        return self.__segment_size
+
+
+    def __seal(self):
+        """
+        Write the open segment and start a new one
+        ==========================================
+        """
+
+        self.__handler.save_as_binary(self.__open_segment, '{}.{}.seg'
+                                      .format(self.__prefix,
+                                              self.__segment_count))
+        self.__segment_count += 1
+        self.__open_segment = bytearray()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,420 @@
+"""
+DoF - Deep Model Core Output Framework
+======================================
+
+Tests of submodule: core
+"""
+
+
+from asyncio import gather, run
+import copyreg
+from io import BytesIO
+import os
+import pickle
+from tempfile import TemporaryDirectory
+from threading import Thread
+import unittest
+import weakref
+from unittest import mock
+
+from dof.core import DofObject, PayloadManager
+from dof.error import DofError
+from dof.handlers import MemoryHandler
+from dof.storage import AsyncLocalHandler, BinaryView, LocalHandler
+
+
+class AsyncLoadingTest(unittest.TestCase):
+    """
+    Asynchronous loading and saving of DofObject
+    ============================================
+    """
+
+
+    def setUp(self):
+        self.__directory = TemporaryDirectory()
+        self.path = self.__directory.name
+
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+
+    def round_trip(self, handler : LocalHandler):
+        """
+        Save and load objects concurrently through a handler
+        ====================================================
+
+        Parameters
+        ----------
+        handler : LocalHandler
+            The handler to use.
+        """
+
+        handler.open()
+        _handler_id = DofObject.add_handler(handler)
+        _saved = [DofObject(list(range(i)), local_path='{}.obj'.format(i),
+                            local_handler_id=_handler_id) for i in range(10)]
+        _binary = DofObject(b'raw', local_path='raw.bin',
+                            local_handler_id=_handler_id)
+        _binary.is_binary = True
+
+        async def save_and_load():
+            await gather(*[item.asave() for item in _saved + [_binary]])
+            _loaded = [DofObject(local_path='{}.obj'.format(i),
+                                 local_handler_id=_handler_id)
+                       for i in range(10)]
+            _loaded_binary = DofObject(local_path='raw.bin',
+                                       local_handler_id=_handler_id)
+            _loaded_binary.is_binary = True
+            await gather(*[item.aload() for item in
+                           _loaded + [_loaded_binary]])
+            return _loaded, _loaded_binary
+
+        _loaded, _loaded_binary = run(save_and_load())
+        self.assertEqual([item.data for item in _loaded],
+                         [list(range(i)) for i in range(10)])
+        self.assertFalse(any(item.is_dirty for item in _loaded))
+        self.assertEqual(bytes(_loaded_binary.data), b'raw')
+
+
+    def test_async_handler(self):
+        self.round_trip(AsyncLocalHandler(self.path))
+
+
+    def test_synchronous_handler_on_executor(self):
+        self.round_trip(LocalHandler(self.path))
+
+
+    def test_unsupported_handler_type(self):
+        with self.assertRaises(DofError):
+            run(DofObject([1]).aload('unknown'))
+
+
+class LazyLoadingTest(unittest.TestCase):
+    """
+    Lazy loading and unloading of DofObject
+    =======================================
+    """
+
+
+    def setUp(self):
+        self.__directory = TemporaryDirectory()
+        self.handler = LocalHandler(self.__directory.name)
+        self.handler.open()
+        self.handler_id = DofObject.add_handler(self.handler)
+
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+
+    def test_lazy_object_loads_on_access(self):
+        self.handler.save_as_instance({'a' : 1}, 'lazy.obj')
+        _object = DofObject(local_path='lazy.obj',
+                            local_handler_id=self.handler_id, lazy=True)
+        self.assertFalse(_object.is_in_memory)
+        self.assertEqual(_object.data, {'a' : 1})
+        self.assertTrue(_object.is_in_memory)
+        self.assertFalse(_object.is_dirty)
+
+
+    def test_unload_after_save(self):
+        _object = DofObject([1, 2, 3], local_path='saved.obj',
+                            local_handler_id=self.handler_id, lazy=True)
+        with self.assertRaises(DofError):
+            _object.unload()
+        _object.save()
+        _object.unload()
+        self.assertFalse(_object.is_in_memory)
+        self.assertEqual(_object.data, [1, 2, 3])
+
+
+    def test_unload_needs_location(self):
+        _object = DofObject([1])
+        with self.assertRaises(DofError):
+            _object.unload()
+
+
+    def test_binary_view(self):
+        _data = bytes(range(200))
+        _object = DofObject(_data, local_path='raw.bin',
+                            local_handler_id=self.handler_id)
+        _object.is_binary = True
+        self.assertEqual(_object.binary_view(10, 5), _data[10:15])
+        _object.save()
+        _stored = DofObject(local_path='raw.bin',
+                            local_handler_id=self.handler_id, lazy=True)
+        _stored.is_binary = True
+        _view = _stored.binary_view(100, 50)
+        self.assertIsInstance(_view, BinaryView)
+        self.assertEqual(bytes(_view[:10]), _data[100:110])
+        self.assertFalse(_stored.is_in_memory)
+
+
+    def test_save_from_stream(self):
+        _object = DofObject(b'in memory', local_path='stream.bin',
+                            local_handler_id=self.handler_id)
+        _object.is_binary = True
+        self.assertEqual(_object.save_from_stream(BytesIO(bytes(5000)),
+                                                  chunk_size=1024), 5000)
+        self.assertEqual(_object.data, b'in memory')
+        _object.load()
+        self.assertEqual(bytes(_object.data), bytes(5000))
+
+
+    def test_dirty_flag(self):
+        _object = DofObject([1], local_path='dirty.obj',
+                            local_handler_id=self.handler_id)
+        self.assertTrue(_object.is_dirty)
+        _object.save()
+        self.assertFalse(_object.is_dirty)
+        _object.data = [2]
+        self.assertTrue(_object.is_dirty)
+        _object.save()
+        _object.set_path('local', 'moved.obj', True)
+        self.assertTrue(_object.is_dirty)
+        _object.save()
+        _object.load()
+        self.assertFalse(_object.is_dirty)
+
+
+    def test_eager_object_stays_unloaded(self):
+        _object = DofObject('x', local_path='eager.obj',
+                            local_handler_id=self.handler_id)
+        _object.save()
+        _object.unload()
+        self.assertIsNone(_object.data)
+        _object.load()
+        self.assertEqual(_object.data, 'x')
+
+
+class Owner:
+    """
+    Payload owner that records its evictions
+    ========================================
+    """
+
+
+    def __init__(self, dirty : bool = False):
+        self.dirty = dirty
+        self.evicted = False
+
+
+    def evict(self) -> bool:
+        """
+        Record the eviction
+        ===================
+
+        Returns
+        -------
+        bool
+            True if the payload is dropped, False if the owner is dirty.
+        """
+
+        if self.dirty:
+            return False
+        self.evicted = True
+        return True
+
+
+class PayloadManagerTest(unittest.TestCase):
+    """
+    Least recently used eviction of PayloadManager
+    ==============================================
+    """
+
+
+    def test_least_recently_used_is_evicted(self):
+        _manager = PayloadManager(max_bytes=3000)
+        _owners = [Owner() for _ in range(3)]
+        for owner in _owners:
+            _manager.track(owner, bytes(1000), owner.evict)
+        _manager.touch(_owners[0])
+        _new = Owner()
+        _manager.track(_new, bytes(1000), _new.evict)
+        self.assertEqual([owner.evicted for owner in _owners],
+                         [False, True, False])
+        self.assertEqual(_manager.stats['bytes'], 3000)
+        self.assertEqual(_manager.stats['evictions'], 1)
+        self.assertEqual(_manager.stats['peak_bytes'], 4000)
+
+
+    def test_last_payload_is_kept_over_budget(self):
+        _manager = PayloadManager(max_bytes=100)
+        _small, _large = Owner(), Owner()
+        _manager.track(_small, bytes(50), _small.evict)
+        _manager.track(_large, bytes(500), _large.evict)
+        self.assertTrue(_small.evicted)
+        self.assertFalse(_large.evicted)
+        self.assertEqual(_manager.stats['tracked'], 1)
+
+
+    def test_refused_eviction_is_not_counted(self):
+        _manager = PayloadManager(max_bytes=1500)
+        _kept, _new = Owner(dirty=True), Owner()
+        _manager.track(_kept, bytes(1000), _kept.evict)
+        _manager.track(_new, bytes(1000), _new.evict)
+        self.assertFalse(_kept.evicted)
+        self.assertEqual(_manager.stats['evictions'], 0)
+        self.assertEqual(_manager.stats['tracked'], 1)
+        self.assertEqual(_manager.stats['bytes'], 1000)
+
+
+    def test_dead_owners_are_forgotten(self):
+        _manager = PayloadManager(max_bytes=10000)
+        _owner = Owner()
+        _manager.track(_owner, bytes(1000), _owner.evict)
+        del _owner
+        _other = Owner()
+        _manager.track(_other, bytes(10), _other.evict)
+        self.assertEqual(_manager.stats['tracked'], 1)
+        self.assertEqual(_manager.stats['bytes'], 10)
+
+
+    def test_no_budget_tracks_nothing(self):
+        _manager = PayloadManager()
+        _owner = Owner()
+        _manager.track(_owner, bytes(1000), _owner.evict)
+        self.assertEqual(_manager.stats['tracked'], 0)
+
+
+class RegistryTest(unittest.TestCase):
+    """
+    Handler registry of DofObject
+    =============================
+    """
+
+
+    def test_concurrent_additions_get_unique_ids(self):
+        _handlers = [MemoryHandler() for _ in range(40)]
+        _ids = {}
+
+        def add(handlers):
+            for handler in handlers:
+                _ids[id(handler)] = DofObject.add_handler(handler)
+
+        _threads = [Thread(target=add, args=(_handlers[i::4],))
+                    for i in range(4)]
+        for thread in _threads:
+            thread.start()
+        for thread in _threads:
+            thread.join()
+        self.assertEqual(len(set(_ids.values())), 40)
+        for handler in _handlers:
+            self.assertIs(DofObject.get_handler('local', _ids[id(handler)]),
+                          handler)
+
+
+    def test_deleted_handler(self):
+        _handler_id = DofObject.add_handler(MemoryHandler())
+        DofObject.delete_handler('local', _handler_id)
+        self.assertFalse(DofObject.handler_exists('local', _handler_id))
+        with self.assertRaises(DofError):
+            DofObject.get_handler('local', _handler_id)
+        with self.assertRaises(DofError):
+            DofObject.delete_handler('local', _handler_id)
+        with self.assertRaises(DofError):
+            DofObject.delete_handler('local', 100000)
+
+
+    def test_after_fork_reinitializes_each_handler_once(self):
+        _handler = MemoryHandler()
+        with mock.patch.object(DofObject, '_DofObject__local_handlers',
+                               {0 : _handler, 1 : None, 2 : _handler}), \
+             mock.patch.object(DofObject, '_DofObject__online_handlers', {}), \
+             mock.patch.object(DofObject, '_DofObject__registry_lock'), \
+             mock.patch('os.getpid', return_value=os.getpid() + 1), \
+             mock.patch.object(_handler, 'after_fork',
+                               wraps=_handler.after_fork) as after_fork:
+            DofObject.after_fork()
+        after_fork.assert_called_once_with()
+
+
+    @unittest.skipUnless(hasattr(os, 'register_at_fork'),
+                         'requires os.register_at_fork()')
+    def test_forked_child_gets_a_free_lock(self):
+        _lock = DofObject._DofObject__registry_lock
+        _handler = MemoryHandler()
+        _lock.acquire()
+        try:
+            _pid = os.fork()
+            if _pid == 0:
+                _status = 1
+                try:
+                    _handler_id = DofObject.add_handler(_handler)
+                    if DofObject.get_handler('local', _handler_id) is _handler:
+                        _status = 0
+                finally:
+                    os._exit(_status)
+        finally:
+            _lock.release()
+        _, _status = os.waitpid(_pid, 0)
+        self.assertEqual(_status, 0)
+
+
+class LegacyPickle:
+    """
+    Pickle of an instance as earlier versions with __dict__ wrote it
+    ================================================================
+    """
+
+
+    def __init__(self, cls : type, state : dict):
+        self.cls = cls
+        self.state = state
+
+
+    def __reduce__(self) -> tuple:
+        # pylint: disable=protected-access
+        #         Earlier versions were pickled through _reconstructor with
+        #         protocols 0 and 1.
+        return (copyreg._reconstructor, (self.cls, object, None), self.state)
+
+
+class SlotsTest(unittest.TestCase):
+    """
+    Slots and pickling of DofObject
+    ===============================
+    """
+
+
+    def test_instances_have_no_dict(self):
+        _object = DofObject([1], local_path='a.obj')
+        self.assertFalse(hasattr(_object, '__dict__'))
+        self.assertIs(weakref.ref(_object)(), _object)
+
+
+    def test_pickle_round_trip(self):
+        _object = DofObject({'a' : 1}, local_path='a.obj', local_handler_id=3,
+                            online_link='x/a.obj', is_binary=True, lazy=True)
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            _loaded = pickle.loads(pickle.dumps(_object, protocol))
+            self.assertEqual(_loaded.data, {'a' : 1})
+            self.assertEqual(_loaded.local_path, 'a.obj')
+            self.assertEqual(_loaded.local_handler_id, 3)
+            self.assertEqual(_loaded.online_link, 'x/a.obj')
+            self.assertTrue(_loaded.is_binary)
+            self.assertTrue(_loaded.lazy)
+            self.assertTrue(_loaded.is_dirty)
+
+
+    def test_earlier_pickles_load(self):
+        _state = {'_DofObject__data' : [1, 2],
+                  '_DofObject__local_path' : 'old.obj',
+                  '_DofObject__is_relative_local' : True,
+                  '_DofObject__local_handler_id' : -1,
+                  '_DofObject__online_link' : '',
+                  '_DofObject__is_relative_online' : True,
+                  '_DofObject__online_handler_id' : -1,
+                  '_DofObject__is_binary' : False}
+        _loaded = pickle.loads(pickle.dumps(LegacyPickle(DofObject, _state),
+                                            0))
+        self.assertIsInstance(_loaded, DofObject)
+        self.assertEqual(_loaded.data, [1, 2])
+        self.assertEqual(_loaded.local_path, 'old.obj')
+        self.assertFalse(_loaded.lazy)
+        self.assertFalse(_loaded.is_dirty)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,319 @@
+"""
+DoF - Deep Model Core Output Framework
+======================================
+
+Tests of submodule: data
+"""
+
+
+from asyncio import run
+import pickle
+from tempfile import TemporaryDirectory
+import unittest
+from unittest import mock
+
+from dof.core import DofObject
+from dof.data import DataElement, Dataset
+from dof.error import DofError
+from dof.storage import AsyncLocalHandler, LocalHandler
+
+
+def create_dataset(count : int) -> Dataset:
+    """
+    Create a dataset of linked x and y elements
+    ===========================================
+
+    Parameters
+    ----------
+    count : int
+        Number of x -> y pairs.
+
+    Returns
+    -------
+    Dataset
+        The new dataset.
+    """
+
+    result = Dataset()
+    for i in range(count):
+        _x = result.add_element(DataElement([i], DataElement.X))
+        result.add_element(DataElement(i * 10, DataElement.Y), _x)
+    return result
+
+
+class AsyncLoadTest(unittest.TestCase):
+    """
+    Asynchronous loading of datasets
+    ================================
+    """
+
+
+    def setUp(self):
+        self.__directory = TemporaryDirectory()
+        self.path = self.__directory.name
+
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+
+    def test_aload_from_lists_files_once(self):
+        _handler = LocalHandler(self.path)
+        _handler.open()
+        _dataset = create_dataset(5)
+        _dataset.save_to(DofObject.add_handler(_handler))
+        _async_handler = AsyncLocalHandler(self.path)
+        _async_handler.open()
+        _handler_id = DofObject.add_handler(_async_handler)
+        _loaded = Dataset()
+        with mock.patch.object(AsyncLocalHandler, 'aexist',
+                               side_effect=AssertionError), \
+             mock.patch.object(AsyncLocalHandler, 'files',
+                               wraps=_async_handler.files) as files:
+            run(_loaded.aload_from(_handler_id))
+        self.assertEqual(files.call_count, 1)
+        self.assertEqual(_loaded.next_available_id, 10)
+        self.assertEqual(_loaded.get_element_by_id(6).data, [3])
+        self.assertEqual(_loaded.get_element_by_id(7).data, 30)
+        self.assertEqual(_loaded.linker.get_link_by_x(7), 6)
+
+
+class PackedLayoutTest(unittest.TestCase):
+    """
+    Datasets saved in the packed segment layout
+    ===========================================
+    """
+
+
+    def setUp(self):
+        self.__directory = TemporaryDirectory()
+        self.handler = LocalHandler(self.__directory.name, use_mmap=True)
+        self.handler.open()
+        self.handler_id = DofObject.add_handler(self.handler)
+
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+
+    def test_packed_round_trip(self):
+        create_dataset(50).save_to(self.handler_id, packed=True,
+                                   segment_size=512)
+        _files = self.handler.files('')
+        self.assertFalse(any(name.endswith('.obj') for name in _files))
+        self.assertGreater(len([name for name in _files
+                                if name.endswith('.seg')]), 1)
+        for load in [lambda dataset: dataset.load_from(self.handler_id),
+                     lambda dataset: run(dataset.aload_from(self.handler_id))]:
+            _loaded = Dataset()
+            load(_loaded)
+            self.assertEqual(_loaded.next_available_id, 100)
+            self.assertEqual(_loaded.get_element_by_id(40).data, [20])
+            self.assertEqual(_loaded.get_element_by_id(41).data, 200)
+            self.assertEqual(_loaded.linker.get_link_by_x(41), 40)
+
+
+    def test_layout_can_be_changed(self):
+        _dataset = create_dataset(3)
+        _dataset.save_to(self.handler_id, packed=True)
+        _dataset.save_to(self.handler_id, full=True)
+        _loaded = Dataset()
+        _loaded.load_from(self.handler_id)
+        self.assertEqual(_loaded.get_element_by_id(5).data, 20)
+
+
+class LoadedElementsTest(unittest.TestCase):
+    """
+    Unloading and eviction of the elements of loaded datasets
+    =========================================================
+    """
+
+
+    def setUp(self):
+        self.__directory = TemporaryDirectory()
+        self.handler = LocalHandler(self.__directory.name)
+        self.handler.open()
+        self.handler_id = DofObject.add_handler(self.handler)
+        _dataset = Dataset()
+        for i in range(10):
+            _dataset.add_element(DataElement(bytes(1000) + bytes([i]),
+                                             DataElement.X))
+        _dataset.save_to(self.handler_id)
+
+
+    def tearDown(self):
+        DofObject.set_memory_budget(None)
+        self.__directory.cleanup()
+
+
+    def test_unload_and_reload_element(self):
+        _dataset = Dataset()
+        _dataset.load_from(self.handler_id)
+        _object = _dataset.get_element_by_id(4).dof_object
+        self.assertEqual(_object.local_path, '4.obj')
+        self.assertEqual(_object.local_handler_id, self.handler_id)
+        self.assertFalse(_object.is_dirty)
+        _object.unload()
+        self.assertFalse(_object.is_in_memory)
+        self.assertEqual(_dataset.get_element_by_id(4).data[-1], 4)
+        self.assertTrue(_object.is_in_memory)
+        _object.data = b'changed'
+        with self.assertRaises(DofError):
+            _object.unload()
+
+
+    def test_lazy_load_from(self):
+        _dataset = Dataset()
+        with mock.patch.object(LocalHandler, 'load_many',
+                               side_effect=AssertionError):
+            _dataset.load_from(self.handler_id, lazy=True)
+        _object = _dataset.get_element_by_id(7).dof_object
+        self.assertFalse(_object.is_in_memory)
+        self.assertEqual(_dataset.get_element_by_id(7).data[-1], 7)
+        self.assertTrue(_object.is_in_memory)
+
+
+    def test_changed_element_is_not_evicted(self):
+        self.handler.save_as_instance(bytearray(1001), '9.obj')
+        DofObject.set_memory_budget(3500)
+        _dataset = Dataset()
+        _dataset.load_from(self.handler_id)
+        _object = _dataset.get_element_by_id(9).dof_object
+        _object.data[0] = 42
+        _object.is_dirty = True
+        for element in _dataset.x_elements:
+            self.assertIsNotNone(element.data)
+        self.assertTrue(_object.is_in_memory)
+        self.assertEqual(_object.data[0], 42)
+        _dataset.save_to(self.handler_id)
+        self.assertEqual(self.handler.load_as_instance('9.obj')[0], 42)
+
+
+    def test_budget_evicts_loaded_elements(self):
+        DofObject.set_memory_budget(3500)
+        _before = DofObject.memory_stats()
+        _dataset = Dataset()
+        _dataset.load_from(self.handler_id)
+        _stats = DofObject.memory_stats()
+        self.assertEqual(_stats['evictions'] - _before['evictions'], 7)
+        self.assertLessEqual(_stats['bytes'], 3500)
+        self.assertFalse(_dataset.get_element_by_id(0).dof_object
+                         .is_in_memory)
+        self.assertEqual(_dataset.get_element_by_id(0).data[-1], 0)
+        self.assertEqual(DofObject.memory_stats()['reloads'] -
+                         _before['reloads'], 1)
+        self.assertEqual([element.data[-1] for element in
+                          _dataset.x_elements], list(range(10)))
+
+
+class IncrementalSaveTest(unittest.TestCase):
+    """
+    Dirty tracking and incremental saves of Dataset
+    ===============================================
+    """
+
+
+    def setUp(self):
+        self.__directory = TemporaryDirectory()
+        self.handler = LocalHandler(self.__directory.name)
+        self.handler.open()
+        self.handler_id = DofObject.add_handler(self.handler)
+
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+
+    def test_incremental_save_after_delete(self):
+        _dataset = create_dataset(5)
+        _dataset.save_to(self.handler_id)
+        _dataset.delete(2)
+        _dataset.get_element_by_id(4).dof_object.data = [40]
+        with mock.patch.object(LocalHandler, 'save_many',
+                               wraps=self.handler.save_many) as save_many:
+            _dataset.save_to(self.handler_id)
+        save_many.assert_called_once_with([([40], '4.obj')])
+        self.assertFalse(self.handler.exist('2.obj'))
+        self.assertFalse(_dataset.is_dirty)
+        _loaded = Dataset()
+        _loaded.load_from(self.handler_id)
+        with self.assertRaises(DofError):
+            _loaded.get_element_by_id(2)
+        self.assertEqual(_loaded.get_element_by_id(4).data, [40])
+
+
+    def test_unchanged_dataset_writes_only_base(self):
+        _dataset = create_dataset(4)
+        _dataset.save_to(self.handler_id)
+        with mock.patch.object(LocalHandler, 'save_as_instance',
+                               wraps=self.handler.save_as_instance) as save:
+            _dataset.save_to(self.handler_id)
+            self.assertEqual([call[0][1] for call in save.call_args_list],
+                             ['dataset.base'])
+            save.reset_mock()
+            _element = _dataset.get_element_by_id(3)
+            _element.info = _element.info
+            _dataset.save_to(self.handler_id)
+            self.assertEqual(sorted(call[0][1] for call in
+                                    save.call_args_list),
+                             ['3.obj', 'dataset.base', 'elements.info'])
+        self.assertFalse(_dataset.is_dirty)
+
+
+    def test_full_save_deletes_stale_files(self):
+        _dataset = create_dataset(3)
+        _dataset.save_to(self.handler_id)
+        _dataset.delete(1)
+        _dataset.save_to(self.handler_id, full=True)
+        self.assertFalse(self.handler.exist('1.obj'))
+        self.assertEqual(self.handler.files(''),
+                         sorted(['0.obj', '2.obj', '3.obj', '4.obj',
+                                 '5.obj', 'dataset.base', 'elements.info',
+                                 'elements.links']))
+
+
+    def test_force_load_loads_every_element(self):
+        create_dataset(3).save_to(self.handler_id)
+        _dataset = Dataset()
+        _dataset.load_from(self.handler_id, lazy=True)
+        _dataset.get_element_by_id(0).dof_object.data = [9]
+        _dataset.delete(5)
+        self.assertTrue(_dataset.force_load_to_memory())
+        for element in _dataset.x_elements + _dataset.y_elements:
+            self.assertTrue(element.dof_object.is_in_memory)
+        for i in range(5):
+            self.handler.delete('{}.obj'.format(i))
+        self.assertEqual(_dataset.get_element_by_id(2).data, [1])
+        self.assertEqual(_dataset.get_element_by_id(0).data, [9])
+
+
+    def test_incremental_save_skips_clean_lazy_elements(self):
+        create_dataset(3).save_to(self.handler_id)
+        _dataset = Dataset()
+        _dataset.load_from(self.handler_id, lazy=True)
+        _dataset.get_element_by_id(0).dof_object.data = [9]
+        with mock.patch.object(LocalHandler, 'load_as_instance',
+                               side_effect=AssertionError):
+            _dataset.save_to(self.handler_id)
+        self.assertFalse(_dataset.get_element_by_id(2).dof_object
+                         .is_in_memory)
+
+
+class DataElementSlotsTest(unittest.TestCase):
+    """
+    Slots and pickling of DataElement
+    =================================
+    """
+
+
+    def test_pickle_round_trip(self):
+        _element = DataElement([1, 2], DataElement.Y)
+        self.assertFalse(hasattr(_element, '__dict__'))
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            _loaded = pickle.loads(pickle.dumps(_element, protocol))
+            self.assertEqual(_loaded.data, [1, 2])
+            self.assertEqual(_loaded.element_type, DataElement.Y)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+DoF - Deep Model Core Output Framework
+======================================
+
+Tests of submodule: file
+"""
+
+
+from os import mkdir
+from os.path import join
+from tempfile import TemporaryDirectory
+import unittest
+from zipfile import ZipFile
+
+from dof.data import DataElement
+from dof.file import DofFile
+from dof.storage import LocalHandler
+
+
+class ArchiveTest(unittest.TestCase):
+    """
+    Round trips of DofFile through DOF_FILE archives
+    ================================================
+    """
+
+
+    def setUp(self):
+        self.__directory = TemporaryDirectory()
+        self.path = self.__directory.name
+        self.archive = join(self.path, 'out.dof')
+
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+
+    def save_out_of_band(self) -> bytearray:
+        """
+        Save a DofFile with out-of-band pickling into the archive
+        =========================================================
+
+        Returns
+        -------
+        bytearray
+            The data of the saved element.
+        """
+
+        _data = bytearray(range(256)) * 40
+        mkdir(join(self.path, 'work'))
+        _handler = LocalHandler(join(self.path, 'work'), out_of_band=True)
+        _file = DofFile(dof_basepath=join(self.path, 'work'),
+                        handler=_handler)
+        _file.dataset.add_element(DataElement(_data, DataElement.X))
+        _file.save_as_dof_file(self.archive)
+        return _data
+
+
+    def test_out_of_band_archive_has_no_sidecars(self):
+        self.save_out_of_band()
+        with ZipFile(self.archive, 'r') as instream:
+            _names = instream.namelist()
+        self.assertIn('0.obj', _names)
+        self.assertFalse(any(name.endswith(LocalHandler.SIDECAR_EXTENSION)
+                             for name in _names))
+
+
+    def test_out_of_band_archive_extracted(self):
+        _data = self.save_out_of_band()
+        _loaded = DofFile.from_file(self.archive, 'dof',
+                                    dof_basepath=join(self.path, 'restored'))
+        self.assertEqual(_loaded.dataset.get_element_by_id(0).data, _data)
+
+
+    def test_out_of_band_archive_read_directly(self):
+        _data = self.save_out_of_band()
+        _loaded = DofFile.from_file(self.archive, 'dof', extract=False)
+        self.assertEqual(_loaded.dataset.get_element_by_id(0).data, _data)
+
+
+if __name__ == '__main__':
+    unittest.main()
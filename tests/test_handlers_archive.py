@@ -0,0 +1,106 @@
+"""
+DoF - Deep Model Core Output Framework
+======================================
+
+Tests of submodule: handlers.archive
+"""
+
+
+from io import BytesIO
+import json
+from os.path import join
+import pickle
+from tempfile import TemporaryDirectory
+import unittest
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+
+from dof.error import DofError
+from dof.handlers import ZipHandler
+from dof.storage import CompressionPolicy, LocalHandler
+
+
+class ZipHandlerTest(unittest.TestCase):
+    """
+    Reading archive members with ZipHandler
+    =======================================
+    """
+
+
+    def setUp(self):
+        self.data = bytes(range(256)) * 20
+        self.archive = BytesIO()
+        with ZipFile(self.archive, 'w', ZIP_STORED) as outstream:
+            outstream.writestr('0.obj', pickle.dumps({'a' : [1, 2]}))
+            outstream.writestr('sub/raw.bin', self.data)
+            outstream.writestr('sub/packed.bin', CompressionPolicy().compress(
+                                                                   self.data))
+            outstream.writestr('dataset.base', json.dumps({'b' : 1}))
+            outstream.writestr('text.txt', 'first\nsecond', ZIP_DEFLATED)
+        self.handler = ZipHandler(self.archive)
+        self.handler.open()
+
+
+    def tearDown(self):
+        self.handler.close()
+
+
+    def test_members_are_loaded(self):
+        self.assertEqual(self.handler.load_as_instance('0.obj'),
+                         {'a' : [1, 2]})
+        self.assertEqual(bytes(self.handler.load_as_binary('sub/raw.bin')),
+                         self.data)
+        self.assertEqual(bytes(self.handler.load_as_binary('sub/packed.bin')),
+                         self.data)
+        self.assertEqual(self.handler.load_as_json('dataset.base'), {'b' : 1})
+        self.assertEqual(self.handler.load_as_text('text.txt'),
+                         ['first\n', 'second'])
+        with self.assertRaises(DofError):
+            self.handler.load_as_instance('missing.obj')
+
+
+    def test_listing(self):
+        self.assertTrue(self.handler.exist('sub/raw.bin'))
+        self.assertFalse(self.handler.exist('raw.bin'))
+        self.assertEqual(self.handler.files('sub'), ['packed.bin', 'raw.bin'])
+        self.assertEqual(self.handler.files(''),
+                         ['0.obj', 'dataset.base', 'text.txt'])
+
+
+    def test_ranges_and_streams(self):
+        for member in ['sub/raw.bin', 'sub/packed.bin']:
+            self.assertEqual(bytes(self.handler.load_range(member, 1000, 24)),
+                             self.data[1000:1024])
+            with self.handler.open_read(member) as instream:
+                self.assertEqual(instream.read(), self.data)
+
+
+    def test_archive_is_read_only(self):
+        with self.assertRaises(DofError):
+            self.handler.save_as_instance(1, '1.obj')
+        with self.assertRaises(DofError):
+            self.handler.delete('0.obj')
+        self.assertEqual(self.handler.files(''),
+                         ['0.obj', 'dataset.base', 'text.txt'])
+
+
+
+    @unittest.skipUnless(hasattr(pickle, 'PickleBuffer'),
+                         'out-of-band pickling requires Python 3.8+')
+    def test_out_of_band_members_are_refused(self):
+        _archive = BytesIO()
+        with TemporaryDirectory() as path:
+            _local = LocalHandler(path, out_of_band=True)
+            _local.open()
+            _local.save_as_instance(pickle.PickleBuffer(bytes(100)), '0.obj')
+            with ZipFile(_archive, 'w', ZIP_STORED) as outstream:
+                for name in ['0.obj',
+                             '0.obj' + LocalHandler.SIDECAR_EXTENSION]:
+                    outstream.write(join(path, name), name)
+        _handler = ZipHandler(_archive)
+        _handler.open()
+        with self.assertRaises(DofError):
+            _handler.load_as_instance('0.obj')
+        _handler.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+"""
+DoF - Deep Model Core Output Framework
+======================================
+
+Tests of submodule: handlers.dedup
+"""
+
+
+import unittest
+from unittest import mock
+
+from dof.handlers import DedupHandler, MemoryHandler
+
+
+class DedupHandlerTest(unittest.TestCase):
+    """
+    Blobs and index of DedupHandler
+    ===============================
+    """
+
+
+    def setUp(self):
+        self.upstream = MemoryHandler()
+        self.upstream.open()
+        self.handler = DedupHandler(self.upstream)
+        self.handler.open()
+
+
+    def blobs(self) -> list:
+        """
+        Get the blobs of the upstream handler
+        =====================================
+
+        Returns
+        -------
+        list[str]
+            Locations of the blobs.
+        """
+
+        return [name for name in self.upstream.files('')
+                if name.endswith(DedupHandler.BLOB_EXTENSION)]
+
+
+    def test_identical_payloads_share_a_blob(self):
+        for i in range(5):
+            self.handler.save_as_instance('label', '{}.obj'.format(i))
+        self.handler.save_as_instance('other', '5.obj')
+        self.assertEqual(self.handler.blob_count, 2)
+        self.assertEqual(len(self.blobs()), 2)
+        self.assertEqual(self.handler.load_as_instance('3.obj'), 'label')
+        self.handler.close()
+        _reopened = DedupHandler(self.upstream)
+        _reopened.open()
+        self.assertEqual(_reopened.blob_count, 2)
+        self.assertEqual(_reopened.files(''),
+                         ['{}.obj'.format(i) for i in range(6)])
+
+
+    def test_index_is_saved_before_blob_is_deleted(self):
+        self.handler.save_as_instance('only', 'a.obj')
+        self.handler.save_index()
+        _calls = mock.Mock()
+        with mock.patch.object(self.upstream, 'save_as_json',
+                               wraps=self.upstream.save_as_json) as save, \
+             mock.patch.object(self.upstream, 'delete',
+                               wraps=self.upstream.delete) as delete:
+            _calls.attach_mock(save, 'save_as_json')
+            _calls.attach_mock(delete, 'delete')
+            self.handler.delete('a.obj')
+            self.assertEqual(len(self.blobs()), 1)
+            self.handler.save_index()
+        self.assertEqual([call[0] for call in _calls.mock_calls],
+                         ['save_as_json', 'delete'])
+        self.assertEqual(self.blobs(), [])
+
+
+    def test_crash_before_index_save_keeps_blobs(self):
+        self.handler.save_as_instance('first', 'a.obj')
+        self.handler.save_index()
+        self.handler.save_as_instance('second', 'a.obj')
+        with mock.patch.object(self.upstream, 'save_as_json',
+                               side_effect=OSError('crash')):
+            with self.assertRaises(OSError):
+                self.handler.save_index()
+        _reopened = DedupHandler(self.upstream)
+        _reopened.open()
+        self.assertEqual(_reopened.load_as_instance('a.obj'), 'first')
+        self.handler.save_index()
+        self.assertEqual(len(self.blobs()), 1)
+        self.assertEqual(self.handler.load_as_instance('a.obj'), 'second')
+
+
+    def test_released_blob_referred_again_is_kept(self):
+        self.handler.save_as_instance('payload', 'a.obj')
+        self.handler.delete('a.obj')
+        self.handler.save_as_instance('payload', 'b.obj')
+        self.handler.save_index()
+        self.assertEqual(self.handler.load_as_instance('b.obj'), 'payload')
+
+
+    def test_batch_deletes_blobs_after_commit(self):
+        self.handler.save_as_instance('old', 'a.obj')
+        self.handler.save_index()
+        self.handler.begin_batch()
+        self.handler.save_as_instance('new', 'a.obj')
+        self.assertEqual(len(self.blobs()), 2)
+        self.handler.commit_batch()
+        self.assertEqual(len(self.blobs()), 1)
+        self.handler.begin_batch()
+        self.handler.delete('a.obj')
+        self.handler.abort_batch()
+        self.handler.save_index()
+        self.assertEqual(self.handler.load_as_instance('a.obj'), 'new')
+
+
+if __name__ == '__main__':
+    unittest.main()
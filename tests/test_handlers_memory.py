@@ -0,0 +1,102 @@
+"""
+DoF - Deep Model Core Output Framework
+======================================
+
+Tests of submodule: handlers.memory
+"""
+
+
+import unittest
+
+from dof.core import DofObject
+from dof.data import DataElement, Dataset
+from dof.error import DofError
+from dof.handlers import MemoryHandler
+
+
+class MemoryHandlerTest(unittest.TestCase):
+    """
+    Files and limits of MemoryHandler
+    =================================
+    """
+
+
+    def setUp(self):
+        self.handler = MemoryHandler()
+        self.handler.open()
+
+
+    def test_file_kinds_round_trip(self):
+        self.handler.save_as_binary(b'\x00\x01', 'data/a.bin')
+        self.handler.save_as_instance({'a' : [1]}, 'data/b.obj')
+        self.handler.save_as_json({'c' : 'd'}, 'c.json')
+        self.handler.save_as_text(['first', 'second'], 'd.txt')
+        self.assertEqual(bytes(self.handler.load_as_binary('data/a.bin')),
+                         b'\x00\x01')
+        self.assertEqual(self.handler.load_as_instance('data/b.obj'),
+                         {'a' : [1]})
+        self.assertEqual(self.handler.load_as_json('c.json'), {'c' : 'd'})
+        self.assertEqual(self.handler.load_as_text('d.txt'),
+                         ['first\n', 'second'])
+        self.assertEqual(self.handler.files('data'), ['a.bin', 'b.obj'])
+        self.assertEqual(self.handler.files(''), ['c.json', 'd.txt'])
+        self.assertTrue(self.handler.exist('data/../c.json'))
+        self.handler.delete('c.json')
+        self.assertFalse(self.handler.exist('c.json'))
+        with self.assertRaises(DofError):
+            self.handler.load_as_json('c.json')
+
+
+    def test_instances_are_pickled_by_default(self):
+        _data = [1, 2]
+        self.handler.save_as_instance(_data, 'a.obj')
+        _data.append(3)
+        self.assertEqual(self.handler.load_as_instance('a.obj'), [1, 2])
+        _shared = MemoryHandler(pickle_instances=False)
+        _shared.open()
+        _shared.save_as_instance(_data, 'a.obj')
+        self.assertIs(_shared.load_as_instance('a.obj'), _data)
+        self.assertEqual(_shared.total_bytes, 0)
+
+
+    def test_limits(self):
+        _handler = MemoryHandler(max_bytes=10, max_files=2)
+        _handler.open()
+        _handler.save_as_binary(b'12345678', 'a.bin')
+        _handler.save_as_binary(b'1234567890', 'a.bin')
+        self.assertEqual(_handler.total_bytes, 10)
+        with self.assertRaises(DofError):
+            _handler.save_as_binary(b'1', 'b.bin')
+        _handler.save_as_binary(b'1', 'a.bin')
+        _handler.save_as_binary(b'2', 'b.bin')
+        with self.assertRaises(DofError):
+            _handler.save_as_binary(b'3', 'c.bin')
+        _handler.delete('b.bin')
+        self.assertEqual(_handler.total_bytes, 1)
+
+
+    def test_files_are_kept_while_closed(self):
+        self.handler.save_as_instance(1, 'a.obj')
+        self.handler.close()
+        with self.assertRaises(DofError):
+            self.handler.load_as_instance('a.obj')
+        with self.assertRaises(DofError):
+            self.handler.save_as_instance(2, 'a.obj')
+        self.handler.open()
+        self.assertEqual(self.handler.load_as_instance('a.obj'), 1)
+
+
+    def test_dataset_round_trip(self):
+        _handler_id = DofObject.add_handler(self.handler)
+        _dataset = Dataset()
+        for i in range(5):
+            _dataset.add_element(DataElement([i], DataElement.X))
+        _dataset.save_to(_handler_id)
+        _loaded = Dataset()
+        _loaded.load_from(_handler_id)
+        self.assertEqual([element.data for element in _loaded.x_elements],
+                         [[i] for i in range(5)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,353 @@
+"""
+DoF - Deep Model Core Output Framework
+======================================
+
+Tests of submodule: handlers.online
+"""
+
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from os.path import join
+import pickle
+import re
+from tempfile import TemporaryDirectory
+from threading import Lock, Thread
+from time import perf_counter, sleep
+import unittest
+
+from dof.error import DofError
+from dof.handlers import OnlineHandler
+from dof.storage import LocalHandler
+
+
+class FileServer(BaseHTTPRequestHandler):
+    """
+    Minimal file server with optional range support
+    ===============================================
+
+    Notes
+    -----
+        The files, the settings and the request log are attributes of the
+        server instance: files (dict(str : bytes)), ranges (bool), requests
+        (list of (path, Range header, If-Range header) of GET requests),
+        connections (set of the client addresses), delays (list of seconds to
+        wait before answering the next GET requests) and on_request (callable |
+        NoneType, called with the server after each logged GET request).
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+
+    def do_DELETE(self):
+        # pylint: disable=invalid-name
+        #         The name is required by BaseHTTPRequestHandler.
+        with self.server.lock:
+            self.server.connections.add(self.client_address)
+            _data = self.server.files.pop(self.path, None)
+        self.send_response(404 if _data is None else 204)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+
+    def do_GET(self):
+        # pylint: disable=invalid-name
+        #         The name is required by BaseHTTPRequestHandler.
+        _server = self.server
+        with _server.lock:
+            _server.connections.add(self.client_address)
+            _server.requests.append((self.path, self.headers.get('Range'),
+                                     self.headers.get('If-Range')))
+            _data = _server.files.get(self.path)
+            _etag = '"{}"'.format(hash(_data))
+            if _server.on_request is not None:
+                _server.on_request(_server)
+            _delay = _server.delays.pop(0) if _server.delays else 0
+        sleep(_delay)
+        if _data is None:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        _range = self.headers.get('Range')
+        _if_range = self.headers.get('If-Range')
+        if (not _server.ranges or _range is None or
+            (_if_range is not None and _if_range != _etag)):
+            self.send(200, _data, _etag)
+            return
+        _match = re.fullmatch(r'bytes=(\d+)-(\d*)', _range)
+        _first = int(_match.group(1))
+        if _first >= len(_data):
+            self.send_response(416)
+            self.send_header('Content-Range', 'bytes */{}'.format(len(_data)))
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        _last = min(int(_match.group(2) or len(_data) - 1), len(_data) - 1)
+        self.send(206, _data[_first:_last + 1], _etag,
+                  'bytes {}-{}/{}'.format(_first, _last, len(_data)))
+
+
+    def do_HEAD(self):
+        # pylint: disable=invalid-name
+        #         The name is required by BaseHTTPRequestHandler.
+        with self.server.lock:
+            self.server.connections.add(self.client_address)
+            _data = self.server.files.get(self.path)
+        self.send_response(404 if _data is None else 200)
+        self.send_header('Content-Length',
+                         '0' if _data is None else str(len(_data)))
+        self.end_headers()
+
+
+    def do_PUT(self):
+        # pylint: disable=invalid-name
+        #         The name is required by BaseHTTPRequestHandler.
+        _data = self.rfile.read(int(self.headers['Content-Length']))
+        with self.server.lock:
+            self.server.connections.add(self.client_address)
+            self.server.files[self.path] = _data
+        self.send_response(201)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+
+    def log_message(self, *args):
+        # pylint: disable=arguments-differ
+        pass
+
+
+    def send(self, status : int, data : bytes, etag : str,
+             content_range : str = None):
+        """
+        Send a response with body
+        =========================
+
+        Parameters
+        ----------
+        status : int
+            Status of the response.
+        data : bytes
+            Body of the response.
+        etag : str
+            ETag of the file.
+        content_range : str | NoneType, optional (None if omitted)
+            Value of the Content-Range header.
+        """
+
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('ETag', etag)
+        if content_range is not None:
+            self.send_header('Content-Range', content_range)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class ServerTestCase(unittest.TestCase):
+    """
+    Base of the tests that run a local FileServer
+    =============================================
+    """
+
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FileServer)
+        self.server.daemon_threads = True
+        self.server.lock = Lock()
+        self.server.files = {'/data/a.bin' : bytes(range(256)) * 10}
+        self.server.ranges = True
+        self.server.requests = []
+        self.server.connections = set()
+        self.server.delays = []
+        self.server.on_request = None
+        self.__thread = Thread(target=self.server.serve_forever, daemon=True)
+        self.__thread.start()
+        self.url = 'http://127.0.0.1:{}/data'.format(self.server.server_port)
+
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.__thread.join()
+
+
+    def handler(self, range_size : int = None, max_connections : int = 4,
+                hedge_percentile : float = None) -> OnlineHandler:
+        """
+        Create an open handler for the local server
+        ===========================================
+
+        Parameters
+        ----------
+        range_size : int | NoneType, optional (None if omitted)
+            Size of the parts of ranged downloads.
+        max_connections : int, optional (4 if omitted)
+            Maximal number of kept connections.
+        hedge_percentile : float | NoneType, optional (None if omitted)
+            Latency percentile after which requests are re-issued.
+
+        Returns
+        -------
+        OnlineHandler
+            The handler.
+        """
+
+        result = OnlineHandler(self.url, use_gzip=False,
+                               max_connections=max_connections,
+                               range_size=range_size,
+                               hedge_percentile=hedge_percentile)
+        result.open()
+        self.addCleanup(result.close)
+        return result
+
+
+class OnlineHandlerTest(ServerTestCase):
+    """
+    Requests of OnlineHandler against a local server
+    ================================================
+    """
+
+
+    def test_file_kinds_round_trip(self):
+        _handler = self.handler()
+        _handler.save_as_instance({'a' : [1]}, 'b.obj')
+        _handler.save_as_json({'c' : 'd'}, 'sub/c.json')
+        _handler.save_as_text('first\nsecond', 'd.txt')
+        self.assertEqual(_handler.load_as_instance('b.obj'), {'a' : [1]})
+        self.assertEqual(_handler.load_as_json('sub/c.json'), {'c' : 'd'})
+        self.assertEqual(_handler.load_as_text('d.txt'),
+                         ['first\n', 'second'])
+        self.assertEqual(bytes(_handler.load_as_binary('a.bin')),
+                         self.server.files['/data/a.bin'])
+        self.assertTrue(_handler.exist('b.obj'))
+        _handler.delete('b.obj')
+        self.assertFalse(_handler.exist('b.obj'))
+        with self.assertRaises(DofError):
+            _handler.load_as_instance('b.obj')
+        with self.assertRaises(DofError):
+            _handler.delete('b.obj')
+
+
+    def test_connections_are_reused(self):
+        _handler = self.handler(max_connections=2)
+        for i in range(10):
+            _handler.save_as_instance(i, '{}.obj'.format(i))
+            _handler.exist('{}.obj'.format(i))
+        self.assertEqual(len(self.server.connections), 1)
+        self.assertEqual(_handler.load_many(['{}.obj'.format(i)
+                                             for i in range(10)]),
+                         list(range(10)))
+        self.assertLessEqual(len(self.server.connections), 2)
+
+
+    def test_files_are_listed_from_the_manifest(self):
+        _handler = self.handler()
+        with self.assertRaises(DofError):
+            _handler.files('')
+        _handler.save_as_json({'0.obj' : 1, 'sub/1.obj' : 1, 'sub/2.obj' : 1},
+                              LocalHandler.MANIFEST_FILE)
+        self.assertEqual(_handler.files('sub'), ['1.obj', '2.obj'])
+
+
+
+    @unittest.skipUnless(hasattr(pickle, 'PickleBuffer'),
+                         'out-of-band pickling requires Python 3.8+')
+    def test_out_of_band_files_are_refused(self):
+        with TemporaryDirectory() as path:
+            _local = LocalHandler(path, out_of_band=True)
+            _local.open()
+            _local.save_as_instance(pickle.PickleBuffer(bytes(100)), '0.obj')
+            for name in ['0.obj', '0.obj' + LocalHandler.SIDECAR_EXTENSION]:
+                with open(join(path, name), 'rb') as instream:
+                    self.server.files['/data/' + name] = instream.read()
+        _handler = self.handler()
+        with self.assertRaises(DofError):
+            _handler.load_as_instance('0.obj')
+
+class RangedDownloadTest(ServerTestCase):
+    """
+    Ranged downloads of OnlineHandler against a local server
+    ========================================================
+    """
+
+
+    def test_ranged_download_is_reassembled(self):
+        _handler = self.handler(range_size=300)
+        self.assertEqual(_handler.load_as_binary('a.bin'),
+                         self.server.files['/data/a.bin'])
+        self.assertEqual(len(self.server.requests), 9)
+        self.assertTrue(all(request[2] is not None
+                            for request in self.server.requests[1:]))
+        self.assertEqual(_handler.stats['range_restarts'], 0)
+
+
+    def test_ranged_download_without_range_support(self):
+        self.server.ranges = False
+        _handler = self.handler(range_size=300)
+        self.assertEqual(_handler.load_as_binary('a.bin'),
+                         self.server.files['/data/a.bin'])
+        self.assertEqual(len(self.server.requests), 1)
+
+
+    def test_ranged_download_restarts_when_file_changes(self):
+        _new = bytes(reversed(range(256))) * 12
+
+        def change(server):
+            server.files['/data/a.bin'] = _new
+            server.on_request = None
+
+        self.server.on_request = change
+        _handler = self.handler(range_size=300)
+        self.assertEqual(_handler.load_as_binary('a.bin'), _new)
+        self.assertEqual(_handler.stats['range_restarts'], 1)
+
+
+    def test_slow_request_is_hedged(self):
+        _handler = self.handler(hedge_percentile=90)
+        for _ in range(OnlineHandler.HEDGE_MIN_SAMPLES):
+            _handler.load_as_binary('a.bin')
+        self.server.delays = [2]
+        _started = perf_counter()
+        self.assertEqual(bytes(_handler.load_as_binary('a.bin')),
+                         self.server.files['/data/a.bin'])
+        self.assertLess(perf_counter() - _started, 1)
+        self.assertEqual(_handler.stats['hedged_requests'], 1)
+        self.assertEqual(_handler.stats['hedge_wins'], 1)
+
+
+    def test_load_range_with_range_support(self):
+        _handler = self.handler()
+        self.assertEqual(_handler.load_range('a.bin', 500, 20),
+                         self.server.files['/data/a.bin'][500:520])
+        self.assertEqual(_handler.load_range('a.bin', 2550, 100),
+                         self.server.files['/data/a.bin'][2550:])
+        self.assertEqual(_handler.load_range('a.bin', 3000, 10), b'')
+        self.assertTrue(all(request[1] is not None
+                            for request in self.server.requests))
+
+
+    def test_load_range_without_range_support(self):
+        self.server.ranges = False
+        _handler = self.handler()
+        self.assertEqual(_handler.load_range('a.bin', 500, 20),
+                         self.server.files['/data/a.bin'][500:520])
+        self.assertEqual(len(self.server.requests), 1)
+
+
+    def test_load_range_restarts_when_file_changes(self):
+        _new = bytes(reversed(range(256))) * 10
+
+        def change(server):
+            server.files['/data/a.bin'] = _new
+            server.on_request = None
+
+        self.server.on_request = change
+        _handler = self.handler()
+        self.assertEqual(_handler.load_range('a.bin', 500, 20), _new[500:520])
+        self.assertEqual(self.server.requests[1][2],
+                         '"{}"'.format(hash(bytes(range(256)) * 10)))
+        self.assertEqual(_handler.stats['range_restarts'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
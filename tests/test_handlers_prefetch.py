@@ -0,0 +1,82 @@
+"""
+DoF - Deep Model Core Output Framework
+======================================
+
+Tests of submodule: handlers.prefetch
+"""
+
+
+import os
+import unittest
+from unittest import mock
+
+from dof.core import DofObject
+from dof.data import DataElement, Dataset
+from dof.handlers import MemoryHandler, PrefetchHandler
+
+
+class PrefetchHandlerTest(unittest.TestCase):
+    """
+    Read-ahead of PrefetchHandler
+    =============================
+    """
+
+
+    def setUp(self):
+        self.upstream = MemoryHandler()
+        self.upstream.open()
+        for i in range(20):
+            self.upstream.save_as_instance(i, '{}.obj'.format(i))
+        self.handler = PrefetchHandler(self.upstream, window=4)
+        self.handler.open()
+
+
+    def test_sequential_loads_are_prefetched(self):
+        for i in range(12):
+            self.assertEqual(self.handler.load_as_instance(
+                                                '{}.obj'.format(i)), i)
+        _stats = self.handler.stats
+        self.assertEqual(_stats['misses'], 2)
+        self.assertEqual(_stats['hits'], 10)
+
+
+    def test_load_many_uses_prefetched_results(self):
+        self.handler.prefetch(['0.obj', '1.obj', '2.obj'])
+        with mock.patch.object(self.upstream, 'load_many',
+                               wraps=self.upstream.load_many) as load_many:
+            _loaded = self.handler.load_many(['{}.obj'.format(i)
+                                              for i in range(5)])
+        self.assertEqual(_loaded, list(range(5)))
+        load_many.assert_called_once_with(['3.obj', '4.obj'], True)
+        self.assertEqual(self.handler.stats['hits'], 3)
+        self.assertEqual(self.handler.load_many(['5.obj', '6.obj']), [5, 6])
+        self.assertEqual(self.handler.stats['hits'], 5)
+
+
+    def test_lazy_dataset_iteration_reads_ahead(self):
+        _dataset = Dataset()
+        for i in range(20):
+            _dataset.add_element(DataElement([i], DataElement.X))
+        _store = MemoryHandler()
+        _store.open()
+        _dataset.save_to(DofObject.add_handler(_store))
+        _handler = PrefetchHandler(_store, window=4)
+        _loaded = Dataset()
+        _loaded.load_from(DofObject.add_handler(_handler), lazy=True)
+        self.assertEqual([element.data for element in _loaded.x_elements],
+                         [[i] for i in range(20)])
+        self.assertGreaterEqual(_handler.stats['hits'], 18)
+
+
+    def test_upstream_is_reinitialized_once_after_fork(self):
+        with mock.patch('os.getpid', return_value=os.getpid() + 1):
+            self.assertTrue(self.handler.after_fork())
+            self.upstream.load_as_instance('0.obj')
+            self.assertFalse(self.upstream.after_fork())
+            self.assertEqual(self.upstream.io_stats()['load_as_instance']
+                             ['count'], 1)
+            self.assertEqual(self.handler.load_as_instance('1.obj'), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
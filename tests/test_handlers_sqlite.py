@@ -0,0 +1,127 @@
+"""
+DoF - Deep Model Core Output Framework
+======================================
+
+Tests of submodule: handlers.sqlite
+"""
+
+
+import os
+from os.path import join
+import sqlite3
+from tempfile import TemporaryDirectory
+import unittest
+from unittest import mock
+
+from dof.error import DofError
+from dof.handlers import SqliteHandler
+
+
+class SqliteHandlerTest(unittest.TestCase):
+    """
+    Files and batches of SqliteHandler
+    ==================================
+    """
+
+
+    def setUp(self):
+        self.__directory = TemporaryDirectory()
+        self.database = join(self.__directory.name, 'dof.sqlite')
+        self.handler = SqliteHandler(self.database)
+        self.handler.open()
+
+
+    def tearDown(self):
+        self.handler.close()
+        self.__directory.cleanup()
+
+
+    def test_files_round_trip(self):
+        self.handler.save_as_instance({'a' : 1}, 'set/0.obj')
+        self.handler.save_as_binary(b'\x00\x01', 'set/1.blob')
+        self.handler.save_as_json([1, 2], 'dof.json')
+        self.assertEqual(self.handler.load_as_instance('set/0.obj'), {'a' : 1})
+        self.assertEqual(bytes(self.handler.load_as_binary('set/1.blob')),
+                         b'\x00\x01')
+        self.assertEqual(self.handler.files('set'), ['0.obj', '1.blob'])
+        self.assertEqual(self.handler.files(''), ['dof.json'])
+        self.handler.save_as_instance('new', 'set/0.obj')
+        self.assertEqual(self.handler.load_as_instance('set/0.obj'), 'new')
+        self.handler.delete('set/0.obj')
+        self.assertFalse(self.handler.exist('set/0.obj'))
+        with self.assertRaises(DofError):
+            self.handler.load_as_instance('set/0.obj')
+
+
+    def test_table_keeps_rowid(self):
+        with sqlite3.connect(self.database) as connection:
+            _sql = connection.execute('SELECT sql FROM sqlite_master WHERE ' +
+                                      'name = ?', ('files',)).fetchone()[0]
+            _indexes = connection.execute('PRAGMA index_list(files)'
+                                          ).fetchall()
+        self.assertNotIn('WITHOUT ROWID', _sql.upper())
+        self.assertTrue(any(index[1] == 'files_location' and index[2]
+                            for index in _indexes))
+
+
+    def test_nested_abort_keeps_outer_writes(self):
+        with self.handler.transaction():
+            self.handler.save_as_instance('outer', '0.obj')
+            with self.assertRaises(ValueError):
+                with self.handler.transaction():
+                    self.handler.save_as_instance('inner', '1.obj')
+                    self.handler.save_as_instance('changed', '0.obj')
+                    raise ValueError()
+            self.assertFalse(self.handler.exist('1.obj'))
+            self.handler.save_as_instance('after', '2.obj')
+        self.assertEqual(self.handler.load_as_instance('0.obj'), 'outer')
+        self.assertFalse(self.handler.exist('1.obj'))
+        self.assertEqual(self.handler.load_as_instance('2.obj'), 'after')
+
+
+    def test_outer_abort_drops_everything(self):
+        with self.assertRaises(ValueError):
+            with self.handler.transaction():
+                self.handler.save_as_instance('outer', '0.obj')
+                with self.handler.transaction():
+                    self.handler.save_as_instance('inner', '1.obj')
+                raise ValueError()
+        self.assertEqual(self.handler.files(''), [])
+        with self.assertRaises(DofError):
+            self.handler.commit_batch()
+
+
+    def test_after_fork_reconnects_lazily(self):
+        self.handler.save_as_binary(b'parent', 'a.bin')
+        with mock.patch('os.getpid', return_value=os.getpid() + 1), \
+             mock.patch('sqlite3.connect', wraps=sqlite3.connect) as connect:
+            self.assertTrue(self.handler.after_fork())
+            self.assertFalse(self.handler.after_fork())
+            connect.assert_not_called()
+            self.assertTrue(self.handler.is_open)
+            self.assertEqual(bytes(self.handler.load_as_binary('a.bin')),
+                             b'parent')
+            self.assertEqual(connect.call_count, 1)
+
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'requires os.fork()')
+    def test_forked_child_uses_own_connection(self):
+        self.handler.save_as_binary(b'parent', 'a.bin')
+        _pid = os.fork()
+        if _pid == 0:
+            _status = 1
+            try:
+                self.handler.after_fork()
+                if bytes(self.handler.load_as_binary('a.bin')) == b'parent':
+                    self.handler.save_as_binary(b'child', 'b.bin')
+                    _status = 0
+            finally:
+                os._exit(_status)
+        _, _status = os.waitpid(_pid, 0)
+        self.assertEqual(_status, 0)
+        self.assertEqual(bytes(self.handler.load_as_binary('b.bin')),
+                         b'child')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+"""
+DoF - Deep Model Core Output Framework
+======================================
+
+Tests of submodule: handlers.tiered
+"""
+
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+from os.path import isfile, join
+import pickle
+from tempfile import TemporaryDirectory
+import unittest
+from unittest import mock
+
+from dof.error import DofError
+from dof.handlers import MemoryHandler, TieredHandler
+from dof.storage import LocalHandler
+
+
+class TieredHandlerTest(unittest.TestCase):
+    """
+    Tiers and counters of TieredHandler
+    ===================================
+    """
+
+
+    def setUp(self):
+        self.__directory = TemporaryDirectory()
+        self.cache_path = join(self.__directory.name, 'cache')
+        self.upstream = MemoryHandler()
+        self.upstream.open()
+        for i in range(8):
+            self.upstream.save_as_instance(bytes(100) + bytes([i]),
+                                           'set/{}.obj'.format(i))
+
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+
+    def test_loads_are_read_through(self):
+        handler = TieredHandler(self.upstream, self.cache_path)
+        handler.open()
+        self.assertEqual(handler.load_as_instance('set/1.obj')[-1], 1)
+        self.assertEqual(handler.load_as_instance('set/1.obj')[-1], 1)
+        _stats = handler.stats
+        self.assertEqual(_stats['upstream_loads'], 1)
+        self.assertEqual(_stats['memory_hits'], 1)
+        self.assertTrue(isfile(join(self.cache_path, 'set', '1.obj')))
+        handler.close()
+        handler = TieredHandler(self.upstream, self.cache_path,
+                                memory_budget=0)
+        handler.open()
+        self.assertEqual(handler.load_as_instance('set/1.obj')[-1], 1)
+        self.assertEqual(handler.stats['disk_hits'], 1)
+        self.assertEqual(handler.stats['upstream_loads'], 0)
+
+
+    def test_disk_tier_is_not_synced(self):
+        handler = TieredHandler(self.upstream, self.cache_path)
+        handler.open()
+        with mock.patch('os.fsync', side_effect=AssertionError), \
+             mock.patch('os.sync', side_effect=AssertionError, create=True):
+            for i in range(8):
+                handler.load_as_instance('set/{}.obj'.format(i))
+        self.assertEqual(sorted(os.listdir(join(self.cache_path, 'set'))),
+                         ['{}.obj'.format(i) for i in range(8)])
+
+
+    def test_disk_budget_evicts_least_recently_used(self):
+        _size = len(self.upstream.load_as_binary('set/0.obj'))
+        handler = TieredHandler(self.upstream, self.cache_path,
+                                memory_budget=0, disk_budget=3 * _size)
+        handler.open()
+        for i in range(5):
+            handler.load_as_instance('set/{}.obj'.format(i))
+        self.assertEqual(handler.stats['disk_evictions'], 2)
+        self.assertEqual(sorted(os.listdir(join(self.cache_path, 'set'))),
+                         ['2.obj', '3.obj', '4.obj'])
+
+
+    def test_parallel_loads(self):
+        handler = TieredHandler(self.upstream, self.cache_path,
+                                memory_budget=300)
+        handler.open()
+        _locations = ['set/{}.obj'.format(i % 8) for i in range(200)]
+        with ThreadPoolExecutor(8) as executor:
+            _results = list(executor.map(handler.load_as_instance,
+                                         _locations))
+        self.assertEqual([result[-1] for result in _results],
+                         [i % 8 for i in range(200)])
+
+
+    def test_locations_outside_are_rejected(self):
+        handler = TieredHandler(self.upstream, self.cache_path)
+        handler.open()
+        self.upstream.save_as_instance('outside', '../escape.obj')
+        for location in ['../escape.obj', 'set/../../escape.obj']:
+            with self.assertRaises(DofError):
+                handler.load_as_instance(location)
+            with self.assertRaises(DofError):
+                handler.save_as_instance('x', location)
+        self.assertFalse(isfile(join(self.__directory.name, 'escape.obj')))
+        self.assertEqual(handler.load_as_instance('set/../set/2.obj')[-1], 2)
+
+
+
+    @unittest.skipUnless(hasattr(pickle, 'PickleBuffer'),
+                         'out-of-band pickling requires Python 3.8+')
+    def test_out_of_band_instances_are_loaded_by_upstream(self):
+        _path = join(self.__directory.name, 'upstream')
+        os.makedirs(_path)
+        _upstream = LocalHandler(_path, out_of_band=True)
+        _upstream.open()
+        _data = bytes(range(256)) * 10
+        _upstream.save_as_instance(pickle.PickleBuffer(_data), '0.obj')
+        handler = TieredHandler(_upstream, self.cache_path)
+        handler.open()
+        for _ in range(2):
+            self.assertEqual(bytes(handler.load_as_instance('0.obj')), _data)
+        self.assertEqual(bytes(handler.load_as_instance(join(_path, '0.obj'),
+                                                        False)), _data)
+        handler.save_as_instance(_data[:10], '0.obj')
+        self.assertEqual(handler.load_as_instance('0.obj'), _data[:10])
+
+
+if __name__ == '__main__':
+    unittest.main()
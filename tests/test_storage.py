@@ -0,0 +1,697 @@
+"""
+DoF - Deep Model Core Output Framework
+======================================
+
+Tests of submodule: storage
+"""
+
+
+from asyncio import run
+from io import BytesIO
+import os
+from os.path import getsize, isfile, join
+from pickle import PicklingError
+from tempfile import TemporaryDirectory
+from threading import Thread, current_thread
+import unittest
+from unittest import mock
+
+from dof.error import DofError
+from dof.handlers import MemoryHandler
+from dof.storage import (AsyncLocalHandler, BinaryView, CompressionPolicy,
+                         HandlerStats, LocalHandler, SegmentStore)
+
+
+class MemoryMapTest(unittest.TestCase):
+    """
+    Memory mapped loads of LocalHandler
+    ===================================
+    """
+
+
+    def setUp(self):
+        self.__directory = TemporaryDirectory()
+        self.path = self.__directory.name
+        self.handler = LocalHandler(self.path, use_mmap=True)
+        self.handler.open()
+
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+
+    def test_binary_is_a_read_only_view(self):
+        _data = bytes(range(256)) * 64
+        self.handler.save_as_binary(_data, 'data.bin')
+        _loaded = self.handler.load_as_binary('data.bin')
+        self.assertIsInstance(_loaded, memoryview)
+        self.assertTrue(_loaded.readonly)
+        self.assertEqual(_loaded, _data)
+        self.assertEqual(bytes(_loaded[100:110]), _data[100:110])
+
+
+    def test_empty_file_is_an_empty_view(self):
+        self.handler.save_as_binary(b'', 'empty.bin')
+        self.assertEqual(self.handler.load_as_binary('empty.bin'), b'')
+
+
+    def test_mode_can_be_switched(self):
+        self.handler.save_as_instance({'a' : [1, 2]}, 'data.obj')
+        self.assertEqual(self.handler.load_as_instance('data.obj'),
+                         {'a' : [1, 2]})
+        self.handler.use_mmap = False
+        self.handler.save_as_binary(b'abc', 'data.bin')
+        self.assertNotIsInstance(self.handler.load_as_binary('data.bin'),
+                                 memoryview)
+
+
+class BatchedOperationsTest(unittest.TestCase):
+    """
+    Parallel load_many() and save_many() of LocalHandler
+    ====================================================
+    """
+
+
+    def setUp(self):
+        self.__directory = TemporaryDirectory()
+        self.handler = LocalHandler(self.__directory.name, max_workers=4)
+        self.handler.open()
+
+
+    def tearDown(self):
+        self.handler.close()
+        self.__directory.cleanup()
+
+
+    def test_round_trip_keeps_order(self):
+        self.handler.save_many([([i] * i, '{}.obj'.format(i))
+                                for i in range(20)])
+        self.assertEqual(self.handler.load_many(['{}.obj'.format(i)
+                                                 for i in reversed(range(20))]),
+                         [[i] * i for i in reversed(range(20))])
+
+
+    def test_save_many_writes_every_item_before_raising(self):
+        _items = [(1, 'a.obj'), (lambda: None, 'b.obj'), (3, 'c.obj')]
+        with self.assertRaises((AttributeError, PicklingError)):
+            self.handler.save_many(_items)
+        self.assertEqual(self.handler.load_many(['a.obj', 'c.obj']), [1, 3])
+
+
+    def test_load_many_of_missing_file(self):
+        self.handler.save_as_instance(1, 'a.obj')
+        with self.assertRaises(DofError):
+            self.handler.load_many(['a.obj', 'missing.obj'])
+
+
+    def test_closed_handler_is_rejected(self):
+        self.handler.close()
+        with self.assertRaises(DofError):
+            self.handler.load_many(['a.obj'])
+        with self.assertRaises(DofError):
+            self.handler.save_many([(1, 'a.obj')])
+
+
+class AsyncLocalHandlerTest(unittest.TestCase):
+    """
+    Coroutines of AsyncLocalHandler
+    ===============================
+    """
+
+
+    def setUp(self):
+        self.__directory = TemporaryDirectory()
+        self.handler = AsyncLocalHandler(self.__directory.name, max_workers=2)
+        self.handler.open()
+
+
+    def tearDown(self):
+        self.handler.close()
+        self.__directory.cleanup()
+
+
+    def test_round_trip(self):
+
+        async def round_trip():
+            await self.handler.asave_many([(i, '{}.obj'.format(i))
+                                           for i in range(8)])
+            await self.handler.asave_as_json({'a' : 1}, 'data.json')
+            return (await self.handler.aload_many(['{}.obj'.format(i)
+                                                   for i in range(8)]),
+                    await self.handler.aload_as_json('data.json'),
+                    await self.handler.aexist('7.obj'),
+                    await self.handler.afiles(''))
+
+        _loaded, _json, _exists, _files = run(round_trip())
+        self.assertEqual(_loaded, list(range(8)))
+        self.assertEqual(_json, {'a' : 1})
+        self.assertTrue(_exists)
+        self.assertEqual(len(_files), 9)
+
+
+    def test_files_are_touched_off_the_event_loop(self):
+        _threads = []
+        _exist = self.handler.exist
+
+        def exist(*args):
+            _threads.append(current_thread())
+            return _exist(*args)
+
+        async def check():
+            return current_thread(), await self.handler.aexist('a.obj')
+
+        with mock.patch.object(self.handler, 'exist', side_effect=exist):
+            _loop_thread, _exists = run(check())
+        self.assertFalse(_exists)
+        self.assertEqual(len(_threads), 1)
+        self.assertIsNot(_threads[0], _loop_thread)
+
+
+class AtomicWritesTest(unittest.TestCase):
+    """
+    Atomic and batched writes of LocalHandler
+    =========================================
+    """
+
+
+    def setUp(self):
+        self.__directory = TemporaryDirectory()
+        self.path = self.__directory.name
+        self.handler = LocalHandler(self.path, atomic_writes=True)
+        self.handler.open()
+
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+
+    def test_batch_is_visible_only_after_commit(self):
+        with self.handler.transaction():
+            self.handler.save_as_instance('a', '0.obj')
+            self.handler.save_as_text('b', 'notes.txt')
+            self.assertFalse(isfile(join(self.path, '0.obj')))
+            self.assertEqual(self.handler.load_as_instance('0.obj'), 'a')
+        self.assertEqual(sorted(os.listdir(self.path)), ['0.obj', 'notes.txt'])
+        self.assertEqual(self.handler.load_as_instance('0.obj'), 'a')
+
+
+    def test_failed_batch_leaves_no_files(self):
+        with self.assertRaises(ValueError):
+            with self.handler.transaction():
+                self.handler.save_as_instance('a', '0.obj')
+                raise ValueError()
+        self.assertEqual(os.listdir(self.path), [])
+        with self.assertRaises(ValueError):
+            with self.handler.open_write('1.obj') as outstream:
+                outstream.write(b'partial')
+                raise ValueError()
+        self.assertEqual(os.listdir(self.path), [])
+
+
+    def test_single_save_is_synced_immediately(self):
+        with mock.patch('os.fsync', wraps=os.fsync) as fsync:
+            self.handler.save_as_instance(0, '0.obj')
+        _directories = 1 if hasattr(os, 'O_DIRECTORY') else 0
+        self.assertEqual(fsync.call_count, 1 + _directories)
+
+
+    def test_batch_is_synced_together_at_commit(self):
+        _synced_before_rename = []
+
+        def replace(source, target):
+            _synced_before_rename.append(fsync.call_count)
+            _replace(source, target)
+
+        _replace = os.replace
+        with mock.patch('os.fsync', wraps=os.fsync) as fsync, \
+             mock.patch('os.replace', side_effect=replace), \
+             mock.patch('os.sync', side_effect=AssertionError, create=True):
+            with self.handler.transaction():
+                for i in range(3):
+                    self.handler.save_as_instance(i, '{}.obj'.format(i))
+                self.assertEqual(fsync.call_count, 0)
+            self.assertEqual(self.handler.load_as_instance('2.obj'), 2)
+        self.assertEqual(_synced_before_rename, [3, 3, 3])
+        _directories = 1 if hasattr(os, 'O_DIRECTORY') else 0
+        self.assertEqual(fsync.call_count, 3 + _directories)
+
+
+class ShardingTest(unittest.TestCase):
+    """
+    Sharded layout of LocalHandler
+    ==============================
+    """
+
+
+    def setUp(self):
+        self.__directory = TemporaryDirectory()
+        self.path = self.__directory.name
+
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+
+    def test_files_are_sharded_and_listed_by_name(self):
+        handler = LocalHandler(self.path, shard_depth=2)
+        handler.open()
+        for i in range(10):
+            handler.save_as_instance([i], '{}.obj'.format(i))
+        handler.save_as_json({'a' : 1}, 'dof.json')
+        self.assertFalse(isfile(join(self.path, '3.obj')))
+        self.assertTrue(isfile(join(self.path, 'dof.json')))
+        self.assertEqual(handler.files(''),
+                         sorted(['{}.obj'.format(i) for i in range(10)] +
+                                ['dof.json']))
+        self.assertTrue(handler.exist('3.obj'))
+        self.assertEqual(handler.load_as_instance('3.obj'), [3])
+        handler.delete('3.obj')
+        self.assertFalse(handler.exist('3.obj'))
+
+
+    def test_flat_layout_stays_readable(self):
+        flat = LocalHandler(self.path)
+        flat.open()
+        flat.save_as_instance('flat', '7.obj')
+        sharded = LocalHandler(self.path, shard_depth=3)
+        sharded.open()
+        self.assertEqual(sharded.load_as_instance('7.obj'), 'flat')
+        self.assertEqual(sharded.files(''), ['7.obj'])
+
+
+    def test_shard_depth_range(self):
+        LocalHandler(self.path, shard_depth=LocalHandler.MAX_SHARD_DEPTH)
+        with self.assertRaises(DofError):
+            LocalHandler(self.path, shard_depth=-1)
+        with self.assertRaises(DofError):
+            LocalHandler(self.path,
+                         shard_depth=LocalHandler.MAX_SHARD_DEPTH + 1)
+
+
+class ManifestTest(unittest.TestCase):
+    """
+    Manifest-driven existence checks and listings of LocalHandler
+    =============================================================
+    """
+
+
+    def setUp(self):
+        self.__directory = TemporaryDirectory()
+        self.path = self.__directory.name
+        _handler = LocalHandler(self.path, shard_depth=1)
+        _handler.open()
+        for i in range(5):
+            _handler.save_as_instance(i, '{}.obj'.format(i))
+        _handler.save_as_json({}, 'dataset.base')
+
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+
+    def test_manifest_is_built_and_saved(self):
+        _handler = LocalHandler(self.path, shard_depth=1, use_manifest=True)
+        _handler.open()
+        self.assertEqual(len(_handler.manifest), 6)
+        _handler.close()
+        self.assertTrue(isfile(join(self.path, LocalHandler.MANIFEST_FILE)))
+        _reopened = LocalHandler(self.path, shard_depth=1, use_manifest=True)
+        _reopened.open()
+        self.assertEqual(_reopened.manifest, _handler.manifest)
+        with mock.patch('dof.storage.listdir', side_effect=AssertionError), \
+             mock.patch('dof.storage.isfile', side_effect=AssertionError):
+            self.assertTrue(_reopened.exist('3.obj'))
+            self.assertFalse(_reopened.exist('7.obj'))
+            self.assertEqual(_reopened.files(''),
+                             ['0.obj', '1.obj', '2.obj', '3.obj', '4.obj',
+                              'dataset.base'])
+
+
+    def test_writes_update_the_manifest(self):
+        _handler = LocalHandler(self.path, shard_depth=1, use_manifest=True)
+        _handler.open()
+        _handler.save_manifest()
+        _handler.save_as_binary(b'abc', 'new.bin')
+        _handler.delete('0.obj')
+        self.assertFalse(isfile(join(self.path, LocalHandler.MANIFEST_FILE)))
+        self.assertEqual(_handler.manifest['new.bin'], 3)
+        self.assertFalse(_handler.exist('0.obj'))
+        _handler.save_manifest()
+        _reopened = LocalHandler(self.path, use_manifest=True)
+        _reopened.open()
+        self.assertEqual(_reopened.manifest, _handler.manifest)
+
+
+class OutOfBandTest(unittest.TestCase):
+    """
+    Out-of-band pickling of LocalHandler
+    ====================================
+    """
+
+
+    def setUp(self):
+        self.__directory = TemporaryDirectory()
+        self.path = self.__directory.name
+
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+
+    def test_round_trip_inside_batch(self):
+        handler = LocalHandler(self.path, atomic_writes=True,
+                               out_of_band=True)
+        handler.open()
+        _data = bytearray(range(256)) * 100
+        with handler.transaction():
+            handler.save_as_instance(_data, '0.obj')
+            self.assertFalse(isfile(join(self.path, '0.obj')))
+            self.assertEqual(handler.load_as_instance('0.obj'), _data)
+            handler.save_as_instance(_data[:10], '0.obj')
+            self.assertEqual(handler.load_as_instance('0.obj'), _data[:10])
+        self.assertEqual(sorted(os.listdir(self.path)),
+                         ['0.obj', '0.obj' + LocalHandler.SIDECAR_EXTENSION])
+        self.assertEqual(handler.load_as_instance('0.obj'), _data[:10])
+
+
+    def test_file_and_sidecar_are_committed_together(self):
+        handler = LocalHandler(self.path, atomic_writes=True,
+                               out_of_band=True)
+        handler.open()
+        with mock.patch('os.replace', wraps=os.replace) as replace:
+            handler.save_as_instance(bytearray(1000), '0.obj')
+        self.assertEqual(replace.call_count, 2)
+        with mock.patch('os.replace', wraps=os.replace) as replace, \
+             mock.patch.object(LocalHandler,
+                               '_LocalHandler__write_buffers',
+                               side_effect=OSError('full')):
+            with self.assertRaises(OSError):
+                handler.save_as_instance(bytearray(10), '0.obj')
+        replace.assert_not_called()
+        self.assertEqual(handler.load_as_instance('0.obj'), bytearray(1000))
+        self.assertEqual(sorted(os.listdir(self.path)),
+                         ['0.obj', '0.obj' + LocalHandler.SIDECAR_EXTENSION])
+
+
+    def test_sidecar_is_sharded_with_its_file(self):
+        handler = LocalHandler(self.path, out_of_band=True, shard_depth=2,
+                               use_manifest=True)
+        handler.open()
+        handler.save_as_instance(bytearray(b'x' * 500), '5.obj')
+        self.assertEqual(handler.load_as_instance('5.obj'),
+                         bytearray(b'x' * 500))
+        self.assertTrue(handler.exist('5.obj' +
+                                      LocalHandler.SIDECAR_EXTENSION))
+        self.assertEqual(handler.files(''), ['5.obj'])
+        handler.delete('5.obj')
+        self.assertFalse(handler.exist('5.obj' +
+                                       LocalHandler.SIDECAR_EXTENSION))
+
+
+class CompressionTest(unittest.TestCase):
+    """
+    Compression policies and compressed saves of LocalHandler
+    =========================================================
+    """
+
+
+    def setUp(self):
+        self.__directory = TemporaryDirectory()
+        self.path = self.__directory.name
+        self.data = b'compressible payload ' * 500
+
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+
+    def test_codecs_round_trip(self):
+        for codec in [CompressionPolicy.ZLIB, CompressionPolicy.BZ2,
+                      CompressionPolicy.LZMA]:
+            _compressed = CompressionPolicy(codec).compress(self.data)
+            self.assertTrue(CompressionPolicy.is_compressed(_compressed))
+            self.assertLess(len(_compressed), len(self.data))
+            self.assertEqual(bytes(CompressionPolicy.decompress(_compressed)),
+                             self.data)
+
+
+    def test_small_and_magic_payloads(self):
+        _policy = CompressionPolicy(threshold=1024)
+        self.assertEqual(_policy.compress(b'short'), b'short')
+        _magic = CompressionPolicy.MAGIC + b'\x01 not compressed'
+        _stored = _policy.compress(_magic)
+        self.assertTrue(CompressionPolicy.is_compressed(_stored))
+        self.assertEqual(bytes(CompressionPolicy.decompress(_stored)), _magic)
+
+
+    def test_invalid_policies(self):
+        with self.assertRaises(DofError):
+            CompressionPolicy('zstd')
+        with self.assertRaises(DofError):
+            CompressionPolicy(threshold=-1)
+        with self.assertRaises(DofError):
+            CompressionPolicy.decompress(CompressionPolicy.MAGIC + b'\xff')
+
+
+    def test_compressed_files_load_with_any_handler(self):
+        _writer = LocalHandler(self.path, compression=CompressionPolicy(
+                                                     CompressionPolicy.LZMA))
+        _writer.open()
+        _writer.save_as_binary(self.data, 'data.bin')
+        _writer.save_many([([self.data] * 3, '{}.obj'.format(i))
+                           for i in range(4)])
+        self.assertLess(getsize(join(self.path, 'data.bin')), len(self.data))
+        for reader in [LocalHandler(self.path),
+                       LocalHandler(self.path, use_mmap=True)]:
+            reader.open()
+            self.assertEqual(bytes(reader.load_as_binary('data.bin')),
+                             self.data)
+            self.assertEqual(reader.load_many(['0.obj', '3.obj']),
+                             [[self.data] * 3] * 2)
+
+
+class RangeTest(unittest.TestCase):
+    """
+    Byte-range reads of the handlers
+    ================================
+    """
+
+
+    def setUp(self):
+        self.__directory = TemporaryDirectory()
+        self.path = self.__directory.name
+        self.data = bytes(range(256)) * 40
+
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+
+    def test_ranges_of_plain_and_compressed_files(self):
+        for handler in [LocalHandler(self.path),
+                        LocalHandler(self.path,
+                                     compression=CompressionPolicy()),
+                        MemoryHandler()]:
+            handler.open()
+            handler.save_as_binary(self.data, 'data.bin')
+            self.assertEqual(bytes(handler.load_range('data.bin', 300, 50)),
+                             self.data[300:350])
+            self.assertEqual(bytes(handler.load_range('data.bin', 10200, 100)),
+                             self.data[10200:])
+            self.assertEqual(bytes(handler.load_range('data.bin', 20000, 5)),
+                             b'')
+            self.assertEqual(bytes(handler.load_range('data.bin', 0, 0)), b'')
+            with self.assertRaises(DofError):
+                handler.load_range('data.bin', -1, 5)
+
+
+    def test_only_the_range_is_read(self):
+        _handler = LocalHandler(self.path)
+        _handler.open()
+        _handler.save_as_binary(self.data, 'data.bin')
+        with mock.patch.object(_handler, 'load_as_binary',
+                               side_effect=AssertionError):
+            _view = BinaryView(_handler, 'data.bin', offset=1000, length=2000)
+            self.assertEqual(len(_view), 2000)
+            _narrow = _view[10:20]
+            self.assertEqual(_narrow.offset, 1010)
+            self.assertEqual(bytes(_narrow), self.data[1010:1020])
+            self.assertEqual(_view[-1], self.data[2999])
+            with self.assertRaises(IndexError):
+                _view[2000]
+            with self.assertRaises(DofError):
+                _view[::2]
+
+
+class StreamingTest(unittest.TestCase):
+    """
+    Streaming reads and writes of the handlers
+    ==========================================
+    """
+
+
+    def setUp(self):
+        self.__directory = TemporaryDirectory()
+        self.path = self.__directory.name
+        self.data = bytes(range(256)) * 1000
+
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+
+    def test_stream_round_trip(self):
+        for handler in [LocalHandler(self.path),
+                        LocalHandler(self.path,
+                                     compression=CompressionPolicy()),
+                        MemoryHandler()]:
+            handler.open()
+            _source = BytesIO(self.data)
+            with mock.patch.object(_source, 'read',
+                                   wraps=_source.read) as read:
+                self.assertEqual(handler.save_from_stream(_source, 'data.bin',
+                                                          chunk_size=10000),
+                                 len(self.data))
+            self.assertEqual(read.call_count, 27)
+            with handler.open_read('data.bin') as instream:
+                self.assertEqual(instream.read(1000), self.data[:1000])
+                self.assertEqual(instream.read(), self.data[1000:])
+            self.assertEqual(bytes(handler.load_as_binary('data.bin')),
+                             self.data)
+
+
+    def test_compressed_stream_is_compressed_on_disk(self):
+        _handler = LocalHandler(self.path, compression=CompressionPolicy())
+        _handler.open()
+        with _handler.open_write('data.bin') as outstream:
+            for i in range(0, len(self.data), 4096):
+                outstream.write(self.data[i:i + 4096])
+        self.assertLess(getsize(join(self.path, 'data.bin')), len(self.data))
+        self.assertEqual(bytes(_handler.load_range('data.bin', 5000, 10)),
+                         self.data[5000:5010])
+
+
+    def test_failed_stream_is_not_saved(self):
+        for handler in [LocalHandler(self.path, atomic_writes=True),
+                        MemoryHandler()]:
+            handler.open()
+            with self.assertRaises(RuntimeError):
+                with handler.open_write('data.bin') as outstream:
+                    outstream.write(self.data)
+                    raise RuntimeError('interrupted')
+            self.assertFalse(handler.exist('data.bin'))
+            self.assertEqual(handler.files(''), [])
+
+
+class SegmentStoreTest(unittest.TestCase):
+    """
+    Packed payloads of SegmentStore
+    ===============================
+    """
+
+
+    def setUp(self):
+        self.handler = MemoryHandler()
+        self.handler.open()
+
+
+    def test_payloads_are_packed_into_segments(self):
+        _store = SegmentStore(self.handler, segment_size=100)
+        for i in range(10):
+            _store.append(i, bytes([i]) * 30)
+        _store.append(12, bytes(250))
+        _store.flush()
+        self.assertEqual(sorted(self.handler.files('')),
+                         ['elements.{}.seg'.format(i) for i in range(5)] +
+                         ['elements.index'])
+        _loaded = SegmentStore.load_from(self.handler)
+        self.assertEqual(_loaded.keys, list(range(10)) + [12])
+        self.assertEqual(_loaded.read(7), bytes([7]) * 30)
+        self.assertEqual(len(_loaded.read(12)), 250)
+        with self.assertRaises(DofError):
+            _loaded.read(11)
+
+
+    def test_open_segment_is_readable(self):
+        _store = SegmentStore(self.handler, prefix='store')
+        _store.append(0, b'first')
+        self.assertEqual(_store.read(0), b'first')
+        self.assertEqual(self.handler.files(''), [])
+
+
+    def test_invalid_keys_are_rejected(self):
+        _store = SegmentStore(self.handler)
+        _store.append(3, b'x')
+        with self.assertRaises(DofError):
+            _store.append(3, b'y')
+        with self.assertRaises(DofError):
+            _store.append(-1, b'y')
+        with self.assertRaises(DofError):
+            SegmentStore(self.handler, segment_size=0)
+
+
+class HandlerStatsTest(unittest.TestCase):
+    """
+    I/O statistics of the handlers
+    ==============================
+    """
+
+
+    def setUp(self):
+        self.__directory = TemporaryDirectory()
+        self.path = self.__directory.name
+
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+
+    def test_instance_bytes_are_counted(self):
+        for handler in [LocalHandler(self.path),
+                        LocalHandler(self.path, use_mmap=True),
+                        LocalHandler(self.path, out_of_band=True)]:
+            handler.open()
+            handler.save_as_instance(list(range(100)), 'list.obj')
+            self.assertEqual(handler.load_as_instance('list.obj'),
+                             list(range(100)))
+            _stats = handler.io_stats()
+            _size = os.path.getsize(join(self.path, 'list.obj'))
+            self.assertGreaterEqual(_stats['save_as_instance']['bytes_out'],
+                                    _size)
+            self.assertGreaterEqual(_stats['load_as_instance']['bytes_in'],
+                                    _size)
+            handler.delete('list.obj')
+
+
+    def test_nested_operations_count_into_outer(self):
+        handler = MemoryHandler()
+        handler.open()
+        handler.save_many([(list(range(10)), '{}.obj'.format(i))
+                           for i in range(3)])
+        handler.load_many(['0.obj', '1.obj', '2.obj'])
+        _stats = handler.io_stats()
+        self.assertEqual(_stats['save_as_instance']['count'], 3)
+        self.assertEqual(_stats['save_many']['bytes_out'],
+                         _stats['save_as_instance']['bytes_out'])
+        self.assertEqual(_stats['load_many']['bytes_in'],
+                         _stats['load_as_instance']['bytes_in'])
+        self.assertGreater(_stats['load_many']['bytes_in'], 0)
+
+
+    def test_finished_threads_are_folded(self):
+        stats = HandlerStats()
+        _threads = [Thread(target=stats.record, args=('exist', 0.001))
+                    for _ in range(20)]
+        for thread in _threads:
+            thread.start()
+        for thread in _threads:
+            thread.join()
+        stats.record('exist', 0.001)
+        self.assertEqual(len(stats._HandlerStats__counters), 1)
+        _snapshot = stats.snapshot()
+        self.assertEqual(_snapshot['exist']['count'], 21)
+        self.assertEqual(sum(_snapshot['exist']['histogram']), 21)
+
+
+if __name__ == '__main__':
+    unittest.main()